@@ -5,10 +5,14 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import os
 import re
+import heapq
+import json
+import hashlib
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -98,97 +102,163 @@ AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking over an inverted index (postings lists per term)"""
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
+        self.postings = {}
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
-        self.doc_freqs = defaultdict(int)
         self.N = 0
 
-    def tokenize(self, text):
+    @staticmethod
+    def tokenize(text):
         """Lowercase, split, remove punctuation, filter short words"""
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build postings (term -> [(doc, tf)]), doc lengths and IDF"""
+        postings = defaultdict(list)
+        self.doc_lengths = []
+        for idx, doc in enumerate(documents):
+            tokens = self.tokenize(doc)
+            self.doc_lengths.append(len(tokens))
+            for word, tf in Counter(tokens).items():
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
+        self.N = len(self.doc_lengths)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
+        self.idf = {word: log((self.N - len(docs) + 0.5) / (len(docs) + 0.5) + 1)
+                    for word, docs in self.postings.items()}
+
+    def to_dict(self):
+        return {"k1": self.k1, "b": self.b, "postings": self.postings,
+                "doc_lengths": self.doc_lengths, "avgdl": self.avgdl, "idf": self.idf}
+
+    @classmethod
+    def from_dict(cls, state):
+        bm25 = cls(state["k1"], state["b"])
+        bm25.postings = state["postings"]
+        bm25.doc_lengths = state["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.idf = state["idf"]
+        bm25.N = len(bm25.doc_lengths)
+        return bm25
+
+    def _accumulate(self, query):
+        """Walk only the postings of the query terms"""
+        scores = {}
+        for token in self.tokenize(query):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = self.idf[token]
+            for idx, tf in docs:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+                scores[idx] = scores.get(idx, 0) + idf * (tf * (self.k1 + 1)) / (tf + norm)
+        return scores
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+    def score(self, query):
+        """Score documents containing a query term, best first (ties in document order)"""
+        return sorted(self._accumulate(query).items(), key=lambda x: (-x[1], x[0]))
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+    def top_k(self, query, k):
+        """Best k (doc, score) pairs, selected with a heap"""
+        return heapq.nsmallest(k, self._accumulate(query).items(), key=lambda x: (-x[1], x[0]))
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+# ============ PERSISTENT INDEX ============
+# Prebuilt index per CSV (BM25 + rows), stored as JSON under data/.index and rebuilt
+# when the CSV changes (mtime/size, confirmed by content hash). Loaded indexes
+# stay in memory for the life of the process.
+INDEX_DIR = DATA_DIR / ".index"
+INDEX_VERSION = 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+_INDEXES = {}
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+def _file_hash(filepath):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-# ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
     with open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
+def _build_index(filepath, search_cols, output_cols):
+    data = _load_csv(filepath)
+    bm25 = BM25()
+    bm25.fit([" ".join(str(row.get(col, "")) for col in search_cols) for row in data])
+    rows = [{col: row.get(col, "") for col in output_cols if col in row} for row in data]
+    return bm25, rows
+
+
+def get_index(filepath, search_cols, output_cols):
+    """(BM25, rows) for a CSV, from memory, disk cache or built from scratch"""
+    key = (str(filepath), tuple(search_cols), tuple(output_cols))
+    stat = filepath.stat()
+    stamp = [stat.st_mtime_ns, stat.st_size]  # list: compares equal to its JSON round trip
+
+    cached = _INDEXES.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1], cached[2]
+
+    cache_name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16] + ".json"
+    cache_path = INDEX_DIR / cache_name
+    entry = None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if entry.get("version") != INDEX_VERSION:
+            entry = None
+        elif entry["stamp"] != stamp:
+            # Touched but maybe unchanged (checkout, copy): compare contents
+            if entry["hash"] == _file_hash(filepath):
+                entry["stamp"] = stamp
+            else:
+                entry = None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        entry = None
+
+    if entry is None:
+        bm25, rows = _build_index(filepath, search_cols, output_cols)
+        entry = {"version": INDEX_VERSION, "stamp": stamp, "hash": _file_hash(filepath),
+                 "bm25": bm25.to_dict(), "rows": rows}
+        try:
+            INDEX_DIR.mkdir(exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Read-only checkout: keep the in-memory index only
+
+    bm25 = BM25.from_dict(entry["bm25"])
+    _INDEXES[key] = (stamp, bm25, entry["rows"])
+    return bm25, entry["rows"]
+
+
+# ============ SEARCH FUNCTIONS ============
 def _search_csv(filepath, search_cols, output_cols, query, max_results):
     """Core search function using BM25"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
-
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
-
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    bm25, rows = get_index(filepath, search_cols, output_cols)
 
-    return results
+    # Get top results with score > 0 (copies: callers may edit them, the index is shared)
+    return [dict(rows[idx]) for idx, score in bm25.top_k(query, max_results) if score > 0]
 
 
 def detect_domain(query):
@@ -256,3 +326,20 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+def search_many(query, domains, max_results=MAX_RESULTS):
+    """Search several domains with the same query in one call"""
+    return {domain: search(query, domain, max_results) for domain in domains}
+
+
+def warm_indexes():
+    """Load every domain and stack index (for long-running processes)"""
+    for config in CSV_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            get_index(filepath, config["search_cols"], config["output_cols"])
+    for config in STACK_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            get_index(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
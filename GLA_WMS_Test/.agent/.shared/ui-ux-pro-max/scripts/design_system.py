@@ -32,6 +32,8 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+_REASONING_CACHE = {}
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
@@ -41,12 +43,16 @@ class DesignSystemGenerator:
         self.reasoning_data = self._load_reasoning()
 
     def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
+        """Load reasoning rules from CSV (cached per process until the file changes)."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
             return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        mtime = filepath.stat().st_mtime_ns
+        if _REASONING_CACHE.get("mtime") != mtime:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                _REASONING_CACHE["rules"] = list(csv.DictReader(f))
+            _REASONING_CACHE["mtime"] = mtime
+        return _REASONING_CACHE["rules"]
 
     def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
         """Execute searches across multiple domains."""
@@ -12,10 +12,23 @@ Stacks: html-tailwind, react, nextjs
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Resident mode (indexes stay loaded between queries):
+  python search.py --serve                 # JSON lines on stdin -> JSON lines on stdout
+  python search.py --serve --port 8765     # same protocol over a local TCP socket
+  Request:  {"id": 1, "query": "fintech dashboard", "domains": ["style", "color"], "max_results": 3}
+            {"id": 2, "query": "forms", "stack": "react"}
+            {"id": 3, "query": "fintech dashboard", "design_system": true, "project_name": "X"}
+  A line may also hold a JSON array of requests (answered with an array).
+  Response: {"id": 1, "result": {...}, "latency_ms": 0.4}
 """
 
+import sys
+import json
+import time
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
+import socketserver
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_many, search_stack, warm_indexes
 from design_system import generate_design_system, persist_design_system
 
 
@@ -45,9 +58,71 @@ def format_output(result):
     return "\n".join(output)
 
 
+def handle_request(request):
+    """Answer one resident-mode request (dict) with its result and latency"""
+    start = time.perf_counter()
+    response = {"id": request.get("id")} if isinstance(request, dict) else {}
+    try:
+        if not isinstance(request, dict) or not request.get("query"):
+            raise ValueError("request must be an object with a 'query'")
+        query = request["query"]
+        max_results = int(request.get("max_results", MAX_RESULTS))
+        if request.get("design_system"):
+            response["result"] = generate_design_system(query, request.get("project_name"),
+                                                        request.get("format", "ascii"))
+        elif request.get("stack"):
+            response["result"] = search_stack(query, request["stack"], max_results)
+        elif request.get("domains"):
+            unknown = [d for d in request["domains"] if d not in CSV_CONFIG]
+            if unknown:
+                raise ValueError(f"unknown domains: {', '.join(unknown)}")
+            response["result"] = search_many(query, request["domains"], max_results)
+        else:
+            response["result"] = search(query, request.get("domain"), max_results)
+    except Exception as e:
+        response["error"] = str(e)
+    response["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return response
+
+
+def handle_line(line):
+    """Parse one JSON line (object or array of objects) and return the reply line"""
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"invalid JSON: {e}"})
+    if isinstance(payload, list):
+        reply = [handle_request(request) for request in payload]
+    else:
+        reply = handle_request(payload)
+    return json.dumps(reply, ensure_ascii=False)
+
+
+def serve_stdin():
+    for line in sys.stdin:
+        if line.strip():
+            sys.stdout.write(handle_line(line) + "\n")
+            sys.stdout.flush()
+
+
+class _QueryHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if line:
+                self.wfile.write((handle_line(line) + "\n").encode("utf-8"))
+
+
+def serve_socket(port):
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer(("127.0.0.1", port), _QueryHandler) as server:
+        print(f"UI Pro Max search listening on 127.0.0.1:{port}", file=sys.stderr)
+        server.serve_forever()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
@@ -61,8 +136,25 @@ if __name__ == "__main__":
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
 
+    # Resident mode
+    parser.add_argument("--serve", action="store_true", help="Answer JSON-lines queries on stdin (or --port) with warm indexes")
+    parser.add_argument("--port", type=int, default=None, help="With --serve: listen on 127.0.0.1:PORT instead of stdin")
+
     args = parser.parse_args()
 
+    if args.serve:
+        warm_indexes()
+        try:
+            if args.port:
+                serve_socket(args.port)
+            else:
+                serve_stdin()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    if not args.query:
+        parser.error("query is required (or use --serve)")
+
     # Design system takes priority
     if args.design_system:
         result = generate_design_system(
@@ -92,7 +184,6 @@ if __name__ == "__main__":
     elif args.stack:
         result = search_stack(args.query, args.stack, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
@@ -100,7 +191,6 @@ if __name__ == "__main__":
     else:
         result = search(args.query, args.domain, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
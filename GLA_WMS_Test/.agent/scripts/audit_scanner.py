@@ -0,0 +1,753 @@
+#!/usr/bin/env python3
+"""
+Shared Audit Scanner - Antigravity Kit
+======================================
+
+Walks the project once, reads each file at most once and hands it to every
+registered rule pack. The skill audit scripts (ux_audit, mobile_audit,
+accessibility_checker, seo_checker, geo_checker, i18n_checker, type_coverage,
+security_scan) are rule packs on top of this module: each still runs on its
+own, and this script (or verify_all/checklist) runs several over one walk.
+
+Usage:
+    python .agent/scripts/audit_scanner.py <project_path>
+    python .agent/scripts/audit_scanner.py <project_path> --packs ux,a11y,seo
+    python .agent/scripts/audit_scanner.py <project_path> --no-cache
+    python .agent/scripts/audit_scanner.py <project_path> --jobs 8
+
+Writing a pack:
+    class MyPack(RulePack):
+        name = "my_check"
+        extensions = frozenset({'.tsx', '.jsx'})
+
+        def check(self, file: SourceFile) -> None:
+            if MY_PATTERN.search(file.text): ...
+
+        def report(self) -> int:
+            ...print the findings, return the exit code...
+
+    RULE_PACK = MyPack   # lets audit_scanner load the script as a pack
+
+Result cache:
+    A pack with `cacheable = True` splits its work into analyze(file), which
+    returns the JSON-serializable findings of one file, and merge(file,
+    findings), which adds them to the report. The findings are kept in
+    <project>/.audit-cache/<pack>.json keyed by the file's content hash and
+    the pack's rule version (`version` plus a hash of the pack's script), so a
+    re-run only analyzes the files that changed. --no-cache skips the cache.
+
+Parallel analysis:
+    A cacheable pack with `parallel = True` (no check() override, analyze()
+    is all the per-file work) has the files it must analyze handed to a pool
+    of worker processes once the walk is done, when there are at least
+    PARALLEL_MIN_FILES of them; the findings are merged in walk order.
+    Each worker re-creates the pack from its script and worker_args().
+    With a time budget (Scanner(time_budget=...)) the files are analyzed in
+    random order until it runs out (at least MIN_SAMPLE_FILES of them, even
+    if the worker pool took the whole budget to start); the rest goes to pack.skipped() instead
+    of being silently cut off, and the report extrapolates from the sample.
+"""
+
+import io
+import os
+import json
+import hashlib
+import sys
+import mmap
+import time
+import argparse
+import traceback
+import importlib.util
+import random
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Fix Windows console encoding
+try:
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+except AttributeError:
+    pass
+
+
+SKILLS_DIR = Path(__file__).resolve().parent.parent / "skills"
+
+# Pack name -> script (relative to .agent/skills)
+PACK_SCRIPTS = {
+    "security": "vulnerability-scanner/scripts/security_scan.py",
+    "types": "lint-and-validate/scripts/type_coverage.py",
+    "ux": "frontend-design/scripts/ux_audit.py",
+    "a11y": "frontend-design/scripts/accessibility_checker.py",
+    "seo": "seo-fundamentals/scripts/seo_checker.py",
+    "geo": "geo-fundamentals/scripts/geo_checker.py",
+    "mobile": "mobile-design/scripts/mobile_audit.py",
+    "i18n": "i18n-localization/scripts/i18n_checker.py",
+}
+
+# Directories no pack looks into unless it says otherwise
+DEFAULT_SKIP_DIRS = frozenset({'node_modules', '.git', 'dist', 'build', '.next', '__pycache__', 'venv', '.venv'})
+
+# Per-pack result caches, under the scanned project (never walked)
+CACHE_DIR_NAME = ".audit-cache"
+# Bump when the cache file layout changes
+CACHE_FORMAT = 1
+
+# Fewer files to analyze than this are not worth starting worker processes
+PARALLEL_MIN_FILES = 200
+
+# A time budget never cuts the sample below this many files
+MIN_SAMPLE_FILES = 50
+
+# Files at least this big are decoded straight from an mmap instead of read()
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def read_text(path: Path) -> str:
+    """Read a file as UTF-8 (undecodable bytes dropped)."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8', 'ignore')
+        return f.read().decode('utf-8', 'ignore')
+
+
+def split_lines(text: str) -> List[str]:
+    """Lines as text-mode reading splits them (\\n, \\r\\n or \\r), without endings."""
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class SourceFile:
+    """A project file shared by every pack; content is read on first use only."""
+
+    __slots__ = ('path', 'rel', 'name', 'suffix', 'dir_parts', '_text', '_lower', '_lines', '_stat', '_digest')
+
+    def __init__(self, path: Path, rel: Path):
+        self.path = path
+        self.rel = rel
+        self.name = path.name
+        self.suffix = path.suffix.lower()
+        self.dir_parts = rel.parts[:-1]
+        self._text = None
+        self._lower = None
+        self._lines = None
+        self._stat = None
+        self._digest = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._text is not None
+
+    @property
+    def text(self) -> str:
+        """File content. Raises OSError if the file cannot be read."""
+        if self._text is None:
+            self._text = read_text(self.path)
+        return self._text
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def lines(self) -> List[str]:
+        """Content split into lines (see split_lines)."""
+        if self._lines is None:
+            self._lines = split_lines(self.text)
+        return self._lines
+
+    def release(self) -> None:
+        """Drop the content (it is read again if needed)."""
+        self._text = self._lower = self._lines = None
+
+    @property
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    @property
+    def digest(self) -> str:
+        """Hash of the content the packs see (reads the file)."""
+        if self._digest is None:
+            self._digest = hashlib.blake2b(self.text.encode('utf-8'), digest_size=16).hexdigest()
+        return self._digest
+
+
+class RulePack:
+    """Base class of the audit rule packs.
+
+    A pack declares which files it wants (`extensions`, `skip_dirs`, or an
+    `accepts()` override), collects findings in `check()` and prints its
+    script's report in `report()`, which returns the exit code.
+    """
+
+    name = "pack"
+    extensions = frozenset()
+    skip_dirs = DEFAULT_SKIP_DIRS
+    # Stop dispatching after this many accepted files (None = no limit)
+    max_files: Optional[int] = None
+    # check() goes through analyze()/merge(), so per-file findings can be cached
+    cacheable = False
+    # analyze() may run in worker processes (cacheable packs without a check() override)
+    parallel = False
+    # Bump when the rules change: cached findings of another version are dropped
+    # (edits to the pack's script drop them too, see rules_version())
+    version = "1"
+
+    def __init__(self, project_path=".") -> None:
+        self.project_path = Path(project_path)
+        self.elapsed = 0.0
+        self.cache: Optional["ResultCache"] = None
+        # Accepted files left unanalyzed by the scanner's time budget; the
+        # analyzed ones are a random sample the report should extrapolate from
+        self.unsampled = 0
+
+    @property
+    def cache_name(self) -> str:
+        """Cache file name; packs whose findings depend on options include them."""
+        return self.name
+
+    def rules_version(self) -> str:
+        source = getattr(sys.modules.get(type(self).__module__), '__file__', None)
+        try:
+            with open(source, 'rb') as f:
+                fingerprint = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+        except (OSError, TypeError):
+            fingerprint = "?"
+        return f"{CACHE_FORMAT}:{self.version}:{fingerprint}"
+
+    def worker_args(self) -> tuple:
+        """Constructor arguments that re-create the pack in a worker process."""
+        return (str(self.project_path),)
+
+    def accepts(self, file: SourceFile) -> bool:
+        return file.suffix in self.extensions and not self.skip_dirs.intersection(file.dir_parts)
+
+    def analyze(self, file: SourceFile) -> Any:
+        """Findings of one file, JSON-serializable (None: nothing to record).
+
+        Must depend on the file's path and content only, not on pack state.
+        """
+        raise NotImplementedError
+
+    def merge(self, file: SourceFile, findings: Any) -> None:
+        """Add the findings of one file (fresh or cached) to the pack's results."""
+        raise NotImplementedError
+
+    def skipped(self, file: SourceFile) -> None:
+        """Called instead of merge() for a file the scanner's time budget left out."""
+        self.unsampled += 1
+
+    def extrapolate(self, count: int, analyzed: int, unsampled: Optional[int] = None) -> int:
+        """Estimate of a count over all accepted files from the `analyzed` ones."""
+        unsampled = self.unsampled if unsampled is None else unsampled
+        if not unsampled or not analyzed:
+            return count
+        return round(count * (analyzed + unsampled) / analyzed)
+
+    def findings(self, file: SourceFile) -> Any:
+        if self.cache is None:
+            return self.analyze(file)
+        return self.cache.lookup(file, self)
+
+    def check(self, file: SourceFile) -> None:
+        self.merge(file, self.findings(file))
+
+    def finish(self) -> None:
+        """Called once after the walk (cross-file checks go here)."""
+
+    def report(self) -> int:
+        raise NotImplementedError
+
+
+class ResultCache:
+    """Findings of one pack per file, keyed by content hash and rule version.
+
+    A file whose size and mtime are unchanged since the cache was written is
+    not read at all; otherwise its content hash decides. Files modified while
+    the cache was being built are always re-hashed (their mtime is not older
+    than the cache).
+    """
+
+    def __init__(self, cache_dir: Path, pack: RulePack) -> None:
+        self.path = cache_dir / f"{pack.cache_name}.json"
+        self.version = pack.rules_version()
+        self.hits = 0
+        self.misses = 0
+        # rel path -> [size, mtime_ns, digest, findings]
+        self.entries: Dict[str, list] = {}
+        self.seen: Dict[str, list] = {}
+        self.valid_before_ns = 0
+        self.started_ns = time.time_ns()
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.entries = data["files"]
+                self.valid_before_ns = data["started_ns"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def fresh(self, file: SourceFile) -> Optional[list]:
+        """Entry of a file untouched since the cache was written (size and mtime), without reading it."""
+        entry = self.entries.get(file.rel.as_posix())
+        if entry is None:
+            return None
+        try:
+            st = file.stat
+        except OSError:
+            return None
+        if entry[0] == st.st_size and entry[1] == st.st_mtime_ns and st.st_mtime_ns < self.valid_before_ns:
+            return entry
+        return None
+
+    def known_digest(self, file: SourceFile) -> Optional[str]:
+        entry = self.entries.get(file.rel.as_posix())
+        return entry[2] if entry else None
+
+    def reuse(self, file: SourceFile, entry: list) -> Any:
+        self.hits += 1
+        self.seen[file.rel.as_posix()] = entry
+        return entry[3]
+
+    def keep(self, file: SourceFile) -> None:
+        """Keep the entry of a file that was not looked at in this run."""
+        rel = file.rel.as_posix()
+        if rel in self.entries:
+            self.seen[rel] = self.entries[rel]
+
+    def record(self, file: SourceFile, digest: Optional[str], findings: Any, unchanged: bool) -> Any:
+        """Store the outcome of analyze_file(); returns the findings to merge."""
+        rel = file.rel.as_posix()
+        try:
+            st = file.stat
+        except OSError:
+            digest = None
+        if unchanged:
+            # Same content, new mtime: keep the findings, refresh the stat
+            findings = self.entries[rel][3]
+            self.hits += 1
+        else:
+            self.misses += 1
+        if digest is not None and findings is not None:
+            self.seen[rel] = [st.st_size, st.st_mtime_ns, digest, findings]
+        return findings
+
+    def lookup(self, file: SourceFile, pack: "RulePack") -> Any:
+        entry = self.fresh(file)
+        if entry is not None:
+            return self.reuse(file, entry)
+        digest, findings, unchanged = analyze_file(pack, file, self.known_digest(file))
+        return self.record(file, digest, findings, unchanged)
+
+    def save(self) -> None:
+        """Write the entries of the files seen in this run (deleted files drop out)."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.version, "started_ns": self.started_ns, "files": self.seen},
+                          f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[cache] could not write {self.path}: {e}", file=sys.stderr)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def analyze_file(pack: RulePack, file: SourceFile, known_digest: Optional[str] = None,
+                 cached: bool = True) -> Tuple[Optional[str], Any, bool]:
+    """(digest, findings, unchanged) of one file.
+
+    unchanged: the content hash equals known_digest, so the cached findings
+    still hold and analyze() is not run. digest is None for unreadable files
+    (the pack's analyze() reports them, nothing is cached) and when the pack
+    has no cache.
+    """
+    if not cached:
+        return None, pack.analyze(file), False
+    try:
+        digest = file.digest
+    except OSError:
+        return None, pack.analyze(file), False
+    if digest == known_digest:
+        return digest, None, True
+    return digest, pack.analyze(file), False
+
+
+# Packs of a worker process (see Scanner._analyze_parallel)
+_worker_packs: List[RulePack] = []
+
+
+def _init_worker(specs: List[Tuple[str, str, tuple]]) -> None:
+    for script, class_name, args in specs:
+        module = import_script(Path(script))
+        _worker_packs.append(getattr(module, class_name)(*args))
+
+
+def _analyze_chunk(tasks: List[Tuple[int, str, str, Optional[str], bool]]) -> List[Tuple[Optional[str], Any, bool]]:
+    return [analyze_file(_worker_packs[index], SourceFile(Path(path), Path(rel)), known_digest, cached)
+            for index, path, rel, known_digest, cached in tasks]
+
+
+class Scanner:
+    """Single walk over the project, dispatching each file to the packs that accept it."""
+
+    def __init__(self, root, packs: Iterable[RulePack] = (), cache: bool = True, jobs: Optional[int] = None,
+                 time_budget: Optional[float] = None) -> None:
+        self.root = Path(root)
+        self.packs: List[RulePack] = list(packs)
+        # Use/update the result caches of cacheable packs
+        self.cache = cache
+        # Worker processes for the parallel packs (default: CPU count; 1 = none)
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.workers_used = 0
+        # Seconds for analyzing the parallel packs' files after the walk; files
+        # not reached in time go to pack.skipped()
+        self.time_budget = time_budget
+        self.files_seen = 0
+        self.files_read = 0
+        self.elapsed = 0.0
+
+    def register(self, pack: RulePack) -> RulePack:
+        self.packs.append(pack)
+        return pack
+
+    def walk(self) -> Iterator[SourceFile]:
+        if self.root.is_file():
+            yield SourceFile(self.root, Path(self.root.name))
+            return
+
+        # Only directories that every pack skips are pruned; the rest is
+        # filtered per pack in accepts()
+        prune = frozenset.intersection(*(frozenset(p.skip_dirs) for p in self.packs)) if self.packs else DEFAULT_SKIP_DIRS
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = sorted(d for d in dirs if d not in prune and d != CACHE_DIR_NAME)
+            rel_dir = Path(root).relative_to(self.root)
+            for name in sorted(files):
+                yield SourceFile(Path(root) / name, rel_dir / name)
+
+    def run(self) -> "Scanner":
+        start = time.perf_counter()
+        single_file = self.root.is_file()
+        dispatched = {id(pack): 0 for pack in self.packs}
+        # A single file would leave only itself in the cache
+        if self.cache and not single_file:
+            for pack in self.packs:
+                if pack.cacheable:
+                    pack.cache = ResultCache(self.root / CACHE_DIR_NAME, pack)
+        # (pack, file, cache entry or None) of the parallel packs, merged after the walk
+        deferred: List[Tuple[RulePack, SourceFile, Optional[list]]] = []
+
+        for file in self.walk():
+            self.files_seen += 1
+            for pack in self.packs:
+                if pack.max_files is not None and dispatched[id(pack)] >= pack.max_files:
+                    continue
+                if not single_file and not pack.accepts(file):
+                    continue
+                dispatched[id(pack)] += 1
+                pack_start = time.perf_counter()
+                if pack.parallel and not single_file:
+                    deferred.append((pack, file, pack.cache.fresh(file) if pack.cache is not None else None))
+                else:
+                    pack.check(file)
+                pack.elapsed += time.perf_counter() - pack_start
+            if file.loaded:
+                self.files_read += 1
+            if deferred and deferred[-1][1] is file:
+                # Analyzed after the walk: do not hold the content until then
+                file.release()
+
+        if deferred:
+            self._merge_deferred(deferred)
+
+        for pack in self.packs:
+            pack_start = time.perf_counter()
+            pack.finish()
+            if pack.cache is not None:
+                pack.cache.save()
+            pack.elapsed += time.perf_counter() - pack_start
+
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def _merge_deferred(self, deferred: List[Tuple[RulePack, SourceFile, Optional[list]]]) -> None:
+        """Analyze the files of the parallel packs not served by the cache, then merge everything in walk order."""
+        todo = [(pack, file) for pack, file, entry in deferred if entry is None]
+        start = time.perf_counter()
+        order = list(range(len(todo)))
+        deadline = None
+        if self.time_budget is not None:
+            # Random order: files left out when the budget runs out are a uniform sample
+            random.Random(0).shuffle(order)
+            deadline = start + self.time_budget
+
+        outcomes = None
+        if len(todo) >= PARALLEL_MIN_FILES and self.jobs > 1:
+            outcomes = self._analyze_parallel(todo, order, deadline)
+        if outcomes is None:
+            outcomes = {}
+        for i in order:
+            if i in outcomes:
+                continue
+            if (deadline is not None and len(outcomes) >= MIN_SAMPLE_FILES
+                    and time.perf_counter() > deadline):
+                break
+            pack, file = todo[i]
+            outcomes[i] = analyze_file(pack, file, *self._cache_args(pack, file))
+        self.files_read += len({id(todo[i][1]) for i in outcomes})
+        # Analysis time is shared among the packs by their number of files
+        share = (time.perf_counter() - start) / len(outcomes) if outcomes else 0.0
+
+        index = 0
+        for pack, file, entry in deferred:
+            pack_start = time.perf_counter()
+            if entry is not None:
+                findings = pack.cache.reuse(file, entry)
+            else:
+                outcome = outcomes.get(index)
+                index += 1
+                if outcome is None:
+                    # Out of time budget
+                    pack.skipped(file)
+                    if pack.cache is not None:
+                        pack.cache.keep(file)
+                    continue
+                digest, findings, unchanged = outcome
+                if pack.cache is not None:
+                    findings = pack.cache.record(file, digest, findings, unchanged)
+                pack.elapsed += share
+            pack.merge(file, findings)
+            pack.elapsed += time.perf_counter() - pack_start
+
+    @staticmethod
+    def _cache_args(pack: RulePack, file: SourceFile) -> Tuple[Optional[str], bool]:
+        if pack.cache is None:
+            return None, False
+        return pack.cache.known_digest(file), True
+
+    def _analyze_parallel(self, todo: List[Tuple[RulePack, SourceFile]], order: List[int],
+                          deadline: Optional[float]) -> Optional[Dict[int, tuple]]:
+        """analyze_file() of the (pack, file) pairs in worker processes, in the given order.
+
+        Returns {index in todo: outcome}, without the files not reached by the
+        deadline; None if no pool could be used (the caller analyzes serially).
+        """
+        packs = []
+        for pack, _ in todo:
+            if pack not in packs:
+                packs.append(pack)
+        specs = []
+        for pack in packs:
+            script = getattr(sys.modules.get(type(pack).__module__), '__file__', None)
+            if script is None:
+                return None
+            specs.append((script, type(pack).__name__, pack.worker_args()))
+
+        tasks = [(packs.index(pack), str(file.path), str(file.rel), *self._cache_args(pack, file))
+                 for pack, file in todo]
+        workers = min(self.jobs, len(tasks) // (PARALLEL_MIN_FILES // 4) or 1)
+        # Small chunks under a time budget, so that the cut-off is close to it
+        size = max(1, len(order) // (workers * (64 if deadline is not None else 8)))
+        chunks = [order[i:i + size] for i in range(0, len(order), size)]
+        outcomes = {}
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,))
+            try:
+                futures = {pool.submit(_analyze_chunk, [tasks[i] for i in chunk]): chunk for chunk in chunks}
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                try:
+                    for future in as_completed(futures, timeout=timeout):
+                        outcomes.update(zip(futures[future], future.result()))
+                except FuturesTimeout:
+                    pass
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        except (OSError, RuntimeError, ImportError) as e:
+            print(f"[scanner] worker pool unavailable ({e}); analyzing serially", file=sys.stderr)
+            return None
+        self.workers_used = workers
+        return outcomes
+
+    def cache_summary(self) -> List[str]:
+        """One line per cached pack: files served from the cache."""
+        lines = []
+        for pack in self.packs:
+            if pack.cache is not None:
+                lines.append(f"[cache] {pack.name}: {format_cache_stats(pack.cache.stats())}")
+        return lines
+
+    def print_cache_summary(self) -> None:
+        # stderr: several packs print JSON on stdout
+        for line in self.cache_summary():
+            print(line, file=sys.stderr)
+
+
+def format_cache_stats(stats: dict) -> str:
+    total = stats["hits"] + stats["misses"]
+    rate = 100.0 * stats["hits"] / total if total else 0.0
+    return f"{stats['hits']}/{total} files from cache ({rate:.0f}%)"
+
+
+def import_script(script: Path):
+    """Import an audit script by path (once per process)."""
+    module_name = f"_audit_pack_{script.stem}"
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, script)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+    return module
+
+
+def load_pack(script: Path, project_path) -> RulePack:
+    """Import an audit script by path and instantiate its RULE_PACK."""
+    return import_script(script).RULE_PACK(project_path)
+
+
+def pack_name(script: Path) -> Optional[str]:
+    """Name of the pack an audit script provides (None if it is not a pack)."""
+    for name, rel in PACK_SCRIPTS.items():
+        if Path(rel).name == script.name:
+            return name
+    return None
+
+
+def is_pack_script(script: Path) -> bool:
+    return pack_name(script) is not None
+
+
+def run_packs(project_path, scripts: Iterable[Path], cache: bool = True, jobs: Optional[int] = None) -> Tuple[Dict[str, dict], Optional[Scanner]]:
+    """Run the given audit scripts as packs over a single walk.
+
+    Scripts that are not packs (or do not exist) are ignored. Returns, per
+    script path, the same fields verify_all/checklist record for a subprocess
+    run (passed, output, error, duration, plus the cache hits/misses), and
+    the scanner with the walk stats.
+    """
+    project_path = Path(project_path)
+    results: Dict[str, dict] = {}
+    loaded = []
+
+    for script in scripts:
+        if not is_pack_script(script) or not script.exists() or str(script) in results:
+            continue
+        try:
+            loaded.append((script, load_pack(script, project_path)))
+        except Exception:
+            results[str(script)] = {"name": script.stem, "passed": False, "output": "",
+                                    "error": traceback.format_exc(), "duration": 0.0}
+
+    if not loaded:
+        return results, None
+
+    scanner = Scanner(project_path, [pack for _, pack in loaded], cache=cache, jobs=jobs)
+    try:
+        scanner.run()
+    except Exception:
+        error = traceback.format_exc()
+        for script, pack in loaded:
+            results[str(script)] = {"name": pack.name, "passed": False, "output": "",
+                                    "error": error, "duration": scanner.elapsed}
+        return results, scanner
+
+    for script, pack in loaded:
+        output = io.StringIO()
+        start = time.perf_counter()
+        error = ""
+        try:
+            with redirect_stdout(output):
+                code = pack.report()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            code = 1
+            error = traceback.format_exc()
+        pack.elapsed += time.perf_counter() - start
+        results[str(script)] = {
+            "name": pack.name,
+            "passed": code == 0,
+            "output": output.getvalue(),
+            "error": error,
+            "duration": pack.elapsed,
+            "cache": pack.cache.stats() if pack.cache is not None else None,
+        }
+    return results, scanner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several audit packs over a single project walk")
+    parser.add_argument("project", nargs="?", default=".", help="Project path to audit")
+    parser.add_argument("--packs", default=",".join(PACK_SCRIPTS),
+                        help=f"Comma-separated packs ({', '.join(PACK_SCRIPTS)})")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the per-pack results (passed, output, error, duration) as JSON")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Analyze every file again (ignore and keep {CACHE_DIR_NAME}/ as is)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for the parallel packs (default: CPU count)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.packs.split(",") if n.strip()]
+    unknown = [n for n in names if n not in PACK_SCRIPTS]
+    if unknown:
+        parser.error(f"unknown pack(s): {', '.join(unknown)}")
+
+    project_path = Path(args.project).resolve()
+    scripts = [SKILLS_DIR / PACK_SCRIPTS[n] for n in names]
+    results, scanner = run_packs(project_path, scripts, cache=not args.no_cache, jobs=args.jobs)
+
+    if args.json:
+        packs = {name: results[str(script)] for name, script in zip(names, scripts) if str(script) in results}
+        print(json.dumps({
+            "scan": {
+                "files_seen": scanner.files_seen if scanner else 0,
+                "files_read": scanner.files_read if scanner else 0,
+                "duration": scanner.elapsed if scanner else 0.0,
+            },
+            "packs": packs,
+        }))
+        sys.exit(0 if all(r["passed"] for r in packs.values()) else 1)
+
+    failed = 0
+    for name, script in zip(names, scripts):
+        result = results.get(str(script))
+        if result is None:
+            continue
+        print(f"\n{'#' * 60}\n# {name}\n{'#' * 60}")
+        print(result["output"], end="")
+        if result["error"]:
+            print(result["error"], end="")
+        failed += not result["passed"]
+
+    print(f"\n{'=' * 60}")
+    if scanner:
+        workers = f", {scanner.workers_used} workers" if scanner.workers_used else ""
+        print(f"Walk: {scanner.files_seen} files seen, {scanner.files_read} file reads, {scanner.elapsed:.2f}s{workers}")
+    for name, script in zip(names, scripts):
+        result = results.get(str(script))
+        if result is not None:
+            status = "PASS" if result["passed"] else "FAIL"
+            cache = f"  {format_cache_stats(result['cache'])}" if result.get("cache") else ""
+            print(f"  {name:<10} {status}  {result['duration']:.2f}s{cache}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Check Scheduler - Antigravity Kit
+=================================
+
+Runs the validation checks of checklist.py and verify_all.py concurrently on
+a bounded worker pool (CPU count by default) and reports each result as soon
+as it finishes.
+
+    - depends_on: a check starts only after the named checks finished
+      (e.g. Type Coverage after Lint Check)
+    - exclusive: a check runs alone, nothing else is started meanwhile
+      (timing-sensitive checks such as Lighthouse)
+    - fail_fast: a failed required check cancels everything still pending
+      or running
+
+Audit scripts that are rule packs (see audit_scanner.py) are not started one
+by one: the pack checks with the same dependencies share one audit_scanner
+process, i.e. one walk of the project. Their results carry the hits/misses
+of the audit result cache (cache=False runs them with --no-cache).
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import audit_scanner
+
+
+@dataclass
+class Check:
+    name: str
+    script: Path
+    required: bool = False
+    category: str = ""
+    # Extra arguments after the project path (e.g. the URL)
+    args: List[str] = field(default_factory=list)
+    depends_on: Tuple[str, ...] = ()
+    exclusive: bool = False
+    timeout: int = 600
+
+
+@dataclass
+class _Job:
+    checks: List[Check]
+    depends_on: Tuple[str, ...]
+    exclusive: bool = False
+    shared: bool = False
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+class Scheduler:
+    def __init__(self, project_path, jobs: Optional[int] = None, fail_fast: bool = False,
+                 on_start: Optional[Callable[[Check], None]] = None,
+                 on_result: Optional[Callable[[dict], None]] = None, cache: bool = True) -> None:
+        self.project_path = Path(project_path)
+        self.jobs = max(1, jobs or default_jobs())
+        self.fail_fast = fail_fast
+        self.cache = cache
+        self.on_start = on_start
+        self.on_result = on_result
+        # Name of the required check that stopped the run (fail_fast)
+        self.stopped_by: Optional[str] = None
+        self.wall_time = 0.0
+        self._start = 0.0
+        self._lock = threading.Lock()
+        self._procs = set()
+        self._terminated = set()
+
+    # ------------------------------------------------------------------ jobs
+
+    def _build_jobs(self, checks: List[Check], results: Dict[str, dict]) -> List[_Job]:
+        jobs: List[_Job] = []
+        shared: Dict[Tuple[str, ...], _Job] = {}
+
+        for check in checks:
+            if not check.script.is_file():
+                self._record(results, self._result(check, passed=True, skipped=True,
+                                                   error="Script not found"))
+                continue
+            if audit_scanner.is_pack_script(check.script) and not check.exclusive:
+                deps = tuple(sorted(check.depends_on))
+                job = shared.get(deps)
+                if job is None:
+                    job = shared[deps] = _Job([], deps, shared=True)
+                    jobs.append(job)
+                job.checks.append(check)
+            else:
+                jobs.append(_Job([check], tuple(check.depends_on), exclusive=check.exclusive))
+        return jobs
+
+    def _ready(self, job: _Job, results: Dict[str, dict], scheduled: set) -> bool:
+        # Dependencies that are not part of this run (no URL, filtered out) do not block
+        return all(dep in results or dep not in scheduled for dep in job.depends_on)
+
+    # --------------------------------------------------------------- running
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def _result(self, check: Check, passed: bool, skipped: bool = False, output: str = "",
+                error: str = "", duration: float = 0.0, started: Optional[float] = None) -> dict:
+        return {
+            "name": check.name,
+            "category": check.category,
+            "required": check.required,
+            "passed": passed,
+            "skipped": skipped,
+            "output": output,
+            "error": error,
+            "duration": duration,
+            "started": self._elapsed() if started is None else started,
+        }
+
+    def _spawn(self, cmd: List[str], timeout: int) -> Tuple[str, Optional[int], str, str]:
+        """Run a command; returns (state, returncode, stdout, stderr), state in ok/timeout/cancelled/error."""
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True, encoding='utf-8', errors='replace')
+        except Exception as e:
+            return "error", None, "", str(e)
+
+        with self._lock:
+            self._procs.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return "timeout", None, "", "Timeout"
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+
+        if proc in self._terminated:
+            return "cancelled", proc.returncode, stdout, stderr
+        return "ok", proc.returncode, stdout, stderr
+
+    def _run_script(self, check: Check) -> List[dict]:
+        started = self._elapsed()
+        cmd = [sys.executable, str(check.script), str(self.project_path), *check.args]
+        state, returncode, stdout, stderr = self._spawn(cmd, check.timeout)
+        duration = self._elapsed() - started
+
+        if state == "cancelled":
+            return [self._result(check, passed=True, skipped=True, error=f"Cancelled ({self.stopped_by} failed)",
+                                 duration=duration, started=started)]
+        return [self._result(check, passed=state == "ok" and returncode == 0, output=stdout, error=stderr,
+                             duration=duration, started=started)]
+
+    def _run_shared(self, job: _Job) -> List[dict]:
+        """Pack checks in one audit_scanner process (one walk, stdout of each pack kept apart)."""
+        started = self._elapsed()
+        names = [audit_scanner.pack_name(c.script) for c in job.checks]
+        cmd = [sys.executable, str(Path(audit_scanner.__file__).resolve()), str(self.project_path),
+               "--packs", ",".join(names), "--json"]
+        if not self.cache:
+            cmd.append("--no-cache")
+        state, _, stdout, stderr = self._spawn(cmd, max(c.timeout for c in job.checks))
+        duration = self._elapsed() - started
+
+        packs = {}
+        if state == "ok":
+            try:
+                packs = json.loads(stdout)["packs"]
+            except (ValueError, KeyError):
+                state = "error"
+                stderr = stderr or stdout[:500]
+
+        results = []
+        for check, name in zip(job.checks, names):
+            r = packs.get(name)
+            if state == "cancelled":
+                results.append(self._result(check, passed=True, skipped=True, error=f"Cancelled ({self.stopped_by} failed)",
+                                            duration=duration, started=started))
+            elif r is None:
+                results.append(self._result(check, passed=False, error=stderr or "Not run by the shared scan",
+                                            duration=duration, started=started))
+            else:
+                result = self._result(check, passed=r["passed"], output=r["output"], error=r["error"],
+                                      duration=r["duration"], started=started)
+                result["cache"] = r.get("cache")
+                results.append(result)
+        return results
+
+    def _run_job(self, job: _Job) -> List[dict]:
+        if job.shared:
+            return self._run_shared(job)
+        return self._run_script(job.checks[0])
+
+    def _record(self, results: Dict[str, dict], result: dict) -> None:
+        results[result["name"]] = result
+        if self.on_result:
+            self.on_result(result)
+
+    def _stop(self, name: str) -> None:
+        self.stopped_by = name
+        with self._lock:
+            for proc in self._procs:
+                proc.terminate()
+                self._terminated.add(proc)
+
+    def run(self, checks: List[Check]) -> List[dict]:
+        """Run the checks; returns their results in the order given."""
+        self._start = time.perf_counter()
+        results: Dict[str, dict] = {}
+        pending = self._build_jobs(checks, results)
+        scheduled = {c.name for job in pending for c in job.checks}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                if not self.stopped_by:
+                    for job in list(pending):
+                        if len(running) >= self.jobs or any(j.exclusive for j in running.values()):
+                            break
+                        if not self._ready(job, results, scheduled):
+                            continue
+                        if job.exclusive and running:
+                            # Wait for the pool to drain; nothing else starts before it
+                            break
+                        pending.remove(job)
+                        for check in job.checks:
+                            if self.on_start:
+                                self.on_start(check)
+                        running[pool.submit(self._run_job, job)] = job
+                        if job.exclusive:
+                            break
+
+                if not running:
+                    reason = f"Cancelled ({self.stopped_by} failed)" if self.stopped_by else "Dependency cycle"
+                    for job in pending:
+                        for check in job.checks:
+                            self._record(results, self._result(check, passed=bool(self.stopped_by),
+                                                               skipped=bool(self.stopped_by), error=reason))
+                    pending = []
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    for result in future.result():
+                        self._record(results, result)
+                        if (self.fail_fast and result["required"] and not result["passed"]
+                                and not result["skipped"] and not self.stopped_by):
+                            self._stop(result["name"])
+
+        self.wall_time = self._elapsed()
+        return [results[c.name] for c in checks if c.name in results]
+
+
+def timing_table(results: List[dict], wall_time: float) -> List[str]:
+    """Per-check timing lines (start offset and duration), slowest first."""
+    width = max([len(r["name"]) for r in results] + [5])
+    lines = [f"{'Check':<{width}}  {'Status':<8} {'Start':>7} {'Time':>8}",
+             f"{'-' * width}  {'-' * 8} {'-' * 7} {'-' * 8}"]
+    for r in sorted(results, key=lambda r: -r.get("duration", 0)):
+        if r.get("skipped"):
+            status = "SKIPPED"
+        else:
+            status = "PASSED" if r["passed"] else "FAILED"
+        lines.append(f"{r['name']:<{width}}  {status:<8} {r.get('started', 0):>6.1f}s {r.get('duration', 0):>7.1f}s")
+
+    total = sum(r.get("duration", 0) for r in results)
+    lines.append(f"{'-' * width}  {'-' * 8} {'-' * 7} {'-' * 8}")
+    lines.append(f"Sum of check times: {total:.1f}s | wall clock: {wall_time:.1f}s")
+    return lines
@@ -9,6 +9,10 @@ Use this for incremental validation during development.
 Usage:
     python scripts/checklist.py .                    # Run core checks
     python scripts/checklist.py . --url <URL>        # Include performance checks
+    python scripts/checklist.py . --jobs 4           # Parallel checks (default: CPU count)
+
+Independent checks run in parallel, in priority order as workers free up; a
+failed required check cancels the rest.
 
 Priority Order:
     P0: Security Scan (vulnerabilities, secrets)
@@ -21,11 +25,13 @@ Priority Order:
 """
 
 import sys
-import subprocess
 import argparse
 from pathlib import Path
 from typing import List, Tuple, Optional
 
+from check_scheduler import Check, Scheduler, default_jobs, timing_table
+from audit_scanner import format_cache_stats
+
 # ANSI colors for terminal output
 class Colors:
     HEADER = '\033[95m'
@@ -69,63 +75,32 @@ PERFORMANCE_CHECKS = [
     ("Playwright E2E", ".agent/skills/webapp-testing/scripts/playwright_runner.py", False),
 ]
 
-def check_script_exists(script_path: Path) -> bool:
-    """Check if script file exists"""
-    return script_path.exists() and script_path.is_file()
-
-def run_script(name: str, script_path: Path, project_path: str, url: Optional[str] = None) -> dict:
-    """
-    Run a validation script and capture results
-    
-    Returns:
-        dict with keys: name, passed, output, skipped
-    """
-    if not check_script_exists(script_path):
-        print_warning(f"{name}: Script not found, skipping")
-        return {"name": name, "passed": True, "output": "", "skipped": True}
-    
-    print_step(f"Running: {name}")
-    
-    # Build command
-    cmd = ["python", str(script_path), project_path]
-    if url and ("lighthouse" in script_path.name.lower() or "playwright" in script_path.name.lower()):
-        cmd.append(url)
-    
-    # Run script
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
-        
-        passed = result.returncode == 0
-        
-        if passed:
-            print_success(f"{name}: PASSED")
-        else:
-            print_error(f"{name}: FAILED")
-            if result.stderr:
-                print(f"  Error: {result.stderr[:200]}")
-        
-        return {
-            "name": name,
-            "passed": passed,
-            "output": result.stdout,
-            "error": result.stderr,
-            "skipped": False
-        }
-    
-    except subprocess.TimeoutExpired:
-        print_error(f"{name}: TIMEOUT (>5 minutes)")
-        return {"name": name, "passed": False, "output": "", "error": "Timeout", "skipped": False}
-    
-    except Exception as e:
-        print_error(f"{name}: ERROR - {str(e)}")
-        return {"name": name, "passed": False, "output": "", "error": str(e), "skipped": False}
-
-def print_summary(results: List[dict]):
+# Checks that start only after others finished
+CHECK_DEPENDENCIES = {
+    # Both drive the app at --url; E2E traffic would skew the Lighthouse numbers
+    "Playwright E2E": ("Lighthouse Audit",),
+}
+
+# Checks that run alone (timing-sensitive)
+EXCLUSIVE_CHECKS = {"Lighthouse Audit"}
+
+def cache_note(result: dict) -> str:
+    """Audit cache hit rate of a rule-pack check, if it used the cache"""
+    return f", {format_cache_stats(result['cache'])}" if result.get("cache") else ""
+
+def print_result(result: dict):
+    """Print a check result as soon as it finishes"""
+    name = result["name"]
+    if result.get("skipped"):
+        print_warning(f"{name}: {result.get('error') or 'skipped'}")
+    elif result["passed"]:
+        print_success(f"{name}: PASSED ({result['duration']:.1f}s{cache_note(result)})")
+    else:
+        print_error(f"{name}: FAILED ({result['duration']:.1f}s{cache_note(result)})")
+        if result.get("error"):
+            print(f"  Error: {result['error'][:200]}")
+
+def print_summary(results: List[dict], wall_time: float):
     """Print final summary report"""
     print_header("📊 CHECKLIST SUMMARY")
     
@@ -151,6 +126,9 @@ def print_summary(results: List[dict]):
         print(f"{status} {r['name']}")
     
     print()
+    for line in timing_table(results, wall_time):
+        print(line)
+    print()
     
     if failed_count > 0:
         print_error(f"{failed_count} check(s) FAILED - Please fix before proceeding")
@@ -172,6 +150,10 @@ Examples:
     parser.add_argument("project", help="Project path to validate")
     parser.add_argument("--url", help="URL for performance checks (lighthouse, playwright)")
     parser.add_argument("--skip-performance", action="store_true", help="Skip performance checks even if URL provided")
+    parser.add_argument("--jobs", type=int, default=default_jobs(),
+                        help="Checks run in parallel (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-audit every file (ignore the audit result cache)")
     
     args = parser.parse_args()
     
@@ -184,32 +166,38 @@ Examples:
     print_header("🚀 ANTIGRAVITY KIT - MASTER CHECKLIST")
     print(f"Project: {project_path}")
     print(f"URL: {args.url if args.url else 'Not provided (performance checks skipped)'}")
+    print(f"Jobs: {args.jobs}")
     
-    results = []
-    
-    # Run core checks
-    print_header("📋 CORE CHECKS")
-    for name, script_path, required in CORE_CHECKS:
-        script = project_path / script_path
-        result = run_script(name, script, str(project_path))
-        results.append(result)
-        
-        # If required check fails, stop
-        if required and not result["passed"] and not result.get("skipped"):
-            print_error(f"CRITICAL: {name} failed. Stopping checklist.")
-            print_summary(results)
-            sys.exit(1)
+    checks = [Check(name, project_path / script_path, required, "Core", timeout=300)  # 5 minute timeout
+              for name, script_path, required in CORE_CHECKS]
     
-    # Run performance checks if URL provided
+    # Performance checks if URL provided
     if args.url and not args.skip_performance:
-        print_header("⚡ PERFORMANCE CHECKS")
-        for name, script_path, required in PERFORMANCE_CHECKS:
-            script = project_path / script_path
-            result = run_script(name, script, str(project_path), args.url)
-            results.append(result)
+        checks += [Check(name, project_path / script_path, required, "Performance", args=[args.url],
+                         depends_on=CHECK_DEPENDENCIES.get(name, ()), exclusive=name in EXCLUSIVE_CHECKS,
+                         timeout=300)
+                   for name, script_path, required in PERFORMANCE_CHECKS]
+    
+    print_header("📋 CHECKS")
+    
+    # A failed required check stops the checklist
+    scheduler = Scheduler(
+        project_path,
+        jobs=args.jobs,
+        fail_fast=True,
+        on_start=lambda check: print_step(f"Running: {check.name}"),
+        on_result=print_result,
+        cache=not args.no_cache
+    )
+    results = scheduler.run(checks)
+    
+    if scheduler.stopped_by:
+        print_error(f"CRITICAL: {scheduler.stopped_by} failed. Stopping checklist.")
+        print_summary(results, scheduler.wall_time)
+        sys.exit(1)
     
     # Print summary
-    all_passed = print_summary(results)
+    all_passed = print_summary(results, scheduler.wall_time)
     
     sys.exit(0 if all_passed else 1)
 
@@ -8,6 +8,10 @@ Use this before deployment or major releases.
 
 Usage:
     python scripts/verify_all.py . --url <URL>
+    python scripts/verify_all.py . --url <URL> --jobs 4 --stop-on-fail
+
+Independent checks run in parallel (--jobs, default CPU count); results are
+printed as they finish and the report ends with a per-check timing table.
 
 Includes ALL checks:
     ✅ Security Scan (OWASP, secrets, dependencies)
@@ -23,12 +27,14 @@ Includes ALL checks:
 """
 
 import sys
-import subprocess
 import argparse
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from check_scheduler import Check, Scheduler, default_jobs, timing_table
+from audit_scanner import format_cache_stats
+
 # ANSI colors
 class Colors:
     HEADER = '\033[95m'
@@ -147,57 +153,32 @@ VERIFICATION_SUITE = [
     },
 ]
 
-def run_script(name: str, script_path: Path, project_path: str, url: Optional[str] = None) -> dict:
-    """Run validation script"""
-    if not script_path.exists():
-        print_warning(f"{name}: Script not found, skipping")
-        return {"name": name, "passed": True, "skipped": True, "duration": 0}
-    
-    print_step(f"Running: {name}")
-    start_time = datetime.now()
-    
-    # Build command
-    cmd = ["python", str(script_path), project_path]
-    if url and ("lighthouse" in script_path.name.lower() or "playwright" in script_path.name.lower()):
-        cmd.append(url)
-    
-    # Run
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout for slow checks
-        )
-        
-        duration = (datetime.now() - start_time).total_seconds()
-        passed = result.returncode == 0
-        
-        if passed:
-            print_success(f"{name}: PASSED ({duration:.1f}s)")
-        else:
-            print_error(f"{name}: FAILED ({duration:.1f}s)")
-            if result.stderr:
-                print(f"  {result.stderr[:300]}")
-        
-        return {
-            "name": name,
-            "passed": passed,
-            "output": result.stdout,
-            "error": result.stderr,
-            "skipped": False,
-            "duration": duration
-        }
-    
-    except subprocess.TimeoutExpired:
-        duration = (datetime.now() - start_time).total_seconds()
-        print_error(f"{name}: TIMEOUT (>{duration:.0f}s)")
-        return {"name": name, "passed": False, "skipped": False, "duration": duration, "error": "Timeout"}
-    
-    except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
-        print_error(f"{name}: ERROR - {str(e)}")
-        return {"name": name, "passed": False, "skipped": False, "duration": duration, "error": str(e)}
+# Checks that start only after others finished
+CHECK_DEPENDENCIES = {
+    "Type Coverage": ("Lint Check",),
+    # Both drive the app at --url; E2E traffic would skew the Lighthouse numbers
+    "Playwright E2E": ("Lighthouse Audit",),
+}
+
+# Checks that run alone (timing-sensitive)
+EXCLUSIVE_CHECKS = {"Lighthouse Audit"}
+
+def cache_note(result: dict) -> str:
+    """Audit cache hit rate of a rule-pack check, if it used the cache"""
+    return f", {format_cache_stats(result['cache'])}" if result.get("cache") else ""
+
+def print_result(result: dict):
+    """Print a check result as soon as it finishes"""
+    name = f"[{result['category']}] {result['name']}"
+    duration = result.get("duration", 0)
+    if result.get("skipped"):
+        print_warning(f"{name}: {result.get('error') or 'skipped'}")
+    elif result["passed"]:
+        print_success(f"{name}: PASSED ({duration:.1f}s{cache_note(result)})")
+    else:
+        print_error(f"{name}: FAILED ({duration:.1f}s{cache_note(result)})")
+        if result.get("error"):
+            print(f"  {result['error'][:300]}")
 
 def print_final_report(results: List[dict], start_time: datetime):
     """Print comprehensive final report"""
@@ -240,6 +221,12 @@ def print_final_report(results: List[dict], start_time: datetime):
     
     print()
     
+    # Timing
+    print(f"{Colors.BOLD}Timing:{Colors.ENDC}")
+    for line in timing_table(results, total_duration):
+        print(f"  {line}")
+    print()
+    
     # Failed checks detail
     if failed > 0:
         print(f"{Colors.BOLD}{Colors.RED}❌ FAILED CHECKS:{Colors.ENDC}")
@@ -273,7 +260,11 @@ Examples:
     parser.add_argument("project", help="Project path to validate")
     parser.add_argument("--url", required=True, help="URL for performance & E2E checks")
     parser.add_argument("--no-e2e", action="store_true", help="Skip E2E tests")
-    parser.add_argument("--stop-on-fail", action="store_true", help="Stop on first failure")
+    parser.add_argument("--stop-on-fail", action="store_true", help="Stop on first failure of a critical check")
+    parser.add_argument("--jobs", type=int, default=default_jobs(),
+                        help="Checks run in parallel (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-audit every file (ignore the audit result cache)")
     
     args = parser.parse_args()
     
@@ -287,36 +278,52 @@ Examples:
     print(f"Project: {project_path}")
     print(f"URL: {args.url}")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Jobs: {args.jobs}")
     
     start_time = datetime.now()
-    results = []
     
-    # Run all verification categories
+    checks = []
     for suite in VERIFICATION_SUITE:
         category = suite["category"]
-        requires_url = suite.get("requires_url", False)
         
         # Skip if requires URL and not provided
-        if requires_url and not args.url:
+        if suite.get("requires_url", False) and not args.url:
             continue
         
         # Skip E2E if flag set
         if args.no_e2e and category == "E2E Testing":
             continue
         
-        print_header(f"📋 {category.upper()}")
-        
         for name, script_path, required in suite["checks"]:
             script = project_path / script_path
-            result = run_script(name, script, str(project_path), args.url)
-            result["category"] = category
-            results.append(result)
-            
-            # Stop on critical failure if flag set
-            if args.stop_on_fail and required and not result["passed"] and not result.get("skipped"):
-                print_error(f"CRITICAL: {name} failed. Stopping verification.")
-                print_final_report(results, start_time)
-                sys.exit(1)
+            url_args = [args.url] if args.url and ("lighthouse" in script.name.lower() or "playwright" in script.name.lower()) else []
+            checks.append(Check(
+                name=name,
+                script=script,
+                required=required,
+                category=category,
+                args=url_args,
+                depends_on=CHECK_DEPENDENCIES.get(name, ()),
+                exclusive=name in EXCLUSIVE_CHECKS,
+                timeout=600  # 10 minute timeout for slow checks
+            ))
+    
+    print_header("📋 RUNNING CHECKS")
+    
+    scheduler = Scheduler(
+        project_path,
+        jobs=args.jobs,
+        fail_fast=args.stop_on_fail,
+        on_start=lambda check: print_step(f"Running: {check.name}"),
+        on_result=print_result,
+        cache=not args.no_cache
+    )
+    results = scheduler.run(checks)
+    
+    if scheduler.stopped_by:
+        print_error(f"CRITICAL: {scheduler.stopped_by} failed. Stopping verification.")
+        print_final_report(results, start_time)
+        sys.exit(1)
     
     # Print final report
     all_passed = print_final_report(results, start_time)
@@ -20,6 +20,9 @@ import re
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -27,156 +30,165 @@ except:
     pass
 
 
-def find_html_files(project_path: Path) -> list:
-    """Find all HTML/JSX/TSX files."""
-    patterns = ['**/*.html', '**/*.jsx', '**/*.tsx']
-    skip_dirs = {'node_modules', '.next', 'dist', 'build', '.git'}
-    
-    files = []
-    for pattern in patterns:
-        for f in project_path.glob(pattern):
-            if not any(skip in f.parts for skip in skip_dirs):
-                files.append(f)
-    
-    return files[:50]
+INPUT_RE = re.compile(r'<input[^>]*>', re.IGNORECASE)
+BUTTON_RE = re.compile(r'<button[^>]*>[^<]*</button>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+POSITIVE_TABINDEX_RE = re.compile(r'tabindex="([1-9]\d*)"', re.IGNORECASE)
+DIV_BUTTON_RE = re.compile(r'<div[^>]*role="button"[^>]*>', re.IGNORECASE)
 
 
-def check_accessibility(file_path: Path) -> list:
-    """Check a single file for accessibility issues."""
+def check_accessibility(content: str) -> list:
+    """Check a single file's content for accessibility issues."""
     issues = []
+    lower = content.lower()
+    
+    # Check for form inputs without labels
+    inputs = INPUT_RE.findall(content)
+    for inp in inputs:
+        if 'type="hidden"' not in inp.lower():
+            if 'aria-label' not in inp.lower() and 'id=' not in inp.lower():
+                issues.append("Input without label or aria-label")
+                break
+    
+    # Check for buttons without accessible text
+    buttons = BUTTON_RE.findall(content)
+    for btn in buttons:
+        # Check if button has text content or aria-label
+        if 'aria-label' not in btn.lower():
+            text = TAG_RE.sub('', btn)
+            if not text.strip():
+                issues.append("Button without accessible text")
+                break
+    
+    # Check for missing lang attribute
+    if '<html' in lower and 'lang=' not in lower:
+        issues.append("Missing lang attribute on <html>")
     
-    try:
-        content = file_path.read_text(encoding='utf-8', errors='ignore')
+    # Check for missing skip link
+    if '<main' in lower or '<body' in lower:
+        if 'skip' not in lower and '#main' not in lower:
+            issues.append("Consider adding skip-to-main-content link")
+    
+    # Check for click handlers without keyboard support
+    onclick_count = lower.count('onclick=')
+    onkeydown_count = lower.count('onkeydown=') + lower.count('onkeyup=')
+    if onclick_count > 0 and onkeydown_count == 0:
+        issues.append("onClick without keyboard handler (onKeyDown)")
+    
+    # Check for tabIndex misuse
+    if 'tabindex=' in lower:
+        if 'tabindex="-1"' not in lower and 'tabindex="0"' not in lower:
+            positive_tabindex = POSITIVE_TABINDEX_RE.findall(content)
+            if positive_tabindex:
+                issues.append("Avoid positive tabIndex values")
+    
+    # Check for autoplay media
+    if 'autoplay' in lower:
+        if 'muted' not in lower:
+            issues.append("Autoplay media should be muted")
+    
+    # Check for role usage
+    if 'role="button"' in lower:
+        # Divs with role button should have tabindex
+        div_buttons = DIV_BUTTON_RE.findall(content)
+        for div in div_buttons:
+            if 'tabindex' not in div.lower():
+                issues.append("role='button' without tabindex")
+                break
+    
+    return issues
+
+
+class AccessibilityPack(RulePack):
+    """HTML/JSX/TSX files (first 50) checked for common WCAG issues."""
+
+    name = "accessibility_checker"
+    extensions = frozenset({'.html', '.jsx', '.tsx'})
+    skip_dirs = frozenset({'node_modules', '.next', 'dist', 'build', '.git'})
+    max_files = 50
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(Path(project_path).resolve())
+        self.files_checked = 0
+        self.all_issues = []
+
+    def check(self, file: SourceFile) -> None:
+        self.files_checked += 1
+        try:
+            issues = check_accessibility(file.text)
+        except Exception as e:
+            issues = [f"Error reading file: {str(e)[:50]}"]
+        if issues:
+            self.all_issues.append({
+                "file": file.name,
+                "issues": issues
+            })
+
+    def report(self) -> int:
+        print(f"\n{'='*60}")
+        print(f"[ACCESSIBILITY CHECKER] WCAG Compliance Audit")
+        print(f"{'='*60}")
+        print(f"Project: {self.project_path}")
+        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("-"*60)
         
-        # Check for form inputs without labels
-        inputs = re.findall(r'<input[^>]*>', content, re.IGNORECASE)
-        for inp in inputs:
-            if 'type="hidden"' not in inp.lower():
-                if 'aria-label' not in inp.lower() and 'id=' not in inp.lower():
-                    issues.append("Input without label or aria-label")
-                    break
+        print(f"Found {self.files_checked} HTML/JSX/TSX files")
         
-        # Check for buttons without accessible text
-        buttons = re.findall(r'<button[^>]*>[^<]*</button>', content, re.IGNORECASE)
-        for btn in buttons:
-            # Check if button has text content or aria-label
-            if 'aria-label' not in btn.lower():
-                text = re.sub(r'<[^>]+>', '', btn)
-                if not text.strip():
-                    issues.append("Button without accessible text")
-                    break
+        if not self.files_checked:
+            output = {
+                "script": "accessibility_checker",
+                "project": str(self.project_path),
+                "files_checked": 0,
+                "issues_found": 0,
+                "passed": True,
+                "message": "No HTML files found"
+            }
+            print(json.dumps(output, indent=2))
+            return 0
         
-        # Check for missing lang attribute
-        if '<html' in content.lower() and 'lang=' not in content.lower():
-            issues.append("Missing lang attribute on <html>")
+        all_issues = self.all_issues
         
-        # Check for missing skip link
-        if '<main' in content.lower() or '<body' in content.lower():
-            if 'skip' not in content.lower() and '#main' not in content.lower():
-                issues.append("Consider adding skip-to-main-content link")
+        # Summary
+        print("\n" + "="*60)
+        print("ACCESSIBILITY ISSUES")
+        print("="*60)
         
-        # Check for click handlers without keyboard support
-        onclick_count = content.lower().count('onclick=')
-        onkeydown_count = content.lower().count('onkeydown=') + content.lower().count('onkeyup=')
-        if onclick_count > 0 and onkeydown_count == 0:
-            issues.append("onClick without keyboard handler (onKeyDown)")
+        if all_issues:
+            for item in all_issues[:10]:
+                print(f"\n{item['file']}:")
+                for issue in item["issues"]:
+                    print(f"  - {issue}")
+            
+            if len(all_issues) > 10:
+                print(f"\n... and {len(all_issues) - 10} more files with issues")
+        else:
+            print("No accessibility issues found!")
         
-        # Check for tabIndex misuse
-        if 'tabindex=' in content.lower():
-            if 'tabindex="-1"' not in content.lower() and 'tabindex="0"' not in content.lower():
-                positive_tabindex = re.findall(r'tabindex="([1-9]\d*)"', content, re.IGNORECASE)
-                if positive_tabindex:
-                    issues.append("Avoid positive tabIndex values")
+        total_issues = sum(len(item["issues"]) for item in all_issues)
+        # Accessibility issues are important but not blocking
+        passed = total_issues < 5  # Allow minor issues
         
-        # Check for autoplay media
-        if 'autoplay' in content.lower():
-            if 'muted' not in content.lower():
-                issues.append("Autoplay media should be muted")
+        output = {
+            "script": "accessibility_checker",
+            "project": str(self.project_path),
+            "files_checked": self.files_checked,
+            "files_with_issues": len(all_issues),
+            "issues_found": total_issues,
+            "passed": passed
+        }
         
-        # Check for role usage
-        if 'role="button"' in content.lower():
-            # Divs with role button should have tabindex
-            div_buttons = re.findall(r'<div[^>]*role="button"[^>]*>', content, re.IGNORECASE)
-            for div in div_buttons:
-                if 'tabindex' not in div.lower():
-                    issues.append("role='button' without tabindex")
-                    break
+        print("\n" + json.dumps(output, indent=2))
         
-    except Exception as e:
-        issues.append(f"Error reading file: {str(e)[:50]}")
-    
-    return issues
+        return 0 if passed else 1
+
+
+RULE_PACK = AccessibilityPack
 
 
 def main():
-    project_path = Path(sys.argv[1] if len(sys.argv) > 1 else ".").resolve()
-    
-    print(f"\n{'='*60}")
-    print(f"[ACCESSIBILITY CHECKER] WCAG Compliance Audit")
-    print(f"{'='*60}")
-    print(f"Project: {project_path}")
-    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("-"*60)
-    
-    # Find HTML files
-    files = find_html_files(project_path)
-    print(f"Found {len(files)} HTML/JSX/TSX files")
-    
-    if not files:
-        output = {
-            "script": "accessibility_checker",
-            "project": str(project_path),
-            "files_checked": 0,
-            "issues_found": 0,
-            "passed": True,
-            "message": "No HTML files found"
-        }
-        print(json.dumps(output, indent=2))
-        sys.exit(0)
-    
-    # Check each file
-    all_issues = []
-    
-    for f in files:
-        issues = check_accessibility(f)
-        if issues:
-            all_issues.append({
-                "file": str(f.name),
-                "issues": issues
-            })
-    
-    # Summary
-    print("\n" + "="*60)
-    print("ACCESSIBILITY ISSUES")
-    print("="*60)
-    
-    if all_issues:
-        for item in all_issues[:10]:
-            print(f"\n{item['file']}:")
-            for issue in item["issues"]:
-                print(f"  - {issue}")
-        
-        if len(all_issues) > 10:
-            print(f"\n... and {len(all_issues) - 10} more files with issues")
-    else:
-        print("No accessibility issues found!")
-    
-    total_issues = sum(len(item["issues"]) for item in all_issues)
-    # Accessibility issues are important but not blocking
-    passed = total_issues < 5  # Allow minor issues
-    
-    output = {
-        "script": "accessibility_checker",
-        "project": str(project_path),
-        "files_checked": len(files),
-        "files_with_issues": len(all_issues),
-        "issues_found": total_issues,
-        "passed": passed
-    }
-    
-    print("\n" + json.dumps(output, indent=2))
-    
-    sys.exit(0 if passed else 1)
+    pack = AccessibilityPack(sys.argv[1] if len(sys.argv) > 1 else ".")
+    Scanner(pack.project_path, [pack]).run()
+    sys.exit(pack.report())
 
 
 if __name__ == "__main__":
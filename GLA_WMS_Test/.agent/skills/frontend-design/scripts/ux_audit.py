@@ -95,8 +95,18 @@ import re
 import json
 from pathlib import Path
 
-class UXAuditor:
-    def __init__(self):
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
+class UXAuditor(RulePack):
+    name = "ux_audit"
+    extensions = frozenset({'.tsx', '.jsx', '.html', '.vue', '.svelte', '.css'})
+    skip_dirs = frozenset({'node_modules', '.git', 'dist', 'build', '.next'})
+    cacheable = True
+
+    def __init__(self, project_path=".", as_json: bool = False):
+        super().__init__(project_path)
+        self.as_json = as_json
         self.issues = []
         self.warnings = []
         self.passed_count = 0
@@ -106,10 +116,30 @@ class UXAuditor:
         try:
             with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
                 content = f.read()
-        except: return
-        
+        except OSError:
+            return
+        self.audit_content(os.path.basename(filepath), content)
+
+    def analyze(self, file: SourceFile):
+        try:
+            content = file.text
+        except OSError:
+            return None
+        scratch = type(self)(self.project_path)
+        scratch.audit_content(file.name, content)
+        return [scratch.issues, scratch.warnings, scratch.passed_count]
+
+    def merge(self, file: SourceFile, findings) -> None:
+        if findings is None:
+            return
+        issues, warnings, passed_count = findings
+        self.files_checked += 1
+        self.issues.extend(issues)
+        self.warnings.extend(warnings)
+        self.passed_count += passed_count
+
+    def audit_content(self, filename: str, content: str) -> None:
         self.files_checked += 1
-        filename = os.path.basename(filepath)
 
         # Pre-calculate common flags
         has_long_text = bool(re.search(r'<p|<div.*class=.*text|article|<span.*text', content, re.IGNORECASE))
@@ -672,12 +702,7 @@ class UXAuditor:
             self.issues.append(f"[Accessibility] {filename}: Missing img alt text")
 
     def audit_directory(self, directory: str) -> None:
-        extensions = {'.tsx', '.jsx', '.html', '.vue', '.svelte', '.css'}
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in {'node_modules', '.git', 'dist', 'build', '.next'}]
-            for file in files:
-                if Path(file).suffix in extensions:
-                    self.audit_file(os.path.join(root, file))
+        Scanner(directory, [self]).run()
 
     def get_report(self):
         return {
@@ -688,35 +713,34 @@ class UXAuditor:
             "compliant": len(self.issues) == 0
         }
 
+    def report(self) -> int:
+        report = self.get_report()
+        
+        if self.as_json:
+            print(json.dumps(report))
+        else:
+            # Use ASCII-safe output for Windows console compatibility
+            print(f"\n[UX AUDIT] {report['files_checked']} files checked")
+            print("-" * 50)
+            if report['issues']:
+                print(f"[!] ISSUES ({len(report['issues'])}):")
+                for i in report['issues'][:10]: print(f"  - {i}")
+            if report['warnings']:
+                print(f"[*] WARNINGS ({len(report['warnings'])}):")
+                for w in report['warnings'][:15]: print(f"  - {w}")
+            print(f"[+] PASSED CHECKS: {report['passed_checks']}")
+            status = "PASS" if report['compliant'] else "FAIL"
+            print(f"STATUS: {status}")
+        
+        return 0 if report['compliant'] else 1
+
+RULE_PACK = UXAuditor
+
 def main():
     if len(sys.argv) < 2: sys.exit(1)
     
-    path = sys.argv[1]
-    is_json = "--json" in sys.argv
-    
-    auditor = UXAuditor()
-    if os.path.isfile(path): auditor.audit_file(path)
-    else: auditor.audit_directory(path)
-    
-    report = auditor.get_report()
-    
-    if is_json:
-        print(json.dumps(report))
-    else:
-        # Use ASCII-safe output for Windows console compatibility
-        print(f"\n[UX AUDIT] {report['files_checked']} files checked")
-        print("-" * 50)
-        if report['issues']:
-            print(f"[!] ISSUES ({len(report['issues'])}):")
-            for i in report['issues'][:10]: print(f"  - {i}")
-        if report['warnings']:
-            print(f"[*] WARNINGS ({len(report['warnings'])}):")
-            for w in report['warnings'][:15]: print(f"  - {w}")
-        print(f"[+] PASSED CHECKS: {report['passed_checks']}")
-        status = "PASS" if report['compliant'] else "FAIL"
-        print(f"STATUS: {status}")
-
-    sys.exit(0 if report['compliant'] else 1)
-
+    auditor = UXAuditor(sys.argv[1], as_json="--json" in sys.argv)
+    Scanner(sys.argv[1], [auditor], cache="--no-cache" not in sys.argv).run().print_cache_summary()
+    sys.exit(auditor.report())
 if __name__ == "__main__":
     main()
@@ -21,6 +21,9 @@ import re
 import json
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -43,6 +46,41 @@ SKIP_FILES = {
     'tailwind.config', 'postcss.config', 'next.config'
 }
 
+H1_RE = re.compile(r'<h1[^>]*>', re.I)
+H2_RE = re.compile(r'<h2[^>]*>', re.I)
+LIST_RE = re.compile(r'<(ul|ol)[^>]*>', re.I)
+TABLE_RE = re.compile(r'<table[^>]*>', re.I)
+
+AUTHOR_PATTERNS = ['author', 'byline', 'written-by', 'contributor', 'rel="author"']
+DATE_PATTERNS = [re.compile(p, re.I) for p in
+                 ['datePublished', 'dateModified', 'datetime=', 'pubdate', 'article:published']]
+FAQ_PATTERNS = [re.compile(p, re.I) for p in [r'<details', r'faq', r'frequently.?asked', r'"FAQPage"']]
+ENTITY_PATTERNS = [re.compile(p, re.I) for p in [
+    r'"@type"\s*:\s*"Organization"',
+    r'"@type"\s*:\s*"LocalBusiness"',
+    r'"@type"\s*:\s*"Brand"',
+    r'itemtype.*schema\.org/(Organization|Person|Brand)',
+    r'rel="author"'
+]]
+STAT_PATTERNS = [re.compile(p, re.I) for p in [
+    r'\d+%',                    # Percentages
+    r'\$[\d,]+',                # Dollar amounts
+    r'study\s+(shows|found)',   # Research citations
+    r'according to',            # Source attribution
+    r'data\s+(shows|reveals)',  # Data-backed claims
+    r'\d+x\s+(faster|better|more)', # Comparison stats
+    r'(million|billion|trillion)', # Large numbers
+]]
+DIRECT_ANSWER_PATTERNS = [re.compile(p, re.I) for p in [
+    r'is defined as',
+    r'refers to',
+    r'means that',
+    r'the answer is',
+    r'in short,',
+    r'simply put,',
+    r'<dfn'
+]]
+
 
 def is_page_file(file_path: Path) -> bool:
     """Check if this file is likely a public-facing page."""
@@ -78,31 +116,8 @@ def is_page_file(file_path: Path) -> bool:
     return False
 
 
-def find_web_pages(project_path: Path) -> list:
-    """Find public-facing web pages only."""
-    patterns = ['**/*.html', '**/*.htm', '**/*.jsx', '**/*.tsx']
-    
-    files = []
-    for pattern in patterns:
-        for f in project_path.glob(pattern):
-            # Skip excluded directories
-            if any(skip in f.parts for skip in SKIP_DIRS):
-                continue
-            
-            # Check if it's likely a page
-            if is_page_file(f):
-                files.append(f)
-    
-    return files[:30]  # Limit to 30 pages
-
-
-def check_page(file_path: Path) -> dict:
+def check_page(name: str, content: str) -> dict:
     """Check a single web page for GEO elements."""
-    try:
-        content = file_path.read_text(encoding='utf-8', errors='ignore')
-    except Exception as e:
-        return {'file': str(file_path.name), 'passed': [], 'issues': [f"Error: {e}"], 'score': 0}
-    
     issues = []
     passed = []
     
@@ -120,8 +135,8 @@ def check_page(file_path: Path) -> dict:
         issues.append("No JSON-LD structured data (AI engines prefer structured content)")
     
     # 2. Heading Structure
-    h1_count = len(re.findall(r'<h1[^>]*>', content, re.I))
-    h2_count = len(re.findall(r'<h2[^>]*>', content, re.I))
+    h1_count = len(H1_RE.findall(content))
+    h2_count = len(H2_RE.findall(content))
     
     if h1_count == 1:
         passed.append("Single H1 heading (clear topic)")
@@ -136,74 +151,47 @@ def check_page(file_path: Path) -> dict:
         issues.append("Add more H2 subheadings for scannable content")
     
     # 3. Author Attribution (E-E-A-T signal)
-    author_patterns = ['author', 'byline', 'written-by', 'contributor', 'rel="author"']
-    has_author = any(p in content.lower() for p in author_patterns)
+    lower = content.lower()
+    has_author = any(p in lower for p in AUTHOR_PATTERNS)
     if has_author:
         passed.append("Author attribution found")
     else:
         issues.append("No author info (AI prefers attributed content)")
     
     # 4. Publication Date (Freshness signal)
-    date_patterns = ['datePublished', 'dateModified', 'datetime=', 'pubdate', 'article:published']
-    has_date = any(re.search(p, content, re.I) for p in date_patterns)
+    has_date = any(p.search(content) for p in DATE_PATTERNS)
     if has_date:
         passed.append("Publication date found")
     else:
         issues.append("No publication date (freshness matters for AI)")
     
     # 5. FAQ Section (Highly citable)
-    faq_patterns = [r'<details', r'faq', r'frequently.?asked', r'"FAQPage"']
-    has_faq = any(re.search(p, content, re.I) for p in faq_patterns)
+    has_faq = any(p.search(content) for p in FAQ_PATTERNS)
     if has_faq:
         passed.append("FAQ section detected (highly citable)")
     
     # 6. Lists (Structured content)
-    list_count = len(re.findall(r'<(ul|ol)[^>]*>', content, re.I))
+    list_count = len(LIST_RE.findall(content))
     if list_count >= 2:
         passed.append(f"{list_count} lists (structured content)")
     
     # 7. Tables (Comparison data)
-    table_count = len(re.findall(r'<table[^>]*>', content, re.I))
+    table_count = len(TABLE_RE.findall(content))
     if table_count >= 1:
         passed.append(f"{table_count} table(s) (comparison data)")
     
     # 8. Entity Recognition (E-E-A-T signal) - NEW 2025
-    entity_patterns = [
-        r'"@type"\s*:\s*"Organization"',
-        r'"@type"\s*:\s*"LocalBusiness"', 
-        r'"@type"\s*:\s*"Brand"',
-        r'itemtype.*schema\.org/(Organization|Person|Brand)',
-        r'rel="author"'
-    ]
-    has_entity = any(re.search(p, content, re.I) for p in entity_patterns)
+    has_entity = any(p.search(content) for p in ENTITY_PATTERNS)
     if has_entity:
         passed.append("Entity/Brand recognition (E-E-A-T)")
     
     # 9. Original Statistics/Data (AI citation magnet) - NEW 2025
-    stat_patterns = [
-        r'\d+%',                    # Percentages
-        r'\$[\d,]+',                # Dollar amounts
-        r'study\s+(shows|found)',   # Research citations
-        r'according to',            # Source attribution
-        r'data\s+(shows|reveals)',  # Data-backed claims
-        r'\d+x\s+(faster|better|more)', # Comparison stats
-        r'(million|billion|trillion)', # Large numbers
-    ]
-    stat_matches = sum(1 for p in stat_patterns if re.search(p, content, re.I))
+    stat_matches = sum(1 for p in STAT_PATTERNS if p.search(content))
     if stat_matches >= 2:
         passed.append("Original statistics/data (citation magnet)")
     
     # 10. Conversational/Direct answers - NEW 2025
-    direct_answer_patterns = [
-        r'is defined as',
-        r'refers to',
-        r'means that',
-        r'the answer is',
-        r'in short,',
-        r'simply put,',
-        r'<dfn'
-    ]
-    has_direct = any(re.search(p, content, re.I) for p in direct_answer_patterns)
+    has_direct = any(p.search(content) for p in DIRECT_ANSWER_PATTERNS)
     if has_direct:
         passed.append("Direct answer patterns (LLM-friendly)")
     
@@ -212,77 +200,97 @@ def check_page(file_path: Path) -> dict:
     score = (len(passed) / total * 100) if total > 0 else 0
     
     return {
-        'file': str(file_path.name),
+        'file': name,
         'passed': passed,
         'issues': issues,
         'score': round(score)
     }
 
 
-def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    target_path = Path(target).resolve()
-    
-    print("\n" + "=" * 60)
-    print("  GEO CHECKER - AI Citation Readiness Audit")
-    print("=" * 60)
-    print(f"Project: {target_path}")
-    print("-" * 60)
-    
-    # Find web pages only
-    pages = find_web_pages(target_path)
-    
-    if not pages:
-        print("\n[!] No public web pages found.")
-        print("    Looking for: HTML, JSX, TSX files in pages/app directories")
-        print("    Skipping: docs, tests, config files, node_modules")
-        output = {"script": "geo_checker", "pages_found": 0, "passed": True}
+class GeoPack(RulePack):
+    """Public web pages (first 30) scored for AI citation readiness."""
+
+    name = "geo_checker"
+    extensions = frozenset({'.html', '.htm', '.jsx', '.tsx'})
+    skip_dirs = frozenset(SKIP_DIRS)
+    max_files = 30
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(Path(project_path).resolve())
+        self.results = []
+
+    def accepts(self, file: SourceFile) -> bool:
+        return super().accepts(file) and is_page_file(file.rel)
+
+    def check(self, file: SourceFile) -> None:
+        try:
+            self.results.append(check_page(file.name, file.text))
+        except Exception as e:
+            self.results.append({'file': file.name, 'passed': [], 'issues': [f"Error: {e}"], 'score': 0})
+
+    def report(self) -> int:
+        print("\n" + "=" * 60)
+        print("  GEO CHECKER - AI Citation Readiness Audit")
+        print("=" * 60)
+        print(f"Project: {self.project_path}")
+        print("-" * 60)
+        
+        results = self.results
+        
+        if not results:
+            print("\n[!] No public web pages found.")
+            print("    Looking for: HTML, JSX, TSX files in pages/app directories")
+            print("    Skipping: docs, tests, config files, node_modules")
+            output = {"script": "geo_checker", "pages_found": 0, "passed": True}
+            print("\n" + json.dumps(output, indent=2))
+            return 0
+        
+        print(f"Found {len(results)} public pages to analyze\n")
+        
+        # Print results
+        for result in results:
+            status = "[OK]" if result['score'] >= 60 else "[!]"
+            print(f"{status} {result['file']}: {result['score']}%")
+            if result['issues'] and result['score'] < 60:
+                for issue in result['issues'][:2]:  # Show max 2 issues
+                    print(f"    - {issue}")
+        
+        # Average score
+        avg_score = sum(r['score'] for r in results) / len(results) if results else 0
+        
+        print("\n" + "=" * 60)
+        print(f"AVERAGE GEO SCORE: {avg_score:.0f}%")
+        print("=" * 60)
+        
+        if avg_score >= 80:
+            print("[OK] Excellent - Content well-optimized for AI citations")
+        elif avg_score >= 60:
+            print("[OK] Good - Some improvements recommended")
+        elif avg_score >= 40:
+            print("[!] Needs work - Add structured elements")
+        else:
+            print("[X] Poor - Content needs GEO optimization")
+        
+        # JSON output
+        output = {
+            "script": "geo_checker",
+            "project": str(self.project_path),
+            "pages_checked": len(results),
+            "average_score": round(avg_score),
+            "passed": avg_score >= 60
+        }
         print("\n" + json.dumps(output, indent=2))
-        sys.exit(0)
-    
-    print(f"Found {len(pages)} public pages to analyze\n")
-    
-    # Check each page
-    results = []
-    for page in pages:
-        result = check_page(page)
-        results.append(result)
-    
-    # Print results
-    for result in results:
-        status = "[OK]" if result['score'] >= 60 else "[!]"
-        print(f"{status} {result['file']}: {result['score']}%")
-        if result['issues'] and result['score'] < 60:
-            for issue in result['issues'][:2]:  # Show max 2 issues
-                print(f"    - {issue}")
-    
-    # Average score
-    avg_score = sum(r['score'] for r in results) / len(results) if results else 0
-    
-    print("\n" + "=" * 60)
-    print(f"AVERAGE GEO SCORE: {avg_score:.0f}%")
-    print("=" * 60)
-    
-    if avg_score >= 80:
-        print("[OK] Excellent - Content well-optimized for AI citations")
-    elif avg_score >= 60:
-        print("[OK] Good - Some improvements recommended")
-    elif avg_score >= 40:
-        print("[!] Needs work - Add structured elements")
-    else:
-        print("[X] Poor - Content needs GEO optimization")
-    
-    # JSON output
-    output = {
-        "script": "geo_checker",
-        "project": str(target_path),
-        "pages_checked": len(results),
-        "average_score": round(avg_score),
-        "passed": avg_score >= 60
-    }
-    print("\n" + json.dumps(output, indent=2))
-    
-    sys.exit(0 if avg_score >= 60 else 1)
+        
+        return 0 if avg_score >= 60 else 1
+
+
+RULE_PACK = GeoPack
+
+
+def main():
+    pack = GeoPack(sys.argv[1] if len(sys.argv) > 1 else ".")
+    Scanner(pack.project_path, [pack]).run()
+    sys.exit(pack.report())
 
 
 if __name__ == "__main__":
@@ -2,12 +2,23 @@
 """
 i18n Checker - Detects hardcoded strings and missing translations.
 Scans for untranslated text in React, Vue, and Python files.
+
+Usage:
+    python i18n_checker.py <project_path> [--no-cache] [--jobs N] [--time-budget SECONDS]
+
+Every code file is analyzed (in worker processes on large projects, unchanged
+files from the result cache). With --time-budget a random sample is analyzed
+when the full scan would take longer, and the report says so.
 """
 import sys
 import re
 import json
+import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding for Unicode output
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -50,22 +61,31 @@ I18N_PATTERNS = [
     r'i18n\.',             # Generic i18n
 ]
 
-def find_locale_files(project_path: Path) -> list:
-    """Find translation/locale files."""
-    patterns = [
-        "**/locales/**/*.json",
-        "**/translations/**/*.json",
-        "**/lang/**/*.json",
-        "**/i18n/**/*.json",
-        "**/messages/*.json",
-        "**/*.po",  # gettext
-    ]
-    
-    files = []
-    for pattern in patterns:
-        files.extend(project_path.glob(pattern))
-    
-    return [f for f in files if 'node_modules' not in str(f)]
+HARDCODED_RES = {kind: [re.compile(p) for p in patterns] for kind, patterns in HARDCODED_PATTERNS.items()}
+I18N_RES = [re.compile(p) for p in I18N_PATTERNS]
+
+# Code file extension -> HARDCODED_PATTERNS key
+CODE_EXTENSIONS = {
+    '.tsx': 'jsx', '.jsx': 'jsx', '.ts': 'jsx', '.js': 'jsx',
+    '.vue': 'vue',
+    '.py': 'python'
+}
+# Path fragments that exclude a code file from the analysis
+CODE_EXCLUDES = ['node_modules', '.git', 'dist', 'build', '__pycache__', 'venv', 'test', 'spec']
+
+# Directories holding translation files (JSON anywhere below them)
+LOCALE_DIRS = {'locales', 'translations', 'lang', 'i18n'}
+
+def is_locale_file(rel: Path) -> bool:
+    """Translation/locale files: JSON under a locales-like dir, messages/*.json, gettext .po."""
+    if 'node_modules' in str(rel):
+        return False
+    if rel.suffix == '.po':
+        return True
+    if rel.suffix != '.json':
+        return False
+    parents = rel.parts[:-1]
+    return bool(LOCALE_DIRS.intersection(parents)) or parents[-1:] == ('messages',)
 
 def check_locale_completeness(locale_files: list) -> dict:
     """Check if all locales have the same keys."""
@@ -128,114 +148,152 @@ def flatten_keys(d, prefix=''):
             keys.add(new_key)
     return keys
 
-def check_hardcoded_strings(project_path: Path) -> dict:
-    """Check for hardcoded strings in code files."""
-    issues = []
-    passed = []
-    
-    # Find code files
-    extensions = {
-        '.tsx': 'jsx', '.jsx': 'jsx', '.ts': 'jsx', '.js': 'jsx',
-        '.vue': 'vue',
-        '.py': 'python'
-    }
-    
-    code_files = []
-    for ext in extensions:
-        code_files.extend(project_path.rglob(f"*{ext}"))
-    
-    code_files = [f for f in code_files if not any(x in str(f) for x in 
-                  ['node_modules', '.git', 'dist', 'build', '__pycache__', 'venv', 'test', 'spec'])]
-    
-    if not code_files:
-        return {'passed': ["[!] No code files found"], 'issues': []}
-    
-    files_with_i18n = 0
-    files_with_hardcoded = 0
-    hardcoded_examples = []
-    
-    for file_path in code_files[:50]:  # Limit
+class I18nPack(RulePack):
+    """Locale completeness and hardcoded strings in code files."""
+
+    name = "i18n_checker"
+    extensions = frozenset(CODE_EXTENSIONS) | {'.json', '.po'}
+    skip_dirs = frozenset({'node_modules', '.git'})
+    cacheable = True
+    parallel = True
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(project_path)
+        self.locale_files = []
+        self.code_files = 0
+        self.files_with_i18n = 0
+        self.files_with_hardcoded = 0
+        self.hardcoded_examples = []
+
+    def accepts(self, file: SourceFile) -> bool:
+        if not super().accepts(file):
+            return False
+        if file.suffix in ('.json', '.po'):
+            return is_locale_file(file.rel)
+        return not any(x in str(file.rel) for x in CODE_EXCLUDES)
+
+    def analyze(self, file: SourceFile):
+        if file.suffix in ('.json', '.po'):
+            # Locale files are compared after the walk
+            return []
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            ext = file_path.suffix
-            file_type = extensions.get(ext, 'jsx')
-            
-            # Check for i18n usage
-            has_i18n = any(re.search(p, content) for p in I18N_PATTERNS)
-            if has_i18n:
-                files_with_i18n += 1
-            
-            # Check for hardcoded strings
-            patterns = HARDCODED_PATTERNS.get(file_type, [])
-            hardcoded_found = False
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, content)
-                if matches and not has_i18n:
-                    hardcoded_found = True
-                    if len(hardcoded_examples) < 5:
-                        hardcoded_examples.append(f"{file_path.name}: {str(matches[0])[:40]}...")
-            
-            if hardcoded_found:
-                files_with_hardcoded += 1
-                
-        except:
-            continue
-    
-    passed.append(f"[OK] Analyzed {len(code_files)} code files")
-    
-    if files_with_i18n > 0:
-        passed.append(f"[OK] {files_with_i18n} files use i18n")
-    
-    if files_with_hardcoded > 0:
-        issues.append(f"[X] {files_with_hardcoded} files may have hardcoded strings")
-        for ex in hardcoded_examples:
-            issues.append(f"   → {ex}")
-    else:
-        passed.append("[OK] No obvious hardcoded strings detected")
-    
-    return {'passed': passed, 'issues': issues}
+            return self.check_hardcoded_strings(file)
+        except Exception:
+            return None
+
+    def check_hardcoded_strings(self, file: SourceFile) -> list:
+        """Check a code file for hardcoded strings: [uses i18n, first match of each hardcoded pattern]."""
+        content = file.text
+        file_type = CODE_EXTENSIONS.get(file.suffix, 'jsx')
+        
+        # Check for i18n usage
+        has_i18n = any(p.search(content) for p in I18N_RES)
+        
+        # Check for hardcoded strings
+        examples = []
+        if not has_i18n:
+            for pattern in HARDCODED_RES.get(file_type, []):
+                matches = pattern.findall(content)
+                if matches:
+                    examples.append(str(matches[0])[:40])
+        
+        return [has_i18n, examples]
+
+    def merge(self, file: SourceFile, findings) -> None:
+        if file.suffix in ('.json', '.po'):
+            self.locale_files.append(file.path)
+            return
+        self.code_files += 1
+        if findings is None:
+            return
+        has_i18n, examples = findings
+        if has_i18n:
+            self.files_with_i18n += 1
+        if examples:
+            self.files_with_hardcoded += 1
+            for example in examples:
+                if len(self.hardcoded_examples) < 5:
+                    self.hardcoded_examples.append(f"{file.name}: {example}...")
+
+    def code_result(self) -> dict:
+        issues = []
+        passed = []
+        
+        if not self.code_files + self.unsampled:
+            return {'passed': ["[!] No code files found"], 'issues': []}
+        
+        if self.unsampled:
+            passed.append(f"[!] Time budget: analyzed a random sample of {self.code_files} of "
+                          f"{self.code_files + self.unsampled} code files (counts extrapolated)")
+        else:
+            passed.append(f"[OK] Analyzed {self.code_files} code files")
+        
+        files_with_i18n = self.extrapolate(self.files_with_i18n, self.code_files)
+        files_with_hardcoded = self.extrapolate(self.files_with_hardcoded, self.code_files)
+        
+        if files_with_i18n > 0:
+            passed.append(f"[OK] {files_with_i18n} files use i18n")
+        
+        if files_with_hardcoded > 0:
+            issues.append(f"[X] {files_with_hardcoded} files may have hardcoded strings")
+            for ex in self.hardcoded_examples:
+                issues.append(f"   → {ex}")
+        else:
+            passed.append("[OK] No obvious hardcoded strings detected")
+        
+        return {'passed': passed, 'issues': issues}
+
+    def report(self) -> int:
+        print("\n" + "=" * 60)
+        print("  i18n CHECKER - Internationalization Audit")
+        print("=" * 60 + "\n")
+        
+        locale_result = check_locale_completeness(self.locale_files)
+        code_result = self.code_result()
+        
+        # Print results
+        print("[LOCALE FILES]")
+        print("-" * 40)
+        for item in locale_result['passed']:
+            print(f"  {item}")
+        for item in locale_result['issues']:
+            print(f"  {item}")
+        
+        print("\n[CODE ANALYSIS]")
+        print("-" * 40)
+        for item in code_result['passed']:
+            print(f"  {item}")
+        for item in code_result['issues']:
+            print(f"  {item}")
+        
+        # Summary
+        critical_issues = sum(1 for i in locale_result['issues'] + code_result['issues'] if i.startswith("[X]"))
+        
+        print("\n" + "=" * 60)
+        if critical_issues == 0:
+            print("[OK] i18n CHECK: PASSED")
+            return 0
+        else:
+            print(f"[X] i18n CHECK: {critical_issues} issues found")
+            return 1
+
+
+RULE_PACK = I18nPack
+
 
 def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    project_path = Path(target)
-    
-    print("\n" + "=" * 60)
-    print("  i18n CHECKER - Internationalization Audit")
-    print("=" * 60 + "\n")
-    
-    # Check locale files
-    locale_files = find_locale_files(project_path)
-    locale_result = check_locale_completeness(locale_files)
-    
-    # Check hardcoded strings
-    code_result = check_hardcoded_strings(project_path)
-    
-    # Print results
-    print("[LOCALE FILES]")
-    print("-" * 40)
-    for item in locale_result['passed']:
-        print(f"  {item}")
-    for item in locale_result['issues']:
-        print(f"  {item}")
-    
-    print("\n[CODE ANALYSIS]")
-    print("-" * 40)
-    for item in code_result['passed']:
-        print(f"  {item}")
-    for item in code_result['issues']:
-        print(f"  {item}")
-    
-    # Summary
-    critical_issues = sum(1 for i in locale_result['issues'] + code_result['issues'] if i.startswith("[X]"))
+    parser = argparse.ArgumentParser(description="Detect hardcoded strings and missing translations")
+    parser.add_argument("project_path", nargs="?", default=".", help="Project directory")
+    parser.add_argument("--no-cache", action="store_true", help="Analyze every file again")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Analyze a random sample if all code files would take longer")
+    args = parser.parse_args()
     
-    print("\n" + "=" * 60)
-    if critical_issues == 0:
-        print("[OK] i18n CHECK: PASSED")
-        sys.exit(0)
-    else:
-        print(f"[X] i18n CHECK: {critical_issues} issues found")
-        sys.exit(1)
+    pack = I18nPack(args.project_path)
+    Scanner(pack.project_path, [pack], cache=not args.no_cache, jobs=args.jobs,
+            time_budget=args.time_budget).run().print_cache_summary()
+    sys.exit(pack.report())
 
 if __name__ == "__main__":
     main()
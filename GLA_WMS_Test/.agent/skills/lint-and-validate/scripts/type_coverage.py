@@ -2,12 +2,23 @@
 """
 Type Coverage Checker - Measures TypeScript/Python type coverage.
 Identifies untyped functions, any usage, and type safety issues.
+
+Usage:
+    python type_coverage.py <project_path> [--no-cache] [--jobs N] [--time-budget SECONDS]
+
+Every TypeScript/Python file is analyzed (in worker processes on large
+projects, unchanged files from the result cache). With --time-budget a
+random sample is analyzed when the full scan would take longer, and the
+report says so and extrapolates the counts.
 """
 import sys
 import re
-import subprocess
+import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding for Unicode output
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -15,159 +26,225 @@ try:
 except AttributeError:
     pass  # Python < 3.7
 
-def check_typescript_coverage(project_path: Path) -> dict:
-    """Check TypeScript type coverage."""
-    issues = []
-    passed = []
-    stats = {'any_count': 0, 'untyped_functions': 0, 'total_functions': 0}
-    
-    ts_files = list(project_path.rglob("*.ts")) + list(project_path.rglob("*.tsx"))
-    ts_files = [f for f in ts_files if 'node_modules' not in str(f) and '.d.ts' not in str(f)]
-    
-    if not ts_files:
-        return {'type': 'typescript', 'files': 0, 'passed': [], 'issues': ["[!] No TypeScript files found"], 'stats': stats}
-    
-    for file_path in ts_files[:30]:  # Limit
+TS_ANY_RE = re.compile(r':\s*any\b')
+# function name(params) { - no return type
+TS_UNTYPED_FUNCTION_RE = re.compile(r'function\s+\w+\s*\([^)]*\)\s*{')
+# Arrow functions without types: const fn = (x) => or (x) =>
+TS_UNTYPED_ARROW_RE = re.compile(r'=\s*\([^:)]*\)\s*=>')
+TS_TYPED_FUNCTION_RE = re.compile(r'function\s+\w+\s*\([^)]*\)\s*:\s*\w+')
+TS_TYPED_ARROW_RE = re.compile(r':\s*\([^)]*\)\s*=>\s*\w+')
+
+PY_ANY_RE = re.compile(r':\s*Any\b')
+PY_TYPED_PARAMS_RE = re.compile(r'def\s+\w+\s*\([^)]*:[^)]+\)')
+PY_TYPED_RETURN_RE = re.compile(r'def\s+\w+\s*\([^)]*\)\s*->')
+PY_FUNCTION_RE = re.compile(r'def\s+\w+\s*\(')
+
+PY_EXCLUDES = ['venv', '__pycache__', '.git', 'node_modules']
+
+class TypeCoveragePack(RulePack):
+    """TypeScript `any`/untyped functions and Python type hints coverage."""
+
+    name = "type_coverage"
+    extensions = frozenset({'.ts', '.tsx', '.py'})
+    skip_dirs = frozenset({'node_modules', '.git'})
+    cacheable = True
+    parallel = True
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(project_path)
+        self.ts_files = 0
+        self.py_files = 0
+        # Files left out by the time budget
+        self.ts_unsampled = 0
+        self.py_unsampled = 0
+        self.ts_stats = {'any_count': 0, 'untyped_functions': 0, 'total_functions': 0}
+        self.py_stats = {'untyped_functions': 0, 'typed_functions': 0, 'any_count': 0}
+
+    def accepts(self, file: SourceFile) -> bool:
+        if not super().accepts(file):
+            return False
+        rel = str(file.rel)
+        if file.suffix == '.py':
+            return not any(x in rel for x in PY_EXCLUDES)
+        return 'node_modules' not in rel and '.d.ts' not in rel
+
+    def analyze(self, file: SourceFile):
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            
-            # Count 'any' usage
-            any_matches = re.findall(r':\s*any\b', content)
-            stats['any_count'] += len(any_matches)
-            
-            # Find functions without return types
-            # function name(params) { - no return type
-            untyped = re.findall(r'function\s+\w+\s*\([^)]*\)\s*{', content)
-            # Arrow functions without types: const fn = (x) => or (x) =>
-            untyped += re.findall(r'=\s*\([^:)]*\)\s*=>', content)
-            stats['untyped_functions'] += len(untyped)
-            
-            # Count typed functions
-            typed = re.findall(r'function\s+\w+\s*\([^)]*\)\s*:\s*\w+', content)
-            typed += re.findall(r':\s*\([^)]*\)\s*=>\s*\w+', content)
-            stats['total_functions'] += len(typed) + len(untyped)
-            
+            if file.suffix == '.py':
+                return self.check_python_file(file)
+            return self.check_typescript_file(file)
         except Exception:
-            continue
-    
-    # Analyze results
-    if stats['any_count'] == 0:
-        passed.append("[OK] No 'any' types found")
-    elif stats['any_count'] <= 5:
-        issues.append(f"[!] {stats['any_count']} 'any' types found (acceptable)")
-    else:
-        issues.append(f"[X] {stats['any_count']} 'any' types found (too many)")
-    
-    if stats['total_functions'] > 0:
-        typed_ratio = (stats['total_functions'] - stats['untyped_functions']) / stats['total_functions'] * 100
-        if typed_ratio >= 80:
-            passed.append(f"[OK] Type coverage: {typed_ratio:.0f}%")
-        elif typed_ratio >= 50:
-            issues.append(f"[!] Type coverage: {typed_ratio:.0f}% (improve)")
+            return None
+
+    def merge(self, file: SourceFile, counts) -> None:
+        if file.suffix == '.py':
+            self.py_files += 1
+            if counts:
+                any_count, typed, functions = counts
+                self.py_stats['any_count'] += any_count
+                self.py_stats['typed_functions'] += typed
+                self.py_stats['untyped_functions'] += functions - typed
         else:
-            issues.append(f"[X] Type coverage: {typed_ratio:.0f}% (too low)")
-    
-    passed.append(f"[OK] Analyzed {len(ts_files)} TypeScript files")
-    
-    return {'type': 'typescript', 'files': len(ts_files), 'passed': passed, 'issues': issues, 'stats': stats}
+            self.ts_files += 1
+            if counts:
+                any_count, untyped, typed = counts
+                self.ts_stats['any_count'] += any_count
+                self.ts_stats['untyped_functions'] += untyped
+                self.ts_stats['total_functions'] += typed + untyped
 
-def check_python_coverage(project_path: Path) -> dict:
-    """Check Python type hints coverage."""
-    issues = []
-    passed = []
-    stats = {'untyped_functions': 0, 'typed_functions': 0, 'any_count': 0}
-    
-    py_files = list(project_path.rglob("*.py"))
-    py_files = [f for f in py_files if not any(x in str(f) for x in ['venv', '__pycache__', '.git', 'node_modules'])]
-    
-    if not py_files:
-        return {'type': 'python', 'files': 0, 'passed': [], 'issues': ["[!] No Python files found"], 'stats': stats}
-    
-    for file_path in py_files[:30]:  # Limit
-        try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            
-            # Count Any usage
-            any_matches = re.findall(r':\s*Any\b', content)
-            stats['any_count'] += len(any_matches)
-            
-            # Find functions with type hints
-            typed_funcs = re.findall(r'def\s+\w+\s*\([^)]*:[^)]+\)', content)
-            typed_funcs += re.findall(r'def\s+\w+\s*\([^)]*\)\s*->', content)
-            stats['typed_functions'] += len(typed_funcs)
-            
-            # Find functions without type hints
-            all_funcs = re.findall(r'def\s+\w+\s*\(', content)
-            stats['untyped_functions'] += len(all_funcs) - len(typed_funcs)
-            
-        except Exception:
-            continue
-    
-    total = stats['typed_functions'] + stats['untyped_functions']
-    
-    if total > 0:
-        typed_ratio = stats['typed_functions'] / total * 100
-        if typed_ratio >= 70:
-            passed.append(f"[OK] Type hints coverage: {typed_ratio:.0f}%")
-        elif typed_ratio >= 40:
-            issues.append(f"[!] Type hints coverage: {typed_ratio:.0f}%")
+    def skipped(self, file: SourceFile) -> None:
+        super().skipped(file)
+        if file.suffix == '.py':
+            self.py_unsampled += 1
         else:
-            issues.append(f"[X] Type hints coverage: {typed_ratio:.0f}% (add type hints)")
-    
-    if stats['any_count'] == 0:
-        passed.append("[OK] No 'Any' types found")
-    elif stats['any_count'] <= 3:
-        issues.append(f"[!] {stats['any_count']} 'Any' types found")
-    else:
-        issues.append(f"[X] {stats['any_count']} 'Any' types found")
-    
-    passed.append(f"[OK] Analyzed {len(py_files)} Python files")
-    
-    return {'type': 'python', 'files': len(py_files), 'passed': passed, 'issues': issues, 'stats': stats}
+            self.ts_unsampled += 1
+
+    def check_typescript_file(self, file: SourceFile) -> list:
+        """[any count, untyped functions, typed functions] of a TypeScript file."""
+        content = file.text
+        
+        # Count 'any' usage
+        any_count = len(TS_ANY_RE.findall(content))
+        
+        # Find functions without return types
+        untyped = len(TS_UNTYPED_FUNCTION_RE.findall(content)) + len(TS_UNTYPED_ARROW_RE.findall(content))
+        
+        # Count typed functions
+        typed = len(TS_TYPED_FUNCTION_RE.findall(content)) + len(TS_TYPED_ARROW_RE.findall(content))
+        return [any_count, untyped, typed]
+
+    def check_python_file(self, file: SourceFile) -> list:
+        """[Any count, functions with type hints, functions] of a Python file."""
+        content = file.text
+        
+        # Count Any usage
+        any_count = len(PY_ANY_RE.findall(content))
+        
+        # Find functions with type hints
+        typed_funcs = len(PY_TYPED_PARAMS_RE.findall(content)) + len(PY_TYPED_RETURN_RE.findall(content))
+        
+        # All functions (the ones without type hints are the difference)
+        return [any_count, typed_funcs, len(PY_FUNCTION_RE.findall(content))]
+
+    def sample_note(self, analyzed: int, unsampled: int, kind: str) -> str:
+        if not unsampled:
+            return f"[OK] Analyzed {analyzed} {kind} files"
+        return (f"[!] Time budget: analyzed a random sample of {analyzed} of {analyzed + unsampled} "
+                f"{kind} files (counts extrapolated)")
+
+    def typescript_result(self) -> dict:
+        """TypeScript type coverage."""
+        issues = []
+        passed = []
+        stats = dict(self.ts_stats)
+        stats['any_count'] = self.extrapolate(stats['any_count'], self.ts_files, self.ts_unsampled)
+        
+        if not self.ts_files + self.ts_unsampled:
+            return {'type': 'typescript', 'files': 0, 'passed': [], 'issues': ["[!] No TypeScript files found"], 'stats': stats}
+        
+        # Analyze results
+        if stats['any_count'] == 0:
+            passed.append("[OK] No 'any' types found")
+        elif stats['any_count'] <= 5:
+            issues.append(f"[!] {stats['any_count']} 'any' types found (acceptable)")
+        else:
+            issues.append(f"[X] {stats['any_count']} 'any' types found (too many)")
+        
+        if stats['total_functions'] > 0:
+            typed_ratio = (stats['total_functions'] - stats['untyped_functions']) / stats['total_functions'] * 100
+            if typed_ratio >= 80:
+                passed.append(f"[OK] Type coverage: {typed_ratio:.0f}%")
+            elif typed_ratio >= 50:
+                issues.append(f"[!] Type coverage: {typed_ratio:.0f}% (improve)")
+            else:
+                issues.append(f"[X] Type coverage: {typed_ratio:.0f}% (too low)")
+        
+        note = self.sample_note(self.ts_files, self.ts_unsampled, "TypeScript")
+        (issues if self.ts_unsampled else passed).append(note)
+        
+        return {'type': 'typescript', 'files': self.ts_files + self.ts_unsampled, 'passed': passed, 'issues': issues, 'stats': stats}
+
+    def python_result(self) -> dict:
+        """Python type hints coverage."""
+        issues = []
+        passed = []
+        stats = dict(self.py_stats)
+        stats['any_count'] = self.extrapolate(stats['any_count'], self.py_files, self.py_unsampled)
+        
+        if not self.py_files + self.py_unsampled:
+            return {'type': 'python', 'files': 0, 'passed': [], 'issues': ["[!] No Python files found"], 'stats': stats}
+        
+        total = stats['typed_functions'] + stats['untyped_functions']
+        
+        if total > 0:
+            typed_ratio = stats['typed_functions'] / total * 100
+            if typed_ratio >= 70:
+                passed.append(f"[OK] Type hints coverage: {typed_ratio:.0f}%")
+            elif typed_ratio >= 40:
+                issues.append(f"[!] Type hints coverage: {typed_ratio:.0f}%")
+            else:
+                issues.append(f"[X] Type hints coverage: {typed_ratio:.0f}% (add type hints)")
+        
+        if stats['any_count'] == 0:
+            passed.append("[OK] No 'Any' types found")
+        elif stats['any_count'] <= 3:
+            issues.append(f"[!] {stats['any_count']} 'Any' types found")
+        else:
+            issues.append(f"[X] {stats['any_count']} 'Any' types found")
+        
+        note = self.sample_note(self.py_files, self.py_unsampled, "Python")
+        (issues if self.py_unsampled else passed).append(note)
+        
+        return {'type': 'python', 'files': self.py_files + self.py_unsampled, 'passed': passed, 'issues': issues, 'stats': stats}
+
+    def report(self) -> int:
+        print("\n" + "=" * 60)
+        print("  TYPE COVERAGE CHECKER")
+        print("=" * 60 + "\n")
+        
+        results = [r for r in (self.typescript_result(), self.python_result()) if r['files'] > 0]
+        
+        if not results:
+            print("[!] No TypeScript or Python files found.")
+            return 0
+        
+        # Print results
+        critical_issues = 0
+        for result in results:
+            print(f"\n[{result['type'].upper()}]")
+            print("-" * 40)
+            for item in result['passed']:
+                print(f"  {item}")
+            for item in result['issues']:
+                print(f"  {item}")
+                if item.startswith("[X]"):
+                    critical_issues += 1
+        
+        print("\n" + "=" * 60)
+        if critical_issues == 0:
+            print("[OK] TYPE COVERAGE: ACCEPTABLE")
+            return 0
+        else:
+            print(f"[X] TYPE COVERAGE: {critical_issues} critical issues")
+            return 1
+
+
+RULE_PACK = TypeCoveragePack
+
 
 def main():
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    project_path = Path(target)
-    
-    print("\n" + "=" * 60)
-    print("  TYPE COVERAGE CHECKER")
-    print("=" * 60 + "\n")
-    
-    results = []
-    
-    # Check TypeScript
-    ts_result = check_typescript_coverage(project_path)
-    if ts_result['files'] > 0:
-        results.append(ts_result)
-    
-    # Check Python
-    py_result = check_python_coverage(project_path)
-    if py_result['files'] > 0:
-        results.append(py_result)
-    
-    if not results:
-        print("[!] No TypeScript or Python files found.")
-        sys.exit(0)
-    
-    # Print results
-    critical_issues = 0
-    for result in results:
-        print(f"\n[{result['type'].upper()}]")
-        print("-" * 40)
-        for item in result['passed']:
-            print(f"  {item}")
-        for item in result['issues']:
-            print(f"  {item}")
-            if item.startswith("[X]"):
-                critical_issues += 1
-    
-    print("\n" + "=" * 60)
-    if critical_issues == 0:
-        print("[OK] TYPE COVERAGE: ACCEPTABLE")
-        sys.exit(0)
-    else:
-        print(f"[X] TYPE COVERAGE: {critical_issues} critical issues")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Measure TypeScript/Python type coverage")
+    parser.add_argument("project_path", nargs="?", default=".", help="Project directory")
+    parser.add_argument("--no-cache", action="store_true", help="Analyze every file again")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Analyze a random sample if all files would take longer")
+    args = parser.parse_args()
+    
+    pack = TypeCoveragePack(args.project_path)
+    Scanner(pack.project_path, [pack], cache=not args.no_cache, jobs=args.jobs,
+            time_budget=args.time_budget).run().print_cache_summary()
+    sys.exit(pack.report())
 
 if __name__ == "__main__":
     main()
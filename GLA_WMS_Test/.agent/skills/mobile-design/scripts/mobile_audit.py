@@ -71,8 +71,18 @@ import re
 import json
 from pathlib import Path
 
-class MobileAuditor:
-    def __init__(self):
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
+class MobileAuditor(RulePack):
+    name = "mobile_audit"
+    extensions = frozenset({'.tsx', '.ts', '.jsx', '.js', '.dart'})
+    skip_dirs = frozenset({'node_modules', '.git', 'dist', 'build', '.next', 'ios', 'android', '.idea'})
+    cacheable = True
+
+    def __init__(self, project_path=".", as_json: bool = False):
+        super().__init__(project_path)
+        self.as_json = as_json
         self.issues = []
         self.warnings = []
         self.passed_count = 0
@@ -82,11 +92,30 @@ class MobileAuditor:
         try:
             with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
                 content = f.read()
-        except:
+        except OSError:
             return
+        self.audit_content(os.path.basename(filepath), content)
 
+    def analyze(self, file: SourceFile):
+        try:
+            content = file.text
+        except OSError:
+            return None
+        scratch = type(self)(self.project_path)
+        scratch.audit_content(file.name, content)
+        return [scratch.issues, scratch.warnings, scratch.passed_count]
+
+    def merge(self, file: SourceFile, findings) -> None:
+        if findings is None:
+            return
+        issues, warnings, passed_count = findings
+        self.files_checked += 1
+        self.issues.extend(issues)
+        self.warnings.extend(warnings)
+        self.passed_count += passed_count
+
+    def audit_content(self, filename: str, content: str) -> None:
         self.files_checked += 1
-        filename = os.path.basename(filepath)
 
         # Detect framework
         is_react_native = bool(re.search(r'react-native|@react-navigation|React\.Native', content))
@@ -611,12 +640,7 @@ class MobileAuditor:
             self.passed_count += 1  # Hermes is default in RN 0.70+
 
     def audit_directory(self, directory: str) -> None:
-        extensions = {'.tsx', '.ts', '.jsx', '.js', '.dart'}
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in {'node_modules', '.git', 'dist', 'build', '.next', 'ios', 'android', 'build', '.idea'}]
-            for file in files:
-                if Path(file).suffix in extensions:
-                    self.audit_file(os.path.join(root, file))
+        Scanner(directory, [self]).run()
 
     def get_report(self):
         return {
@@ -627,41 +651,40 @@ class MobileAuditor:
             "compliant": len(self.issues) == 0
         }
 
+    def report(self) -> int:
+        report = self.get_report()
+
+        if self.as_json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(f"\n[MOBILE AUDIT] {report['files_checked']} mobile files checked")
+            print("-" * 50)
+            if report['issues']:
+                print(f"[!] ISSUES ({len(report['issues'])}):")
+                for i in report['issues'][:10]:
+                    print(f"  - {i}")
+            if report['warnings']:
+                print(f"[*] WARNINGS ({len(report['warnings'])}):")
+                for w in report['warnings'][:15]:
+                    print(f"  - {w}")
+            print(f"[+] PASSED CHECKS: {report['passed_checks']}")
+            status = "PASS" if report['compliant'] else "FAIL"
+            print(f"STATUS: {status}")
+
+        return 0 if report['compliant'] else 1
+
+
+RULE_PACK = MobileAuditor
+
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python mobile_audit.py <directory>")
         sys.exit(1)
 
-    path = sys.argv[1]
-    is_json = "--json" in sys.argv
-
-    auditor = MobileAuditor()
-    if os.path.isfile(path):
-        auditor.audit_file(path)
-    else:
-        auditor.audit_directory(path)
-
-    report = auditor.get_report()
-
-    if is_json:
-        print(json.dumps(report, indent=2))
-    else:
-        print(f"\n[MOBILE AUDIT] {report['files_checked']} mobile files checked")
-        print("-" * 50)
-        if report['issues']:
-            print(f"[!] ISSUES ({len(report['issues'])}):")
-            for i in report['issues'][:10]:
-                print(f"  - {i}")
-        if report['warnings']:
-            print(f"[*] WARNINGS ({len(report['warnings'])}):")
-            for w in report['warnings'][:15]:
-                print(f"  - {w}")
-        print(f"[+] PASSED CHECKS: {report['passed_checks']}")
-        status = "PASS" if report['compliant'] else "FAIL"
-        print(f"STATUS: {status}")
-
-    sys.exit(0 if report['compliant'] else 1)
+    auditor = MobileAuditor(sys.argv[1], as_json="--json" in sys.argv)
+    Scanner(sys.argv[1], [auditor], cache="--no-cache" not in sys.argv).run().print_cache_summary()
+    sys.exit(auditor.report())
 
 
 if __name__ == "__main__":
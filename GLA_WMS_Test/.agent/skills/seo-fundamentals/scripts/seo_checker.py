@@ -15,7 +15,7 @@ WHAT IT CHECKS:
     - Only files that are likely PUBLIC pages
 
 Usage:
-    python seo_checker.py <project_path>
+    python seo_checker.py <project_path> [--no-cache]
 """
 import sys
 import json
@@ -23,6 +23,9 @@ import re
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -44,6 +47,9 @@ SKIP_PATTERNS = [
     '.test.', '.spec.', '_test.', '_spec.'
 ]
 
+H1_RE = re.compile(r'<h1[^>]*>', re.I)
+IMG_RE = re.compile(r'<img[^>]+>', re.I)
+
 
 def is_page_file(file_path: Path) -> bool:
     """Check if this file is likely a public-facing page."""
@@ -75,59 +81,36 @@ def is_page_file(file_path: Path) -> bool:
     return False
 
 
-def find_pages(project_path: Path) -> list:
-    """Find page files to check."""
-    patterns = ['**/*.html', '**/*.htm', '**/*.jsx', '**/*.tsx']
-    
-    files = []
-    for pattern in patterns:
-        for f in project_path.glob(pattern):
-            # Skip excluded directories
-            if any(skip in f.parts for skip in SKIP_DIRS):
-                continue
-            
-            # Check if it's likely a page
-            if is_page_file(f):
-                files.append(f)
-    
-    return files[:50]  # Limit to 50 files
-
-
-def check_page(file_path: Path) -> dict:
+def check_page(name: str, content: str) -> dict:
     """Check a single page for SEO issues."""
     issues = []
-    
-    try:
-        content = file_path.read_text(encoding='utf-8', errors='ignore')
-    except Exception as e:
-        return {"file": str(file_path.name), "issues": [f"Error: {e}"]}
+    lower = content.lower()
     
     # Detect if this is a layout/template file (has Head component)
-    is_layout = 'Head>' in content or '<head' in content.lower()
+    is_layout = 'Head>' in content or '<head' in lower
     
     # 1. Title tag
-    has_title = '<title' in content.lower() or 'title=' in content or 'Head>' in content
+    has_title = '<title' in lower or 'title=' in content or 'Head>' in content
     if not has_title and is_layout:
         issues.append("Missing <title> tag")
     
     # 2. Meta description
-    has_description = 'name="description"' in content.lower() or 'name=\'description\'' in content.lower()
+    has_description = 'name="description"' in lower or 'name=\'description\'' in lower
     if not has_description and is_layout:
         issues.append("Missing meta description")
     
     # 3. Open Graph tags
-    has_og = 'og:' in content or 'property="og:' in content.lower()
+    has_og = 'og:' in content or 'property="og:' in lower
     if not has_og and is_layout:
         issues.append("Missing Open Graph tags")
     
     # 4. Heading hierarchy - multiple H1s
-    h1_matches = re.findall(r'<h1[^>]*>', content, re.I)
+    h1_matches = H1_RE.findall(content)
     if len(h1_matches) > 1:
         issues.append(f"Multiple H1 tags ({len(h1_matches)})")
     
     # 5. Images without alt
-    img_pattern = r'<img[^>]+>'
-    imgs = re.findall(img_pattern, content, re.I)
+    imgs = IMG_RE.findall(content)
     for img in imgs:
         if 'alt=' not in img.lower():
             issues.append("Image missing alt attribute")
@@ -140,79 +123,107 @@ def check_page(file_path: Path) -> dict:
     # has_canonical = 'rel="canonical"' in content.lower()
     
     return {
-        "file": str(file_path.name),
+        "file": name,
         "issues": issues
     }
 
 
-def main():
-    project_path = Path(sys.argv[1] if len(sys.argv) > 1 else ".").resolve()
-    
-    print(f"\n{'='*60}")
-    print(f"  SEO CHECKER - Search Engine Optimization Audit")
-    print(f"{'='*60}")
-    print(f"Project: {project_path}")
-    print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("-"*60)
-    
-    # Find pages
-    pages = find_pages(project_path)
-    
-    if not pages:
-        print("\n[!] No page files found.")
-        print("    Looking for: HTML, JSX, TSX in pages/app/routes directories")
-        output = {"script": "seo_checker", "files_checked": 0, "passed": True}
-        print("\n" + json.dumps(output, indent=2))
-        sys.exit(0)
-    
-    print(f"Found {len(pages)} page files to analyze\n")
-    
-    # Check each page
-    all_issues = []
-    for f in pages:
-        result = check_page(f)
-        if result["issues"]:
-            all_issues.append(result)
-    
-    # Summary
-    print("=" * 60)
-    print("SEO ANALYSIS RESULTS")
-    print("=" * 60)
-    
-    if all_issues:
-        # Group by issue type
-        issue_counts = {}
-        for item in all_issues:
-            for issue in item["issues"]:
-                issue_counts[issue] = issue_counts.get(issue, 0) + 1
+class SeoPack(RulePack):
+    """Public page files (first 50) checked for SEO basics."""
+
+    name = "seo_checker"
+    extensions = frozenset({'.html', '.htm', '.jsx', '.tsx'})
+    skip_dirs = frozenset(SKIP_DIRS)
+    max_files = 50
+    cacheable = True
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(Path(project_path).resolve())
+        self.files_checked = 0
+        self.all_issues = []
+
+    def accepts(self, file: SourceFile) -> bool:
+        return super().accepts(file) and is_page_file(file.rel)
+
+    def analyze(self, file: SourceFile) -> list:
+        try:
+            return check_page(file.name, file.text)["issues"]
+        except Exception as e:
+            return [f"Error: {e}"]
+
+    def merge(self, file: SourceFile, issues: list) -> None:
+        self.files_checked += 1
+        if issues:
+            self.all_issues.append({"file": file.name, "issues": issues})
+
+    def report(self) -> int:
+        print(f"\n{'='*60}")
+        print(f"  SEO CHECKER - Search Engine Optimization Audit")
+        print(f"{'='*60}")
+        print(f"Project: {self.project_path}")
+        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("-"*60)
         
-        print("\nIssue Summary:")
-        for issue, count in sorted(issue_counts.items(), key=lambda x: -x[1]):
-            print(f"  [{count}] {issue}")
+        if not self.files_checked:
+            print("\n[!] No page files found.")
+            print("    Looking for: HTML, JSX, TSX in pages/app/routes directories")
+            output = {"script": "seo_checker", "files_checked": 0, "passed": True}
+            print("\n" + json.dumps(output, indent=2))
+            return 0
         
-        print(f"\nAffected files ({len(all_issues)}):")
-        for item in all_issues[:5]:
-            print(f"  - {item['file']}")
-        if len(all_issues) > 5:
-            print(f"  ... and {len(all_issues) - 5} more")
-    else:
-        print("\n[OK] No SEO issues found!")
-    
-    total_issues = sum(len(item["issues"]) for item in all_issues)
-    passed = total_issues == 0
-    
-    output = {
-        "script": "seo_checker",
-        "project": str(project_path),
-        "files_checked": len(pages),
-        "files_with_issues": len(all_issues),
-        "issues_found": total_issues,
-        "passed": passed
-    }
-    
-    print("\n" + json.dumps(output, indent=2))
-    
-    sys.exit(0 if passed else 1)
+        print(f"Found {self.files_checked} page files to analyze\n")
+        
+        all_issues = self.all_issues
+        
+        # Summary
+        print("=" * 60)
+        print("SEO ANALYSIS RESULTS")
+        print("=" * 60)
+        
+        if all_issues:
+            # Group by issue type
+            issue_counts = {}
+            for item in all_issues:
+                for issue in item["issues"]:
+                    issue_counts[issue] = issue_counts.get(issue, 0) + 1
+            
+            print("\nIssue Summary:")
+            for issue, count in sorted(issue_counts.items(), key=lambda x: -x[1]):
+                print(f"  [{count}] {issue}")
+            
+            print(f"\nAffected files ({len(all_issues)}):")
+            for item in all_issues[:5]:
+                print(f"  - {item['file']}")
+            if len(all_issues) > 5:
+                print(f"  ... and {len(all_issues) - 5} more")
+        else:
+            print("\n[OK] No SEO issues found!")
+        
+        total_issues = sum(len(item["issues"]) for item in all_issues)
+        passed = total_issues == 0
+        
+        output = {
+            "script": "seo_checker",
+            "project": str(self.project_path),
+            "files_checked": self.files_checked,
+            "files_with_issues": len(all_issues),
+            "issues_found": total_issues,
+            "passed": passed
+        }
+        
+        print("\n" + json.dumps(output, indent=2))
+        
+        return 0 if passed else 1
+
+
+RULE_PACK = SeoPack
+
+
+def main():
+    paths = [a for a in sys.argv[1:] if not a.startswith("--")]
+    pack = SeoPack(paths[0] if paths else ".")
+    Scanner(pack.project_path, [pack], cache="--no-cache" not in sys.argv).run().print_cache_summary()
+    sys.exit(pack.report())
 
 
 if __name__ == "__main__":
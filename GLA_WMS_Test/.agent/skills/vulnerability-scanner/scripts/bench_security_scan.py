@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Skill: vulnerability-scanner
+Script: bench_security_scan.py
+Purpose: Time the secret/pattern/config file scan of security_scan.py
+Usage: python bench_security_scan.py <project_path> [--scale N] [--jobs N]
+
+The files security_scan looks at are copied --scale times into a temporary
+tree (e.g. --scale 50 for a node_modules-sized tree; pass node_modules itself
+as the project to use real dependency code), which is then scanned:
+
+    1. per-pattern regexes on every line (the scan before the prefilter)
+    2. literal prefilter + regex confirmation, one process
+    3. literal prefilter + regex confirmation, --jobs worker processes
+    4. the same with a warm result cache
+
+Every variant must report the same counts. The dependency scan (npm audit)
+is not part of the timing.
+"""
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import Scanner
+from security_scan import SecurityPack
+
+# Fix Windows console encoding
+try:
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+except AttributeError:
+    pass
+
+
+def build_tree(project: Path, scale: int, target: Path) -> tuple:
+    """Copy the files the pack accepts `scale` times under target; returns (files, bytes)."""
+    pack = SecurityPack(project)
+    sources = [f for f in Scanner(project, [pack]).walk() if pack.accepts(f)]
+    files = size = 0
+    for i in range(scale):
+        for f in sources:
+            dest = target / f"copy_{i}" / f.rel
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(f.path, dest)
+            files += 1
+            size += dest.stat().st_size
+    return files, size
+
+
+def scan(tree: Path, jobs: int, cache: bool, prefilter: bool = True) -> tuple:
+    """One scan of the tree; returns (seconds, counts to compare between variants)."""
+    pack = SecurityPack(tree)
+    pack.prefilter = prefilter
+    start = time.perf_counter()
+    scanner = Scanner(tree, [pack], cache=cache, jobs=jobs).run()
+    elapsed = time.perf_counter() - start
+    counts = (pack.secrets["scanned_files"], dict(pack.secrets["by_severity"]),
+              pack.patterns["scanned_files"], dict(sorted(pack.patterns["by_category"].items())),
+              len(pack.config["findings"]))
+    return elapsed, counts, scanner.workers_used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the security_scan file scan")
+    parser.add_argument("project_path", nargs="?", default=".", help="Project whose files are scanned")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the project's files (default: 1)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    project = Path(args.project_path).resolve()
+    with tempfile.TemporaryDirectory(prefix="bench_security_") as tmp:
+        tree = Path(tmp)
+        files, size = build_tree(project, args.scale, tree)
+        print(f"Project: {project}")
+        print(f"Tree: {files} files, {size / (1024 * 1024):.1f} MB (scale {args.scale})\n")
+
+        variants = [
+            ("per-pattern regexes, 1 process", lambda: scan(tree, 1, False, prefilter=False)),
+            ("literal prefilter, 1 process", lambda: scan(tree, 1, False)),
+            ("literal prefilter, workers", lambda: scan(tree, args.jobs, False)),
+        ]
+        results = []
+        for label, run in variants:
+            elapsed, counts, workers = run()
+            if workers:
+                label = f"literal prefilter, {workers} workers"
+            results.append((label, elapsed, counts))
+
+        scan(tree, args.jobs, True)  # fill the cache
+        elapsed, counts, _ = scan(tree, args.jobs, True)
+        results.append(("warm cache (nothing changed)", elapsed, counts))
+
+        baseline = results[0][1]
+        print(f"{'Variant':<34} {'Time':>8} {'Files/s':>9} {'Speedup':>8}")
+        print(f"{'-' * 34} {'-' * 8} {'-' * 9} {'-' * 8}")
+        for label, elapsed, _ in results:
+            print(f"{label:<34} {elapsed:>7.2f}s {files / elapsed if elapsed else 0:>9.0f} {baseline / elapsed if elapsed else 0:>7.1f}x")
+
+        if any(counts != results[0][2] for _, _, counts in results):
+            print("\n[!] Variants disagree on the findings:")
+            for label, _, counts in results:
+                print(f"  {label}: {counts}")
+            sys.exit(1)
+        print("\n[OK] All variants report the same findings")
+
+
+if __name__ == "__main__":
+    main()
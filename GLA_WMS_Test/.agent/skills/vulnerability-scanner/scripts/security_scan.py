@@ -3,7 +3,7 @@
 Skill: vulnerability-scanner
 Script: security_scan.py
 Purpose: Validate that security principles from SKILL.md are applied correctly
-Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config]
+Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config] [--no-cache] [--jobs N]
 Output: JSON with validation findings
 
 This script verifies:
@@ -18,10 +18,15 @@ import os
 import sys
 import re
 import argparse
+from bisect import bisect_right
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts"))
+from audit_scanner import RulePack, Scanner, SourceFile
+
 # Fix Windows console encoding for Unicode output
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -34,60 +39,151 @@ except AttributeError:
 #  CONFIGURATION
 # ============================================================================
 
+# (regex, type, severity, literals): every match contains one of the
+# lowercase literals, so a file or line without them is not searched
 SECRET_PATTERNS = [
     # API Keys & Tokens
-    (r'api[_-]?key\s*[=:]\s*["\'][^"\']{10,}["\']', "API Key", "high"),
-    (r'token\s*[=:]\s*["\'][^"\']{10,}["\']', "Token", "high"),
-    (r'bearer\s+[a-zA-Z0-9\-_.]+', "Bearer Token", "critical"),
+    (r'api[_-]?key\s*[=:]\s*["\'][^"\']{10,}["\']', "API Key", "high", ("apikey", "api_key", "api-key")),
+    (r'token\s*[=:]\s*["\'][^"\']{10,}["\']', "Token", "high", ("token",)),
+    (r'bearer\s+[a-zA-Z0-9\-_.]+', "Bearer Token", "critical", ("bearer",)),
     
     # Cloud Credentials
-    (r'AKIA[0-9A-Z]{16}', "AWS Access Key", "critical"),
-    (r'aws[_-]?secret[_-]?access[_-]?key\s*[=:]\s*["\'][^"\']+["\']', "AWS Secret", "critical"),
-    (r'AZURE[_-]?[A-Z_]+\s*[=:]\s*["\'][^"\']+["\']', "Azure Credential", "critical"),
-    (r'GOOGLE[_-]?[A-Z_]+\s*[=:]\s*["\'][^"\']+["\']', "GCP Credential", "critical"),
+    (r'AKIA[0-9A-Z]{16}', "AWS Access Key", "critical", ("akia",)),
+    (r'aws[_-]?secret[_-]?access[_-]?key\s*[=:]\s*["\'][^"\']+["\']', "AWS Secret", "critical", ("secret",)),
+    (r'AZURE[_-]?[A-Z_]+\s*[=:]\s*["\'][^"\']+["\']', "Azure Credential", "critical", ("azure",)),
+    (r'GOOGLE[_-]?[A-Z_]+\s*[=:]\s*["\'][^"\']+["\']', "GCP Credential", "critical", ("google",)),
     
     # Database & Connections
-    (r'password\s*[=:]\s*["\'][^"\']{4,}["\']', "Password", "high"),
-    (r'(mongodb|postgres|mysql|redis):\/\/[^\s"\']+', "Database Connection String", "critical"),
+    (r'password\s*[=:]\s*["\'][^"\']{4,}["\']', "Password", "high", ("password",)),
+    (r'(mongodb|postgres|mysql|redis):\/\/[^\s"\']+', "Database Connection String", "critical",
+     ("mongodb://", "postgres://", "mysql://", "redis://")),
     
     # Private Keys
-    (r'-----BEGIN\s+(RSA|PRIVATE|EC)\s+KEY-----', "Private Key", "critical"),
-    (r'ssh-rsa\s+[A-Za-z0-9+/]+', "SSH Key", "critical"),
+    (r'-----BEGIN\s+(RSA|PRIVATE|EC)\s+KEY-----', "Private Key", "critical", ("-----begin",)),
+    (r'ssh-rsa\s+[A-Za-z0-9+/]+', "SSH Key", "critical", ("ssh-rsa",)),
     
     # JWT
-    (r'eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+', "JWT Token", "high"),
+    (r'eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+', "JWT Token", "high", ("eyj",)),
 ]
 
+# (regex, name, severity, category, literals), matched line by line
 DANGEROUS_PATTERNS = [
     # Injection risks
-    (r'eval\s*\(', "eval() usage", "critical", "Code Injection risk"),
-    (r'exec\s*\(', "exec() usage", "critical", "Code Injection risk"),
-    (r'new\s+Function\s*\(', "Function constructor", "high", "Code Injection risk"),
-    (r'child_process\.exec\s*\(', "child_process.exec", "high", "Command Injection risk"),
-    (r'subprocess\.call\s*\([^)]*shell\s*=\s*True', "subprocess with shell=True", "high", "Command Injection risk"),
+    (r'eval\s*\(', "eval() usage", "critical", "Code Injection risk", ("eval",)),
+    (r'exec\s*\(', "exec() usage", "critical", "Code Injection risk", ("exec",)),
+    (r'new\s+Function\s*\(', "Function constructor", "high", "Code Injection risk", ("function",)),
+    (r'child_process\.exec\s*\(', "child_process.exec", "high", "Command Injection risk", ("child_process.exec",)),
+    (r'subprocess\.call\s*\([^)]*shell\s*=\s*True', "subprocess with shell=True", "high", "Command Injection risk",
+     ("subprocess.call",)),
     
     # XSS risks
-    (r'dangerouslySetInnerHTML', "dangerouslySetInnerHTML", "high", "XSS risk"),
-    (r'\.innerHTML\s*=', "innerHTML assignment", "medium", "XSS risk"),
-    (r'document\.write\s*\(', "document.write", "medium", "XSS risk"),
+    (r'dangerouslySetInnerHTML', "dangerouslySetInnerHTML", "high", "XSS risk", ("dangerouslysetinnerhtml",)),
+    (r'\.innerHTML\s*=', "innerHTML assignment", "medium", "XSS risk", (".innerhtml",)),
+    (r'document\.write\s*\(', "document.write", "medium", "XSS risk", ("document.write",)),
     
     # SQL Injection indicators
-    (r'["\'][^"\']*\+\s*[a-zA-Z_]+\s*\+\s*["\'].*(?:SELECT|INSERT|UPDATE|DELETE)', "SQL String Concat", "critical", "SQL Injection risk"),
-    (r'f"[^"]*(?:SELECT|INSERT|UPDATE|DELETE)[^"]*\{', "SQL f-string", "critical", "SQL Injection risk"),
+    (r'["\'][^"\']*\+\s*[a-zA-Z_]+\s*\+\s*["\'].*(?:SELECT|INSERT|UPDATE|DELETE)', "SQL String Concat", "critical",
+     "SQL Injection risk", ("select", "insert", "update", "delete")),
+    (r'f"[^"]*(?:SELECT|INSERT|UPDATE|DELETE)[^"]*\{', "SQL f-string", "critical", "SQL Injection risk", ('f"',)),
     
     # Insecure configurations
-    (r'verify\s*=\s*False', "SSL Verify Disabled", "high", "MITM risk"),
-    (r'--insecure', "Insecure flag", "medium", "Security disabled"),
-    (r'disable[_-]?ssl', "SSL Disabled", "high", "MITM risk"),
+    (r'verify\s*=\s*False', "SSL Verify Disabled", "high", "MITM risk", ("verify",)),
+    (r'--insecure', "Insecure flag", "medium", "Security disabled", ("--insecure",)),
+    (r'disable[_-]?ssl', "SSL Disabled", "high", "MITM risk", ("disablessl", "disable_ssl", "disable-ssl")),
     
     # Unsafe deserialization
-    (r'pickle\.loads?\s*\(', "pickle usage", "high", "Deserialization risk"),
-    (r'yaml\.load\s*\([^)]*\)(?!\s*,\s*Loader)', "Unsafe YAML load", "high", "Deserialization risk"),
+    (r'pickle\.loads?\s*\(', "pickle usage", "high", "Deserialization risk", ("pickle.load",)),
+    (r'yaml\.load\s*\([^)]*\)(?!\s*,\s*Loader)', "Unsafe YAML load", "high", "Deserialization risk", ("yaml.load",)),
 ]
 
 SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '__pycache__', '.venv', 'venv', '.next'}
 CODE_EXTENSIONS = {'.js', '.ts', '.jsx', '.tsx', '.py', '.go', '.java', '.rb', '.php'}
 CONFIG_EXTENSIONS = {'.json', '.yaml', '.yml', '.toml', '.env', '.env.local', '.env.development'}
+CONFIG_FILES = {'next.config.js', 'webpack.config.js', '.eslintrc.js'}
+
+CONFIG_ISSUES = [
+    (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
+    (r'debug\s*=\s*True', "Debug mode enabled", "high"),
+    (r'NODE_ENV.*development', "Development mode in config", "medium"),
+    (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
+    (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
+    (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
+]
+
+SECRET_RES = [(re.compile(p, re.IGNORECASE), t, sev, lits) for p, t, sev, lits in SECRET_PATTERNS]
+DANGEROUS_RES = [(re.compile(p, re.IGNORECASE), n, sev, cat, lits) for p, n, sev, cat, lits in DANGEROUS_PATTERNS]
+CONFIG_ISSUE_RES = [(re.compile(p, re.IGNORECASE), issue, sev) for p, issue, sev in CONFIG_ISSUES]
+
+
+# Non-ASCII letters that IGNORECASE matches to ASCII ones (see the re docs)
+ASCII_FOLDS = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+
+
+def fold(text: str) -> str:
+    """Lowercased text holding a pattern's literal wherever the pattern matches."""
+    if not text.isascii() and any(c in text for c in '\u0130\u0131\u017f\u212a'):
+        text = text.translate(ASCII_FOLDS)
+    return text.lower()
+
+
+def literal_lines(folded: str, literals, starts: List[int]) -> List[int]:
+    """Indexes of the lines (starting at the given offsets) containing one of the literals."""
+    found = set()
+    for literal in literals:
+        i = folded.find(literal)
+        while i != -1:
+            found.add(bisect_right(starts, i) - 1)
+            i = folded.find(literal, i + 1)
+    return sorted(found)
+
+
+def match_dangerous(lines: List[str], folded: Optional[str] = None) -> list:
+    """[line, pattern, severity, category, snippet] per dangerous pattern matched on a line.
+
+    With the folded content (fold()) only the lines holding a pattern's
+    literal are searched with its regex; without it every pattern is tried on
+    every line.
+    """
+    found = []
+    if folded is None:
+        for line_num, line in enumerate(lines, 1):
+            for pattern, name, severity, category, _ in DANGEROUS_RES:
+                if pattern.search(line):
+                    found.append([line_num, name, severity, category, line.strip()[:80]])
+        return found
+
+    candidates = [(order, entry) for order, entry in enumerate(DANGEROUS_RES)
+                  if any(literal in folded for literal in entry[4])]
+    if not candidates:
+        return found
+    # Offset of each line, line breaks as in SourceFile.lines (folding keeps them)
+    folded = folded.replace('\r\n', '\n').replace('\r', '\n')
+    starts = list(accumulate(map((1).__add__, map(len, folded.split('\n'))), initial=0))
+    hits = []
+    for order, (pattern, name, severity, category, literals) in candidates:
+        for index in literal_lines(folded, literals, starts):
+            line = lines[index]
+            if pattern.search(line):
+                hits.append((index, order, [index + 1, name, severity, category, line.strip()[:80]]))
+    # Same order as the line-by-line scan
+    hits.sort(key=lambda hit: hit[:2])
+    return [hit[2] for hit in hits]
+
+
+def match_secrets(content: str, folded: Optional[str] = None) -> list:
+    """[type, severity, count] per secret pattern found in the content.
+
+    With the folded content (fold()) a pattern none of whose literals occur
+    is skipped.
+    """
+    found = []
+    for pattern, secret_type, severity, literals in SECRET_RES:
+        if folded is not None and not any(literal in folded for literal in literals):
+            continue
+        matches = pattern.findall(content)
+        if matches:
+            found.append([secret_type, severity, len(matches)])
+    return found
 
 
 # ============================================================================
@@ -178,191 +274,270 @@ def scan_dependencies(project_path: str) -> Dict[str, Any]:
     return results
 
 
-def scan_secrets(project_path: str) -> Dict[str, Any]:
-    """
-    Validate no hardcoded secrets (OWASP A04).
-    Checks: API keys, tokens, passwords, cloud credentials.
-    """
-    results = {
-        "tool": "secret_scanner",
-        "findings": [],
-        "status": "[OK] No secrets detected",
-        "scanned_files": 0,
-        "by_severity": {"critical": 0, "high": 0, "medium": 0}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS and ext not in CONFIG_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
+class SecurityPack(RulePack):
+    """Secrets, dangerous code patterns and configuration, over one walk."""
+
+    name = "security_scan"
+    extensions = frozenset(CODE_EXTENSIONS | CONFIG_EXTENSIONS)
+    skip_dirs = frozenset(SKIP_DIRS)
+    cacheable = True
+    parallel = True
+    # Literal prefilter before the regexes (off only to benchmark against it)
+    prefilter = True
+
+    def __init__(self, project_path=".", scan_type: str = "all", output: str = "json") -> None:
+        super().__init__(project_path)
+        self.scan_type = scan_type
+        self.output = output
+        self.secrets = {
+            "tool": "secret_scanner",
+            "findings": [],
+            "status": "[OK] No secrets detected",
+            "scanned_files": 0,
+            "by_severity": {"critical": 0, "high": 0, "medium": 0}
+        }
+        self.patterns = {
+            "tool": "pattern_scanner",
+            "findings": [],
+            "status": "[OK] No dangerous patterns",
+            "scanned_files": 0,
+            "by_category": {}
+        }
+        self.config = {
+            "tool": "config_scanner",
+            "findings": [],
+            "status": "[OK] Configuration secure",
+            "checks": {}
+        }
+
+    def wants(self, key: str) -> bool:
+        return self.scan_type in ("all", key)
+
+    def worker_args(self) -> tuple:
+        return (str(self.project_path), self.scan_type, self.output)
+
+    @property
+    def cache_name(self) -> str:
+        # Findings cover only the scans of this scan type
+        return f"{self.name}.{self.scan_type}"
+
+    def accepts(self, file: SourceFile) -> bool:
+        if self.skip_dirs.intersection(file.dir_parts):
+            return False
+        return file.suffix in self.extensions or file.name in CONFIG_FILES
+
+    def analyze(self, file: SourceFile) -> Dict[str, list]:
+        """Findings of one file, per scan that applies to it."""
+        ext = file.suffix
+        findings = {}
+        secrets = self.wants("secrets") and (ext in CODE_EXTENSIONS or ext in CONFIG_EXTENSIONS)
+        patterns = self.wants("patterns") and ext in CODE_EXTENSIONS
+        # Folded once for the literal prefilters of both scans
+        folded = None
+        if self.prefilter and (secrets or patterns):
             try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, secret_type, severity in SECRET_PATTERNS:
-                        matches = re.findall(pattern, content, re.IGNORECASE)
-                        if matches:
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "type": secret_type,
-                                "severity": severity,
-                                "count": len(matches)
-                            })
-                            results["by_severity"][severity] += len(matches)
-                            
+                folded = fold(file.text)
             except Exception:
                 pass
-    
-    if results["by_severity"]["critical"] > 0:
-        results["status"] = "[!!] CRITICAL: Secrets exposed!"
-    elif results["by_severity"]["high"] > 0:
-        results["status"] = "[!] HIGH: Secrets found"
-    elif sum(results["by_severity"].values()) > 0:
-        results["status"] = "[?] Potential secrets detected"
-    
-    # Limit findings for output
-    results["findings"] = results["findings"][:15]
-    
-    return results
+        if secrets:
+            findings["secrets"] = self.scan_secrets(file, folded)
+        if patterns:
+            findings["patterns"] = self.scan_code_patterns(file, folded)
+        if self.wants("config") and (ext in CONFIG_EXTENSIONS or file.name in CONFIG_FILES):
+            findings["config"] = self.scan_configuration(file)
+        return findings
 
+    def merge(self, file: SourceFile, findings: Dict[str, list]) -> None:
+        rel = str(file.rel)
+        if "secrets" in findings:
+            results = self.secrets
+            results["scanned_files"] += 1
+            for secret_type, severity, count in findings["secrets"]:
+                results["findings"].append({
+                    "file": rel,
+                    "type": secret_type,
+                    "severity": severity,
+                    "count": count
+                })
+                results["by_severity"][severity] += count
+        if "patterns" in findings:
+            results = self.patterns
+            results["scanned_files"] += 1
+            for line_num, name, severity, category, snippet in findings["patterns"]:
+                results["findings"].append({
+                    "file": rel,
+                    "line": line_num,
+                    "pattern": name,
+                    "severity": severity,
+                    "category": category,
+                    "snippet": snippet
+                })
+                results["by_category"][category] = results["by_category"].get(category, 0) + 1
+        for issue, severity in findings.get("config", []):
+            self.config["findings"].append({
+                "file": rel,
+                "issue": issue,
+                "severity": severity
+            })
 
-def scan_code_patterns(project_path: str) -> Dict[str, Any]:
-    """
-    Validate dangerous code patterns (OWASP A05).
-    Checks: Injection risks, XSS, unsafe deserialization.
-    """
-    results = {
-        "tool": "pattern_scanner",
-        "findings": [],
-        "status": "[OK] No dangerous patterns",
-        "scanned_files": 0,
-        "by_category": {}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+    def scan_secrets(self, file: SourceFile, folded: Optional[str] = None) -> list:
+        """
+        Validate no hardcoded secrets (OWASP A04).
+        Checks: API keys, tokens, passwords, cloud credentials.
+        Returns [type, severity, count] per secret pattern found.
+        """
+        try:
+            content = file.text
+        except Exception:
+            return []
         
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        for pattern, name, severity, category in DANGEROUS_PATTERNS:
-                            if re.search(pattern, line, re.IGNORECASE):
-                                results["findings"].append({
-                                    "file": str(filepath.relative_to(project_path)),
-                                    "line": line_num,
-                                    "pattern": name,
-                                    "severity": severity,
-                                    "category": category,
-                                    "snippet": line.strip()[:80]
-                                })
-                                results["by_category"][category] = results["by_category"].get(category, 0) + 1
-                                
-            except Exception:
-                pass
-    
-    critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
-    high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
-    
-    if critical_count > 0:
-        results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
-    elif high_count > 0:
-        results["status"] = f"[!] HIGH: {high_count} risky patterns"
-    elif results["findings"]:
-        results["status"] = "[?] Some patterns need review"
-    
-    # Limit findings
-    results["findings"] = results["findings"][:20]
-    
-    return results
+        return match_secrets(content, folded)
 
+    def scan_code_patterns(self, file: SourceFile, folded: Optional[str] = None) -> list:
+        """
+        Validate dangerous code patterns (OWASP A05).
+        Checks: Injection risks, XSS, unsafe deserialization.
+        Returns [line, pattern, severity, category, snippet] per match.
+        """
+        try:
+            lines = file.lines
+        except Exception:
+            return []
+        
+        return match_dangerous(lines, folded)
 
-def scan_configuration(project_path: str) -> Dict[str, Any]:
-    """
-    Validate security configuration (OWASP A02).
-    Checks: Security headers, CORS, debug modes.
-    """
-    results = {
-        "tool": "config_scanner",
-        "findings": [],
-        "status": "[OK] Configuration secure",
-        "checks": {}
-    }
-    
-    # Check common config files for issues
-    config_issues = [
-        (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
-        (r'debug\s*=\s*True', "Debug mode enabled", "high"),
-        (r'NODE_ENV.*development', "Development mode in config", "medium"),
-        (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
-        (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
-        (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
-    ]
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+    def scan_configuration(self, file: SourceFile) -> list:
+        """
+        Validate security configuration (OWASP A02).
+        Checks: Security headers, CORS, debug modes.
+        Returns [issue, severity] per issue found.
+        """
+        try:
+            content = file.text
+        except Exception:
+            return []
+        
+        return [[issue, severity] for pattern, issue, severity in CONFIG_ISSUE_RES if pattern.search(content)]
+
+    def finish(self) -> None:
+        results = self.secrets
+        if results["by_severity"]["critical"] > 0:
+            results["status"] = "[!!] CRITICAL: Secrets exposed!"
+        elif results["by_severity"]["high"] > 0:
+            results["status"] = "[!] HIGH: Secrets found"
+        elif sum(results["by_severity"].values()) > 0:
+            results["status"] = "[?] Potential secrets detected"
+        
+        # Limit findings for output
+        results["findings"] = results["findings"][:15]
+        
+        results = self.patterns
+        critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
+        high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
+        
+        if critical_count > 0:
+            results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
+        elif high_count > 0:
+            results["status"] = f"[!] HIGH: {high_count} risky patterns"
+        elif results["findings"]:
+            results["status"] = "[?] Some patterns need review"
+        
+        # Limit findings
+        results["findings"] = results["findings"][:20]
+        
+        results = self.config
+        # Check for security header configurations
+        header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
+        for hf in header_files:
+            hf_path = self.project_path / hf
+            if hf_path.exists():
+                results["checks"]["security_headers_config"] = True
+                break
+        else:
+            results["checks"]["security_headers_config"] = False
+            results["findings"].append({
+                "issue": "No security headers configuration found",
+                "severity": "medium",
+                "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
+            })
+        
+        if any(f["severity"] == "critical" for f in results["findings"]):
+            results["status"] = "[!!] CRITICAL: Configuration issues"
+        elif any(f["severity"] == "high" for f in results["findings"]):
+            results["status"] = "[!] HIGH: Configuration review needed"
+        elif results["findings"]:
+            results["status"] = "[?] Minor configuration issues"
+
+    def build_report(self) -> Dict[str, Any]:
+        report = {
+            "project": str(self.project_path),
+            "timestamp": datetime.now().isoformat(),
+            "scan_type": self.scan_type,
+            "scans": {},
+            "summary": {
+                "total_findings": 0,
+                "critical": 0,
+                "high": 0,
+                "overall_status": "[OK] SECURE"
+            }
+        }
+        
+        scans = {
+            "deps": ("dependencies", lambda: scan_dependencies(str(self.project_path))),
+            "secrets": ("secrets", lambda: self.secrets),
+            "patterns": ("code_patterns", lambda: self.patterns),
+            "config": ("configuration", lambda: self.config),
+        }
         
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CONFIG_EXTENSIONS and file not in ['next.config.js', 'webpack.config.js', '.eslintrc.js']:
-                continue
+        for key, (name, result_of) in scans.items():
+            if self.wants(key):
+                result = result_of()
+                report["scans"][name] = result
                 
-            filepath = Path(root) / file
+                findings_count = len(result.get("findings", []))
+                report["summary"]["total_findings"] += findings_count
+                
+                for finding in result.get("findings", []):
+                    sev = finding.get("severity", "low")
+                    if sev == "critical":
+                        report["summary"]["critical"] += 1
+                    elif sev == "high":
+                        report["summary"]["high"] += 1
+        
+        # Determine overall status
+        if report["summary"]["critical"] > 0:
+            report["summary"]["overall_status"] = "[!!] CRITICAL ISSUES FOUND"
+        elif report["summary"]["high"] > 0:
+            report["summary"]["overall_status"] = "[!] HIGH RISK ISSUES"
+        elif report["summary"]["total_findings"] > 0:
+            report["summary"]["overall_status"] = "[?] REVIEW RECOMMENDED"
+        
+        return report
+
+    def report(self) -> int:
+        result = self.build_report()
+        
+        if self.output == "summary":
+            print(f"\n{'='*60}")
+            print(f"Security Scan: {result['project']}")
+            print(f"{'='*60}")
+            print(f"Status: {result['summary']['overall_status']}")
+            print(f"Total Findings: {result['summary']['total_findings']}")
+            print(f"  Critical: {result['summary']['critical']}")
+            print(f"  High: {result['summary']['high']}")
+            print(f"{'='*60}\n")
             
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, issue, severity in config_issues:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "issue": issue,
-                                "severity": severity
-                            })
-                            
-            except Exception:
-                pass
-    
-    # Check for security header configurations
-    header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
-    for hf in header_files:
-        hf_path = Path(project_path) / hf
-        if hf_path.exists():
-            results["checks"]["security_headers_config"] = True
-            break
-    else:
-        results["checks"]["security_headers_config"] = False
-        results["findings"].append({
-            "issue": "No security headers configuration found",
-            "severity": "medium",
-            "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
-        })
-    
-    if any(f["severity"] == "critical" for f in results["findings"]):
-        results["status"] = "[!!] CRITICAL: Configuration issues"
-    elif any(f["severity"] == "high" for f in results["findings"]):
-        results["status"] = "[!] HIGH: Configuration review needed"
-    elif results["findings"]:
-        results["status"] = "[?] Minor configuration issues"
-    
-    return results
+            for scan_name, scan_result in result['scans'].items():
+                print(f"\n{scan_name.upper()}: {scan_result['status']}")
+                for finding in scan_result.get('findings', [])[:5]:
+                    print(f"  - {finding}")
+        else:
+            print(json.dumps(result, indent=2))
+        
+        return 0
+
+
+RULE_PACK = SecurityPack
 
 
 # ============================================================================
@@ -371,51 +546,11 @@ def scan_configuration(project_path: str) -> Dict[str, Any]:
 
 def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
     """Execute security validation scans."""
-    
-    report = {
-        "project": project_path,
-        "timestamp": datetime.now().isoformat(),
-        "scan_type": scan_type,
-        "scans": {},
-        "summary": {
-            "total_findings": 0,
-            "critical": 0,
-            "high": 0,
-            "overall_status": "[OK] SECURE"
-        }
-    }
-    
-    scanners = {
-        "deps": ("dependencies", scan_dependencies),
-        "secrets": ("secrets", scan_secrets),
-        "patterns": ("code_patterns", scan_code_patterns),
-        "config": ("configuration", scan_configuration),
-    }
-    
-    for key, (name, scanner) in scanners.items():
-        if scan_type == "all" or scan_type == key:
-            result = scanner(project_path)
-            report["scans"][name] = result
-            
-            findings_count = len(result.get("findings", []))
-            report["summary"]["total_findings"] += findings_count
-            
-            for finding in result.get("findings", []):
-                sev = finding.get("severity", "low")
-                if sev == "critical":
-                    report["summary"]["critical"] += 1
-                elif sev == "high":
-                    report["summary"]["high"] += 1
-    
-    # Determine overall status
-    if report["summary"]["critical"] > 0:
-        report["summary"]["overall_status"] = "[!!] CRITICAL ISSUES FOUND"
-    elif report["summary"]["high"] > 0:
-        report["summary"]["overall_status"] = "[!] HIGH RISK ISSUES"
-    elif report["summary"]["total_findings"] > 0:
-        report["summary"]["overall_status"] = "[?] REVIEW RECOMMENDED"
-    
-    return report
+    pack = SecurityPack(project_path, scan_type)
+    # Only the dependency scan runs without walking the project
+    if scan_type != "deps":
+        Scanner(project_path, [pack]).run()
+    return pack.build_report()
 
 
 def main():
@@ -427,6 +562,10 @@ def main():
                         default="all", help="Type of scan to run")
     parser.add_argument("--output", choices=["json", "summary"], default="json",
                         help="Output format")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Scan every file again instead of reusing cached results")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for large scans (default: CPU count)")
     
     args = parser.parse_args()
     
@@ -434,24 +573,10 @@ def main():
         print(json.dumps({"error": f"Directory not found: {args.project_path}"}))
         sys.exit(1)
     
-    result = run_full_scan(args.project_path, args.scan_type)
-    
-    if args.output == "summary":
-        print(f"\n{'='*60}")
-        print(f"Security Scan: {result['project']}")
-        print(f"{'='*60}")
-        print(f"Status: {result['summary']['overall_status']}")
-        print(f"Total Findings: {result['summary']['total_findings']}")
-        print(f"  Critical: {result['summary']['critical']}")
-        print(f"  High: {result['summary']['high']}")
-        print(f"{'='*60}\n")
-        
-        for scan_name, scan_result in result['scans'].items():
-            print(f"\n{scan_name.upper()}: {scan_result['status']}")
-            for finding in scan_result.get('findings', [])[:5]:
-                print(f"  - {finding}")
-    else:
-        print(json.dumps(result, indent=2))
+    pack = SecurityPack(args.project_path, args.scan_type, args.output)
+    if args.scan_type != "deps":
+        Scanner(args.project_path, [pack], cache=not args.no_cache, jobs=args.jobs).run().print_cache_summary()
+    sys.exit(pack.report())
 
 
 if __name__ == "__main__":
@@ -1,12 +1,17 @@
 
 import { useEffect, useRef } from 'react';
+import { resyncQueries } from '@/lib/queryClient';
 
 type SSEEvent<T = any> = {
     type: string;
     data: T;
 };
 
-export function useSSE(url: string, eventTypes: string[], onMessage: (type: string, data: any) => void) {
+// The server only sends the listed event types (and, when given, only events of the
+// topics "section:<id>", "pickup:<n>", "order:<id>"). A "resync" event means the
+// server dropped messages for this client: the work-unit and order lists are refetched
+// in full here, before onMessage is called with it.
+export function useSSE(url: string, eventTypes: string[], onMessage: (type: string, data: any) => void, topics: string[] = []) {
     const eventSourceRef = useRef<EventSource | null>(null);
 
     useEffect(() => {
@@ -15,15 +20,18 @@ export function useSSE(url: string, eventTypes: string[], onMessage: (type: stri
             eventSourceRef.current.close();
         }
 
-        const eventSource = new EventSource(url);
+        const params = new URLSearchParams({ events: eventTypes.join(',') });
+        if (topics.length > 0) params.set('topics', topics.join(','));
+        const eventSource = new EventSource(`${url}${url.includes('?') ? '&' : '?'}${params}`);
         eventSourceRef.current = eventSource;
 
         const listeners: { type: string; listener: (e: MessageEvent) => void }[] = [];
 
-        eventTypes.forEach((type) => {
+        [...eventTypes, 'resync'].forEach((type) => {
             const listener = (event: MessageEvent) => {
                 try {
                     const parsedData = JSON.parse(event.data);
+                    if (type === 'resync') resyncQueries();
                     onMessage(type, parsedData);
                 } catch (error) {
                     console.error(`Error parsing SSE data for ${type}:`, error);
@@ -48,7 +56,16 @@ export function useSSE(url: string, eventTypes: string[], onMessage: (type: stri
             });
             eventSource.close();
         };
-    }, [url, JSON.stringify(eventTypes), onMessage]); // JSON.stringify to avoid loop on array dependency
+    }, [url, JSON.stringify(eventTypes), JSON.stringify(topics), onMessage]); // JSON.stringify to avoid loop on array dependency
 
     return eventSourceRef.current;
 }
+
+// Topics of a handheld screen: the operator's sections and, while working, the orders
+// of the locked units. Events without these fields still reach every client.
+export function operatorTopics(sections: string[] | null | undefined, orderIds: string[] = []): string[] {
+    return [
+        ...(sections || []).map(id => `section:${id}`),
+        ...[...new Set(orderIds)].sort().map(id => `order:${id}`),
+    ];
+}
@@ -0,0 +1,28 @@
+import { useEffect, useRef } from "react";
+import { apiRequest } from "@/lib/queryClient";
+
+const HEARTBEAT_INTERVAL_MS = 60 * 1000;
+
+// Mantém vivas as leases das unidades bloqueadas pelo operador. A partir do
+// primeiro heartbeat, o servidor libera o bloqueio se os heartbeats pararem
+// por mais que o TTL.
+export function useWorkUnitHeartbeat(workUnitIds: string[], enabled: boolean = true) {
+  const idsRef = useRef(workUnitIds);
+  idsRef.current = workUnitIds;
+  const hasUnits = workUnitIds.length > 0;
+
+  useEffect(() => {
+    if (!enabled || !hasUnits) return;
+
+    const interval = setInterval(async () => {
+      if (idsRef.current.length === 0) return;
+      try {
+        await apiRequest("POST", "/api/work-units/heartbeat", { workUnitIds: idsRef.current });
+      } catch (e) {
+        console.error("Work unit heartbeat failed", e);
+      }
+    }, HEARTBEAT_INTERVAL_MS);
+
+    return () => clearInterval(interval);
+  }, [enabled, hasUnits]);
+}
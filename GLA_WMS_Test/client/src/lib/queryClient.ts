@@ -76,6 +76,83 @@ export const getQueryFn: <T>(options: {
       return await res.json();
     };
 
+// Listas incrementais (?since=<versão>): o servidor devolve só as linhas alteradas,
+// os ids removidos e a nova versão; o delta é aplicado sobre os dados em cache.
+const deltaVersions = new Map<string, number>();
+
+// pageSize: a carga completa vem em páginas (limit/cursor); a versão guardada é a
+// da primeira página, então o que mudar durante a paginação chega no próximo delta.
+export function getDeltaQueryFn<T extends { id: string }>(
+  url: string,
+  listField: string,
+  sort?: (a: T, b: T) => number,
+  pageSize?: number,
+): QueryFunction<T[]> {
+  return async ({ queryKey }) => {
+    const cacheKey = JSON.stringify(queryKey);
+    const previous = queryClient.getQueryData<T[]>(queryKey);
+    const since = previous ? deltaVersions.get(cacheKey) ?? 0 : 0;
+    const base = `${url}${url.includes("?") ? "&" : "?"}since=${since}${pageSize ? `&limit=${pageSize}` : ""}`;
+
+    type Delta = { version: number; full: boolean; removed: string[]; nextCursor?: number | null } & Record<string, T[]>;
+    const fetchDelta = async (cursor?: number): Promise<Delta> => {
+      const res = await fetch(cursor !== undefined ? `${base}&cursor=${cursor}` : base, {
+        credentials: "include",
+      });
+      await throwIfResNotOk(res);
+      return res.json();
+    };
+
+    const delta = await fetchDelta();
+    const rows = delta[listField];
+    for (let next = delta.nextCursor; delta.full && next != null;) {
+      const page = await fetchDelta(next);
+      rows.push(...page[listField]);
+      next = page.nextCursor;
+    }
+    deltaVersions.set(cacheKey, delta.version);
+
+    if (delta.full || !previous) return rows;
+    // Nada mudou: mesma referência, sem re-render
+    if (rows.length === 0 && delta.removed.length === 0) return previous;
+
+    const removed = new Set(delta.removed);
+    const changed = new Map(rows.map(row => [row.id, row]));
+    const merged = previous
+      .filter(row => !removed.has(row.id))
+      .map(row => {
+        const updated = changed.get(row.id);
+        if (updated) changed.delete(row.id);
+        return updated ?? row;
+      });
+    merged.push(...changed.values());
+    return sort ? merged.sort(sort) : merged;
+  };
+}
+
+// Páginas da carga completa das filas do coletor (máximo do servidor: 500)
+export const WORK_UNITS_PAGE_SIZE = 200;
+
+// Fila de unidades de uma tela de coletor: tipo e seções do operador filtrados no SQL
+export function workUnitsUrl(type: string, sections?: string[] | null): string {
+  const params = new URLSearchParams({ type });
+  if (sections?.length) params.set("section", sections.join(","));
+  return `/api/work-units?${params}`;
+}
+
+// Listas recarregadas quando o servidor descarta eventos SSE deste cliente ("resync")
+const RESYNC_QUERY_PREFIXES = ["/api/work-units", "/api/orders", "/api/queue", "/api/stats"];
+
+// Esquece as versões dos deltas (a próxima busca é completa) e invalida as listas
+// de unidades e pedidos.
+export function resyncQueries(): Promise<void> {
+  deltaVersions.clear();
+  return queryClient.invalidateQueries({
+    predicate: query => query.queryKey.some(key =>
+      typeof key === "string" && RESYNC_QUERY_PREFIXES.some(prefix => key.startsWith(prefix))),
+  });
+}
+
 export const queryClient = new QueryClient({
   defaultOptions: {
     queries: {
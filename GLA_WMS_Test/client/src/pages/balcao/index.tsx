@@ -10,9 +10,10 @@ import { Skeleton } from "@/components/ui/skeleton";
 import { Checkbox } from "@/components/ui/checkbox";
 import { Progress } from "@/components/ui/progress";
 import { useToast } from "@/hooks/use-toast";
-import { apiRequest } from "@/lib/queryClient";
-import { useSSE } from "@/hooks/use-sse";
+import { apiRequest, getDeltaQueryFn, workUnitsUrl, WORK_UNITS_PAGE_SIZE } from "@/lib/queryClient";
+import { useSSE, operatorTopics } from "@/hooks/use-sse";
 import { useBarcodeScanner } from "@/hooks/use-barcode-scanner";
+import { useWorkUnitHeartbeat } from "@/hooks/use-work-unit-heartbeat";
 import {
   Store,
   Package,
@@ -139,6 +140,9 @@ export default function BalcaoPage() {
 
   const { data: workUnits, isLoading } = useQuery<WorkUnitWithDetails[]>({
     queryKey: workUnitsQueryKey,
+    queryFn: getDeltaQueryFn<WorkUnitWithDetails>(
+      workUnitsUrl("balcao", user?.sections as string[] | undefined), "workUnits", undefined, WORK_UNITS_PAGE_SIZE,
+    ),
     refetchInterval: 1000,
   });
 
@@ -153,10 +157,16 @@ export default function BalcaoPage() {
     }
   }, [queryClient, workUnitsQueryKey, toast]);
 
+  // Só eventos das seções do operador e, durante o trabalho, dos pedidos das unidades bloqueadas
+  const sseTopics = useMemo(() => operatorTopics(
+    user?.sections as string[] | undefined,
+    step === "picking" && user ? (workUnits || []).filter(wu => wu.lockedBy === user.id).map(wu => wu.orderId) : [],
+  ), [user, step, workUnits]);
+
   useSSE("/api/sse", [
     "picking_update", "lock_acquired", "lock_released", "picking_started",
     "item_picked", "exception_created", "picking_finished",
-  ], handleSSEMessage);
+  ], handleSSEMessage, sseTopics);
 
   const myLockedUnits = useMemo(() => {
     if (!workUnits || !user) return [];
@@ -648,6 +658,7 @@ export default function BalcaoPage() {
   }, [step, handleScanItem]);
 
   useBarcodeScanner(globalScanHandler, step === "picking" || step === "scan_cart");
+  useWorkUnitHeartbeat(allMyUnits.map(wu => wu.id));
 
   const handleIncrementProduct = async (ap: AggregatedProduct, qty: number = 1) => {
     const remaining = ap.totalQty - ap.separatedQty - ap.exceptionQty;
@@ -10,9 +10,10 @@ import { Skeleton } from "@/components/ui/skeleton";
 import { Checkbox } from "@/components/ui/checkbox";
 import { Progress } from "@/components/ui/progress";
 import { useToast } from "@/hooks/use-toast";
-import { apiRequest } from "@/lib/queryClient";
-import { useSSE } from "@/hooks/use-sse";
+import { apiRequest, getDeltaQueryFn, workUnitsUrl, WORK_UNITS_PAGE_SIZE } from "@/lib/queryClient";
+import { useSSE, operatorTopics } from "@/hooks/use-sse";
 import { useBarcodeScanner } from "@/hooks/use-barcode-scanner";
+import { useWorkUnitHeartbeat } from "@/hooks/use-work-unit-heartbeat";
 import {
   ClipboardCheck,
   Package,
@@ -134,6 +135,9 @@ export default function ConferenciaPage() {
 
   const { data: workUnits, isLoading } = useQuery<WorkUnitWithDetails[]>({
     queryKey: workUnitsQueryKey,
+    queryFn: getDeltaQueryFn<WorkUnitWithDetails>(
+      workUnitsUrl("conferencia", user?.sections as string[] | undefined), "workUnits", undefined, WORK_UNITS_PAGE_SIZE,
+    ),
     refetchInterval: 1000,
   });
 
@@ -152,10 +156,16 @@ export default function ConferenciaPage() {
     }
   }, [queryClient, workUnitsQueryKey, toast]);
 
+  // Só eventos das seções do operador e, durante o trabalho, dos pedidos das unidades bloqueadas
+  const sseTopics = useMemo(() => operatorTopics(
+    user?.sections as string[] | undefined,
+    step === "checking" && user ? (workUnits || []).filter(wu => wu.lockedBy === user.id).map(wu => wu.orderId) : [],
+  ), [user, step, workUnits]);
+
   useSSE("/api/sse", [
     "picking_update", "lock_acquired", "lock_released", "picking_finished",
     "conference_started", "conference_finished", "exception_created",
-  ], handleSSEMessage);
+  ], handleSSEMessage, sseTopics);
 
   const myLockedUnits = useMemo(() => {
     if (!workUnits || !user) return [];
@@ -605,6 +615,7 @@ export default function ConferenciaPage() {
   }, [step, handleScanItem]);
 
   useBarcodeScanner(globalScanHandler, step === "checking");
+  useWorkUnitHeartbeat(allMyUnits.map(wu => wu.id));
 
   const handleIncrementProduct = async (ap: AggregatedProduct, qty: number = 1) => {
     const remaining = ap.totalSeparatedQty - ap.checkedQty - ap.exceptionQty;
@@ -10,9 +10,10 @@ import { Skeleton } from "@/components/ui/skeleton";
 import { Checkbox } from "@/components/ui/checkbox";
 import { Progress } from "@/components/ui/progress";
 import { useToast } from "@/hooks/use-toast";
-import { apiRequest } from "@/lib/queryClient";
-import { useSSE } from "@/hooks/use-sse";
+import { apiRequest, getDeltaQueryFn, workUnitsUrl, WORK_UNITS_PAGE_SIZE } from "@/lib/queryClient";
+import { useSSE, operatorTopics } from "@/hooks/use-sse";
 import { useBarcodeScanner } from "@/hooks/use-barcode-scanner";
+import { useWorkUnitHeartbeat } from "@/hooks/use-work-unit-heartbeat";
 import {
   Package,
   List,
@@ -135,6 +136,9 @@ export default function SeparacaoPage() {
 
   const { data: workUnits, isLoading } = useQuery<WorkUnitWithDetails[]>({
     queryKey: workUnitsQueryKey,
+    queryFn: getDeltaQueryFn<WorkUnitWithDetails>(
+      workUnitsUrl("separacao", user?.sections as string[] | undefined), "workUnits", undefined, WORK_UNITS_PAGE_SIZE,
+    ),
     refetchInterval: 1000,
   });
 
@@ -155,10 +159,16 @@ export default function SeparacaoPage() {
     }
   }, [queryClient, workUnitsQueryKey, toast]);
 
+  // Só eventos das seções do operador e, durante o trabalho, dos pedidos das unidades bloqueadas
+  const sseTopics = useMemo(() => operatorTopics(
+    user?.sections as string[] | undefined,
+    step === "picking" && user ? (workUnits || []).filter(wu => wu.lockedBy === user.id).map(wu => wu.orderId) : [],
+  ), [user, step, workUnits]);
+
   useSSE("/api/sse", [
     "picking_update", "lock_acquired", "lock_released", "picking_started",
     "item_picked", "exception_created", "picking_finished",
-  ], handleSSEMessage);
+  ], handleSSEMessage, sseTopics);
 
   const myLockedUnits = useMemo(() => {
     if (!workUnits || !user) return [];
@@ -360,16 +370,23 @@ export default function SeparacaoPage() {
 
   const scanItemMutation = useMutation({
     mutationFn: async ({ workUnitId, barcode, quantity }: { workUnitId: string; barcode: string; quantity?: number }) => {
-      const body = quantity ? { barcode, quantity } : { barcode };
+      const body = quantity ? { barcode, quantity, minimal: true } : { barcode, minimal: true };
       const res = await apiRequest("POST", `/api/work-units/${workUnitId}/scan-item`, body);
       return res.json();
     },
     onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: workUnitsQueryKey });
-      if (data.workUnit) {
+      if (data.item) {
+        // Aplica o delta do bipe na lista em cache até o próximo refetch
         queryClient.setQueryData(workUnitsQueryKey, (oldData: any[]) => {
           if (!oldData) return oldData;
-          return oldData.map(wu => wu.id === data.workUnit.id ? data.workUnit : wu);
+          return oldData.map(wu => wu.id !== data.workUnitId ? wu : {
+            ...wu,
+            status: data.workUnitStatus,
+            items: wu.items.map((it: any) => it.id === data.item.id
+              ? { ...it, separatedQty: data.item.separatedQty, status: data.item.status }
+              : it),
+          });
         });
       }
     },
@@ -643,8 +660,7 @@ export default function SeparacaoPage() {
         }
         setPickingTab("product");
 
-        const updatedUnits = units.map(wu => wu.id === result.workUnit.id ? result.workUnit : wu);
-        const allCompleted = updatedUnits.every(wu => wu.status === "concluido");
+        const allCompleted = units.every(wu => (wu.id === result.workUnitId ? result.workUnitStatus : wu.status) === "concluido");
         if (allCompleted) {
           handleCompleteAll();
         }
@@ -677,6 +693,7 @@ export default function SeparacaoPage() {
   }, [step, handleScanItem]);
 
   useBarcodeScanner(globalScanHandler, step === "picking" || step === "scan_cart");
+  useWorkUnitHeartbeat(allMyUnits.map(wu => wu.id));
 
   const handleIncrementProduct = async (ap: AggregatedProduct, qty: number = 1) => {
     const remaining = ap.totalQty - ap.separatedQty - ap.exceptionQty;
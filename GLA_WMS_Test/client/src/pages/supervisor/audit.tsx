@@ -48,10 +48,14 @@ const actionLabels: Record<string, { label: string; color: string }> = {
 };
 
 export default function AuditPage() {
-    const logsQueryKey = useSessionQueryKey(["/api/audit-logs"]);
     const usersQueryKey = useSessionQueryKey(["/api/users"]);
 
     const [filterDateRange, setFilterDateRange] = useState<DateRange | undefined>();
+    // Com período, o servidor inclui as linhas já movidas para os arquivos mensais
+    const periodQuery = filterDateRange?.from
+        ? `?from=${format(filterDateRange.from, "yyyy-MM-dd")}&to=${format(filterDateRange.to ?? filterDateRange.from, "yyyy-MM-dd")}`
+        : "";
+    const logsQueryKey = useSessionQueryKey([`/api/audit-logs${periodQuery}`]);
     const [tempDateRange, setTempDateRange] = useState<DateRange | undefined>();
     const [selectedUserId, setSelectedUserId] = useState<string>("all");
 
@@ -46,9 +46,12 @@ const exceptionTypeLabels: Record<string, { label: string; color: string }> = {
 };
 
 export default function ExceptionsPage() {
-  const exceptionsQueryKey = useSessionQueryKey(["/api/exceptions"]);
-
   const [filterDateRange, setFilterDateRange] = useState<DateRange | undefined>();
+  // Com período, o servidor inclui as linhas já movidas para os arquivos mensais
+  const periodQuery = filterDateRange?.from
+    ? `?from=${format(filterDateRange.from, "yyyy-MM-dd")}&to=${format(filterDateRange.to ?? filterDateRange.from, "yyyy-MM-dd")}`
+    : "";
+  const exceptionsQueryKey = useSessionQueryKey([`/api/exceptions${periodQuery}`]);
   const [tempDateRange, setTempDateRange] = useState<DateRange | undefined>();
   const [searchOrderQuery, setSearchOrderQuery] = useState("");
   const [selectedExceptionType, setSelectedExceptionType] = useState<string>("all");
@@ -34,7 +34,7 @@ import {
   TableRow,
 } from "@/components/ui/table";
 import { useToast } from "@/hooks/use-toast";
-import { apiRequest } from "@/lib/queryClient";
+import { apiRequest, getDeltaQueryFn } from "@/lib/queryClient";
 import { Link } from "wouter";
 import {
   ArrowLeft,
@@ -90,6 +90,9 @@ export default function OrdersPage() {
 
   const { data: orders, isLoading: ordersLoading, refetch } = useQuery<OrderWithExtras[]>({
     queryKey: ordersQueryKey,
+    // Mesma ordem do servidor: prioridade, depois mais recentes
+    queryFn: getDeltaQueryFn<OrderWithExtras>("/api/orders", "orders", (a, b) =>
+      b.priority - a.priority || b.createdAt.localeCompare(a.createdAt)),
   });
 
   const { data: routes } = useQuery<Route[]>({
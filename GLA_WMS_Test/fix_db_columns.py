@@ -3,6 +3,9 @@ import os
 
 DB_PATH = "database.db"
 
+# Incorporado às migrações do sync_db2.py (migracao_scripts_avulsos), aplicadas
+# automaticamente na inicialização; mantido para bancos usados sem o sync.
+
 def add_column(cursor, table, col_def):
     try:
         cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_def}")
@@ -4,6 +4,8 @@ import os
 DB_PATH = "database.db"
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
+# O sync (sync_db2.transform_data) já faz isso para os produtos de cada carga;
+# este script aplica o cache inteiro de uma vez.
 def fix_barcodes():
     print(f"Updating product barcodes from cache in {DB_PATH}...")
     conn = sqlite3.connect(DB_PATH)
@@ -11,35 +13,23 @@ def fix_barcodes():
 
     # Get barcodes from cache
     # cache_orcamentos: IDPRODUTO (erp_code), CODBARRAS, CODBARRAS_CAIXA
-    # We need to map IDPRODUTO (erp_code) -> CODBARRAS
     # Note: IDPRODUTO in cache is TEXT. products.erp_code is TEXT.
-    
-    cursor.execute("SELECT DISTINCT IDPRODUTO, CODBARRAS, CODBARRAS_CAIXA FROM cache_orcamentos WHERE CODBARRAS IS NOT NULL OR CODBARRAS_CAIXA IS NOT NULL")
-    rows = cursor.fetchall()
-    
-    print(f"Found {len(rows)} products in cache with barcode data.")
-    
-    updated = 0
-    for row in rows:
-        erp_code, unit_bc, box_bc = row
-        
-        # Clean up barcodes (remove empty strings)
-        if hasattr(unit_bc, 'strip') and not unit_bc.strip(): unit_bc = None
-        if hasattr(box_bc, 'strip') and not box_bc.strip(): box_bc = None
-        
-        if not unit_bc and not box_bc:
-            continue
-
-        try:
-            cursor.execute("""
-                UPDATE products 
-                SET barcode = ?, box_barcode = ?
-                WHERE erp_code = ?
-            """, (unit_bc, box_bc, erp_code))
-            if cursor.rowcount > 0:
-                updated += 1
-        except Exception as e:
-            print(f"Error updating product {erp_code}: {e}")
+    # Empty/'None' barcodes count as missing; only products whose barcodes
+    # differ are updated, in a single UPDATE ... FROM.
+    cursor.execute("""
+        UPDATE products SET barcode = cache.barcode, box_barcode = cache.box_barcode
+        FROM (
+            SELECT IDPRODUTO AS erp_code,
+                   MAX(CASE WHEN UPPER(TRIM(CODBARRAS)) IN ('', 'NONE') THEN NULL ELSE TRIM(CODBARRAS) END) AS barcode,
+                   MAX(CASE WHEN UPPER(TRIM(CODBARRAS_CAIXA)) IN ('', 'NONE') THEN NULL ELSE TRIM(CODBARRAS_CAIXA) END) AS box_barcode
+            FROM cache_orcamentos
+            GROUP BY IDPRODUTO
+            HAVING barcode IS NOT NULL OR box_barcode IS NOT NULL
+        ) AS cache
+        WHERE products.erp_code = cache.erp_code
+          AND (products.barcode IS NOT cache.barcode OR products.box_barcode IS NOT cache.box_barcode)
+    """)
+    updated = cursor.rowcount
 
     conn.commit()
     conn.close()
@@ -1,6 +1,9 @@
 
 import sqlite3
 
+# Incorporado às migrações do sync_db2.py (migracao_scripts_avulsos), aplicadas
+# automaticamente na inicialização; mantido para bancos usados sem o sync.
+
 def run_fix():
     print("Fixing database schema manually...")
     conn = sqlite3.connect('database.db')
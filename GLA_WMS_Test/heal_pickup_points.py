@@ -1,8 +1,9 @@
 
 import sqlite3
-import json
 import os
 
+# O sync (sync_db2.transform_data) já recalcula os pontos de retirada dos
+# pedidos que sincroniza; este script só corrige a base inteira de uma vez.
 db_path = "database.db"
 if not os.path.exists(db_path):
     print(f"Database not found at {db_path}")
@@ -11,34 +12,21 @@ if not os.path.exists(db_path):
 conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
 
-print("Analyzing order items...")
-# Get orders with their items' pickup points
+print("Healing order pickup points...")
+# Pontos distintos dos itens de cada pedido, aplicados num único UPDATE ... FROM
 cursor.execute("""
-    SELECT order_id, pickup_point 
-    FROM order_items 
-    WHERE pickup_point IS NOT NULL
+    UPDATE orders SET pickup_points = pontos.lista
+    FROM (
+        SELECT order_id, json_group_array(DISTINCT pickup_point) AS lista
+        FROM (SELECT order_id, pickup_point FROM order_items
+              WHERE pickup_point IS NOT NULL
+              ORDER BY order_id, pickup_point)
+        GROUP BY order_id
+    ) AS pontos
+    WHERE orders.id = pontos.order_id
+      AND orders.pickup_points IS NOT pontos.lista
 """)
-rows = cursor.fetchall()
-
-order_points = {}
-for oid, pp in rows:
-    if oid not in order_points:
-        order_points[oid] = set()
-    order_points[oid].add(pp)
-
-print(f"Found {len(order_points)} orders with items.")
-
-updated = 0
-for oid, points in order_points.items():
-    points_list = list(points)
-    points_json = json.dumps(points_list)
-    # Check if needs update
-    cursor.execute("SELECT pickup_points FROM orders WHERE id = ?", (oid,))
-    current = cursor.fetchone()
-    
-    if current and current[0] != points_json:
-        cursor.execute("UPDATE orders SET pickup_points = ? WHERE id = ?", (points_json, oid))
-        updated += 1
+updated = cursor.rowcount
 
 conn.commit()
 print(f"Updated {updated} orders with pickup points.")
@@ -99,9 +99,25 @@ def reset_database():
         sys.exit(1)
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Reseta o database.db")
+    # Com um snapshot de referência (ex.: banco limpo salvo com
+    # `python snapshot_db.py backup`) o reset vira uma troca de arquivo em
+    # milissegundos, em vez do DELETE tabela por tabela. Pare o servidor antes.
+    parser.add_argument("--snapshot", metavar="ARQUIVO", help="Snapshot (.db ou .db.gz) para restaurar")
+    args = parser.parse_args()
+
     confirm = input("⚠️  ATENÇÃO: Isso vai apagar TODOS os dados (Pedidos, Produtos, Usuários não-admin). Deseja continuar? (s/N): ")
     
     if confirm.lower() in ['s', 'sim', 'yes', 'y']:
-        reset_database()
+        if args.snapshot:
+            from snapshot_db import resetar_para_snapshot
+            try:
+                resetar_para_snapshot(args.snapshot, DB_PATH)
+            except Exception as e:
+                print(f"[ERRO] Falha ao resetar para o snapshot: {e}")
+                sys.exit(1)
+        else:
+            reset_database()
     else:
         print("[RESET] Operação cancelada pelo usuário.")
@@ -0,0 +1,176 @@
+import fs from "fs";
+import path from "path";
+import { createClient, type Client } from "@libsql/client";
+import { getTableColumns, inArray, type Table } from "drizzle-orm";
+import {
+  orders, orderItems, workUnits, exceptions, auditLogs, products, users,
+  type Order, type OrderItem, type WorkUnit, type Exception, type AuditLog, type Product, type User,
+} from "@shared/schema";
+import { db } from "./db";
+import type { OrderWithStats } from "./storage";
+
+// Arquivos mensais gerados por `sync_db2.py --arquivar` (archive_YYYYMM.db ao lado
+// do database.db). Só são abertos quando uma consulta pede um período que os inclui,
+// e fechados ao fim dela (consultas raras: relatórios de períodos antigos).
+const ARCHIVE_DIR = process.cwd();
+
+function archivePath(month: string): string {
+  return path.join(ARCHIVE_DIR, `archive_${month}.db`);
+}
+
+// Meses (YYYYMM) entre as datas (YYYY-MM-DD) que têm arquivo em disco. Lista a
+// pasta uma vez em vez de testar mês a mês (o período vem do usuário).
+export function archiveMonthsInRange(from: string, to: string): string[] {
+  const first = from.slice(0, 4) + from.slice(5, 7);
+  const last = to.slice(0, 4) + to.slice(5, 7);
+  return fs.readdirSync(ARCHIVE_DIR)
+    .map(name => /^archive_(\d{6})\.db$/.exec(name)?.[1])
+    .filter((month): month is string => !!month && month >= first && month <= last)
+    .sort();
+}
+
+// Abre o arquivo do mês só durante a consulta
+async function withArchiveClient<T>(month: string, read: (client: Client) => Promise<T>): Promise<T> {
+  const client = createClient({ url: `file:${archivePath(month)}` });
+  try {
+    return await read(client);
+  } finally {
+    client.close();
+  }
+}
+
+function nextDay(date: string): string {
+  return new Date(new Date(`${date}T00:00:00Z`).getTime() + 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+}
+
+// Mês anterior (YYYY-MM-DD do dia 1): o arquivo é o do mês de criação do pedido,
+// então exceções do período podem estar no arquivo do mês anterior.
+function previousMonth(date: string): string {
+  const d = new Date(`${date.slice(0, 7)}-01T00:00:00Z`);
+  d.setUTCMonth(d.getUTCMonth() - 1);
+  return d.toISOString().slice(0, 10);
+}
+
+// Linha crua (nomes de coluna do SQLite) -> objeto do drizzle. Colunas criadas
+// depois do arquivamento não existem no arquivo e ficam null.
+function mapRow<T>(table: Table, row: unknown): T {
+  const raw = row as Record<string, unknown>;
+  const result: Record<string, unknown> = {};
+  for (const [key, column] of Object.entries(getTableColumns(table))) {
+    const value = raw[column.name];
+    result[key] = value === undefined || value === null ? null : column.mapFromDriverValue(value);
+  }
+  return result as T;
+}
+
+// Pedidos arquivados criados no período (fim inclusivo), com os mesmos totais de
+// getAllOrders.
+export async function getArchivedOrders(from: string, to: string): Promise<(OrderWithStats & { archived: true })[]> {
+  const result: (OrderWithStats & { archived: true })[] = [];
+  const toExclusive = nextDay(to);
+
+  for (const month of archiveMonthsInRange(from, to)) {
+    const [orderRows, statsRows, exceptionRows] = await withArchiveClient(month, client => client.batch([
+      { sql: "SELECT * FROM orders WHERE created_at >= ? AND created_at < ?", args: [from, toExclusive] },
+      {
+        sql: `SELECT order_id,
+                     COUNT(*) AS total,
+                     SUM(CASE WHEN status IN ('separado', 'conferido', 'finalizado') THEN 1 ELSE 0 END) AS picked
+              FROM order_items GROUP BY order_id`,
+        args: [],
+      },
+      {
+        sql: "SELECT DISTINCT oi.order_id FROM exceptions e JOIN order_items oi ON oi.id = e.order_item_id",
+        args: [],
+      },
+    ], "read"));
+
+    const statsMap = new Map(statsRows.rows.map(r => [String(r.order_id), { total: Number(r.total), picked: Number(r.picked) }]));
+    const withExceptions = new Set(exceptionRows.rows.map(r => String(r.order_id)));
+
+    for (const row of orderRows.rows) {
+      const order = mapRow<Order>(orders, row);
+      const stats = statsMap.get(order.id) || { total: 0, picked: 0 };
+      result.push({
+        ...order,
+        hasExceptions: withExceptions.has(order.id),
+        totalItems: stats.total,
+        itemCount: stats.total,
+        pickedItems: stats.picked,
+        archived: true,
+      });
+    }
+  }
+
+  return result;
+}
+
+// Logs de auditoria arquivados do período (fim inclusivo); o usuário vem do banco principal.
+export async function getArchivedAuditLogs(from: string, to: string): Promise<(AuditLog & { user: User | null; archived: true })[]> {
+  const logs: AuditLog[] = [];
+  for (const month of archiveMonthsInRange(from, to)) {
+    const { rows } = await withArchiveClient(month, client => client.execute({
+      sql: "SELECT * FROM audit_logs WHERE created_at >= ? AND created_at < ?",
+      args: [from, nextDay(to)],
+    }));
+    logs.push(...rows.map(row => mapRow<AuditLog>(auditLogs, row)));
+  }
+
+  const userIds = [...new Set(logs.map(l => l.userId).filter((id): id is string => !!id))];
+  const usersMap = new Map(
+    (userIds.length > 0 ? await db.select().from(users).where(inArray(users.id, userIds)) : []).map(u => [u.id, u]),
+  );
+  return logs.map(log => ({ ...log, user: (log.userId && usersMap.get(log.userId)) || null, archived: true as const }));
+}
+
+// Exceções arquivadas criadas no período, com item/pedido/unidade do arquivo e
+// produto/usuário do banco principal (que não são arquivados).
+export async function getArchivedExceptions(from: string, to: string): Promise<(Exception & {
+  orderItem: OrderItem & { product: Product; order: Order };
+  reportedByUser: User;
+  workUnit: WorkUnit;
+  archived: true;
+})[]> {
+  const found: { exception: Exception; item: OrderItem; order: Order; workUnit: WorkUnit }[] = [];
+  for (const month of archiveMonthsInRange(previousMonth(from), to)) {
+    const [exceptionRows, itemRows, orderRows, unitRows] = await withArchiveClient(month, client => {
+      const inPeriod = "SELECT * FROM exceptions WHERE created_at >= ? AND created_at < ?";
+      const args = [from, nextDay(to)];
+      return client.batch([
+        { sql: inPeriod, args },
+        { sql: `SELECT * FROM order_items WHERE id IN (SELECT order_item_id FROM (${inPeriod}))`, args },
+        { sql: `SELECT * FROM orders WHERE id IN (SELECT order_id FROM order_items WHERE id IN (SELECT order_item_id FROM (${inPeriod})))`, args },
+        { sql: `SELECT * FROM work_units WHERE id IN (SELECT work_unit_id FROM (${inPeriod}))`, args },
+      ], "read");
+    });
+    const itemsMap = new Map(itemRows.rows.map(r => mapRow<OrderItem>(orderItems, r)).map(i => [i.id, i]));
+    const ordersMap = new Map(orderRows.rows.map(r => mapRow<Order>(orders, r)).map(o => [o.id, o]));
+    const unitsMap = new Map(unitRows.rows.map(r => mapRow<WorkUnit>(workUnits, r)).map(u => [u.id, u]));
+
+    for (const row of exceptionRows.rows) {
+      const exception = mapRow<Exception>(exceptions, row);
+      const item = itemsMap.get(exception.orderItemId);
+      const order = item && ordersMap.get(item.orderId);
+      const workUnit = unitsMap.get(exception.workUnitId);
+      if (item && order && workUnit) found.push({ exception, item, order, workUnit });
+    }
+  }
+  if (found.length === 0) return [];
+
+  const productIds = [...new Set(found.map(f => f.item.productId))];
+  const userIds = [...new Set(found.map(f => f.exception.reportedBy))];
+  const [productRows, userRows] = await Promise.all([
+    db.select().from(products).where(inArray(products.id, productIds)),
+    db.select().from(users).where(inArray(users.id, userIds)),
+  ]);
+  const productsMap = new Map(productRows.map(p => [p.id, p]));
+  const usersMap = new Map(userRows.map(u => [u.id, u]));
+
+  // Mesmo critério de getAllExceptions: sem produto ou usuário, a exceção fica de fora
+  return found.flatMap(({ exception, item, order, workUnit }) => {
+    const product = productsMap.get(item.productId);
+    const reportedByUser = usersMap.get(exception.reportedBy);
+    if (!product || !reportedByUser) return [];
+    return [{ ...exception, orderItem: { ...item, product, order }, reportedByUser, workUnit, archived: true as const }];
+  });
+}
@@ -32,13 +32,10 @@ export async function createAuthSession(userId: string): Promise<{ token: string
 }
 
 export async function getUserFromToken(token: string) {
-  const session = await storage.getSessionByToken(token);
+  const session = await storage.getAuthSession(token);
   if (!session) return null;
   
-  const user = await storage.getUser(session.userId);
-  if (!user) return null;
-  
-  return { user, sessionKey: session.sessionKey };
+  return { user: session.user, sessionKey: session.sessionKey };
 }
 
 export function getTokenFromRequest(req: Request): string | null {
@@ -0,0 +1,61 @@
+// Cache em memória com expiração (TTL) e limite de entradas.
+// Map preserva a ordem de inserção: reinserir no get mantém as entradas
+// mais usadas no fim, e o despejo remove as mais antigas (LRU).
+export class TtlCache<K, V> {
+  private entries = new Map<K, { value: V; expiresAt: number }>();
+  private hits = 0;
+  private misses = 0;
+
+  constructor(private maxEntries: number, private ttlMs: number) {}
+
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.misses++;
+      return undefined;
+    }
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      this.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.hits++;
+    return entry.value;
+  }
+
+  set(key: K, value: V, ttlMs: number = this.ttlMs): void {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value as K;
+      this.entries.delete(oldest);
+    }
+  }
+
+  delete(key: K): void {
+    this.entries.delete(key);
+  }
+
+  // Remove todas as entradas que satisfazem o predicado (ex.: todas de um pedido).
+  deleteWhere(predicate: (value: V, key: K) => boolean): void {
+    for (const [key, entry] of this.entries) {
+      if (predicate(entry.value, key)) this.entries.delete(key);
+    }
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+
+  stats(): { size: number; hits: number; misses: number; hitRate: number } {
+    const total = this.hits + this.misses;
+    return {
+      size: this.entries.size,
+      hits: this.hits,
+      misses: this.misses,
+      hitRate: total > 0 ? this.hits / total : 0,
+    };
+  }
+}
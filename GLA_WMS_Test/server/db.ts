@@ -1,3 +1,4 @@
+import fs from "fs";
 import { drizzle } from "drizzle-orm/libsql";
 import { createClient } from "@libsql/client";
 import * as schema from "@shared/schema";
@@ -11,3 +12,33 @@ export const db = drizzle(client, { schema });
 // Enable WAL mode and set busy timeout to handle concurrent access
 db.$client.execute("PRAGMA journal_mode = WAL");
 db.$client.execute("PRAGMA busy_timeout = 5000"); // 5 seconds timeout
+
+// Réplica somente leitura, atualizada por `python snapshot_db.py replica --intervalo N`.
+// O mtime do arquivo é a hora em que começou a última atualização.
+const REPLICA_FILE = "database_replica.db";
+
+let replicaDb: typeof db | null = null;
+
+function getReplicaDb(): typeof db {
+    if (!replicaDb) {
+        replicaDb = drizzle(createClient({ url: `file:${REPLICA_FILE}` }), { schema });
+        replicaDb.$client.execute("PRAGMA busy_timeout = 5000");
+        replicaDb.$client.execute("PRAGMA query_only = ON");
+    }
+    return replicaDb;
+}
+
+// Banco para leituras pesadas que toleram até maxStalenessMs de atraso: a réplica,
+// se existir, tiver sido atualizada dentro do prazo e depois de writtenAfter
+// (epoch ms da última escrita que o chamador precisa enxergar); senão o principal.
+export function getReadDb(maxStalenessMs?: number, writtenAfter = 0): typeof db {
+    if (!maxStalenessMs) return db;
+    let refreshedAt: number;
+    try {
+        refreshedAt = fs.statSync(REPLICA_FILE).mtimeMs;
+    } catch {
+        return db;
+    }
+    if (Date.now() - refreshedAt > maxStalenessMs || refreshedAt < writtenAfter) return db;
+    return getReplicaDb();
+}
@@ -4,6 +4,8 @@ import { registerRoutes } from "./routes";
 import { serveStatic } from "./static";
 import { createServer } from "http";
 import { seedDatabase } from "./seed";
+import { storage } from "./storage";
+import { startLeaseManagers } from "./leases";
 
 const app = express();
 const httpServer = createServer(app);
@@ -81,6 +83,17 @@ app.use((req, res, next) => {
     log("Seeding error (non-critical): " + (error as Error).message);
   }
 
+  // Flags de quantidade manual dos produtos (regras podem ter mudado com o servidor parado)
+  try {
+    const changed = await storage.refreshManualQtyFlags();
+    if (changed > 0) log(`Regras de qtd manual | produtos_atualizados=${changed}`);
+  } catch (error) {
+    log("Manual qty flags error (non-critical): " + (error as Error).message);
+  }
+
+  // Locks e heartbeats ficam em memória; o estado persistido é recarregado aqui
+  await startLeaseManagers();
+
   await registerRoutes(httpServer, app);
 
   app.use((err: any, _req: Request, res: Response, next: NextFunction) => {
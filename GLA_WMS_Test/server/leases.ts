@@ -0,0 +1,311 @@
+import { randomUUID } from "crypto";
+import { storage } from "./storage";
+import { broadcastSSE } from "./sse";
+import { log } from "./log";
+
+export interface Lease<M = undefined> {
+  id: string;
+  key: string;
+  holder: string;
+  acquiredAt: number;
+  renewedAt: number;
+  expiresAt: number;
+  // Já recebeu ao menos um heartbeat do titular
+  heartbeat: boolean;
+  meta: M;
+}
+
+// Persistência das transições de estado de uma lease. Heartbeats (renovações)
+// ficam só em memória e chegam aqui apenas pelo flush periódico.
+export interface LeaseStore<M> {
+  load(): Promise<Lease<M>[]>;
+  acquired(leases: Lease<M>[]): Promise<void>;
+  released(keys: string[]): Promise<void>;
+  expired(leases: Lease<M>[]): Promise<void>;
+  renewed(leases: Lease<M>[]): Promise<void>;
+}
+
+interface LeaseManagerOptions<M> {
+  ttlMs: number;
+  sweepIntervalMs: number;
+  flushIntervalMs: number;
+  // false: lease que nunca recebeu heartbeat não expira nem pode ser tomada por
+  // vencimento (clientes antigos, que só bloqueiam e liberam). O TTL passa a valer
+  // a partir do primeiro heartbeat.
+  expireWithoutHeartbeat: boolean;
+  onExpired?: (leases: Lease<M>[]) => void;
+}
+
+export class LeaseManager<M = undefined> {
+  private byKey = new Map<string, Lease<M>>();
+  private byId = new Map<string, Lease<M>>();
+  // Chaves renovadas desde o último flush
+  private dirty = new Set<string>();
+  private timers: NodeJS.Timeout[] = [];
+
+  constructor(private name: string, private store: LeaseStore<M>, private options: LeaseManagerOptions<M>) {}
+
+  get ttlMs(): number {
+    return this.options.ttlMs;
+  }
+
+  async start(): Promise<void> {
+    const leases = await this.store.load();
+    for (const lease of leases) this.put(lease);
+
+    const sweep = setInterval(() => {
+      this.sweep().catch(error => log(`Leases ${this.name} | erro no sweep: ${(error as Error).message}`));
+    }, this.options.sweepIntervalMs);
+    const flush = setInterval(() => {
+      this.flush().catch(error => log(`Leases ${this.name} | erro no flush: ${(error as Error).message}`));
+    }, this.options.flushIntervalMs);
+    sweep.unref();
+    flush.unref();
+    this.timers.push(sweep, flush);
+
+    // Expiradas enquanto o servidor estava parado
+    await this.sweep();
+  }
+
+  get(key: string): Lease<M> | undefined {
+    const lease = this.byKey.get(key);
+    return lease && this.isAlive(lease, Date.now()) ? lease : undefined;
+  }
+
+  getById(id: string): Lease<M> | undefined {
+    const lease = this.byId.get(id);
+    return lease && this.isAlive(lease, Date.now()) ? lease : undefined;
+  }
+
+  list(predicate?: (lease: Lease<M>) => boolean): Lease<M>[] {
+    const now = Date.now();
+    return [...this.byKey.values()].filter(l => this.isAlive(l, now) && (!predicate || predicate(l)));
+  }
+
+  // Adquire as chaves para o titular. Lease válida de outro titular vira conflito,
+  // a menos que steal = true; a do próprio titular é readquirida (mesmo id).
+  async acquire(entries: { key: string; meta: M }[], holder: string, opts: { steal?: boolean } = {}): Promise<{ acquired: Lease<M>[]; conflicts: Lease<M>[] }> {
+    const now = Date.now();
+    const acquired: Lease<M>[] = [];
+    const conflicts: Lease<M>[] = [];
+    const created: Lease<M>[] = [];
+
+    for (const { key, meta } of entries) {
+      const current = this.byKey.get(key);
+      if (current && this.isAlive(current, now)) {
+        if (current.holder === holder) {
+          current.renewedAt = now;
+          current.expiresAt = now + this.options.ttlMs;
+          current.meta = meta;
+          this.dirty.delete(key);
+          acquired.push(current);
+          continue;
+        }
+        if (!opts.steal) {
+          conflicts.push(current);
+          continue;
+        }
+      }
+      if (current) this.remove(current);
+
+      const lease: Lease<M> = { id: randomUUID(), key, holder, acquiredAt: now, renewedAt: now, expiresAt: now + this.options.ttlMs, heartbeat: false, meta };
+      this.put(lease);
+      created.push(lease);
+      acquired.push(lease);
+    }
+
+    if (acquired.length > 0) {
+      try {
+        await this.store.acquired(acquired);
+      } catch (error) {
+        for (const lease of created) this.remove(lease);
+        throw error;
+      }
+    }
+    return { acquired, conflicts };
+  }
+
+  // Heartbeat: só memória.
+  renew(keys: string[], holder: string): Lease<M>[] {
+    const now = Date.now();
+    const renewed: Lease<M>[] = [];
+    for (const key of keys) {
+      const lease = this.byKey.get(key);
+      if (!lease || lease.holder !== holder || !this.isAlive(lease, now)) continue;
+      lease.renewedAt = now;
+      lease.expiresAt = now + this.options.ttlMs;
+      lease.heartbeat = true;
+      this.dirty.add(key);
+      renewed.push(lease);
+    }
+    return renewed;
+  }
+
+  renewById(id: string, holder: string): Lease<M> | undefined {
+    const lease = this.byId.get(id);
+    if (!lease) return undefined;
+    return this.renew([lease.key], holder)[0];
+  }
+
+  async release(keys: string[]): Promise<void> {
+    for (const key of keys) {
+      const lease = this.byKey.get(key);
+      if (lease) this.remove(lease);
+    }
+    if (keys.length > 0) await this.store.released(keys);
+  }
+
+  async sweep(): Promise<void> {
+    const now = Date.now();
+    const expired = [...this.byKey.values()].filter(l => !this.isAlive(l, now));
+    if (expired.length === 0) return;
+
+    for (const lease of expired) this.remove(lease);
+    await this.store.expired(expired);
+    log(`Leases ${this.name} | expiradas=${expired.length}`);
+    this.options.onExpired?.(expired);
+  }
+
+  // Grava o último heartbeat das leases renovadas (recuperação após queda do servidor).
+  async flush(): Promise<void> {
+    if (this.dirty.size === 0) return;
+    const leases = [...this.dirty].map(key => this.byKey.get(key)).filter((l): l is Lease<M> => !!l);
+    this.dirty.clear();
+    if (leases.length > 0) await this.store.renewed(leases);
+  }
+
+  private isAlive(lease: Lease<M>, now: number): boolean {
+    return lease.expiresAt > now || (!this.options.expireWithoutHeartbeat && !lease.heartbeat);
+  }
+
+  private put(lease: Lease<M>): void {
+    this.byKey.set(lease.key, lease);
+    this.byId.set(lease.id, lease);
+  }
+
+  private remove(lease: Lease<M>): void {
+    this.byKey.delete(lease.key);
+    this.byId.delete(lease.id);
+    this.dirty.delete(lease.key);
+  }
+}
+
+// Sessões de separação do coletor (picking_sessions): uma por pedido/seção.
+export const PICKING_SESSION_TTL_MINUTES = 2;
+// Bloqueio das unidades de trabalho nas telas de separação/conferência/balcão.
+export const WORK_UNIT_LOCK_TTL_MINUTES = 15;
+
+export interface PickingLeaseMeta {
+  orderId: string;
+  sectionId: string;
+}
+
+export function pickingLeaseKey(orderId: string, sectionId: string): string {
+  return `${orderId}:${sectionId}`;
+}
+
+export const pickingLeases = new LeaseManager<PickingLeaseMeta>("picking_sessions", {
+  async load() {
+    const sessions = await storage.getAllPickingSessions();
+    return sessions.map(s => {
+      const renewedAt = Date.parse(s.lastHeartbeat) || Date.now();
+      return {
+        id: s.id,
+        key: pickingLeaseKey(s.orderId, s.sectionId),
+        holder: s.userId,
+        acquiredAt: Date.parse(s.createdAt) || renewedAt,
+        renewedAt,
+        expiresAt: renewedAt + PICKING_SESSION_TTL_MINUTES * 60 * 1000,
+        heartbeat: true,
+        meta: { orderId: s.orderId, sectionId: s.sectionId },
+      };
+    });
+  },
+  async acquired(leases) {
+    await storage.savePickingSessions(leases.map(l => ({
+      id: l.id,
+      userId: l.holder,
+      orderId: l.meta.orderId,
+      sectionId: l.meta.sectionId,
+      lastHeartbeat: new Date(l.renewedAt).toISOString(),
+      createdAt: new Date(l.acquiredAt).toISOString(),
+    })));
+  },
+  async released(keys) {
+    for (const key of keys) {
+      const separator = key.indexOf(":");
+      await storage.deletePickingSession(key.slice(0, separator), key.slice(separator + 1));
+    }
+  },
+  async expired(leases) {
+    await storage.deletePickingSessionsById(leases.map(l => l.id));
+  },
+  async renewed(leases) {
+    await storage.touchPickingSessions(leases.map(l => ({ id: l.id, lastHeartbeat: new Date(l.renewedAt).toISOString() })));
+  },
+}, {
+  ttlMs: PICKING_SESSION_TTL_MINUTES * 60 * 1000,
+  sweepIntervalMs: 15 * 1000,
+  flushIntervalMs: 60 * 1000,
+  expireWithoutHeartbeat: true,
+  onExpired: (leases) => {
+    for (const lease of leases) {
+      broadcastSSE("lock_released", { orderId: lease.meta.orderId, sectionId: lease.meta.sectionId, expired: true });
+    }
+  },
+});
+
+export const workUnitLeases = new LeaseManager("work_units", {
+  async load() {
+    const locked = await storage.getLockedWorkUnits();
+    return locked.map(wu => {
+      const lockedAt = Date.parse(wu.lockedAt || "") || Date.now();
+      const expiresAt = Date.parse(wu.lockExpiresAt || "") || lockedAt + WORK_UNIT_LOCK_TTL_MINUTES * 60 * 1000;
+      return {
+        id: wu.id,
+        key: wu.id,
+        holder: wu.lockedBy,
+        acquiredAt: lockedAt,
+        renewedAt: lockedAt,
+        expiresAt,
+        // O flush só grava lockExpiresAt de leases renovadas: vencimento além do
+        // TTL inicial indica que o titular já mandou heartbeat.
+        heartbeat: expiresAt > lockedAt + WORK_UNIT_LOCK_TTL_MINUTES * 60 * 1000,
+        meta: undefined,
+      };
+    });
+  },
+  async acquired(leases) {
+    const byHolder = new Map<string, Lease[]>();
+    for (const lease of leases) {
+      byHolder.set(lease.holder, [...(byHolder.get(lease.holder) || []), lease]);
+    }
+    for (const [holder, held] of byHolder) {
+      const expiresAt = Math.max(...held.map(l => l.expiresAt));
+      await storage.lockWorkUnits(held.map(l => l.key), holder, new Date(expiresAt));
+    }
+  },
+  async released(keys) {
+    await storage.unlockWorkUnits(keys);
+  },
+  async expired(leases) {
+    await storage.expireWorkUnitLocks(leases.map(l => ({ id: l.key, lockedBy: l.holder })));
+  },
+  async renewed(leases) {
+    await storage.renewWorkUnitLocks(leases.map(l => ({ id: l.key, lockedBy: l.holder, lockExpiresAt: new Date(l.expiresAt).toISOString() })));
+  },
+}, {
+  ttlMs: WORK_UNIT_LOCK_TTL_MINUTES * 60 * 1000,
+  sweepIntervalMs: 30 * 1000,
+  flushIntervalMs: 60 * 1000,
+  // Como antes das leases, o bloqueio de cliente sem heartbeat dura até ser liberado
+  expireWithoutHeartbeat: false,
+  onExpired: (leases) => {
+    broadcastSSE("work_units_unlocked", { workUnitIds: leases.map(l => l.key), affectedOrderIds: [], expired: true });
+  },
+});
+
+export async function startLeaseManagers(): Promise<void> {
+  await pickingLeases.start();
+  await workUnitLeases.start();
+}
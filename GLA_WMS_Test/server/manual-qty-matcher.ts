@@ -0,0 +1,107 @@
+import type { ManualQtyRule, Product } from "@shared/schema";
+
+type MatchableProduct = Pick<Product, "erpCode" | "barcode" | "boxBarcode" | "name" | "manufacturer">;
+
+// Autômato Aho-Corasick: testa todas as palavras-chave contra o texto numa única passada.
+class KeywordAutomaton {
+  private transitions: Map<string, number>[] = [new Map()];
+  private fail: number[] = [0];
+  private terminal: boolean[] = [false];
+
+  constructor(patterns: string[]) {
+    for (const pattern of patterns) {
+      let state = 0;
+      for (const ch of pattern) {
+        let next = this.transitions[state].get(ch);
+        if (next === undefined) {
+          next = this.transitions.length;
+          this.transitions.push(new Map());
+          this.fail.push(0);
+          this.terminal.push(false);
+          this.transitions[state].set(ch, next);
+        }
+        state = next;
+      }
+      this.terminal[state] = true;
+    }
+
+    // Links de falha em largura (filhos da raiz falham para a raiz)
+    const queue = [...this.transitions[0].values()];
+    for (let head = 0; head < queue.length; head++) {
+      const state = queue[head];
+      for (const [ch, next] of this.transitions[state]) {
+        let f = this.fail[state];
+        while (f !== 0 && !this.transitions[f].has(ch)) f = this.fail[f];
+        this.fail[next] = this.transitions[f].get(ch) ?? 0;
+        this.terminal[next] = this.terminal[next] || this.terminal[this.fail[next]];
+        queue.push(next);
+      }
+    }
+  }
+
+  get isEmpty(): boolean {
+    return this.transitions[0].size === 0;
+  }
+
+  matches(text: string): boolean {
+    let state = 0;
+    for (const ch of text) {
+      while (state !== 0 && !this.transitions[state].has(ch)) state = this.fail[state];
+      state = this.transitions[state].get(ch) ?? 0;
+      if (this.terminal[state]) return true;
+    }
+    return false;
+  }
+}
+
+// Regras de quantidade manual compiladas: códigos e barras em Set, palavras-chave
+// (descrição/fabricante) em autômatos. Mesma semântica do antigo loop de regras:
+// igualdade exata para códigos, "contém" sem diferenciar maiúsculas para textos.
+export class ManualQtyMatcher {
+  private productCodes = new Set<string>();
+  private barcodes = new Set<string>();
+  private keywords: KeywordAutomaton;
+  private manufacturers: KeywordAutomaton;
+
+  constructor(rules: Pick<ManualQtyRule, "ruleType" | "value" | "active">[]) {
+    const keywords: string[] = [];
+    const manufacturers: string[] = [];
+
+    for (const rule of rules) {
+      if (!rule.active) continue;
+      const values = rule.value.split(";").map(v => v.trim()).filter(v => v.length > 0);
+      for (const val of values) {
+        switch (rule.ruleType) {
+          case "product_code":
+            this.productCodes.add(val);
+            break;
+          case "barcode":
+            this.barcodes.add(val);
+            break;
+          case "description_keyword":
+            keywords.push(val.toUpperCase());
+            break;
+          case "manufacturer":
+            manufacturers.push(val.toUpperCase());
+            break;
+        }
+      }
+    }
+
+    this.keywords = new KeywordAutomaton(keywords);
+    this.manufacturers = new KeywordAutomaton(manufacturers);
+  }
+
+  get isEmpty(): boolean {
+    return this.productCodes.size === 0 && this.barcodes.size === 0 && this.keywords.isEmpty && this.manufacturers.isEmpty;
+  }
+
+  matches(product: MatchableProduct): boolean {
+    if (this.productCodes.has(product.erpCode)) return true;
+    if (product.barcode && this.barcodes.has(product.barcode)) return true;
+    if (product.boxBarcode && this.barcodes.has(product.boxBarcode)) return true;
+    if (product.name && this.keywords.matches(product.name.toUpperCase())) return true;
+    if (product.manufacturer && this.manufacturers.matches(product.manufacturer.toUpperCase())) return true;
+    return false;
+  }
+}
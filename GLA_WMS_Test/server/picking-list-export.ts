@@ -0,0 +1,107 @@
+import type { Response } from "express";
+import type { PickingListGroup } from "./storage";
+
+export type PickingListFormat = "csv" | "html";
+
+interface ExportLabels {
+  sectionNames: Map<string, string>;
+  pickupPointNames: Map<number, string>;
+  title: string;
+}
+
+// Respeita o backpressure do socket: só segue quando o buffer esvaziar
+async function write(res: Response, chunk: string): Promise<void> {
+  if (!res.write(chunk)) {
+    await new Promise<void>((resolve, reject) => {
+      const onDrain = () => { res.off("close", onClose); resolve(); };
+      const onClose = () => { res.off("drain", onDrain); reject(new Error("Conexão encerrada pelo cliente")); };
+      res.once("drain", onDrain);
+      res.once("close", onClose);
+    });
+  }
+}
+
+function escapeHtml(value: unknown): string {
+  return String(value ?? "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;");
+}
+
+function csvField(value: unknown): string {
+  const text = String(value ?? "");
+  return /[";\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function formatQty(qty: number): string {
+  return qty.toFixed(2).replace(".", ",");
+}
+
+const HTML_HEAD = `<style>
+    body { font-family: Arial, Helvetica, sans-serif; margin: 12px 20px; font-size: 11px; color: #000; }
+    h1 { font-size: 16px; text-align: center; margin: 0 0 6px 0; }
+    table { width: 100%; border-collapse: collapse; }
+    th { border-top: 1px solid #000; border-bottom: 1px solid #000; padding: 3px 6px; text-align: left; background: #f5f5f5; }
+    td { padding: 2px 6px; }
+    th:last-child, td:last-child { text-align: right; }
+    .section-row td { padding-top: 8px; border-bottom: 1px solid #ccc; font-size: 12px; }
+    @media print { @page { size: landscape; margin: 6mm; } tr { page-break-inside: avoid; } }
+</style>`;
+
+// Grava o romaneio na resposta à medida que os grupos chegam (chunked), sem
+// montar o documento inteiro em memória.
+export async function streamPickingListExport(
+  res: Response,
+  groups: AsyncIterable<PickingListGroup>,
+  format: PickingListFormat,
+  labels: ExportLabels,
+): Promise<void> {
+  const stamp = new Date().toISOString().slice(0, 10);
+  const sectionName = (id: string) => labels.sectionNames.get(id) || id || "Sem Seção";
+  const pickupPointName = (id: number) => labels.pickupPointNames.get(id) || `Ponto ${id}`;
+
+  if (format === "csv") {
+    res.setHeader("Content-Type", "text/csv; charset=utf-8");
+    res.setHeader("Content-Disposition", `attachment; filename="romaneio_${stamp}.csv"`);
+    // BOM para o Excel reconhecer UTF-8
+    await write(res, "\uFEFFSeção;Ponto de Retirada;Cód. Produto;Descrição;Cód. de Barras;Fornecedor;Separar\r\n");
+    for await (const group of groups) {
+      let chunk = "";
+      for (const line of group.lines) {
+        chunk += [
+          sectionName(group.section),
+          pickupPointName(group.pickupPoint),
+          line.erpCode,
+          line.name,
+          line.barcode,
+          line.manufacturer,
+          formatQty(line.quantity),
+        ].map(csvField).join(";") + "\r\n";
+      }
+      await write(res, chunk);
+    }
+    res.end();
+    return;
+  }
+
+  res.setHeader("Content-Type", "text/html; charset=utf-8");
+  await write(res, `<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>${escapeHtml(labels.title)}</title>${HTML_HEAD}</head><body>
+<h1>${escapeHtml(labels.title)}</h1>
+<table>
+<thead><tr><th>Cód. Produto</th><th>Descrição do Produto</th><th>Cód. de Barras</th><th>Fornecedor</th><th>Separar</th></tr></thead>
+<tbody>
+`);
+  let totalLines = 0;
+  for await (const group of groups) {
+    let chunk = `<tr class="section-row"><td colspan="5"><strong>Seção:</strong> ${escapeHtml(sectionName(group.section).toUpperCase())} · ${escapeHtml(pickupPointName(group.pickupPoint))}</td></tr>\n`;
+    for (const line of group.lines) {
+      chunk += `<tr><td>${escapeHtml(line.erpCode)}</td><td>${escapeHtml(line.name)}</td><td>${escapeHtml(line.barcode)}</td><td>${escapeHtml(line.manufacturer)}</td><td><strong>${formatQty(line.quantity)}</strong></td></tr>\n`;
+    }
+    totalLines += group.lines.length;
+    await write(res, chunk);
+  }
+  await write(res, `</tbody></table>\n<p>${totalLines} produto(s) · gerado em ${escapeHtml(new Date().toLocaleString("pt-BR"))}</p>\n</body></html>`);
+  res.end();
+}
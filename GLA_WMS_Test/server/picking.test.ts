@@ -0,0 +1,99 @@
+import { describe, it, expect } from 'vitest';
+import { evaluatePickScan, withWorkUnitLock } from './picking';
+
+describe('evaluatePickScan', () => {
+    it('adds the scanned quantity while below the target', () => {
+        const outcome = evaluatePickScan({ separatedQty: 2, quantity: 10, exceptionQty: 0 }, 3);
+        expect(outcome).toEqual({
+            status: 'success',
+            quantity: 3,
+            separatedQty: 5,
+            itemStatus: 'pendente',
+            itemComplete: false,
+            reopensOrder: false,
+        });
+    });
+
+    it('completes the item when the target is reached', () => {
+        const outcome = evaluatePickScan({ separatedQty: 9, quantity: 10, exceptionQty: 0 }, 1);
+        expect(outcome.status).toBe('success');
+        expect(outcome.separatedQty).toBe(10);
+        expect(outcome.itemStatus).toBe('separado');
+        expect(outcome.itemComplete).toBe(true);
+    });
+
+    it('discounts exceptions from the target', () => {
+        const outcome = evaluatePickScan({ separatedQty: 6, quantity: 10, exceptionQty: 2 }, 2);
+        expect(outcome.status).toBe('success');
+        expect(outcome.separatedQty).toBe(8);
+        expect(outcome.itemComplete).toBe(true);
+    });
+
+    it('resets the item when the scan exceeds the available quantity', () => {
+        const outcome = evaluatePickScan({ separatedQty: 8, quantity: 10, exceptionQty: 0 }, 12);
+        expect(outcome.status).toBe('over_quantity');
+        expect(outcome.quantity).toBe(12);
+        expect(outcome.separatedQty).toBe(0);
+        expect(outcome.itemStatus).toBe('recontagem');
+        expect(outcome.itemComplete).toBe(false);
+        expect(outcome.reopensOrder).toBe(true);
+        expect(outcome.message).toContain('Disponível: 2');
+    });
+
+    it('resets an item that was already complete without reopening the order', () => {
+        const outcome = evaluatePickScan({ separatedQty: 10, quantity: 10, exceptionQty: 0 }, 5);
+        expect(outcome.status).toBe('over_quantity');
+        expect(outcome.quantity).toBe(1);
+        expect(outcome.separatedQty).toBe(0);
+        expect(outcome.itemStatus).toBe('recontagem');
+        expect(outcome.reopensOrder).toBe(false);
+    });
+
+    it('reopens the order when an item with exceptions is scanned past its target', () => {
+        const outcome = evaluatePickScan({ separatedQty: 7, quantity: 10, exceptionQty: 3 }, 1);
+        expect(outcome.status).toBe('over_quantity_with_exception');
+        expect(outcome.reopensOrder).toBe(true);
+        expect(outcome.message).toContain('3 unidade(s) com exceção');
+    });
+});
+
+describe('withWorkUnitLock', () => {
+    const tick = () => new Promise(resolve => setTimeout(resolve, 5));
+
+    it('runs calls for the same unit one after the other', async () => {
+        const events: string[] = [];
+        const task = (name: string) => async () => {
+            events.push(`${name}:start`);
+            await tick();
+            events.push(`${name}:end`);
+            return name;
+        };
+
+        const results = await Promise.all([
+            withWorkUnitLock('wu-1', task('a')),
+            withWorkUnitLock('wu-1', task('b')),
+        ]);
+
+        expect(results).toEqual(['a', 'b']);
+        expect(events).toEqual(['a:start', 'a:end', 'b:start', 'b:end']);
+    });
+
+    it('keeps the queue going after a failed call', async () => {
+        const failed = withWorkUnitLock('wu-2', async () => {
+            throw new Error('boom');
+        });
+        const next = withWorkUnitLock('wu-2', async () => 'ok');
+
+        await expect(failed).rejects.toThrow('boom');
+        await expect(next).resolves.toBe('ok');
+    });
+
+    it('does not serialize different units', async () => {
+        const events: string[] = [];
+        await Promise.all([
+            withWorkUnitLock('wu-3', async () => { events.push('x:start'); await tick(); events.push('x:end'); }),
+            withWorkUnitLock('wu-4', async () => { events.push('y:start'); await tick(); events.push('y:end'); }),
+        ]);
+        expect(events.slice(0, 2).sort()).toEqual(['x:start', 'y:start']);
+    });
+});
@@ -0,0 +1,87 @@
+// Regras de bipagem da separação e serialização por unidade de trabalho.
+
+export type PickScanStatus = "success" | "over_quantity" | "over_quantity_with_exception";
+
+export interface PickItemState {
+  separatedQty: number;
+  quantity: number;
+  exceptionQty: number;
+}
+
+export interface PickScanOutcome {
+  status: PickScanStatus;
+  // Quantidade informada ao operador (a bipada, ou 1 quando o item já estava completo)
+  quantity: number;
+  separatedQty: number;
+  itemStatus: "pendente" | "separado" | "recontagem";
+  // true quando o item atingiu o alvo (quantidade - exceções) com este bipe
+  itemComplete: boolean;
+  // Reset que também volta o pedido de "separado" para "em_separacao". Bipe em
+  // item já completo e sem exceção só volta a unidade (como já era feito na rota).
+  reopensOrder: boolean;
+  message?: string;
+}
+
+// Aplica um bipe ao estado atual do item, sem tocar no banco.
+// Excedeu o disponível -> zera o item (recontagem), como já era feito na rota.
+export function evaluatePickScan(state: PickItemState, requestedQty: number): PickScanOutcome {
+  const currentQty = Number(state.separatedQty);
+  const exceptionQty = Number(state.exceptionQty || 0);
+  const adjustedTarget = Number(state.quantity) - exceptionQty;
+  const hasException = exceptionQty > 0;
+
+  if (currentQty >= adjustedTarget) {
+    return {
+      status: hasException ? "over_quantity_with_exception" : "over_quantity",
+      quantity: 1,
+      separatedQty: 0,
+      itemStatus: "recontagem",
+      itemComplete: false,
+      reopensOrder: hasException,
+      message: hasException
+        ? `Este item tem ${exceptionQty} unidade(s) com exceção. Quantidade disponível para separar: ${adjustedTarget}. Separação resetada, bipe novamente.`
+        : `Quantidade excedida! Separação resetada. Bipe os ${adjustedTarget} itens novamente.`,
+    };
+  }
+
+  const availableQty = adjustedTarget - currentQty;
+  if (requestedQty > availableQty) {
+    return {
+      status: hasException ? "over_quantity_with_exception" : "over_quantity",
+      quantity: requestedQty,
+      separatedQty: 0,
+      itemStatus: "recontagem",
+      itemComplete: false,
+      reopensOrder: true,
+      message: hasException
+        ? `Este item tem ${exceptionQty} unidade(s) com exceção. Quantidade disponível: ${availableQty}. Separação resetada.`
+        : `Quantidade excedida! Disponível: ${availableQty}. Separação resetada.`,
+    };
+  }
+
+  const newQty = currentQty + requestedQty;
+  const itemComplete = newQty >= adjustedTarget;
+  return {
+    status: "success",
+    quantity: requestedQty,
+    separatedQty: newQty,
+    itemStatus: itemComplete ? "separado" : "pendente",
+    itemComplete,
+    reopensOrder: false,
+  };
+}
+
+// Fila de promessas por chave: bipes da mesma unidade rodam em série (sem
+// leitura-modificação-escrita concorrente), unidades diferentes seguem em paralelo.
+const workUnitQueues = new Map<string, Promise<unknown>>();
+
+export function withWorkUnitLock<T>(workUnitId: string, fn: () => Promise<T>): Promise<T> {
+  const previous = workUnitQueues.get(workUnitId) ?? Promise.resolve();
+  const run = previous.then(() => fn());
+  const tail = run.catch(() => undefined);
+  workUnitQueues.set(workUnitId, tail);
+  tail.then(() => {
+    if (workUnitQueues.get(workUnitId) === tail) workUnitQueues.delete(workUnitId);
+  });
+  return run;
+}
@@ -3,17 +3,19 @@ import { createServer, type Server } from "http";
 import cookieParser from "cookie-parser";
 import { storage } from "./storage";
 import { hashPassword, verifyPassword, createAuthSession, isAuthenticated, requireRole, getTokenFromRequest, getUserFromToken } from "./auth";
-import { loginSchema, insertRouteSchema, orderItems, pickingSessions, pickupPoints, type MappingField, datasetEnum, type User, type OrderItem, type Product, type WorkUnit, type Exception, type PickingSession, type ExceptionType, type ManualQtyRule, type UserSettings } from "@shared/schema";
+import { loginSchema, insertRouteSchema, orderItems, pickingSessions, pickupPoints, type MappingField, datasetEnum, type User, type OrderItem, type Product, type WorkUnit, type Exception, type PickingSession, type ExceptionType, type ManualQtyRule, type UserSettings, scanBatchSchema, workUnitStatusEnum, orderStatusEnum, type WorkUnitStatus } from "@shared/schema";
 import { z } from "zod";
 import { exec } from "child_process";
 import path from "path";
-import { setupSSE, broadcastSSE } from "./sse";
+import fs from "fs";
+import { setupSSE, broadcastSSE, getSSEStats } from "./sse";
 import { db } from "./db";
 import { eq } from "drizzle-orm";
 import { getDataContract, getAvailableDatasets } from "./data-contracts";
 import { log } from "./log";
-
-const LOCK_TTL_MINUTES = 15;
+import { pickingLeases, pickingLeaseKey, workUnitLeases } from "./leases";
+import { getArchivedOrders, getArchivedAuditLogs, getArchivedExceptions } from "./archive";
+import { streamPickingListExport } from "./picking-list-export";
 
 function getClientIp(req: Request): string | undefined {
   const ip = req.ip;
@@ -27,6 +29,33 @@ function getUserAgent(req: Request): string | undefined {
   return ua;
 }
 
+const WORK_UNIT_PAGE_MAX = 500;
+const DATE_PARAM = /^\d{4}-\d{2}-\d{2}$/;
+// Atraso aceito nas leituras pesadas (relatórios, exceções) servidas pela réplica
+const REPORT_MAX_STALENESS_MS = 2 * 60 * 1000;
+
+function parseListParam(value: unknown): string[] | undefined {
+  if (typeof value !== "string" || value.length === 0) return undefined;
+  return value.split(",").map(v => v.trim()).filter(v => v.length > 0);
+}
+
+// ?from=YYYY-MM-DD&to=YYYY-MM-DD (fim inclusivo): undefined sem período, null se inválido
+function parsePeriodParams(query: Request["query"]): { from: string; to: string } | null | undefined {
+  if (query.from === undefined && query.to === undefined) return undefined;
+  const from = String(query.from || "");
+  const to = String(query.to || "");
+  return DATE_PARAM.test(from) && DATE_PARAM.test(to) && from <= to ? { from, to } : null;
+}
+
+function inPeriod(createdAt: string, period: { from: string; to: string }): boolean {
+  return createdAt.slice(0, 10) >= period.from && createdAt.slice(0, 10) <= period.to;
+}
+
+function parseSinceParam(value: unknown): number | null {
+  const since = Number(value);
+  return Number.isInteger(since) && since >= 0 ? since : null;
+}
+
 export async function registerRoutes(
   httpServer: Server,
   app: Express
@@ -72,13 +101,14 @@ export async function registerRoutes(
       const userId = (req as any).user.id;
 
       // 1. Verify Lock
-      const lock = await storage.getPickingSession(orderId, sectionId);
-      if (!lock || lock.userId !== userId) {
+      const lockKey = pickingLeaseKey(orderId, sectionId);
+      const lock = pickingLeases.get(lockKey);
+      if (!lock || lock.holder !== userId) {
         return res.status(409).json({ error: "Sessão expirada ou inválida. Bloqueie novamente." });
       }
 
       // Refresh heartbeat
-      await storage.updatePickingSessionHeartbeat(lock.id);
+      pickingLeases.renew([lockKey], userId);
 
       // 2. Process Items
       const updates = [];
@@ -126,39 +156,25 @@ export async function registerRoutes(
       const { orderId, sectionId } = req.body;
       const userId = (req as any).user.id;
 
-      // 1. Check if locked by someone else
-      const existing = await storage.getPickingSession(orderId, sectionId);
-      if (existing) {
-        if (existing.userId !== userId) {
-          // Check if expired
-          const minutesSinceHeartbeat = (Date.now() - new Date(existing.lastHeartbeat).getTime()) / 1000 / 60;
-          if (minutesSinceHeartbeat < 2) { // 2 mins TTL for heartbeat
-            return res.status(409).json({
-              error: "Bloqueado",
-              lockedBy: existing.userId,
-              message: "Seção sendo separada por outro usuário"
-            });
-          } else {
-            // Expired, steal lock
-            await storage.deletePickingSession(orderId, sectionId);
-          }
-        } else {
-          // Self-lock, just refresh
-          await storage.updatePickingSessionHeartbeat(existing.id);
-          return res.json({ success: true, sessionId: existing.id });
-        }
+      // Lease em memória: bloqueio de outro usuário só vale enquanto houver heartbeat
+      // (expirada, a lease é substituída); o próprio usuário apenas readquire.
+      const key = pickingLeaseKey(orderId, sectionId);
+      const isSelfLock = pickingLeases.get(key)?.holder === userId;
+      const { acquired, conflicts } = await pickingLeases.acquire([{ key, meta: { orderId, sectionId } }], userId);
+
+      if (conflicts.length > 0) {
+        return res.status(409).json({
+          error: "Bloqueado",
+          lockedBy: conflicts[0].holder,
+          message: "Seção sendo separada por outro usuário"
+        });
       }
 
-      // 2. Create lock
-      const session = await storage.createPickingSession({
-        userId,
-        orderId,
-        sectionId,
-      });
-
-      broadcastSSE("lock_acquired", { orderId, sectionId, userId });
+      if (!isSelfLock) {
+        broadcastSSE("lock_acquired", { orderId, sectionId, userId });
+      }
 
-      res.json({ success: true, sessionId: session.id });
+      res.json({ success: true, sessionId: acquired[0].id });
     } catch (error) {
       console.error("Lock error:", error);
       res.status(500).json({ error: "Erro ao bloquear seção" });
@@ -168,8 +184,12 @@ export async function registerRoutes(
   app.post("/api/heartbeat", isAuthenticated, async (req: Request, res: Response) => {
     try {
       const { sessionId } = req.body;
-      await storage.updatePickingSessionHeartbeat(sessionId);
-      res.json({ success: true });
+      // Só memória; o último heartbeat vai para o banco no flush periódico
+      const lease = pickingLeases.renewById(sessionId, (req as any).user.id);
+      if (!lease) {
+        return res.status(409).json({ error: "Sessão expirada ou inválida. Bloqueie novamente." });
+      }
+      res.json({ success: true, expiresAt: new Date(lease.expiresAt) });
     } catch (error) {
       res.status(500).json({ error: "Erro no heartbeat" });
     }
@@ -178,7 +198,7 @@ export async function registerRoutes(
   app.post("/api/unlock", isAuthenticated, async (req: Request, res: Response) => {
     try {
       const { orderId, sectionId } = req.body;
-      await storage.deletePickingSession(orderId, sectionId);
+      await pickingLeases.release([pickingLeaseKey(orderId, sectionId)]);
 
       broadcastSSE("lock_released", { orderId, sectionId });
 
@@ -359,7 +379,12 @@ export async function registerRoutes(
 
   app.get("/api/queue/balcao", isAuthenticated, async (req: Request, res: Response) => {
     try {
-      const wus = await storage.getWorkUnits("balcao");
+      const { workUnits: wus } = await storage.getWorkUnitQueue({
+        type: "balcao",
+        statuses: workUnitStatusEnum.filter(s => s !== "concluido"),
+        orderStatuses: orderStatusEnum.filter(s => s !== "finalizado"),
+        lockedOnly: true,
+      });
       const activeOrders = new Map<string, {
         orderId: string;
         erpOrderId: string;
@@ -375,9 +400,6 @@ export async function registerRoutes(
       }>();
 
       for (const wu of wus) {
-        if (!wu.lockedBy || wu.status === "concluido") continue;
-        if (wu.order.status === "finalizado") continue;
-
         const existing = activeOrders.get(wu.orderId);
         if (!existing) {
           activeOrders.set(wu.orderId, {
@@ -547,6 +569,31 @@ export async function registerRoutes(
   // Orders routes
   app.get("/api/orders", isAuthenticated, async (req: Request, res: Response) => {
     try {
+      // ?since=<versão>: só pedidos alterados/removidos desde a versão (0 = carga completa)
+      if (req.query.since !== undefined) {
+        const since = parseSinceParam(req.query.since);
+        if (since === null) {
+          return res.status(400).json({ error: "Parâmetro since inválido" });
+        }
+        const delta = await storage.getOrdersSince(since);
+        return res.json({ version: delta.version, full: delta.full, orders: delta.rows, removed: delta.removed });
+      }
+
+      // ?from=YYYY-MM-DD&to=YYYY-MM-DD: período de criação; inclui os arquivos
+      // mensais (pedidos finalizados já arquivados) que cobrem o período
+      const period = parsePeriodParams(req.query);
+      if (period !== undefined) {
+        if (period === null) {
+          return res.status(400).json({ error: "Período inválido" });
+        }
+        const [hot, archived] = await Promise.all([
+          storage.getOrdersInRange(period.from, period.to),
+          getArchivedOrders(period.from, period.to),
+        ]);
+        const merged = [...hot, ...archived].sort((a, b) => b.priority - a.priority || b.createdAt.localeCompare(a.createdAt));
+        return res.json(merged);
+      }
+
       const orders = await storage.getAllOrders();
       res.json(orders);
     } catch (error) {
@@ -761,12 +808,12 @@ export async function registerRoutes(
         }
 
         // Check for active picking sessions
-        const activeSessions = await storage.getPickingSessionsByOrder(orderId);
+        const activeSessions = pickingLeases.list(lease => lease.meta.orderId === orderId);
 
         if (activeSessions.length > 0) {
           // Get operator name from first session
           const session = activeSessions[0];
-          const operator = await storage.getUser(session.userId);
+          const operator = await storage.getUser(session.holder);
           const operatorName = operator ? operator.name : "Operador desconhecido";
 
           return res.status(400).json({
@@ -811,11 +858,30 @@ export async function registerRoutes(
     }
   });
 
+  // Contadores dos caches em memória (sessões, unidades de trabalho) e das filas SSE
+  app.get("/api/stats/cache", isAuthenticated, requireRole("administrador"), async (req: Request, res: Response) => {
+    res.json({ ...storage.getCacheStats(), sse: getSSEStats() });
+  });
+
+  // Métricas gravadas pelo sync_db2.py (último sync, tamanho e atraso do WAL)
+  app.get("/api/stats/sync", isAuthenticated, requireRole("administrador"), async (req: Request, res: Response) => {
+    try {
+      const content = await fs.promises.readFile(path.join(process.cwd(), "sync_metrics.json"), "utf-8");
+      res.json(JSON.parse(content));
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code === "ENOENT") {
+        return res.status(404).json({ error: "Métricas do sync ainda não disponíveis" });
+      }
+      console.error("Get sync metrics error:", error);
+      res.status(500).json({ error: "Erro interno" });
+    }
+  });
+
   // Reports
   app.post("/api/reports/picking-list", isAuthenticated, requireRole("supervisor", "administrador"), async (req: Request, res: Response) => {
     try {
       const { orderIds, pickupPoints, sections } = req.body;
-      const data = await storage.getPickingListReportData({ orderIds, pickupPoints, sections });
+      const data = await storage.getPickingListReportData({ orderIds, pickupPoints, sections }, REPORT_MAX_STALENESS_MS);
       res.json(data);
     } catch (error) {
       console.error("Get picking list report error:", error);
@@ -826,9 +892,44 @@ export async function registerRoutes(
   // Work Units routes
   app.get("/api/work-units", isAuthenticated, async (req: Request, res: Response) => {
     try {
-      const type = req.query.type as string | undefined;
-      const workUnits = await storage.getWorkUnits(type);
-      res.json(workUnits);
+      // Filtros no SQL: status=, section=, pickupPoint= (listas separadas por vírgula),
+      // iguais na lista incremental (since=) e na paginada (limit/cursor: { workUnits, nextCursor }).
+      const filter = {
+        type: req.query.type as string | undefined,
+        statuses: parseListParam(req.query.status) as WorkUnitStatus[] | undefined,
+        sections: parseListParam(req.query.section),
+        pickupPoints: parseListParam(req.query.pickupPoint)?.map(Number).filter(Number.isInteger),
+      };
+
+      const limit = req.query.limit !== undefined ? Number(req.query.limit) : undefined;
+      const cursor = req.query.cursor !== undefined ? Number(req.query.cursor) : undefined;
+      if ((limit !== undefined && (!Number.isInteger(limit) || limit < 1 || limit > WORK_UNIT_PAGE_MAX))
+        || (cursor !== undefined && !Number.isInteger(cursor))) {
+        return res.status(400).json({ error: "Paginação inválida" });
+      }
+
+      if (req.query.since !== undefined) {
+        const since = parseSinceParam(req.query.since);
+        if (since === null) {
+          return res.status(400).json({ error: "Parâmetro since inválido" });
+        }
+        // limit/cursor paginam só a carga completa (full); o delta vem inteiro
+        const delta = await storage.getWorkUnitsSince({ ...filter, limit, cursor }, since);
+        return res.json({
+          version: delta.version,
+          full: delta.full,
+          workUnits: delta.rows,
+          removed: delta.removed,
+          nextCursor: delta.nextCursor ?? null,
+        });
+      }
+
+      const page = await storage.getWorkUnitQueue({ ...filter, limit, cursor });
+
+      if (limit !== undefined || cursor !== undefined) {
+        return res.json(page);
+      }
+      res.json(page.workUnits);
     } catch (error) {
       console.error("Get work units error:", error);
       res.status(500).json({ error: "Erro interno" });
@@ -846,7 +947,7 @@ export async function registerRoutes(
         if (wu?.orderId) affectedOrderIds.add(wu.orderId);
       }
 
-      await storage.unlockWorkUnits(workUnitIds);
+      await workUnitLeases.release(workUnitIds);
 
       if (reset) {
         for (const id of workUnitIds) {
@@ -884,9 +985,14 @@ export async function registerRoutes(
     try {
       const { workUnitIds } = req.body;
       const userId = (req as any).user.id;
-      const expiresAt = new Date(Date.now() + LOCK_TTL_MINUTES * 60 * 1000);
 
-      await storage.lockWorkUnits(workUnitIds, userId, expiresAt);
+      // Mantém o comportamento anterior: o bloqueio sobrescreve o de outro operador
+      const { acquired } = await workUnitLeases.acquire(
+        workUnitIds.map((id: string) => ({ key: id, meta: undefined })),
+        userId,
+        { steal: true },
+      );
+      const expiresAt = new Date(acquired[0]?.expiresAt ?? Date.now() + workUnitLeases.ttlMs);
 
       await storage.createAuditLog({
         userId,
@@ -904,6 +1010,26 @@ export async function registerRoutes(
     }
   });
 
+  // Heartbeat das unidades bloqueadas pelo operador: renova as leases só em memória
+  app.post("/api/work-units/heartbeat", isAuthenticated, async (req: Request, res: Response) => {
+    try {
+      const { workUnitIds } = req.body;
+      if (!Array.isArray(workUnitIds)) {
+        return res.status(400).json({ error: "workUnitIds deve ser um array" });
+      }
+
+      const renewed = workUnitLeases.renew(workUnitIds.map(String), (req as any).user.id);
+      res.json({
+        success: true,
+        renewed: renewed.map(l => l.key),
+        expiresAt: renewed.length > 0 ? new Date(Math.max(...renewed.map(l => l.expiresAt))) : null,
+      });
+    } catch (error) {
+      console.error("Work units heartbeat error:", error);
+      res.status(500).json({ error: "Erro no heartbeat" });
+    }
+  });
+
   app.post("/api/work-units/batch/scan-cart", isAuthenticated, async (req: Request, res: Response) => {
     try {
       const { workUnitIds, qrCode } = req.body;
@@ -1023,146 +1149,86 @@ export async function registerRoutes(
 
   app.post("/api/work-units/:id/scan-item", isAuthenticated, async (req: Request, res: Response) => {
     try {
-      const { barcode } = req.body;
-      const workUnit = await storage.getWorkUnitById(req.params.id as string);
+      const { barcode, minimal } = req.body;
+      const workUnitId = req.params.id as string;
 
-      if (!workUnit) {
-        return res.status(404).json({ error: "Unidade não encontrada" });
-      }
+      // Aceitar quantidade opcional do frontend (padrão = 1, ou o múltiplo da caixa fechada)
+      const result = await storage.applyPickScan(workUnitId, barcode, Number(req.body.quantity) || undefined);
 
-      const product = await storage.getProductByBarcode(barcode);
-      if (!product) {
-        return res.json({ status: "not_found" });
+      if (result.status === "unit_not_found") {
+        return res.status(404).json({ error: "Unidade não encontrada" });
       }
-
-      const item = workUnit.items.find(i => i.productId === product.id);
-      if (!item) {
+      if (result.status === "not_found") {
         return res.json({ status: "not_found" });
       }
 
-      const currentQty = Number(item.separatedQty);
-      const targetQty = Number(item.quantity);
-      const exceptionQty = Number(item.exceptionQty || 0);
-      const adjustedTarget = targetQty - exceptionQty;
-
-      // If trying to scan more than adjusted target (accounting for exceptions)
-      if (currentQty >= adjustedTarget) {
-        // If there are exceptions, reset and inform user
-        if (exceptionQty > 0) {
-          await storage.updateOrderItem(item.id, {
-            separatedQty: 0,
-            status: "recontagem",
-          });
-          // Also reset work unit status if it was completed
-          // Também resetar status do pedido se estava como separado
-          const order = await storage.getOrderById(workUnit.orderId);
-          if (order && order.status === "separado") {
-            await storage.updateOrder(workUnit.orderId, { status: "em_separacao" });
-          }
-          await storage.updateWorkUnit(req.params.id as string, { status: "em_andamento" });
-
-          const resetWorkUnit = await storage.getWorkUnitById(req.params.id as string);
-
-          return res.json({
-            status: "over_quantity_with_exception",
-            workUnit: resetWorkUnit,
-            product,
-            quantity: 1,
-            exceptionQty,
-            message: `Este item tem ${exceptionQty} unidade(s) com exceção. Quantidade disponível para separar: ${adjustedTarget}. Separação resetada, bipe novamente.`
-          });
-        }
-        // No exceptions, just over quantity - RESET behavior requested
-        await storage.updateOrderItem(item.id, {
-          separatedQty: 0,
-          status: "recontagem",
-        });
-        // Also reset work unit status if it was completed
-        await storage.updateWorkUnit(req.params.id as string, { status: "em_andamento" });
-
-        const resetWorkUnit = await storage.getWorkUnitById(req.params.id as string);
-
-        return res.json({
-          status: "over_quantity",
-          product,
-          quantity: 1,
-          workUnit: resetWorkUnit, // Return the reset work unit!
-          message: `Quantidade excedida! Separação resetada. Bipe os ${adjustedTarget} itens novamente.`
-        });
-      }
-
-      // Aceitar quantidade opcional do frontend (padrão = 1)
-      const requestedQty = Number(req.body.quantity || 1);
-      const availableQty = adjustedTarget - currentQty;
-
-      // Se a quantidade solicitada exceder o disponível, aplicar regra de reset
-      if (requestedQty > availableQty) {
-        // Reset to zero as per user requirement
-        await storage.updateOrderItem(item.id, {
-          separatedQty: 0,
-          status: "recontagem",
-        });
-        // Também resetar status do pedido se estava como separado
-        const order = await storage.getOrderById(workUnit.orderId);
-        if (order && order.status === "separado") {
-          await storage.updateOrder(workUnit.orderId, { status: "em_separacao" });
+      const orderId = result.workUnit.orderId;
+      if (result.status === "success") {
+        broadcastSSE("item_picked", { workUnitId, orderId, sectionId: result.workUnit.section, pickupPoint: result.workUnit.pickupPoint, productId: result.product.id, userId: (req as any).user.id });
+        if (result.unitComplete) {
+          broadcastSSE("picking_finished", { workUnitId, orderId, sectionId: result.workUnit.section, pickupPoint: result.workUnit.pickupPoint });
         }
-        await storage.updateWorkUnit(req.params.id as string, { status: "em_andamento" });
-
-        const resetWorkUnit = await storage.getWorkUnitById(req.params.id as string);
-
-        if (exceptionQty > 0) {
-          return res.json({
-            status: "over_quantity_with_exception",
-            workUnit: resetWorkUnit,
-            product,
-            quantity: requestedQty,
-            exceptionQty,
-            message: `Este item tem ${exceptionQty} unidade(s) com exceção. Quantidade disponível: ${availableQty}. Separação resetada.`
-          });
-        }
-
-        return res.json({
-          status: "over_quantity",
-          product,
-          quantity: requestedQty,
-          workUnit: resetWorkUnit,
-          message: `Quantidade excedida! Disponível: ${availableQty}. Separação resetada.`
-        });
       }
 
-      const newQty = currentQty + requestedQty;
-      await storage.updateOrderItem(item.id, {
-        separatedQty: Number(newQty),
-        status: newQty >= adjustedTarget ? "separado" : "pendente",
+      // Resposta enxuta: apenas o que mudou. A unidade completa só é montada
+      // (a partir do cache) para clientes que não pedem o modo mínimo.
+      res.json({
+        status: result.status,
+        product: result.product,
+        quantity: result.quantity,
+        ...(result.status !== "success" && { exceptionQty: result.exceptionQty, message: result.message }),
+        item: {
+          id: result.item.id,
+          separatedQty: result.item.separatedQty,
+          status: result.item.status,
+          exceptionQty: result.exceptionQty,
+        },
+        workUnitId,
+        workUnitStatus: result.workUnitStatus,
+        unitComplete: result.unitComplete,
+        orderComplete: result.orderComplete,
+        ...(!minimal && { workUnit: await storage.getWorkUnitById(workUnitId) }),
       });
+    } catch (error) {
+      console.error("Scan item error:", error);
+      res.status(500).json({ error: "Erro interno" });
+    }
+  });
 
-      const updated = await storage.getWorkUnitById(req.params.id as string);
-
-      broadcastSSE("item_picked", { workUnitId: req.params.id, orderId: workUnit.orderId, productId: product.id, userId: (req as any).user.id });
-
-      const unitComplete = await storage.checkAndCompleteWorkUnit(req.params.id as string);
-
-      if (unitComplete) {
-        broadcastSSE("picking_finished", { workUnitId: req.params.id, orderId: workUnit.orderId });
+  // Fila de bipes do coletor (ex.: acumulada com Wi-Fi instável) enviada de uma vez.
+  // Cada bipe traz o seq do dispositivo; reenvios do mesmo seq não contam de novo.
+  app.post("/api/work-units/:id/scan-batch", isAuthenticated, async (req: Request, res: Response) => {
+    try {
+      const data = scanBatchSchema.parse(req.body);
+      const workUnitId = req.params.id as string;
+      const userId = (req as any).user.id;
 
-        // Verificar se agora TODAS as unidades do pedido est\u00e3o prontas
-        const allWusComplete = await storage.checkAllWorkUnitsComplete(workUnit.orderId);
-        if (allWusComplete) {
-          await storage.updateOrder(workUnit.orderId, { status: "separado" });
-        }
+      const result = await storage.applyPickScanBatch(workUnitId, data.clientId, data.scans);
+      if (result.status === "unit_not_found") {
+        return res.status(404).json({ error: "Unidade não encontrada" });
       }
 
-      const finalWorkUnit = await storage.getWorkUnitById(req.params.id as string);
+      const orderId = result.workUnit.orderId;
+      if (result.items.length > 0) {
+        broadcastSSE("item_picked", { workUnitId, orderId, sectionId: result.workUnit.section, pickupPoint: result.workUnit.pickupPoint, productIds: result.items.map(i => i.productId), userId });
+      }
+      if (result.unitComplete) {
+        broadcastSSE("picking_finished", { workUnitId, orderId, sectionId: result.workUnit.section, pickupPoint: result.workUnit.pickupPoint });
+      }
 
       res.json({
-        status: "success",
-        product,
-        quantity: requestedQty,
-        workUnit: finalWorkUnit,
+        workUnitId,
+        results: result.results,
+        items: result.items,
+        workUnitStatus: result.workUnitStatus,
+        unitComplete: result.unitComplete,
+        orderComplete: result.orderComplete,
       });
     } catch (error) {
-      console.error("Scan item error:", error);
+      if (error instanceof z.ZodError) {
+        return res.status(400).json({ error: "Dados inválidos" });
+      }
+      console.error("Scan batch error:", error);
       res.status(500).json({ error: "Erro interno" });
     }
   });
@@ -1358,10 +1424,40 @@ export async function registerRoutes(
     }
   });
 
+  // Audit Logs (?from&to: período, incluindo os arquivos mensais)
+  app.get("/api/audit-logs", isAuthenticated, requireRole("supervisor", "administrador"), async (req: Request, res: Response) => {
+    try {
+      const period = parsePeriodParams(req.query);
+      if (period === null) {
+        return res.status(400).json({ error: "Período inválido" });
+      }
+      const logs = await storage.getAllAuditLogs(REPORT_MAX_STALENESS_MS);
+      if (period) {
+        const archived = await getArchivedAuditLogs(period.from, period.to);
+        return res.json([...logs.filter(l => inPeriod(l.createdAt, period)), ...archived]
+          .sort((a, b) => b.createdAt.localeCompare(a.createdAt)));
+      }
+      res.json(logs);
+    } catch (error) {
+      console.error("Get audit logs error:", error);
+      res.status(500).json({ error: "Erro interno" });
+    }
+  });
+
   // Exceptions
   app.get("/api/exceptions", isAuthenticated, async (req: Request, res: Response) => {
     try {
-      const exceptions = await storage.getAllExceptions();
+      // ?from&to: período de criação, incluindo as exceções dos pedidos já arquivados
+      const period = parsePeriodParams(req.query);
+      if (period === null) {
+        return res.status(400).json({ error: "Período inválido" });
+      }
+      const exceptions = await storage.getAllExceptions(REPORT_MAX_STALENESS_MS);
+      if (period) {
+        const archived = await getArchivedExceptions(period.from, period.to);
+        return res.json([...exceptions.filter(e => inPeriod(e.createdAt, period)), ...archived]
+          .sort((a, b) => b.createdAt.localeCompare(a.createdAt)));
+      }
       res.json(exceptions);
     } catch (error) {
       console.error("Get exceptions error:", error);
@@ -1493,18 +1589,7 @@ export async function registerRoutes(
         return res.status(400).json({ error: "productIds deve ser um array" });
       }
 
-      const allProducts = await storage.getAllProducts();
-      const results: Record<string, boolean> = {};
-
-      for (const productId of productIds) {
-        const product = allProducts.find(p => p.id === productId);
-        if (product) {
-          results[productId] = await storage.checkProductManualQty(product);
-        } else {
-          results[productId] = false;
-        }
-      }
-
+      const results = await storage.getManualQtyFlags(productIds.map(String));
       res.json(results);
     } catch (error) {
       console.error("Check manual qty rules error:", error);
@@ -1525,7 +1610,7 @@ export async function registerRoutes(
         orderIds,
         pickupPoints: pickupPoints?.map(String),
         sections: filterSections,
-      });
+      }, REPORT_MAX_STALENESS_MS);
 
       const selectedOrders: any[] = [];
       for (const oid of orderIds) {
@@ -1545,6 +1630,53 @@ export async function registerRoutes(
     }
   });
 
+  // Romaneio em CSV ou HTML imprimível, enviado em partes (chunked) à medida que
+  // os itens são lidos: um romaneio do dia inteiro não fica todo em memória.
+  app.post("/api/reports/picking-list/export", isAuthenticated, requireRole("supervisor", "administrador"), async (req: Request, res: Response) => {
+    try {
+      const { orderIds, pickupPoints: filterPickupPoints, sections: filterSections, groupId } = req.body;
+      const format = req.body.format || req.query.format || "html";
+
+      if (format !== "csv" && format !== "html") {
+        return res.status(400).json({ error: "Formato inválido (use csv ou html)" });
+      }
+      if (orderIds !== undefined && !Array.isArray(orderIds)) {
+        return res.status(400).json({ error: "orderIds deve ser uma lista" });
+      }
+
+      let sectionFilter: string[] | undefined = filterSections;
+      if (groupId && !sectionFilter?.length) {
+        const group = await storage.getSectionGroupById(groupId);
+        if (!group) return res.status(404).json({ error: "Grupo de seções não encontrado" });
+        sectionFilter = group.sections;
+      }
+
+      const [allSections, allPickupPoints] = await Promise.all([
+        storage.getAllSections(),
+        db.select().from(pickupPoints),
+      ]);
+
+      const groups = storage.streamPickingList({
+        orderIds,
+        pickupPoints: filterPickupPoints?.map(String),
+        sections: sectionFilter,
+      }, REPORT_MAX_STALENESS_MS);
+
+      await streamPickingListExport(res, groups, format, {
+        sectionNames: new Map(allSections.map(s => [String(s.id), s.name])),
+        pickupPointNames: new Map(allPickupPoints.map(p => [p.id, p.name])),
+        title: "Romaneio de Separação",
+      });
+    } catch (error) {
+      console.error("Export picking list error:", error);
+      if (res.headersSent) {
+        res.destroy();
+      } else {
+        res.status(500).json({ error: "Erro ao gerar relatório" });
+      }
+    }
+  });
+
   app.delete("/api/exceptions/item/:orderItemId", isAuthenticated, async (req: Request, res: Response) => {
     try {
       const orderItemId = req.params.orderItemId as string;
@@ -1,62 +1,247 @@
 import { Response, Request, Express } from 'express';
+import { getTokenFromRequest, getUserFromToken } from './auth';
+
+// Window in which bursts are merged before being written to clients
+const COALESCE_WINDOW_MS = 150;
+// Messages waiting per client while its socket is not draining
+const CLIENT_QUEUE_MAX = 100;
+
+// Events that collapse into a single message per key within the window
+// (e.g. every item_picked of a work unit during a wave)
+const DEFAULT_COALESCE_KEYS: Record<string, (data: any) => string | undefined> = {
+    item_picked: (data) => data?.workUnitId,
+    picking_update: (data) => data?.orderId && `${data.orderId}:${data.sectionId}`,
+};
+
+// Dimensions a client must hold to receive an event targeted at them.
+// The others (type, order, section, pickup) are filters: a client that
+// did not ask for a dimension receives everything in it.
+const STRICT_DIMENSIONS = new Set(['user', 'role']);
+
+type Topics = Map<string, Set<string>>;
+
+interface QueuedMessage {
+    key?: string;
+    chunk: string;
+}
+
+interface SSEClient {
+    id: number;
+    res: Response;
+    userId?: string;
+    subscription: Topics;
+    queue: QueuedMessage[];
+    paused: boolean;
+}
+
+interface PendingEvent {
+    type: string;
+    data: any;
+    topics: Topics;
+    key?: string;
+    count: number;
+}
+
+export interface BroadcastOptions {
+    // Extra topics ("role:supervisor", "user:<id>", ...) besides the ones derived from data
+    topics?: string[];
+    // Overrides the default coalescing key of the event type; null disables coalescing
+    coalesceKey?: string | null;
+}
 
 // Store active connections
-let clients: { id: number; res: Response; userId?: string }[] = [];
+const clients = new Map<number, SSEClient>();
+let nextClientId = 1;
+
+let pending: PendingEvent[] = [];
+const pendingByKey = new Map<string, PendingEvent>();
+let flushTimer: NodeJS.Timeout | null = null;
+
+function parseTopics(list: Iterable<string>): Topics {
+    const topics: Topics = new Map();
+    for (const topic of list) {
+        const separator = topic.indexOf(':');
+        if (separator <= 0) continue;
+        const dimension = topic.slice(0, separator);
+        if (!topics.has(dimension)) topics.set(dimension, new Set());
+        topics.get(dimension)!.add(topic.slice(separator + 1));
+    }
+    return topics;
+}
+
+function topicsFromData(data: any): string[] {
+    if (!data || typeof data !== 'object') return [];
+    const topics: string[] = [];
+    if (data.orderId) topics.push(`order:${data.orderId}`);
+    if (Array.isArray(data.orderIds)) topics.push(...data.orderIds.map((id: string) => `order:${id}`));
+    if (data.sectionId) topics.push(`section:${data.sectionId}`);
+    if (data.pickupPoint != null) topics.push(`pickup:${data.pickupPoint}`);
+    return topics;
+}
+
+function matches(subscription: Topics, topics: Topics): boolean {
+    for (const [dimension, values] of topics) {
+        const wanted = subscription.get(dimension);
+        if (!wanted) {
+            if (STRICT_DIMENSIONS.has(dimension)) return false;
+            continue;
+        }
+        if (![...values].some(value => wanted.has(value))) return false;
+    }
+    return true;
+}
+
+function formatMessage(type: string, data: any): string {
+    return `event: ${type}\ndata: ${JSON.stringify(data)}\n\n`;
+}
+
+function drain(client: SSEClient) {
+    while (!client.paused && client.queue.length > 0) {
+        const message = client.queue.shift()!;
+        if (!client.res.write(message.chunk)) {
+            client.paused = true;
+            client.res.once('drain', () => {
+                client.paused = false;
+                drain(client);
+            });
+        }
+    }
+}
+
+function enqueue(client: SSEClient, chunk: string, key?: string) {
+    if (key) {
+        const queued = client.queue.find(message => message.key === key);
+        if (queued) {
+            queued.chunk = chunk;
+            return;
+        }
+    }
+    if (client.queue.length >= CLIENT_QUEUE_MAX) {
+        // Slow client: discard the backlog and ask it to refetch everything
+        client.queue = [{ key: 'resync', chunk: formatMessage('resync', { dropped: client.queue.length }) }];
+    }
+    client.queue.push({ key, chunk });
+    drain(client);
+}
+
+function flushPending() {
+    flushTimer = null;
+    const events = pending;
+    pending = [];
+    pendingByKey.clear();
+
+    for (const event of events) {
+        const data = event.count > 1 && event.data && typeof event.data === 'object' && !Array.isArray(event.data)
+            ? { ...event.data, coalesced: event.count }
+            : event.data;
+        // Serialized once, shared by every subscribed client
+        const chunk = formatMessage(event.type, data);
+        for (const client of clients.values()) {
+            if (matches(client.subscription, event.topics)) {
+                enqueue(client, chunk, event.key);
+            }
+        }
+    }
+}
 
 /**
  * Setup Server-Sent Events (SSE) endpoint
+ *
+ * Query params (optional):
+ * - events: comma-separated event types the client listens to
+ * - topics: comma-separated filters, e.g. "section:1,pickup:2,order:<id>"
  */
 export function setupSSE(app: Express) {
-    app.get('/api/sse', (req: Request, res: Response) => {
+    app.get('/api/sse', async (req: Request, res: Response) => {
+        let user: { id: string; role: string } | undefined;
+        const token = getTokenFromRequest(req);
+        if (token) {
+            try {
+                user = (await getUserFromToken(token))?.user;
+            } catch {
+                user = undefined;
+            }
+        }
+
+        const requested = [
+            ...String(req.query.events || '').split(',').filter(Boolean).map(type => `type:${type}`),
+            ...String(req.query.topics || '').split(',').filter(Boolean),
+        ].filter(topic => !STRICT_DIMENSIONS.has(topic.split(':')[0]));
+        if (user) requested.push(`user:${user.id}`, `role:${user.role}`);
+
         // Set headers for SSE
         res.setHeader('Content-Type', 'text/event-stream');
         res.setHeader('Cache-Control', 'no-cache');
         res.setHeader('Connection', 'keep-alive');
         res.flushHeaders();
 
-        const clientId = Date.now();
-        const userId = (req as any).user?.id; // Optional: identify user if auth middleware runs before
-
-        const newClient = {
+        const clientId = nextClientId++;
+        const newClient: SSEClient = {
             id: clientId,
             res,
-            userId
+            userId: user?.id,
+            subscription: parseTopics(requested),
+            queue: [],
+            paused: false,
         };
 
-        clients.push(newClient);
-        // console.log(`[SSE] Client connected: ${clientId} (User: ${userId || 'anonymous'})`);
+        clients.set(clientId, newClient);
 
         // Send initial connection message
-        res.write(`data: ${JSON.stringify({ type: 'connected', clientId })}\n\n`);
+        res.write(formatMessage('connected', { clientId }));
 
         // Remove client on close
         req.on('close', () => {
-            // console.log(`[SSE] Client disconnected: ${clientId}`);
-            clients = clients.filter(client => client.id !== clientId);
+            clients.delete(clientId);
         });
     });
 }
 
 /**
- * Broadcast an event to all connected clients
+ * Broadcast an event to the connected clients subscribed to its topics.
+ * Events are buffered for a short window so bursts can be coalesced.
  */
-export function broadcastSSE(type: string, data: any) {
-    const message = `event: ${type}\ndata: ${JSON.stringify(data)}\n\n`;
+export function broadcastSSE(type: string, data: any, opts: BroadcastOptions = {}) {
+    const coalesceKey = opts.coalesceKey === null
+        ? undefined
+        : opts.coalesceKey ?? DEFAULT_COALESCE_KEYS[type]?.(data);
+    const key = coalesceKey ? `${type}:${coalesceKey}` : undefined;
 
-    clients.forEach(client => {
-        client.res.write(message);
-    });
+    const existing = key ? pendingByKey.get(key) : undefined;
+    if (existing) {
+        existing.data = data;
+        existing.count++;
+        return;
+    }
+
+    const event: PendingEvent = {
+        type,
+        data,
+        topics: parseTopics([`type:${type}`, ...topicsFromData(data), ...(opts.topics || [])]),
+        key,
+        count: 1,
+    };
+    pending.push(event);
+    if (key) pendingByKey.set(key, event);
+
+    if (!flushTimer) {
+        flushTimer = setTimeout(flushPending, COALESCE_WINDOW_MS);
+    }
 }
 
 /**
  * Send an event to specific user(s)
  */
 export function sendToUserSSE(userId: string, type: string, data: any) {
-    const message = `event: ${type}\ndata: ${JSON.stringify(data)}\n\n`;
+    broadcastSSE(type, data, { topics: [`user:${userId}`], coalesceKey: null });
+}
 
-    clients
-        .filter(client => client.userId === userId)
-        .forEach(client => {
-            client.res.write(message);
-        });
+export function getSSEStats() {
+    let queued = 0;
+    let paused = 0;
+    for (const client of clients.values()) {
+        queued += client.queue.length;
+        if (client.paused) paused++;
+    }
+    return { clients: clients.size, queued, paused, pending: pending.length };
 }
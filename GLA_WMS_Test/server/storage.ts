@@ -1,15 +1,140 @@
-import { db } from "./db";
-import { eq, and, sql, desc, inArray, isNull, gt, lt, or } from "drizzle-orm";
+import { db, getReadDb } from "./db";
+import { eq, and, sql, desc, inArray, isNull, isNotNull, gt, gte, lt, or } from "drizzle-orm";
 import {
-  users, orders, orderItems, products, routes, workUnits, exceptions, auditLogs, sessions, sections, sectionGroups, manualQtyRules, db2Mappings, cacheOrcamentos,
+  users, orders, orderItems, products, productBarcodes, scanReceipts, changeVersion, tombstones, statsCounters, routes, workUnits, exceptions, auditLogs, sessions, sections, sectionGroups, manualQtyRules, db2Mappings, cacheOrcamentos,
   type User, type InsertUser, type Order, type InsertOrder, type OrderItem, type InsertOrderItem,
   type Product, type InsertProduct, type Route, type InsertRoute, type WorkUnit, type InsertWorkUnit,
   type Exception, type InsertException, type AuditLog, type InsertAuditLog, type Session,
   type SectionGroup, type InsertSectionGroup, type Section, pickingSessions, type PickingSession, type InsertPickingSession,
   type ManualQtyRule, type InsertManualQtyRule,
-  type Db2Mapping, type MappingField,
+  type Db2Mapping, type MappingField, type BarcodeKind, type ScanBatchInput, type ScanOutcome,
+  type OrderStatus, type WorkUnitStatus,
 } from "@shared/schema";
 import { randomUUID } from "crypto";
+import { alias } from "drizzle-orm/sqlite-core";
+import type { BatchItem } from "drizzle-orm/batch";
+import { TtlCache } from "./cache";
+import { evaluatePickScan, withWorkUnitLock, type PickScanOutcome } from "./picking";
+import { ManualQtyMatcher } from "./manual-qty-matcher";
+
+export type WorkUnitWithItems = WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[] };
+
+export type PickScanResult =
+  | { status: "unit_not_found" }
+  | { status: "not_found" }
+  | (PickScanOutcome & {
+    workUnit: WorkUnit;
+    item: OrderItem;
+    product: Product;
+    exceptionQty: number;
+    workUnitStatus: WorkUnit["status"];
+    unitComplete: boolean;
+    orderComplete: boolean;
+  });
+
+export type PickScanBatchResult =
+  | { status: "unit_not_found" }
+  | {
+    status: "ok";
+    workUnit: WorkUnit;
+    results: (ScanOutcome & { duplicate?: boolean })[];
+    items: { id: string; productId: string; separatedQty: number; status: OrderItem["status"] }[];
+    workUnitStatus: WorkUnit["status"];
+    unitComplete: boolean;
+    orderComplete: boolean;
+  };
+
+export type OrderWithStats = Order & { hasExceptions: boolean; totalItems: number; itemCount: number; pickedItems: number };
+export type WorkUnitListEntry = WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[]; lockedByName?: string };
+
+export interface WorkUnitQueueFilter {
+  type?: string;
+  statuses?: WorkUnitStatus[];
+  // Padrão da conferência: CONFERENCE_ORDER_STATUSES
+  orderStatuses?: OrderStatus[];
+  sections?: string[];
+  pickupPoints?: number[];
+  lockedOnly?: boolean;
+  // Paginação por chave (rowid): limit + cursor devolvido na página anterior
+  limit?: number;
+  cursor?: number;
+}
+
+export interface WorkUnitQueuePage {
+  workUnits: WorkUnitListEntry[];
+  nextCursor: number | null;
+}
+
+// Conferência só enxerga pedidos separados ou já em conferência/conferidos
+const CONFERENCE_ORDER_STATUSES: OrderStatus[] = ["separado", "em_conferencia", "conferido"];
+
+// Resposta das listas incrementais: linhas alteradas desde a versão pedida,
+// ids removidos (ou que saíram do filtro) e a nova marca d'água. full = true
+// quando a versão pedida não pode ser atendida e a lista veio completa.
+export interface ListDelta<T> {
+  version: number;
+  full: boolean;
+  rows: T[];
+  removed: string[];
+  // Carga completa paginada: cursor da próxima página (null na última)
+  nextCursor?: number | null;
+}
+
+export interface PickingListFilters {
+  orderIds?: string[];
+  pickupPoints?: string[];
+  sections?: string[];
+}
+
+// Linha do romaneio: quantidade somada por produto dentro de seção/ponto de retirada
+export interface PickingListLine {
+  erpCode: string;
+  name: string;
+  barcode: string | null;
+  manufacturer: string | null;
+  quantity: number;
+}
+
+export interface PickingListGroup {
+  section: string;
+  pickupPoint: number;
+  lines: PickingListLine[];
+}
+
+const PICKING_LIST_PAGE_SIZE = 1000;
+
+export interface OrderStats {
+  pendentes: number;
+  emSeparacao: number;
+  separados: number;
+  conferidos: number;
+  excecoes: number;
+  // Pedidos por status
+  byStatus: Record<string, number>;
+  // Unidades de trabalho por status, por seção / ponto de retirada
+  bySection: Record<string, Record<string, number>>;
+  byPickupPoint: Record<string, Record<string, number>>;
+}
+
+export interface AuthSession {
+  user: User;
+  sessionKey: string;
+  expiresAt: number;
+}
+
+// Sessões autenticadas (token -> usuário) consultadas a cada requisição.
+const SESSION_CACHE_MAX = 2000;
+const SESSION_CACHE_TTL_MS = 60 * 1000;
+
+// Estado das unidades de trabalho é relido a cada bipe; o TTL curto cobre
+// escritas feitas fora deste processo (sync_db2.py).
+const WORK_UNIT_CACHE_MAX = 500;
+const WORK_UNIT_CACHE_TTL_MS = 5000;
+
+// Recibos de bipes em lote só servem para reenvios da mesma fila; os mais antigos
+// que isso são descartados junto com um lote, no máximo uma vez por intervalo.
+const SCAN_RECEIPT_RETENTION_DAYS = 7;
+const SCAN_RECEIPT_PRUNE_INTERVAL_MS = 60 * 60 * 1000;
 
 export interface IStorage {
   // Users
@@ -32,6 +157,7 @@ export interface IStorage {
   // Sessions
   createSession(userId: string, token: string, sessionKey: string, expiresAt: Date): Promise<Session>;
   getSessionByToken(token: string): Promise<Session | undefined>;
+  getAuthSession(token: string): Promise<AuthSession | undefined>;
   deleteSession(token: string): Promise<void>;
 
   // Routes
@@ -43,10 +169,13 @@ export interface IStorage {
   // Products
   getAllProducts(): Promise<Product[]>;
   getProductByBarcode(barcode: string): Promise<Product | undefined>;
+  resolveBarcode(barcode: string): Promise<{ product: Product; kind: BarcodeKind; multiplier: number } | undefined>;
   createProduct(product: InsertProduct): Promise<Product>;
 
   // Orders
   getAllOrders(): Promise<Order[]>;
+  getOrdersSince(since: number): Promise<ListDelta<OrderWithStats>>;
+  getOrdersInRange(from: string, to: string): Promise<OrderWithStats[]>;
   getOrderById(id: string): Promise<Order | undefined>;
   getOrderWithItems(id: string): Promise<(Order & { items: (OrderItem & { product: Product })[] }) | undefined>;
   createOrder(order: InsertOrder): Promise<Order>;
@@ -65,14 +194,21 @@ export interface IStorage {
 
   // Work Units
   getWorkUnits(type?: string): Promise<(WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[] })[]>;
-  getWorkUnitById(id: string): Promise<(WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[] }) | undefined>;
+  getWorkUnitsSince(filter: WorkUnitQueueFilter, since: number): Promise<ListDelta<WorkUnitListEntry>>;
+  getWorkUnitQueue(filter: WorkUnitQueueFilter): Promise<WorkUnitQueuePage>;
+  getWorkUnitById(id: string): Promise<WorkUnitWithItems | undefined>;
+  applyPickScan(workUnitId: string, barcode: string, quantity?: number): Promise<PickScanResult>;
+  applyPickScanBatch(workUnitId: string, clientId: string, scans: ScanBatchInput["scans"]): Promise<PickScanBatchResult>;
   createWorkUnit(workUnit: InsertWorkUnit): Promise<WorkUnit>;
   updateWorkUnit(id: string, data: Partial<WorkUnit>): Promise<WorkUnit | undefined>;
   lockWorkUnits(workUnitIds: string[], userId: string, expiresAt: Date): Promise<void>;
   unlockWorkUnits(workUnitIds: string[]): Promise<void>;
+  getLockedWorkUnits(): Promise<{ id: string; lockedBy: string; lockedAt: string | null; lockExpiresAt: string | null }[]>;
+  expireWorkUnitLocks(locks: { id: string; lockedBy: string }[]): Promise<void>;
+  renewWorkUnitLocks(locks: { id: string; lockedBy: string; lockExpiresAt: string }[]): Promise<void>;
 
   // Exceptions
-  getAllExceptions(): Promise<(Exception & { orderItem: OrderItem & { product: Product; order: Order }; reportedByUser: User; workUnit: WorkUnit })[]>;
+  getAllExceptions(maxStalenessMs?: number): Promise<(Exception & { orderItem: OrderItem & { product: Product; order: Order }; reportedByUser: User; workUnit: WorkUnit })[]>;
 
   createException(exception: InsertException): Promise<Exception>;
   deleteExceptionsForItem(orderItemId: string): Promise<void>;
@@ -80,17 +216,18 @@ export interface IStorage {
 
   // Audit Logs
   createAuditLog(log: InsertAuditLog): Promise<AuditLog>;
-  getAllAuditLogs(): Promise<(AuditLog & { user: User | null })[]>;
+  getAllAuditLogs(maxStalenessMs?: number): Promise<(AuditLog & { user: User | null })[]>;
 
   // Stats
-  getOrderStats(): Promise<{ pendentes: number; emSeparacao: number; separados: number; conferidos: number; excecoes: number }>;
+  getOrderStats(): Promise<OrderStats>;
 
   // Reports
-  getPickingListReportData(filters: { orderIds?: string[]; pickupPoints?: string[]; sections?: string[] }): Promise<{
+  getPickingListReportData(filters: { orderIds?: string[]; pickupPoints?: string[]; sections?: string[] }, maxStalenessMs?: number): Promise<{
     section: string;
     pickupPoint: number;
     items: (OrderItem & { product: Product; order: Order })[];
   }[]>;
+  streamPickingList(filters: PickingListFilters, maxStalenessMs?: number): AsyncGenerator<PickingListGroup>;
 
   // Picking Sessions
   createPickingSession(session: InsertPickingSession): Promise<PickingSession>;
@@ -98,6 +235,10 @@ export interface IStorage {
   updatePickingSessionHeartbeat(id: string): Promise<void>;
   deletePickingSession(orderId: string, sectionId: string): Promise<void>;
   getPickingSessionsByOrder(orderId: string): Promise<PickingSession[]>;
+  getAllPickingSessions(): Promise<PickingSession[]>;
+  savePickingSessions(sessions: PickingSession[]): Promise<void>;
+  deletePickingSessionsById(ids: string[]): Promise<void>;
+  touchPickingSessions(heartbeats: { id: string; lastHeartbeat: string }[]): Promise<void>;
   cancelOrderLaunch(orderId: string): Promise<void>;
 
   // Manual Quantity Rules
@@ -106,6 +247,8 @@ export interface IStorage {
   updateManualQtyRule(id: string, data: Partial<InsertManualQtyRule>): Promise<ManualQtyRule | undefined>;
   deleteManualQtyRule(id: string): Promise<void>;
   checkProductManualQty(product: Product): Promise<boolean>;
+  getManualQtyFlags(productIds: string[]): Promise<Record<string, boolean>>;
+  refreshManualQtyFlags(): Promise<number>;
 
   // DB2 Mappings
   getMappingByDataset(dataset: string): Promise<Db2Mapping | undefined>;
@@ -116,6 +259,38 @@ export interface IStorage {
 }
 
 export class DatabaseStorage implements IStorage {
+  private workUnitCache = new TtlCache<string, WorkUnitWithItems>(WORK_UNIT_CACHE_MAX, WORK_UNIT_CACHE_TTL_MS);
+  private manualQtyMatcher: ManualQtyMatcher | null = null;
+  private sessionCache = new TtlCache<string, AuthSession>(SESSION_CACHE_MAX, SESSION_CACHE_TTL_MS);
+  // Última escrita em exceptions: a listagem só usa a réplica atualizada depois dela
+  private exceptionsWrittenAt = 0;
+  private scanReceiptsPrunedAt = 0;
+
+  getCacheStats() {
+    return {
+      sessions: this.sessionCache.stats(),
+      workUnits: this.workUnitCache.stats(),
+    };
+  }
+
+  // Descarta o estado em cache das unidades de um pedido (ou de todas, sem orderId).
+  invalidateWorkUnitState(orderId?: string | null): void {
+    if (orderId) {
+      this.workUnitCache.deleteWhere(wu => wu.orderId === orderId);
+    } else {
+      this.workUnitCache.clear();
+    }
+  }
+
+  // Exceções mudam o estado das unidades dos pedidos desses itens.
+  private async invalidateWorkUnitStateForItems(orderItemIds: string[]): Promise<void> {
+    if (orderItemIds.length === 0) return;
+    const rows = await db.selectDistinct({ orderId: orderItems.orderId })
+      .from(orderItems)
+      .where(inArray(orderItems.id, orderItemIds));
+    rows.forEach(r => this.invalidateWorkUnitState(r.orderId));
+  }
+
   // Users
   async getUser(id: string): Promise<User | undefined> {
     const [user] = await db.select().from(users).where(eq(users.id, id));
@@ -143,6 +318,9 @@ export class DatabaseStorage implements IStorage {
       .set(userUpdate)
       .where(eq(users.id, id));
 
+    // Sessões em cache carregam o usuário (role, active, settings)
+    this.sessionCache.deleteWhere(session => session.user.id === id);
+
     // Fetch the updated user to return it (workaround for potential returning() issues or just safety)
     return this.getUser(id);
   }
@@ -173,8 +351,30 @@ export class DatabaseStorage implements IStorage {
     return session;
   }
 
+  // Sessão + usuário do token, com cache. O TTL de cada entrada nunca passa da
+  // expiração da própria sessão.
+  async getAuthSession(token: string): Promise<AuthSession | undefined> {
+    const cached = this.sessionCache.get(token);
+    if (cached) {
+      if (cached.expiresAt > Date.now()) return cached;
+      this.sessionCache.delete(token);
+      return undefined;
+    }
+
+    const session = await this.getSessionByToken(token);
+    if (!session) return undefined;
+    const user = await this.getUser(session.userId);
+    if (!user) return undefined;
+
+    const authSession = { user, sessionKey: session.sessionKey, expiresAt: Date.parse(session.expiresAt) };
+    const ttlMs = Math.min(SESSION_CACHE_TTL_MS, authSession.expiresAt - Date.now());
+    if (ttlMs > 0) this.sessionCache.set(token, authSession, ttlMs);
+    return authSession;
+  }
+
   async deleteSession(token: string): Promise<void> {
     await db.delete(sessions).where(eq(sessions.token, token));
+    this.sessionCache.delete(token);
   }
 
   // Routes
@@ -221,10 +421,33 @@ export class DatabaseStorage implements IStorage {
   }
 
   async getProductByBarcode(barcode: string): Promise<Product | undefined> {
+    const resolved = await this.resolveBarcode(barcode);
+    return resolved?.product;
+  }
+
+  // Resolve um código bipado via product_barcodes (busca pela chave primária).
+  // Cai no OR barcode/box_barcode apenas se o índice ainda não conhece o código.
+  async resolveBarcode(barcode: string): Promise<{ product: Product; kind: BarcodeKind; multiplier: number } | undefined> {
+    const [indexed] = await db.select({
+      product: products,
+      kind: productBarcodes.kind,
+      multiplier: productBarcodes.multiplier,
+    })
+      .from(productBarcodes)
+      .innerJoin(products, eq(productBarcodes.productId, products.id))
+      .where(eq(productBarcodes.code, barcode));
+
+    if (indexed) {
+      return { product: indexed.product, kind: indexed.kind, multiplier: Number(indexed.multiplier) || 1 };
+    }
+
     const [product] = await db.select().from(products).where(
       or(eq(products.barcode, barcode), eq(products.boxBarcode, barcode))
     );
-    return product;
+    if (!product) return undefined;
+
+    const kind: BarcodeKind = product.barcode === barcode ? "unit" : "box";
+    return { product, kind, multiplier: 1 };
   }
 
   async createProduct(product: InsertProduct): Promise<Product> {
@@ -233,32 +456,63 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Orders
-  async getAllOrders(): Promise<(Order & { hasExceptions: boolean; totalItems: number; pickedItems: number })[]> {
+  async getAllOrders(): Promise<OrderWithStats[]> {
     const allOrders = await db.select().from(orders).orderBy(desc(orders.priority), desc(orders.createdAt));
+    return this.withOrderStats(allOrders);
+  }
 
-    // Get Exceptions
-    const allExceptions = await db.select({ orderItemId: exceptions.orderItemId }).from(exceptions);
-    const exceptionItemIds = new Set(allExceptions.map(e => e.orderItemId));
+  // Pedidos (banco principal) criados no período, fim inclusivo (YYYY-MM-DD)
+  async getOrdersInRange(from: string, to: string): Promise<OrderWithStats[]> {
+    const toExclusive = new Date(new Date(`${to}T00:00:00Z`).getTime() + 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+    const list = await db.select().from(orders)
+      .where(and(gte(orders.createdAt, from), lt(orders.createdAt, toExclusive)))
+      .orderBy(desc(orders.priority), desc(orders.createdAt));
+    return this.withOrderStats(list, list.map(o => o.id));
+  }
+
+  // Pedidos alterados desde a versão informada (o próprio pedido, seus itens ou
+  // exceções dos itens) e pedidos removidos.
+  async getOrdersSince(since: number): Promise<ListDelta<OrderWithStats>> {
+    const { version, minVersion } = await this.getChangeVersion();
+    if (since <= minVersion || since > version) {
+      return { version, full: true, rows: await this.getAllOrders(), removed: [] };
+    }
+
+    const changedItemOrders = db.select({ orderId: orderItems.orderId }).from(orderItems).where(gt(orderItems.rowVersion, since));
+    const changed = await db.select().from(orders)
+      .where(or(gt(orders.rowVersion, since), inArray(orders.id, changedItemOrders)))
+      .orderBy(desc(orders.priority), desc(orders.createdAt));
+
+    return {
+      version,
+      full: false,
+      rows: await this.withOrderStats(changed, changed.map(o => o.id)),
+      removed: await this.getTombstones("orders", since),
+    };
+  }
+
+  // Totais de itens e presença de exceções por pedido; scope limita as consultas
+  // aos pedidos informados (listas incrementais).
+  private async withOrderStats(list: Order[], scope?: string[]): Promise<OrderWithStats[]> {
+    if (scope && scope.length === 0) return [];
+
+    const withExceptions = await db.selectDistinct({ orderId: orderItems.orderId })
+      .from(exceptions)
+      .innerJoin(orderItems, eq(exceptions.orderItemId, orderItems.id))
+      .where(scope ? inArray(orderItems.orderId, scope) : undefined);
+    const ordersWithExceptions = new Set(withExceptions.map(e => e.orderId));
 
-    // Get Item Stats
     const itemStats = await db.select({
       orderId: orderItems.orderId,
       total: sql<number>`count(*)`,
       picked: sql<number>`sum(case when ${orderItems.status} in ('separado', 'conferido', 'finalizado') then 1 else 0 end)`
-    }).from(orderItems).groupBy(orderItems.orderId);
+    }).from(orderItems)
+      .where(scope ? inArray(orderItems.orderId, scope) : undefined)
+      .groupBy(orderItems.orderId);
 
     const statsMap = new Map(itemStats.map(s => [s.orderId, { total: Number(s.total), picked: Number(s.picked) }]));
 
-    const allItems = await db.select({ id: orderItems.id, orderId: orderItems.orderId }).from(orderItems);
-    const ordersWithExceptions = new Set<string>();
-
-    for (const item of allItems) {
-      if (exceptionItemIds.has(item.id)) {
-        ordersWithExceptions.add(item.orderId);
-      }
-    }
-
-    return allOrders.map(o => {
+    return list.map(o => {
       const stats = statsMap.get(o.id) || { total: 0, picked: 0 };
       return {
         ...o,
@@ -270,6 +524,17 @@ export class DatabaseStorage implements IStorage {
     });
   }
 
+  private async getChangeVersion(): Promise<{ version: number; minVersion: number }> {
+    const [row] = await db.select().from(changeVersion).where(eq(changeVersion.id, 1));
+    return { version: row?.version ?? 0, minVersion: row?.minVersion ?? 0 };
+  }
+
+  private async getTombstones(tableName: string, since: number): Promise<string[]> {
+    const rows = await db.select({ rowId: tombstones.rowId }).from(tombstones)
+      .where(and(eq(tombstones.tableName, tableName), gt(tombstones.rowVersion, since)));
+    return rows.map(r => r.rowId);
+  }
+
   async getOrderById(id: string): Promise<Order | undefined> {
     const [order] = await db.select().from(orders).where(eq(orders.id, id));
     return order;
@@ -296,6 +561,7 @@ export class DatabaseStorage implements IStorage {
       .set({ ...data, updatedAt: new Date().toISOString() })
       .where(eq(orders.id, id))
       .returning();
+    this.invalidateWorkUnitState(id);
     return updated;
   }
 
@@ -303,12 +569,14 @@ export class DatabaseStorage implements IStorage {
     await db.update(orders)
       .set({ routeId, updatedAt: new Date().toISOString() })
       .where(inArray(orders.id, orderIds));
+    orderIds.forEach(id => this.invalidateWorkUnitState(id));
   }
 
   async setOrderPriority(orderIds: string[], priority: number): Promise<void> {
     await db.update(orders)
       .set({ priority, updatedAt: new Date().toISOString() })
       .where(inArray(orders.id, orderIds));
+    orderIds.forEach(id => this.invalidateWorkUnitState(id));
   }
 
   async launchOrders(orderIds: string[]): Promise<void> {
@@ -318,6 +586,7 @@ export class DatabaseStorage implements IStorage {
         updatedAt: new Date().toISOString()
       })
       .where(inArray(orders.id, orderIds));
+    orderIds.forEach(id => this.invalidateWorkUnitState(id));
   }
 
   async checkAndUpdateOrderStatus(orderId: string): Promise<WorkUnit | null> {
@@ -332,6 +601,7 @@ export class DatabaseStorage implements IStorage {
           updatedAt: new Date().toISOString()
         })
         .where(eq(orders.id, orderId));
+      this.invalidateWorkUnitState(orderId);
 
       // Criar Unidade de Confer\u00eancia se n\u00e3o existir
       const existing = await db.select().from(workUnits)
@@ -377,6 +647,7 @@ export class DatabaseStorage implements IStorage {
       await db.update(orders)
         .set({ status: newStatus as any, updatedAt: new Date().toISOString() })
         .where(eq(orders.id, orderId));
+      this.invalidateWorkUnitState(orderId);
     }
   }
 
@@ -395,6 +666,7 @@ export class DatabaseStorage implements IStorage {
       separatedQty: item.separatedQty || 0,
       checkedQty: item.checkedQty || 0,
     }).returning();
+    this.invalidateWorkUnitState(newItem.orderId);
     return newItem;
   }
 
@@ -415,6 +687,7 @@ export class DatabaseStorage implements IStorage {
       .set(data)
       .where(eq(orderItems.id, id))
       .returning();
+    this.invalidateWorkUnitState(updated?.orderId);
     return updated;
   }
 
@@ -459,24 +732,109 @@ export class DatabaseStorage implements IStorage {
     for (const item of orderItemIds) {
       await db.delete(exceptions).where(eq(exceptions.orderItemId, item.id));
     }
+    this.exceptionsWrittenAt = Date.now();
+    this.invalidateWorkUnitState(orderId);
   }
 
   // Work Units
   // Retorna unidades de trabalho, opcionalmente filtradas por tipo.
   // IMPORTANTE: Para 'conferencia', filtra pedidos que ainda n\u00e3o est\u00e3o 'separado' ou adiante.
-  async getWorkUnits(type?: string): Promise<(WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[]; lockedByName?: string })[]> {
-    const query = type
-      ? db.select().from(workUnits).where(eq(workUnits.type, type as any))
-      : db.select().from(workUnits);
+  async getWorkUnits(type?: string): Promise<WorkUnitListEntry[]> {
+    const { workUnits } = await this.getWorkUnitQueue({ type });
+    return workUnits;
+  }
+
+  // Fila de unidades com os filtros (tipo, status, seção, ponto de retirada, status
+  // do pedido) aplicados no SQL e paginação por rowid, na ordem de criação.
+  async getWorkUnitQueue(filter: WorkUnitQueueFilter): Promise<WorkUnitQueuePage> {
+    const rowId = sql<number>`${workUnits}.rowid`;
+
+    const query = db.select({ rowId, workUnit: workUnits, order: orders })
+      .from(workUnits)
+      .innerJoin(orders, eq(workUnits.orderId, orders.id))
+      .where(and(
+        filter.type ? eq(workUnits.type, filter.type as any) : undefined,
+        this.workUnitQueueFilterCondition(filter),
+        filter.cursor !== undefined ? sql`${rowId} > ${filter.cursor}` : undefined,
+      ))
+      .orderBy(rowId)
+      .$dynamic();
+
+    // Uma linha a mais indica que existe próxima página
+    const rows = filter.limit ? await query.limit(filter.limit + 1) : await query;
+    const hasMore = filter.limit !== undefined && rows.length > filter.limit;
+    const page = hasMore ? rows.slice(0, filter.limit) : rows;
+
+    const ordersMap = new Map(page.map(r => [r.order.id, r.order]));
+    return {
+      workUnits: await this.assembleWorkUnits(page.map(r => r.workUnit), ordersMap),
+      nextCursor: hasMore ? Number(page[page.length - 1].rowId) : null,
+    };
+  }
+
+  // Filtros da fila além do tipo (status, seção, ponto de retirada, bloqueio,
+  // status do pedido); a listagem paginada e a incremental usam os mesmos.
+  private workUnitQueueFilterCondition(filter: WorkUnitQueueFilter) {
+    const orderStatuses = filter.orderStatuses ?? (filter.type === "conferencia" ? CONFERENCE_ORDER_STATUSES : undefined);
+    return and(
+      filter.statuses?.length ? inArray(workUnits.status, filter.statuses) : undefined,
+      // Unidade sem seção (conferência, unificadas) passa: as telas filtram os itens
+      filter.sections?.length ? or(isNull(workUnits.section), inArray(workUnits.section, filter.sections)) : undefined,
+      filter.pickupPoints?.length ? inArray(workUnits.pickupPoint, filter.pickupPoints) : undefined,
+      filter.lockedOnly ? isNotNull(workUnits.lockedBy) : undefined,
+      orderStatuses ? inArray(orders.status, orderStatuses) : undefined,
+    );
+  }
+
+  // Unidades cuja linha, pedido ou itens do pedido mudaram desde a versão informada.
+  // As que deixaram de passar no filtro da lista (status, seção, conferência...) vão em removed.
+  // limit/cursor só paginam a carga completa; o delta vem sempre inteiro.
+  async getWorkUnitsSince(filter: WorkUnitQueueFilter, since: number): Promise<ListDelta<WorkUnitListEntry>> {
+    const { version, minVersion } = await this.getChangeVersion();
+    if (since <= minVersion || since > version) {
+      const { workUnits: rows, nextCursor } = await this.getWorkUnitQueue(filter);
+      return { version, full: true, rows, removed: [], nextCursor };
+    }
+
+    const condition = this.workUnitQueueFilterCondition(filter);
+    const matches = condition ? sql<number>`CASE WHEN ${condition} THEN 1 ELSE 0 END` : sql<number>`1`;
+    const changedOrders = db.select({ id: orders.id }).from(orders).where(gt(orders.rowVersion, since));
+    const changedItemOrders = db.select({ orderId: orderItems.orderId }).from(orderItems).where(gt(orderItems.rowVersion, since));
+    const changed = await db.select({ workUnit: workUnits, order: orders, matches })
+      .from(workUnits)
+      .innerJoin(orders, eq(workUnits.orderId, orders.id))
+      .where(and(
+        filter.type ? eq(workUnits.type, filter.type as any) : undefined,
+        or(
+          gt(workUnits.rowVersion, since),
+          inArray(workUnits.orderId, changedOrders),
+          inArray(workUnits.orderId, changedItemOrders),
+        ),
+      ));
+
+    const included = changed.filter(r => Number(r.matches) === 1);
+    const ordersMap = new Map(included.map(r => [r.order.id, r.order]));
+    return {
+      version,
+      full: false,
+      rows: await this.assembleWorkUnits(included.map(r => r.workUnit), ordersMap),
+      removed: [
+        ...changed.filter(r => Number(r.matches) !== 1).map(r => r.workUnit.id),
+        ...await this.getTombstones("work_units", since),
+      ],
+    };
+  }
 
-    const wus = await query;
+  // Monta order/items/product/exceptions das unidades com uma consulta por tabela.
+  private async assembleWorkUnits(wus: WorkUnit[], knownOrders?: Map<string, Order>): Promise<WorkUnitListEntry[]> {
     if (wus.length === 0) return [];
 
     const orderIds = [...new Set(wus.map(wu => wu.orderId))];
 
     // Fetch Orders
-    const ordersData = await db.select().from(orders).where(inArray(orders.id, orderIds));
-    const ordersMap = new Map(ordersData.map(o => [o.id, o]));
+    const ordersMap = knownOrders ?? new Map(
+      (await db.select().from(orders).where(inArray(orders.id, orderIds))).map(o => [o.id, o])
+    );
 
     // Fetch locked-by user names
     const lockedByIds = [...new Set(wus.map(wu => wu.lockedBy).filter(Boolean))] as string[];
@@ -498,17 +856,22 @@ export class DatabaseStorage implements IStorage {
       : [];
     const productsMap = new Map(productsData.map(p => [p.id, p]));
 
-    // Fetch Exceptions
-    const itemIds = itemsData.map(i => i.id);
-    const exceptionsData = itemIds.length > 0
-      ? await db.select().from(exceptions).where(inArray(exceptions.orderItemId, itemIds))
-      : [];
+    // Fetch Exceptions (itens das unidades via subconsulta, sem lista de ids)
+    const exceptionsData = await db.select().from(exceptions).where(inArray(
+      exceptions.orderItemId,
+      db.select({ id: orderItems.id }).from(orderItems).where(inArray(orderItems.orderId, orderIds)),
+    ));
 
     // Group exceptions by itemId
-    const exceptionsMap = new Map<string, number>();
+    const exceptionsMap = new Map<string, { total: number; list: Exception[] }>();
     for (const exc of exceptionsData) {
-      const current = exceptionsMap.get(exc.orderItemId) || 0;
-      exceptionsMap.set(exc.orderItemId, current + Number(exc.quantity));
+      const entry = exceptionsMap.get(exc.orderItemId);
+      if (entry) {
+        entry.total += Number(exc.quantity);
+        entry.list.push(exc);
+      } else {
+        exceptionsMap.set(exc.orderItemId, { total: Number(exc.quantity), list: [exc] });
+      }
     }
 
     // Assemble Items
@@ -517,10 +880,9 @@ export class DatabaseStorage implements IStorage {
       const product = productsMap.get(item.productId);
       if (!product) continue;
 
-      const exceptionQty = exceptionsMap.get(item.id) || 0;
-      // Injetar o array de exce\u00e7\u00f5es para o frontend
-      const itemExceptions = exceptionsData.filter(e => e.orderItemId === item.id);
-      const fullItem = { ...item, product, exceptionQty, exceptions: itemExceptions };
+      const itemExceptions = exceptionsMap.get(item.id);
+      // Injetar o array de exceções para o frontend
+      const fullItem = { ...item, product, exceptionQty: itemExceptions?.total || 0, exceptions: itemExceptions?.list || [] };
 
       const list = itemsByOrder.get(item.orderId) || [];
       list.push(fullItem);
@@ -528,19 +890,11 @@ export class DatabaseStorage implements IStorage {
     }
 
     // Assemble Result
-    const result: (WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[]; lockedByName?: string })[] = [];
+    const result: WorkUnitListEntry[] = [];
 
     for (const wu of wus) {
       const order = ordersMap.get(wu.orderId);
       if (order) {
-        // Filtro espec\u00edfico para Confer\u00eancia: S\u00f3 ver pedidos Separados ou j\u00e1 em Confer\u00eancia/Conferidos
-        if (type === "conferencia") {
-          const allowedStatuses = ["separado", "em_conferencia", "conferido"];
-          if (!allowedStatuses.includes(order.status)) {
-            continue;
-          }
-        }
-
         const allItems = itemsByOrder.get(wu.orderId) || [];
         const filteredItems = wu.section
           ? allItems.filter(i => i.section === wu.section && i.pickupPoint === wu.pickupPoint)
@@ -553,7 +907,11 @@ export class DatabaseStorage implements IStorage {
     return result;
   }
 
-  async getWorkUnitById(id: string): Promise<(WorkUnit & { order: Order; items: (OrderItem & { product: Product; exceptionQty?: number })[] }) | undefined> {
+  async getWorkUnitById(id: string): Promise<WorkUnitWithItems | undefined> {
+    // Cópia: quem chama pode alterar o objeto sem mexer no que está em cache
+    const cached = this.workUnitCache.get(id);
+    if (cached) return structuredClone(cached);
+
     const [wu] = await db.select().from(workUnits).where(eq(workUnits.id, id));
     if (!wu) return undefined;
 
@@ -565,7 +923,88 @@ export class DatabaseStorage implements IStorage {
       ? items.filter(i => i.section === wu.section && i.pickupPoint === wu.pickupPoint)
       : items.filter(i => i.pickupPoint === wu.pickupPoint);
 
-    return { ...wu, order, items: filteredItems };
+    const result = { ...wu, order, items: filteredItems };
+    this.workUnitCache.set(id, result);
+    return structuredClone(result);
+  }
+
+  // Caminho do bipe na separação: uma consulta resolve unidade, item, produto e
+  // exceções; as escritas (item + conclusão da unidade/pedido) vão num único batch.
+  async applyPickScan(workUnitId: string, barcode: string, quantity?: number): Promise<PickScanResult> {
+    return withWorkUnitLock(workUnitId, async () => {
+      const fallbackProducts = alias(products, "fallback_products");
+      // Fora do índice só o código unitário: caixa sem multiplicador conhecido
+      // (rejeitada pelo sync) não pode contar como 1 unidade
+      const fallbackProductId = sql`(SELECT ${fallbackProducts.id} FROM ${fallbackProducts} WHERE ${fallbackProducts.barcode} = ${barcode} LIMIT 1)`;
+
+      const [row] = await db.select({
+        workUnit: workUnits,
+        item: orderItems,
+        product: products,
+        multiplier: productBarcodes.multiplier,
+        exceptionQty: sql<number>`(SELECT COALESCE(SUM(${exceptions.quantity}), 0) FROM ${exceptions} WHERE ${exceptions.orderItemId} = ${orderItems.id})`,
+      })
+        .from(workUnits)
+        .leftJoin(productBarcodes, eq(productBarcodes.code, barcode))
+        .leftJoin(orderItems, and(
+          eq(orderItems.orderId, workUnits.orderId),
+          eq(orderItems.pickupPoint, workUnits.pickupPoint),
+          sql`(${workUnits.section} IS NULL OR ${orderItems.section} = ${workUnits.section})`,
+          eq(orderItems.productId, sql`COALESCE(${productBarcodes.productId}, ${fallbackProductId})`),
+        ))
+        .leftJoin(products, eq(products.id, orderItems.productId))
+        .where(eq(workUnits.id, workUnitId))
+        .limit(1);
+
+      if (!row) return { status: "unit_not_found" as const };
+      if (!row.item || !row.product) return { status: "not_found" as const };
+
+      const { workUnit, item, product } = row;
+      const exceptionQty = Number(row.exceptionQty) || 0;
+      const requestedQty = Number(quantity || row.multiplier || 1);
+      const outcome = evaluatePickScan({
+        separatedQty: Number(item.separatedQty),
+        quantity: Number(item.quantity),
+        exceptionQty,
+      }, requestedQty);
+
+      const now = new Date().toISOString();
+      const itemUpdate = db.update(orderItems)
+        .set({ separatedQty: outcome.separatedQty, status: outcome.itemStatus })
+        .where(eq(orderItems.id, item.id));
+
+      let unitComplete = false;
+      let orderComplete = false;
+      let workUnitStatus = workUnit.status;
+
+      if (outcome.status !== "success") {
+        await db.batch([itemUpdate, ...this.pickResetStatements(workUnit, now, outcome.reopensOrder)]);
+        workUnitStatus = "em_andamento";
+      } else if (outcome.itemComplete) {
+        const [, completedUnits, completedOrders] = await db.batch([
+          itemUpdate,
+          ...this.pickCompletionStatements(workUnit, now),
+        ]);
+        unitComplete = completedUnits.length > 0;
+        orderComplete = completedOrders.length > 0;
+        if (unitComplete) workUnitStatus = "concluido";
+      } else {
+        await itemUpdate;
+      }
+
+      this.invalidateWorkUnitState(workUnit.orderId);
+
+      return {
+        ...outcome,
+        workUnit,
+        item: { ...item, separatedQty: outcome.separatedQty, status: outcome.itemStatus },
+        product,
+        exceptionQty,
+        workUnitStatus,
+        unitComplete,
+        orderComplete,
+      };
+    });
   }
 
   async createWorkUnit(workUnit: InsertWorkUnit): Promise<WorkUnit> {
@@ -577,11 +1016,210 @@ export class DatabaseStorage implements IStorage {
     return newWu;
   }
 
+  // Bipe acima do disponível: unidade volta para em_andamento e o pedido deixa de ser 'separado'.
+  private pickResetStatements(workUnit: WorkUnit, now: string, reopenOrder: boolean): BatchItem<"sqlite">[] {
+    const statements: BatchItem<"sqlite">[] = [
+      db.update(workUnits).set({ status: "em_andamento" }).where(eq(workUnits.id, workUnit.id)),
+    ];
+    if (reopenOrder) {
+      statements.push(db.update(orders)
+        .set({ status: "em_separacao", updatedAt: now })
+        .where(and(eq(orders.id, workUnit.orderId), eq(orders.status, "separado"))));
+    }
+    return statements;
+  }
+
+  // Mesmas regras de checkAndCompleteWorkUnit / checkAllWorkUnitsComplete, em SQL,
+  // para rodar no mesmo batch das atualizações de itens. Retornam as linhas afetadas.
+  private pickCompletionStatements(workUnit: WorkUnit, now: string) {
+    const sectionFilter = workUnit.section ? sql`AND oi.section = ${workUnit.section}` : sql``;
+    return [
+      db.update(workUnits)
+        .set({ status: "concluido", completedAt: now })
+        .where(and(eq(workUnits.id, workUnit.id), sql`NOT EXISTS (
+          SELECT 1 FROM order_items oi
+          WHERE oi.order_id = ${workUnit.orderId} AND oi.pickup_point = ${workUnit.pickupPoint} ${sectionFilter}
+            AND oi.separated_qty + (SELECT COALESCE(SUM(e.quantity), 0) FROM exceptions e
+                                    WHERE e.order_item_id = oi.id AND e.work_unit_id = ${workUnit.id}) < oi.quantity
+        )`))
+        .returning({ id: workUnits.id }),
+      db.update(orders)
+        .set({ status: "separado", updatedAt: now })
+        .where(and(eq(orders.id, workUnit.orderId), sql`EXISTS (
+          SELECT 1 FROM work_units w WHERE w.id = ${workUnit.id} AND w.status = 'concluido'
+        ) AND NOT EXISTS (
+          SELECT 1 FROM work_units w
+          WHERE w.order_id = ${workUnit.orderId} AND w.type = 'separacao' AND w.status != 'concluido'
+        ) AND NOT EXISTS (
+          SELECT 1 FROM order_items oi
+          WHERE oi.order_id = ${workUnit.orderId} AND oi.quantity > 0
+            AND oi.separated_qty + (SELECT COALESCE(SUM(e.quantity), 0) FROM exceptions e
+                                    JOIN work_units w ON w.id = e.work_unit_id
+                                    WHERE e.order_item_id = oi.id AND w.type = 'separacao') < oi.quantity
+        )`))
+        .returning({ id: orders.id }),
+    ] as const;
+  }
+
+  // Fila de bipes de um dispositivo (ex.: acumulada offline) aplicada de uma vez:
+  // as regras de bipe rodam em memória sobre um snapshot da unidade, na ordem de seq,
+  // e itens, recibos e conclusão são gravados num único batch. Seqs já recebidos
+  // devolvem o resultado original sem contar de novo.
+  async applyPickScanBatch(workUnitId: string, clientId: string, scans: ScanBatchInput["scans"]): Promise<PickScanBatchResult> {
+    return withWorkUnitLock(workUnitId, async () => {
+      const [workUnit] = await db.select().from(workUnits).where(eq(workUnits.id, workUnitId));
+      if (!workUnit) return { status: "unit_not_found" as const };
+
+      const ordered = [...scans].sort((a, b) => a.seq - b.seq);
+      const receipts = await db.select().from(scanReceipts).where(and(
+        eq(scanReceipts.workUnitId, workUnitId),
+        eq(scanReceipts.clientId, clientId),
+        inArray(scanReceipts.seq, ordered.map(s => s.seq)),
+      ));
+      const receiptsBySeq = new Map(receipts.map(r => [r.seq, r.result]));
+
+      // Snapshot dos itens da unidade (primeiro item por produto, como no bipe individual)
+      const unitItems = await db.select({
+        item: orderItems,
+        exceptionQty: sql<number>`(SELECT COALESCE(SUM(${exceptions.quantity}), 0) FROM ${exceptions} WHERE ${exceptions.orderItemId} = ${orderItems.id})`,
+      }).from(orderItems).where(and(
+        eq(orderItems.orderId, workUnit.orderId),
+        eq(orderItems.pickupPoint, workUnit.pickupPoint),
+        workUnit.section ? eq(orderItems.section, workUnit.section) : undefined,
+      ));
+      const itemsByProduct = new Map<string, { item: OrderItem; exceptionQty: number; separatedQty: number; status: OrderItem["status"]; touched: boolean }>();
+      for (const { item, exceptionQty } of unitItems) {
+        if (itemsByProduct.has(item.productId)) continue;
+        itemsByProduct.set(item.productId, {
+          item,
+          exceptionQty: Number(exceptionQty) || 0,
+          separatedQty: Number(item.separatedQty),
+          status: item.status,
+          touched: false,
+        });
+      }
+
+      // Resolve os códigos distintos do lote de uma vez
+      const codes = [...new Set(ordered.filter(s => !receiptsBySeq.has(s.seq)).map(s => s.barcode))];
+      const codeMap = new Map<string, { productId: string; multiplier: number }>();
+      if (codes.length > 0) {
+        const indexed = await db.select().from(productBarcodes).where(inArray(productBarcodes.code, codes));
+        for (const row of indexed) {
+          codeMap.set(row.code, { productId: row.productId, multiplier: Number(row.multiplier) || 1 });
+        }
+        const missing = codes.filter(c => !codeMap.has(c));
+        if (missing.length > 0) {
+          // Fora do índice só o código unitário (como no bipe individual)
+          const legacy = await db.select({ id: products.id, barcode: products.barcode })
+            .from(products)
+            .where(inArray(products.barcode, missing));
+          for (const code of missing) {
+            const product = legacy.find(p => p.barcode === code);
+            if (product) codeMap.set(code, { productId: product.id, multiplier: 1 });
+          }
+        }
+      }
+
+      const results: (ScanOutcome & { duplicate?: boolean })[] = [];
+      const now = new Date().toISOString();
+      const newReceipts: { workUnitId: string; clientId: string; seq: number; result: ScanOutcome; createdAt: string }[] = [];
+      let anyReset = false;
+      let anyOrderReopen = false;
+      let anyItemComplete = false;
+
+      for (const scan of ordered) {
+        const previous = receiptsBySeq.get(scan.seq);
+        if (previous) {
+          results.push({ ...previous, duplicate: true });
+          continue;
+        }
+
+        const resolved = codeMap.get(scan.barcode);
+        const entry = resolved ? itemsByProduct.get(resolved.productId) : undefined;
+        let result: ScanOutcome;
+        if (!resolved || !entry) {
+          result = { seq: scan.seq, status: "not_found" };
+        } else {
+          const outcome = evaluatePickScan({
+            separatedQty: entry.separatedQty,
+            quantity: Number(entry.item.quantity),
+            exceptionQty: entry.exceptionQty,
+          }, Number(scan.quantity || resolved.multiplier || 1));
+
+          entry.separatedQty = outcome.separatedQty;
+          entry.status = outcome.itemStatus;
+          entry.touched = true;
+          if (outcome.status !== "success") anyReset = true;
+          if (outcome.reopensOrder) anyOrderReopen = true;
+          if (outcome.itemComplete) anyItemComplete = true;
+
+          result = {
+            seq: scan.seq,
+            status: outcome.status,
+            quantity: outcome.quantity,
+            itemId: entry.item.id,
+            productId: entry.item.productId,
+            separatedQty: outcome.separatedQty,
+            ...(outcome.message && { message: outcome.message }),
+          };
+        }
+        results.push(result);
+        newReceipts.push({ workUnitId, clientId, seq: scan.seq, result, createdAt: now });
+        receiptsBySeq.set(scan.seq, result);
+      }
+
+      const touched = [...itemsByProduct.values()].filter(e => e.touched);
+      let unitComplete = false;
+      let orderComplete = false;
+      let workUnitStatus = workUnit.status;
+
+      if (newReceipts.length > 0) {
+        const statements: BatchItem<"sqlite">[] = touched.map(e =>
+          db.update(orderItems)
+            .set({ separatedQty: e.separatedQty, status: e.status })
+            .where(eq(orderItems.id, e.item.id))
+        );
+        statements.push(db.insert(scanReceipts).values(newReceipts));
+        if (Date.now() - this.scanReceiptsPrunedAt > SCAN_RECEIPT_PRUNE_INTERVAL_MS) {
+          const cutoff = new Date(Date.now() - SCAN_RECEIPT_RETENTION_DAYS * 24 * 60 * 60 * 1000).toISOString();
+          statements.push(db.delete(scanReceipts).where(lt(scanReceipts.createdAt, cutoff)));
+          this.scanReceiptsPrunedAt = Date.now();
+        }
+        if (anyReset) {
+          statements.push(...this.pickResetStatements(workUnit, now, anyOrderReopen));
+          workUnitStatus = "em_andamento";
+        }
+        // A conclusão é avaliada sobre o estado final do lote
+        const completionIndex = statements.length;
+        if (anyItemComplete) statements.push(...this.pickCompletionStatements(workUnit, now));
+
+        const batchResults = await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+        if (anyItemComplete) {
+          unitComplete = (batchResults[completionIndex] as { id: string }[]).length > 0;
+          orderComplete = (batchResults[completionIndex + 1] as { id: string }[]).length > 0;
+          if (unitComplete) workUnitStatus = "concluido";
+        }
+        this.invalidateWorkUnitState(workUnit.orderId);
+      }
+
+      return {
+        status: "ok" as const,
+        workUnit,
+        results,
+        items: touched.map(e => ({ id: e.item.id, productId: e.item.productId, separatedQty: e.separatedQty, status: e.status })),
+        workUnitStatus,
+        unitComplete,
+        orderComplete,
+      };
+    });
+  }
+
   async updateWorkUnit(id: string, data: Partial<WorkUnit>): Promise<WorkUnit | undefined> {
     const [updated] = await db.update(workUnits)
       .set(data)
       .where(eq(workUnits.id, id))
       .returning();
+    this.workUnitCache.delete(id);
     return updated;
   }
 
@@ -595,6 +1233,7 @@ export class DatabaseStorage implements IStorage {
         // startedAt: new Date().toISOString(), // Moved to scan-cart
       })
       .where(inArray(workUnits.id, workUnitIds));
+    workUnitIds.forEach(id => this.workUnitCache.delete(id));
   }
 
   async unlockWorkUnits(workUnitIds: string[]): Promise<void> {
@@ -606,6 +1245,41 @@ export class DatabaseStorage implements IStorage {
         lockExpiresAt: null,
       })
       .where(inArray(workUnits.id, workUnitIds));
+    workUnitIds.forEach(id => this.workUnitCache.delete(id));
+  }
+
+  async getLockedWorkUnits(): Promise<{ id: string; lockedBy: string; lockedAt: string | null; lockExpiresAt: string | null }[]> {
+    const rows = await db.select({
+      id: workUnits.id,
+      lockedBy: workUnits.lockedBy,
+      lockedAt: workUnits.lockedAt,
+      lockExpiresAt: workUnits.lockExpiresAt,
+    }).from(workUnits).where(sql`${workUnits.lockedBy} IS NOT NULL`);
+    return rows.filter((r): r is typeof r & { lockedBy: string } => !!r.lockedBy);
+  }
+
+  // Bloqueio expirado: libera só os campos de lock (o progresso e o status ficam),
+  // e apenas se a unidade ainda pertence ao mesmo operador.
+  async expireWorkUnitLocks(locks: { id: string; lockedBy: string }[]): Promise<void> {
+    if (locks.length === 0) return;
+    const statements = locks.map(l =>
+      db.update(workUnits)
+        .set({ lockedBy: null, lockedAt: null, lockExpiresAt: null })
+        .where(and(eq(workUnits.id, l.id), eq(workUnits.lockedBy, l.lockedBy)))
+    );
+    await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+    locks.forEach(l => this.workUnitCache.delete(l.id));
+  }
+
+  async renewWorkUnitLocks(locks: { id: string; lockedBy: string; lockExpiresAt: string }[]): Promise<void> {
+    if (locks.length === 0) return;
+    const statements = locks.map(l =>
+      db.update(workUnits)
+        .set({ lockExpiresAt: l.lockExpiresAt })
+        .where(and(eq(workUnits.id, l.id), eq(workUnits.lockedBy, l.lockedBy)))
+    );
+    await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+    locks.forEach(l => this.workUnitCache.delete(l.id));
   }
 
   async resetWorkUnitProgress(id: string): Promise<void> {
@@ -636,8 +1310,12 @@ export class DatabaseStorage implements IStorage {
 
       // Delete exceptions
       await db.delete(exceptions).where(eq(exceptions.orderItemId, item.id));
+      this.exceptionsWrittenAt = Date.now();
     }
 
+    // Recibos dos bipes em lote: depois do reset os mesmos seqs são bipes novos
+    await db.delete(scanReceipts).where(eq(scanReceipts.workUnitId, id));
+
     // Reset WorkUnit
     await db.update(workUnits)
       .set({
@@ -646,6 +1324,7 @@ export class DatabaseStorage implements IStorage {
         cartQrCode: null
       })
       .where(eq(workUnits.id, id));
+    this.invalidateWorkUnitState(workUnit.orderId);
   }
 
 
@@ -679,6 +1358,7 @@ export class DatabaseStorage implements IStorage {
       await db.update(workUnits)
         .set({ status: "concluido", completedAt: new Date().toISOString() })
         .where(eq(workUnits.id, id));
+      this.workUnitCache.delete(id);
       return true;
     }
     return false;
@@ -769,6 +1449,7 @@ export class DatabaseStorage implements IStorage {
       await db.update(orderItems)
         .set({ separatedQty: maxSeparated })
         .where(eq(orderItems.id, orderItemId));
+      this.invalidateWorkUnitState(item.orderId);
     }
   }
 
@@ -783,16 +1464,17 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Exceptions
-  async getAllExceptions(): Promise<(Exception & { orderItem: OrderItem & { product: Product; order: Order }; reportedByUser: User; workUnit: WorkUnit })[]> {
-    const excs = await db.select().from(exceptions).orderBy(desc(exceptions.createdAt));
+  async getAllExceptions(maxStalenessMs?: number): Promise<(Exception & { orderItem: OrderItem & { product: Product; order: Order }; reportedByUser: User; workUnit: WorkUnit })[]> {
+    const reader = getReadDb(maxStalenessMs, this.exceptionsWrittenAt);
+    const excs = await reader.select().from(exceptions).orderBy(desc(exceptions.createdAt));
     const result: (Exception & { orderItem: OrderItem & { product: Product; order: Order }; reportedByUser: User; workUnit: WorkUnit })[] = [];
 
     for (const exc of excs) {
-      const [item] = await db.select().from(orderItems).where(eq(orderItems.id, exc.orderItemId));
-      const [product] = item ? await db.select().from(products).where(eq(products.id, item.productId)) : [undefined];
-      const [order] = item ? await db.select().from(orders).where(eq(orders.id, item.orderId)) : [undefined];
-      const [user] = await db.select().from(users).where(eq(users.id, exc.reportedBy));
-      const [wu] = exc.workUnitId ? await db.select().from(workUnits).where(eq(workUnits.id, exc.workUnitId)) : [undefined];
+      const [item] = await reader.select().from(orderItems).where(eq(orderItems.id, exc.orderItemId));
+      const [product] = item ? await reader.select().from(products).where(eq(products.id, item.productId)) : [undefined];
+      const [order] = item ? await reader.select().from(orders).where(eq(orders.id, item.orderId)) : [undefined];
+      const [user] = await reader.select().from(users).where(eq(users.id, exc.reportedBy));
+      const [wu] = exc.workUnitId ? await reader.select().from(workUnits).where(eq(workUnits.id, exc.workUnitId)) : [undefined];
 
       if (item && product && order && user && wu) {
         result.push({
@@ -813,21 +1495,28 @@ export class DatabaseStorage implements IStorage {
       ...exception,
       type: exception.type as any,
     }).returning();
+    this.exceptionsWrittenAt = Date.now();
+    await this.invalidateWorkUnitStateForItems([newExc.orderItemId]);
     return newExc;
   }
 
   async deleteExceptionsForItem(orderItemId: string): Promise<void> {
     await db.delete(exceptions).where(eq(exceptions.orderItemId, orderItemId));
+    this.exceptionsWrittenAt = Date.now();
+    await this.invalidateWorkUnitStateForItems([orderItemId]);
   }
 
   async authorizeExceptions(exceptionIds: string[], authData: { authorizedBy: string; authorizedByName: string; authorizedAt: string }): Promise<void> {
-    await db.update(exceptions)
+    const authorized = await db.update(exceptions)
       .set({
         authorizedBy: authData.authorizedBy,
         authorizedByName: authData.authorizedByName,
         authorizedAt: authData.authorizedAt,
       })
-      .where(inArray(exceptions.id, exceptionIds));
+      .where(inArray(exceptions.id, exceptionIds))
+      .returning({ orderItemId: exceptions.orderItemId });
+    this.exceptionsWrittenAt = Date.now();
+    await this.invalidateWorkUnitStateForItems([...new Set(authorized.map(e => e.orderItemId))]);
   }
 
   // Audit Logs
@@ -836,13 +1525,14 @@ export class DatabaseStorage implements IStorage {
     return newLog;
   }
 
-  async getAllAuditLogs(): Promise<(AuditLog & { user: User | null })[]> {
-    const logs = await db.select().from(auditLogs).orderBy(desc(auditLogs.createdAt));
+  async getAllAuditLogs(maxStalenessMs?: number): Promise<(AuditLog & { user: User | null })[]> {
+    const reader = getReadDb(maxStalenessMs);
+    const logs = await reader.select().from(auditLogs).orderBy(desc(auditLogs.createdAt));
     const result: (AuditLog & { user: User | null })[] = [];
 
     for (const log of logs) {
       const [user] = log.userId
-        ? await db.select().from(users).where(eq(users.id, log.userId))
+        ? await reader.select().from(users).where(eq(users.id, log.userId))
         : [null];
 
       result.push({ ...log, user });
@@ -888,24 +1578,52 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Stats
-  async getOrderStats(): Promise<{ pendentes: number; emSeparacao: number; separados: number; conferidos: number; excecoes: number }> {
-    const allOrders = await db.select().from(orders);
-    const allExceptions = await db.select().from(exceptions);
+  // Lê os contadores mantidos por trigger: custo proporcional ao número de
+  // status/seções, não ao de pedidos.
+  async getOrderStats(): Promise<OrderStats> {
+    const counters = await db.select().from(statsCounters);
+
+    const byStatus: Record<string, number> = {};
+    const bySection: Record<string, Record<string, number>> = {};
+    const byPickupPoint: Record<string, Record<string, number>> = {};
+    let excecoes = 0;
+
+    for (const c of counters) {
+      if (c.count === 0) continue;
+      switch (c.scope) {
+        case "orders":
+          byStatus[c.status] = c.count;
+          break;
+        case "exceptions":
+          excecoes += c.count;
+          break;
+        case "work_units_section":
+          bySection[c.scopeKey] = { ...bySection[c.scopeKey], [c.status]: c.count };
+          break;
+        case "work_units_pickup":
+          byPickupPoint[c.scopeKey] = { ...byPickupPoint[c.scopeKey], [c.status]: c.count };
+          break;
+      }
+    }
 
     return {
-      pendentes: allOrders.filter(o => o.status === "pendente").length,
-      emSeparacao: allOrders.filter(o => o.status === "em_separacao").length,
-      separados: allOrders.filter(o => o.status === "separado").length,
-      conferidos: allOrders.filter(o => o.status === "conferido").length,
-      excecoes: allExceptions.length,
+      pendentes: byStatus.pendente || 0,
+      emSeparacao: byStatus.em_separacao || 0,
+      separados: byStatus.separado || 0,
+      conferidos: byStatus.conferido || 0,
+      excecoes,
+      byStatus,
+      bySection,
+      byPickupPoint,
     };
   }
 
-  async getPickingListReportData(filters: { orderIds?: string[]; pickupPoints?: string[]; sections?: string[] }): Promise<{
+  async getPickingListReportData(filters: { orderIds?: string[]; pickupPoints?: string[]; sections?: string[] }, maxStalenessMs?: number): Promise<{
     section: string;
     pickupPoint: number;
     items: (OrderItem & { product: Product; order: Order })[];
   }[]> {
+    const reader = getReadDb(maxStalenessMs);
     const conditions = [];
 
     if (filters.orderIds && filters.orderIds.length > 0) {
@@ -926,7 +1644,7 @@ export class DatabaseStorage implements IStorage {
 
     const whereClause = conditions.length > 0 ? and(...conditions) : undefined;
 
-    const items = await db.select().from(orderItems).where(whereClause);
+    const items = await reader.select().from(orderItems).where(whereClause);
     const result: any[] = [];
 
     // Optimize: Fetch all related products and orders in batch if possible, or just lazily for now (simple report)
@@ -935,10 +1653,10 @@ export class DatabaseStorage implements IStorage {
     const orderIds = Array.from(new Set(items.map(i => i.orderId)));
 
     const fetchedProducts = productIds.length > 0
-      ? await db.select().from(products).where(inArray(products.id, productIds))
+      ? await reader.select().from(products).where(inArray(products.id, productIds))
       : [];
     const fetchedOrders = orderIds.length > 0
-      ? await db.select().from(orders).where(inArray(orders.id, orderIds))
+      ? await reader.select().from(orders).where(inArray(orders.id, orderIds))
       : [];
 
     const productMap = new Map(fetchedProducts.map(p => [p.id, p]));
@@ -976,6 +1694,71 @@ export class DatabaseStorage implements IStorage {
   }
 
 
+  // Romaneio em ordem de seção/ponto de retirada, lido em páginas (keyset) pelo
+  // índice idx_order_items_section_pp. Só o grupo corrente fica em memória.
+  async *streamPickingList(filters: PickingListFilters, maxStalenessMs?: number): AsyncGenerator<PickingListGroup> {
+    const reader = getReadDb(maxStalenessMs);
+    const rowId = sql<number>`${orderItems}.rowid`;
+    const ppInts = (filters.pickupPoints || []).map(p => parseInt(p)).filter(p => !isNaN(p));
+
+    let current: { section: string; pickupPoint: number; lines: Map<string, PickingListLine> } | null = null;
+    let cursor: { section: string; pickupPoint: number; rowId: number } | null = null;
+
+    const finish = (group: NonNullable<typeof current>): PickingListGroup => ({
+      section: group.section,
+      pickupPoint: group.pickupPoint,
+      lines: [...group.lines.values()].sort((a, b) => a.erpCode.localeCompare(b.erpCode)),
+    });
+
+    while (true) {
+      const page = await reader.select({
+        rowId,
+        section: orderItems.section,
+        pickupPoint: orderItems.pickupPoint,
+        quantity: orderItems.quantity,
+        erpCode: products.erpCode,
+        name: products.name,
+        barcode: products.barcode,
+        manufacturer: products.manufacturer,
+      })
+        .from(orderItems)
+        .innerJoin(products, eq(orderItems.productId, products.id))
+        .innerJoin(orders, eq(orderItems.orderId, orders.id))
+        .where(and(
+          filters.orderIds?.length ? inArray(orderItems.orderId, filters.orderIds) : undefined,
+          ppInts.length ? inArray(orderItems.pickupPoint, ppInts) : undefined,
+          filters.sections?.length ? inArray(orderItems.section, filters.sections) : undefined,
+          cursor ? sql`(${orderItems.section}, ${orderItems.pickupPoint}, ${rowId}) > (${cursor.section}, ${cursor.pickupPoint}, ${cursor.rowId})` : undefined,
+        ))
+        .orderBy(orderItems.section, orderItems.pickupPoint, rowId)
+        .limit(PICKING_LIST_PAGE_SIZE);
+
+      for (const row of page) {
+        if (!current || current.section !== row.section || current.pickupPoint !== row.pickupPoint) {
+          if (current) yield finish(current);
+          current = { section: row.section, pickupPoint: row.pickupPoint, lines: new Map() };
+        }
+        const line = current.lines.get(row.erpCode);
+        if (line) {
+          line.quantity += Number(row.quantity) || 0;
+        } else {
+          current.lines.set(row.erpCode, {
+            erpCode: row.erpCode,
+            name: row.name,
+            barcode: row.barcode,
+            manufacturer: row.manufacturer,
+            quantity: Number(row.quantity) || 0,
+          });
+        }
+      }
+
+      if (page.length < PICKING_LIST_PAGE_SIZE) break;
+      const last = page[page.length - 1];
+      cursor = { section: last.section, pickupPoint: last.pickupPoint, rowId: Number(last.rowId) };
+    }
+
+    if (current) yield finish(current);
+  }
 
   // Picking Sessions
   async createPickingSession(session: InsertPickingSession): Promise<PickingSession> {
@@ -1005,7 +1788,49 @@ export class DatabaseStorage implements IStorage {
     return await db.select().from(pickingSessions).where(eq(pickingSessions.orderId, orderId));
   }
 
+  async getAllPickingSessions(): Promise<PickingSession[]> {
+    return await db.select().from(pickingSessions);
+  }
+
+  // Grava sessões adquiridas; a sessão anterior do mesmo pedido/seção (expirada) é substituída.
+  async savePickingSessions(sessions: PickingSession[]): Promise<void> {
+    if (sessions.length === 0) return;
+    const statements = sessions.map(session =>
+      db.insert(pickingSessions)
+        .values(session)
+        .onConflictDoUpdate({
+          target: [pickingSessions.orderId, pickingSessions.sectionId],
+          set: {
+            id: session.id,
+            userId: session.userId,
+            lastHeartbeat: session.lastHeartbeat,
+            createdAt: session.createdAt,
+          },
+        })
+    );
+    await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+  }
+
+  async deletePickingSessionsById(ids: string[]): Promise<void> {
+    if (ids.length === 0) return;
+    await db.delete(pickingSessions).where(inArray(pickingSessions.id, ids));
+  }
+
+  async touchPickingSessions(heartbeats: { id: string; lastHeartbeat: string }[]): Promise<void> {
+    if (heartbeats.length === 0) return;
+    const statements = heartbeats.map(h =>
+      db.update(pickingSessions).set({ lastHeartbeat: h.lastHeartbeat }).where(eq(pickingSessions.id, h.id))
+    );
+    await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+  }
+
   async cancelOrderLaunch(orderId: string): Promise<void> {
+    // Recibos de bipes em lote das unidades que serão removidas
+    await db.delete(scanReceipts).where(inArray(
+      scanReceipts.workUnitId,
+      db.select({ id: workUnits.id }).from(workUnits).where(eq(workUnits.orderId, orderId)),
+    ));
+
     // Delete all work units for this order
     await db.delete(workUnits).where(eq(workUnits.orderId, orderId));
 
@@ -1021,6 +1846,7 @@ export class DatabaseStorage implements IStorage {
     for (const item of items) {
       await db.delete(exceptions).where(eq(exceptions.orderItemId, item.id));
     }
+    this.exceptionsWrittenAt = Date.now();
 
     // Reset all order items
     await db.update(orderItems)
@@ -1040,6 +1866,7 @@ export class DatabaseStorage implements IStorage {
         updatedAt: new Date().toISOString()
       })
       .where(eq(orders.id, orderId));
+    this.invalidateWorkUnitState(orderId);
   }
 
   // Manual Quantity Rules
@@ -1049,41 +1876,82 @@ export class DatabaseStorage implements IStorage {
 
   async createManualQtyRule(rule: InsertManualQtyRule): Promise<ManualQtyRule> {
     const [newRule] = await db.insert(manualQtyRules).values(rule as any).returning();
+    await this.refreshManualQtyFlags();
     return newRule;
   }
 
   async updateManualQtyRule(id: string, data: Partial<InsertManualQtyRule>): Promise<ManualQtyRule | undefined> {
     const [updated] = await db.update(manualQtyRules).set(data as any).where(eq(manualQtyRules.id, id)).returning();
+    await this.refreshManualQtyFlags();
     return updated;
   }
 
   async deleteManualQtyRule(id: string): Promise<void> {
     await db.delete(manualQtyRules).where(eq(manualQtyRules.id, id));
+    await this.refreshManualQtyFlags();
+  }
+
+  // As regras só são compiladas de novo quando mudam (create/update/delete).
+  private async getManualQtyMatcher(): Promise<ManualQtyMatcher> {
+    if (!this.manualQtyMatcher) {
+      const rules = await db.select().from(manualQtyRules).where(eq(manualQtyRules.active, true));
+      this.manualQtyMatcher = new ManualQtyMatcher(rules);
+    }
+    return this.manualQtyMatcher;
   }
 
   async checkProductManualQty(product: Product): Promise<boolean> {
-    const rules = await db.select().from(manualQtyRules).where(eq(manualQtyRules.active, true));
-
-    for (const rule of rules) {
-      const values = rule.value.split(";").map(v => v.trim()).filter(v => v.length > 0);
-      for (const val of values) {
-        switch (rule.ruleType) {
-          case "product_code":
-            if (product.erpCode === val) return true;
-            break;
-          case "barcode":
-            if (product.barcode === val || product.boxBarcode === val) return true;
-            break;
-          case "description_keyword":
-            if (product.name && product.name.toUpperCase().includes(val.toUpperCase())) return true;
-            break;
-          case "manufacturer":
-            if (product.manufacturer && product.manufacturer.toUpperCase().includes(val.toUpperCase())) return true;
-            break;
-        }
+    const matcher = await this.getManualQtyMatcher();
+    return matcher.matches(product);
+  }
+
+  // Flag products.manual_qty: calculada pelo sync_db2.py para produtos novos e
+  // recalculada aqui quando as regras mudam.
+  async getManualQtyFlags(productIds: string[]): Promise<Record<string, boolean>> {
+    const results: Record<string, boolean> = {};
+    for (const id of productIds) results[id] = false;
+    if (productIds.length === 0) return results;
+
+    const rows = await db.select({ id: products.id, manualQty: products.manualQty })
+      .from(products)
+      .where(inArray(products.id, productIds));
+    for (const row of rows) results[row.id] = !!row.manualQty;
+    return results;
+  }
+
+  async refreshManualQtyFlags(): Promise<number> {
+    this.manualQtyMatcher = null;
+    const matcher = await this.getManualQtyMatcher();
+
+    const rows = await db.select({
+      id: products.id,
+      erpCode: products.erpCode,
+      barcode: products.barcode,
+      boxBarcode: products.boxBarcode,
+      name: products.name,
+      manufacturer: products.manufacturer,
+      manualQty: products.manualQty,
+    }).from(products);
+
+    const toEnable: string[] = [];
+    const toDisable: string[] = [];
+    for (const row of rows) {
+      const flag = matcher.matches(row);
+      if (flag === !!row.manualQty) continue;
+      (flag ? toEnable : toDisable).push(row.id);
+    }
+
+    const CHUNK = 500;
+    const statements: BatchItem<"sqlite">[] = [];
+    for (const [ids, flag] of [[toEnable, true], [toDisable, false]] as const) {
+      for (let i = 0; i < ids.length; i += CHUNK) {
+        statements.push(db.update(products).set({ manualQty: flag }).where(inArray(products.id, ids.slice(i, i + CHUNK))));
       }
     }
-    return false;
+    if (statements.length > 0) {
+      await db.batch(statements as [BatchItem<"sqlite">, ...BatchItem<"sqlite">[]]);
+    }
+    return toEnable.length + toDisable.length;
   }
 
   // DB2 Mappings
@@ -1162,6 +2030,7 @@ export class DatabaseStorage implements IStorage {
       await db.update(workUnits)
         .set({ status: "concluido", completedAt: new Date().toISOString() })
         .where(eq(workUnits.id, id));
+      this.workUnitCache.delete(id);
       return true;
     }
     return false;
@@ -1,4 +1,4 @@
-import { sqliteTable, text, integer, real } from "drizzle-orm/sqlite-core";
+import { sqliteTable, text, integer, real, primaryKey } from "drizzle-orm/sqlite-core";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
 
@@ -23,6 +23,9 @@ export type ExceptionType = typeof exceptionTypeEnum[number];
 export const workUnitTypeEnum = ["separacao", "conferencia", "balcao"] as const;
 export type WorkUnitType = typeof workUnitTypeEnum[number];
 
+export const barcodeKindEnum = ["unit", "box"] as const;
+export type BarcodeKind = typeof barcodeKindEnum[number];
+
 export interface UserSettings {
   allowManualQty?: boolean;
   allowMultiplier?: boolean;
@@ -101,6 +104,7 @@ export const cacheOrcamentos = sqliteTable("cache_orcamentos", {
   syncAt: text("sync_at"),
   codBarras: text("CODBARRAS"),
   codBarrasCaixa: text("CODBARRAS_CAIXA"),
+  qtdMultiplaCaixa: real("QTDMULTIPLA_CAIXA"),
 });
 
 export const products = sqliteTable("products", {
@@ -116,6 +120,16 @@ export const products = sqliteTable("products", {
   price: real("price").notNull().default(0),
   stockQty: real("stock_qty").notNull().default(0),
   erpUpdatedAt: timestamp("erp_updated_at"),
+  // Pré-calculada a partir de manual_qty_rules (sync_db2.py / alteração de regras)
+  manualQty: boolean("manual_qty").notNull().default(false),
+});
+
+// Mantida pelo sync_db2.py: cada código (unitário ou caixa) aponta para um produto
+export const productBarcodes = sqliteTable("product_barcodes", {
+  code: text("code").primaryKey(),
+  productId: text("product_id").notNull().references(() => products.id),
+  kind: text("kind").notNull().$type<BarcodeKind>(),
+  multiplier: real("multiplier").notNull().default(1),
 });
 
 export const orders = sqliteTable("orders", {
@@ -135,6 +149,8 @@ export const orders = sqliteTable("orders", {
   financialStatus: text("financial_status").notNull().default("pendente"),
   createdAt: timestamp("created_at").notNull().default(new Date().toISOString()),
   updatedAt: timestamp("updated_at").notNull().default(new Date().toISOString()),
+  // Mantido por trigger (sync_db2.py); base das listas incrementais (?since=)
+  rowVersion: integer("row_version").notNull().default(0),
 });
 
 export const orderItems = sqliteTable("order_items", {
@@ -150,6 +166,7 @@ export const orderItems = sqliteTable("order_items", {
   qtyChecked: real("qty_checked").default(0),
   status: text("status").default("pendente").$type<ItemStatus>(),
   exceptionType: text("exception_type").$type<ExceptionType>(),
+  rowVersion: integer("row_version").notNull().default(0),
 });
 
 export const pickingSessions = sqliteTable("picking_sessions", {
@@ -178,6 +195,7 @@ export const workUnits = sqliteTable("work_units", {
   startedAt: timestamp("started_at"),
   completedAt: timestamp("completed_at"),
   createdAt: timestamp("created_at").notNull().default(new Date().toISOString()),
+  rowVersion: integer("row_version").notNull().default(0),
 });
 
 export const exceptions = sqliteTable("exceptions", {
@@ -217,6 +235,48 @@ export const sessions = sqliteTable("sessions", {
   createdAt: timestamp("created_at").notNull().default(new Date().toISOString()),
 });
 
+// Bipes recebidos em lote: um recibo por (unidade, dispositivo, seq) torna o
+// reenvio da mesma fila idempotente.
+export const scanReceipts = sqliteTable("scan_receipts", {
+  workUnitId: text("work_unit_id").notNull(),
+  clientId: text("client_id").notNull(),
+  seq: integer("seq").notNull(),
+  result: text("result", { mode: "json" }).$type<ScanOutcome>().notNull(),
+  createdAt: timestamp("created_at").notNull().default(new Date().toISOString()),
+}, (t) => [
+  primaryKey({ columns: [t.workUnitId, t.clientId, t.seq] }),
+]);
+
+// Contador global das versões de linha (linha única, id = 1). min_version marca
+// até onde os tombstones ainda existem.
+export const changeVersion = sqliteTable("change_version", {
+  id: integer("id").primaryKey(),
+  version: integer("version").notNull(),
+  minVersion: integer("min_version").notNull(),
+});
+
+// Pedidos e unidades de trabalho removidos, para as listas incrementais
+export const tombstones = sqliteTable("tombstones", {
+  tableName: text("table_name").notNull(),
+  rowId: text("row_id").notNull(),
+  rowVersion: integer("row_version").notNull(),
+  createdAt: timestamp("created_at").notNull().default(new Date().toISOString()),
+});
+
+// Contadores do painel mantidos por triggers (sync_db2.py): pedidos por status,
+// exceções e unidades por status em cada seção/ponto de retirada.
+export const statsCounterScopeEnum = ["orders", "exceptions", "work_units_section", "work_units_pickup"] as const;
+export type StatsCounterScope = typeof statsCounterScopeEnum[number];
+
+export const statsCounters = sqliteTable("stats_counters", {
+  scope: text("scope").notNull().$type<StatsCounterScope>(),
+  scopeKey: text("scope_key").notNull(),
+  status: text("status").notNull(),
+  count: integer("count").notNull().default(0),
+}, (t) => [
+  primaryKey({ columns: [t.scope, t.scopeKey, t.status] }),
+]);
+
 export const manualQtyRuleTypeEnum = ["product_code", "barcode", "description_keyword", "manufacturer"] as const;
 export type ManualQtyRuleType = typeof manualQtyRuleTypeEnum[number];
 
@@ -269,9 +329,9 @@ export const insertUserSchema = createInsertSchema(users).omit({ id: true, creat
 export const insertRouteSchema = createInsertSchema(routes).omit({ id: true }).extend({ code: z.string().optional() });
 export const insertSectionSchema = createInsertSchema(sections);
 export const insertProductSchema = createInsertSchema(products).omit({ id: true });
-export const insertOrderSchema = createInsertSchema(orders).omit({ id: true, createdAt: true, updatedAt: true });
-export const insertOrderItemSchema = createInsertSchema(orderItems).omit({ id: true });
-export const insertWorkUnitSchema = createInsertSchema(workUnits).omit({ id: true });
+export const insertOrderSchema = createInsertSchema(orders).omit({ id: true, createdAt: true, updatedAt: true, rowVersion: true });
+export const insertOrderItemSchema = createInsertSchema(orderItems).omit({ id: true, rowVersion: true });
+export const insertWorkUnitSchema = createInsertSchema(workUnits).omit({ id: true, rowVersion: true });
 export const insertPickingSessionSchema = createInsertSchema(pickingSessions).omit({ id: true, createdAt: true, lastHeartbeat: true });
 export const insertExceptionSchema = createInsertSchema(exceptions).omit({ id: true, createdAt: true });
 export const insertAuditLogSchema = createInsertSchema(auditLogs).omit({ id: true, createdAt: true });
@@ -283,6 +343,7 @@ export type InsertRoute = z.infer<typeof insertRouteSchema>;
 export type Route = typeof routes.$inferSelect;
 export type InsertProduct = z.infer<typeof insertProductSchema>;
 export type Product = typeof products.$inferSelect;
+export type ProductBarcode = typeof productBarcodes.$inferSelect;
 export type InsertOrder = z.infer<typeof insertOrderSchema>;
 export type Order = typeof orders.$inferSelect;
 export type InsertOrderItem = z.infer<typeof insertOrderItemSchema>;
@@ -309,6 +370,29 @@ export const loginSchema = z.object({
 
 export type LoginInput = z.infer<typeof loginSchema>;
 
+export const scanBatchSchema = z.object({
+  // Identificador do dispositivo (não do usuário): o mesmo usuário em dois coletores,
+  // ou um coletor que reiniciou o seq, não pode cair nos recibos de outra fila
+  clientId: z.string().min(1),
+  scans: z.array(z.object({
+    seq: z.number().int().nonnegative(),
+    barcode: z.string().min(1),
+    quantity: z.number().positive().optional(),
+  })).min(1).max(500),
+});
+
+export type ScanBatchInput = z.infer<typeof scanBatchSchema>;
+
+export interface ScanOutcome {
+  seq: number;
+  status: "success" | "over_quantity" | "over_quantity_with_exception" | "not_found";
+  quantity?: number;
+  itemId?: string;
+  productId?: string;
+  separatedQty?: number;
+  message?: string;
+}
+
 export type OrderWithItems = Order & {
   items: (OrderItem & { product: Product })[];
   route?: Route | null;
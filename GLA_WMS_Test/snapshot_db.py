@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backup online, snapshots comprimidos e restauração do database.db.
+
+O backup usa a API de backup online do SQLite em passos de poucas páginas, com
+uma pausa entre eles: o servidor continua gravando (bipes, bloqueios) durante
+a cópia.
+
+Uso:
+    python snapshot_db.py backup                    # snapshots/database_AAAAMMDD_HHMMSS.db.gz
+    python snapshot_db.py backup --sem-compressao   # snapshot .db
+    python snapshot_db.py listar
+    python snapshot_db.py restore ARQUIVO --destino restaurado.db
+    python snapshot_db.py reset ARQUIVO             # troca de arquivo (servidor parado)
+    python snapshot_db.py reset ARQUIVO --online    # copia sobre o banco em uso
+    python snapshot_db.py replica --intervalo 30    # réplica de leitura para relatórios
+"""
+
+import os
+import sys
+import gzip
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, 'database.db')
+SNAPSHOT_DIR = os.path.join(SCRIPT_DIR, 'snapshots')
+# Lida pelo servidor (getReadDb em server/db.ts) nos relatórios que toleram atraso
+REPLICA_PATH = os.path.join(SCRIPT_DIR, 'database_replica.db')
+
+# Páginas copiadas por passo e pausa entre passos (libera o banco para o servidor)
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.02
+# Escritas de outra conexão reiniciam o backup; depois de tantos reinícios a
+# cópia é feita num passo só (uma leitura; em WAL não bloqueia quem grava)
+MAX_REINICIOS = 5
+
+
+class BackupReiniciado(Exception):
+    pass
+
+
+def copia_online(origem_path: str, destino_path: str):
+    """Copia origem -> destino com a API de backup, em passos com pausa."""
+    origem = sqlite3.connect(origem_path, timeout=30)
+    destino = sqlite3.connect(destino_path)
+    estado = {'restantes': None, 'reinicios': 0}
+
+    def progresso(status, restantes, total):
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > MAX_REINICIOS:
+                raise BackupReiniciado()
+        estado['restantes'] = restantes
+        time.sleep(PAUSA_ENTRE_PASSOS)
+
+    try:
+        try:
+            origem.backup(destino, pages=PAGINAS_POR_PASSO, progress=progresso)
+        except BackupReiniciado:
+            print(f"[SNAPSHOT] Banco muito movimentado ({estado['reinicios']} reinícios); copiando num passo só")
+            origem.backup(destino)
+    finally:
+        destino.close()
+        origem.close()
+
+
+def verificar(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if resultado != 'ok':
+        raise RuntimeError(f"Verificação falhou em {path}: {resultado}")
+
+
+def criar_snapshot(origem: str = DB_PATH, saida: str = None, comprimir: bool = True) -> str:
+    inicio = time.time()
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    if not saida:
+        nome = f"database_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        saida = os.path.join(SNAPSHOT_DIR, nome + ('.gz' if comprimir else ''))
+
+    fd, temporario = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(saida)))
+    os.close(fd)
+    try:
+        copia_online(origem, temporario)
+        verificar(temporario)
+        if comprimir:
+            with open(temporario, 'rb') as f_in, gzip.open(saida, 'wb', compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        else:
+            os.replace(temporario, saida)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    tamanho = os.path.getsize(saida) / (1024 * 1024)
+    print(f"[SNAPSHOT] ✓ {saida} | {tamanho:.1f} MB | {time.time() - inicio:.1f}s")
+    return saida
+
+
+def extrair_snapshot(snapshot: str, pasta: str) -> str:
+    """Descomprime (se .gz) o snapshot num arquivo novo dentro de `pasta` e o verifica."""
+    fd, temporario = tempfile.mkstemp(suffix='.db', dir=pasta)
+    os.close(fd)
+    try:
+        abrir = gzip.open if snapshot.endswith('.gz') else open
+        with abrir(snapshot, 'rb') as f_in, open(temporario, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        verificar(temporario)
+        return temporario
+    except Exception:
+        os.remove(temporario)
+        raise
+
+
+def restaurar_snapshot(snapshot: str, destino: str, forcar: bool = False) -> str:
+    """Restaura o snapshot num arquivo novo (não sobrescreve sem --forcar)."""
+    if os.path.exists(destino) and not forcar:
+        raise FileExistsError(f"{destino} já existe (use --forcar)")
+    inicio = time.time()
+    temporario = extrair_snapshot(snapshot, os.path.dirname(os.path.abspath(destino)))
+    os.replace(temporario, destino)
+    print(f"[SNAPSHOT] ✓ Restaurado em {destino} | {time.time() - inicio:.1f}s")
+    return destino
+
+
+def resetar_para_snapshot(snapshot: str, destino: str = DB_PATH, online: bool = False):
+    """Volta o banco ao estado do snapshot.
+
+    Padrão: troca de arquivo (milissegundos; o servidor precisa estar parado). O
+    banco atual fica em <destino>.anterior. Com online=True o snapshot é copiado
+    sobre o banco em uso pela API de backup (servidor pode continuar no ar).
+    """
+    pasta = os.path.dirname(os.path.abspath(destino))
+    temporario = extrair_snapshot(snapshot, pasta)
+    try:
+        if online:
+            inicio = time.time()
+            origem = sqlite3.connect(temporario)
+            alvo = sqlite3.connect(destino, timeout=30)
+            try:
+                origem.backup(alvo)
+            finally:
+                alvo.close()
+                origem.close()
+            print(f"[RESET] ✓ Snapshot copiado sobre {destino} | {time.time() - inicio:.2f}s")
+            return
+
+        inicio = time.time()
+        if os.path.exists(destino):
+            # Transações ainda só no WAL vão para o arquivo: o .anterior fica completo
+            antigo = sqlite3.connect(destino, timeout=30)
+            try:
+                antigo.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                antigo.close()
+            os.replace(destino, destino + '.anterior')
+        # WAL/SHM acompanham o banco antigo (se o checkpoint não esvaziou o WAL, o
+        # .anterior ainda o aplica); não podem ser aplicados ao arquivo novo
+        for ext in ('-wal', '-shm'):
+            if os.path.exists(destino + '.anterior' + ext):
+                os.remove(destino + '.anterior' + ext)
+            if os.path.exists(destino + ext):
+                os.replace(destino + ext, destino + '.anterior' + ext)
+        os.replace(temporario, destino)
+        print(f"[RESET] ✓ {destino} trocado pelo snapshot em {(time.time() - inicio) * 1000:.0f} ms "
+              f"(anterior: {destino}.anterior)")
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def atualizar_replica(origem: str = DB_PATH, replica: str = REPLICA_PATH):
+    """Atualiza a réplica de leitura.
+
+    A cópia do banco principal é feita em passos com pausa (como no backup) para
+    um temporário; depois o temporário vai para a réplica num passo só. A réplica
+    fica em WAL, então os relatórios que estão lendo não travam a atualização.
+    O mtime do arquivo fica com a hora do início da cópia (o servidor usa para o atraso).
+    """
+    inicio = time.time()
+    fd, temporario = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(replica)))
+    os.close(fd)
+    try:
+        copia_online(origem, temporario)
+        copia = sqlite3.connect(temporario)
+        alvo = sqlite3.connect(replica, timeout=30)
+        try:
+            alvo.execute("PRAGMA journal_mode = WAL")
+            copia.backup(alvo)
+            alvo.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            alvo.close()
+            copia.close()
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    # Hora do início da cópia: tudo que foi gravado antes dela está na réplica
+    os.utime(replica, (inicio, inicio))
+    print(f"[REPLICA] ✓ {replica} atualizada | {time.time() - inicio:.2f}s")
+
+
+def manter_replica(intervalo: int, origem: str = DB_PATH, replica: str = REPLICA_PATH):
+    while True:
+        try:
+            atualizar_replica(origem, replica)
+        except Exception as e:
+            print(f"[REPLICA] Erro na atualização: {e}")
+        time.sleep(intervalo)
+
+
+def listar_snapshots():
+    if not os.path.isdir(SNAPSHOT_DIR):
+        print("[SNAPSHOT] Nenhum snapshot encontrado")
+        return
+    for nome in sorted(os.listdir(SNAPSHOT_DIR)):
+        caminho = os.path.join(SNAPSHOT_DIR, nome)
+        print(f"  {nome}  {os.path.getsize(caminho) / (1024 * 1024):.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup/snapshot/restauração do database.db")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_backup = sub.add_parser('backup', help="Snapshot online do banco")
+    p_backup.add_argument('--origem', default=DB_PATH)
+    p_backup.add_argument('--saida', help="Arquivo de saída (padrão: snapshots/)")
+    p_backup.add_argument('--sem-compressao', action='store_true')
+
+    sub.add_parser('listar', help="Lista os snapshots")
+
+    p_restore = sub.add_parser('restore', help="Restaura um snapshot num arquivo novo")
+    p_restore.add_argument('snapshot')
+    p_restore.add_argument('--destino', required=True)
+    p_restore.add_argument('--forcar', action='store_true', help="Sobrescreve o destino")
+
+    p_reset = sub.add_parser('reset', help="Volta o database.db ao snapshot")
+    p_reset.add_argument('snapshot')
+    p_reset.add_argument('--destino', default=DB_PATH)
+    p_reset.add_argument('--online', action='store_true', help="Copia sobre o banco em uso (servidor no ar)")
+
+    p_replica = sub.add_parser('replica', help="Atualiza a réplica de leitura dos relatórios")
+    p_replica.add_argument('--origem', default=DB_PATH)
+    p_replica.add_argument('--replica', default=REPLICA_PATH)
+    p_replica.add_argument('--intervalo', type=int, metavar='SEGUNDOS',
+                           help="Atualiza continuamente a cada SEGUNDOS (padrão: uma vez)")
+
+    args = parser.parse_args()
+    try:
+        if args.comando == 'backup':
+            criar_snapshot(args.origem, args.saida, comprimir=not args.sem_compressao)
+        elif args.comando == 'listar':
+            listar_snapshots()
+        elif args.comando == 'restore':
+            restaurar_snapshot(args.snapshot, args.destino, forcar=args.forcar)
+        elif args.comando == 'reset':
+            resetar_para_snapshot(args.snapshot, args.destino, online=args.online)
+        elif args.comando == 'replica':
+            if args.intervalo:
+                manter_replica(args.intervalo, args.origem, args.replica)
+            else:
+                atualizar_replica(args.origem, args.replica)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"[ERRO] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,9 @@ ITENS AS (
         /* >>> ADICIONADO: código de barras da CAIXA FECHADA <<< */
         CBX.CODBARCX AS CODBARRAS_CAIXA,
 
+        /* >>> NOVO: quantidade de unidades na caixa fechada <<< */
+        CBX.QTDMULTIPLA AS QTDMULTIPLA_CAIXA,
+
         /* seção */
         PR.IDSECAO,
         S.DESCRSECAO,
@@ -130,7 +133,8 @@ ITENS AS (
             CASE
                 WHEN TRIM(COALESCE(PGCX.CODBARCX, '')) = '' THEN VARCHAR(PGCX.IDCODBARCX)
                 ELSE PGCX.CODBARCX
-            END AS CODBARCX
+            END AS CODBARCX,
+            COALESCE(PGCX.QTDMULTIPLA, 0) AS QTDMULTIPLA
         FROM DBA.PRODUTO_GRADE_CODBARCX PGCX
         WHERE PGCX.IDPRODUTO    = OP.IDPRODUTO
           AND PGCX.IDSUBPRODUTO = OP.IDSUBPRODUTO
@@ -188,6 +192,9 @@ SELECT
 
     I.CODBARRAS_CAIXA,
 
+    /* >>> NOVO <<< */
+    I.QTDMULTIPLA_CAIXA,
+
     I.IDSECAO,
     I.DESCRSECAO,
 
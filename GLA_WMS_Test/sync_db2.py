@@ -10,6 +10,7 @@ Uso:
     python sync_db2.py --desde 2025-01-01     # Carga desde data específica
     python sync_db2.py --loop 600             # Sync a cada 10 minutos
     python sync_db2.py --loop 600 --serve     # Sync + servidor web
+    python sync_db2.py --serve --arquivar 90  # + arquivamento diário de pedidos finalizados
 """
 
 import os
@@ -23,6 +24,8 @@ import platform
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import json
+import re
+import hashlib
 
 # === MODIFICATION: pyodbc mandatory ===
 import pyodbc
@@ -170,346 +173,698 @@ def formatar_hora(valor) -> str:
     return str(valor)[:8]
 
 
-def inicializar_sqlite():
-    """Inicializa o banco SQLite com o schema."""
-    log(f"Inicializando SQLite em {DATABASE_PATH}...")
-    
+def adicionar_coluna(cursor, tabela: str, coluna: str, definicao: str):
+    """ALTER TABLE ... ADD COLUMN se a coluna ainda não existe (bancos antigos)."""
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    if coluna not in [info[1] for info in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+
+def tem_indice_unico(cursor, tabela: str, coluna: str) -> bool:
+    """Se a coluna já tem índice único próprio (constraint UNIQUE ou CREATE UNIQUE INDEX)."""
+    cursor.execute(f"PRAGMA index_list({tabela})")
+    for indice in cursor.fetchall():
+        nome, unico = indice[1], indice[2]
+        if unico:
+            cursor.execute(f'PRAGMA index_info("{nome}")')
+            if [info[2] for info in cursor.fetchall()] == [coluna]:
+                return True
+    return False
+
+
+def exigir_valores_unicos(cursor, tabela: str, coluna: str):
+    """
+    Falha com erro claro se a coluna tem valores repetidos. Duplicatas de
+    pedido/produto têm itens e unidades apontando para cada cópia: a escolha de
+    qual manter fica para o operador, não para a migração.
+    """
+    cursor.execute(f"""
+        SELECT {coluna}, COUNT(*) FROM {tabela}
+        GROUP BY {coluna} HAVING COUNT(*) > 1
+        ORDER BY COUNT(*) DESC, {coluna}
+    """)
+    repetidos = cursor.fetchall()
+    if repetidos:
+        exemplos = ", ".join(f"{valor} ({qtd}x)" for valor, qtd in repetidos[:5])
+        raise RuntimeError(
+            f"{tabela}.{coluna} tem {len(repetidos)} valor(es) repetido(s): {exemplos}. "
+            f"Remova as duplicatas antes de rodar o sync."
+        )
+
+
+def migracao_schema_inicial(cursor):
+    """
+    Schema de antes do user_version. Bancos antigos (versão 0) já têm parte
+    dele: tudo é IF NOT EXISTS e as colunas acrescentadas depois são conferidas.
+    """
+    # 1. Cache Orcamentos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_orcamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CHAVE TEXT UNIQUE NOT NULL,
+            IDEMPRESA INTEGER,
+            IDORCAMENTO INTEGER,
+            IDPRODUTO TEXT,
+            IDSUBPRODUTO TEXT,
+            NUMSEQUENCIA INTEGER,
+            QTDPRODUTO REAL,
+            UNIDADE TEXT,
+            FABRICANTE TEXT,
+            VALUNITBRUTO REAL,
+            VALTOTLIQUIDO REAL,
+            DESCRRESPRODUTO TEXT,
+            IDVENDEDOR TEXT,
+            IDLOCALRETIRADA INTEGER,
+            IDSECAO INTEGER,
+            DESCRSECAO TEXT,
+            TIPOENTREGA TEXT,
+            NOMEVENDEDOR TEXT,
+            TIPOENTREGA_DESCR TEXT,
+            LOCALRETESTOQUE TEXT,
+            FLAGCANCELADO TEXT,
+            IDCLIFOR TEXT,
+            DESCLIENTE TEXT,
+            DTMOVIMENTO TEXT,
+            IDRECEBIMENTO TEXT,
+            DESCRRECEBIMENTO TEXT,
+            FLAGPRENOTAPAGA TEXT,
+            CODBARRAS TEXT,
+            CODBARRAS_CAIXA TEXT,
+            sync_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 2. Remover tabelas antigas
+    cursor.execute("DROP TABLE IF EXISTS cache_vendas_pendentes")
+    cursor.execute("DROP TABLE IF EXISTS cache_tubos_conexoes")
+
+    # 3. Companies & Goals & Alerts & Pickup Points
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pickup_points (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            active INTEGER DEFAULT 1
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS companies (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cnpj TEXT UNIQUE NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS goals (
+            id TEXT PRIMARY KEY,
+            salesperson_id TEXT NOT NULL,
+            company_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            month INTEGER NOT NULL,
+            year INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            id TEXT PRIMARY KEY,
+            company_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            salesperson_id TEXT,
+            severity TEXT DEFAULT 'warning',
+            is_read INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # 4. Indices
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_dt ON cache_orcamentos(DTMOVIMENTO)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_vend ON cache_orcamentos(IDVENDEDOR)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_chave ON cache_orcamentos(CHAVE)")
+
+    # 5. Users
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            sections TEXT,
+            settings TEXT,
+            active INTEGER DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    adicionar_coluna(cursor, "users", "settings", "TEXT")
+
+    # 6. Sections
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sections (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        )
+    """)
+
+    # 7. App Tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            erp_code TEXT UNIQUE NOT NULL,
+            barcode TEXT,
+            box_barcode TEXT,
+            name TEXT NOT NULL,
+            section TEXT NOT NULL,
+            pickup_point INTEGER NOT NULL,
+            unit TEXT DEFAULT 'UN' NOT NULL,
+            manufacturer TEXT,
+            price REAL DEFAULT 0 NOT NULL,
+            stock_qty REAL DEFAULT 0 NOT NULL,
+            erp_updated_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS routes (
+            id TEXT PRIMARY KEY,
+            code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            active INTEGER DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            erp_order_id TEXT UNIQUE NOT NULL,
+            customer_name TEXT NOT NULL,
+            customer_code TEXT,
+            total_value REAL DEFAULT 0 NOT NULL,
+            observation TEXT,
+            status TEXT DEFAULT 'pendente' NOT NULL,
+            financial_status TEXT DEFAULT 'pendente' NOT NULL,
+            priority INTEGER DEFAULT 0 NOT NULL,
+            is_launched INTEGER DEFAULT 0 NOT NULL,
+            route_id TEXT REFERENCES routes(id),
+            separation_code TEXT UNIQUE,
+            pickup_points TEXT,
+            erp_updated_at TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS order_items (
+            id TEXT PRIMARY KEY,
+            order_id TEXT NOT NULL REFERENCES orders(id),
+            product_id TEXT NOT NULL REFERENCES products(id),
+            quantity REAL NOT NULL,
+            separated_qty REAL DEFAULT 0 NOT NULL,
+            checked_qty REAL DEFAULT 0 NOT NULL,
+            status TEXT DEFAULT 'pendente' NOT NULL,
+            pickup_point INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            qty_picked REAL DEFAULT 0,
+            qty_checked REAL DEFAULT 0,
+            exception_type TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS work_units (
+            id TEXT PRIMARY KEY,
+            order_id TEXT REFERENCES orders(id),
+            status TEXT NOT NULL,
+            type TEXT NOT NULL,
+            pickup_point INTEGER,
+            section TEXT,
+            assigned_user_id TEXT REFERENCES users(id),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            completed_at TEXT,
+            locked_by TEXT REFERENCES users(id),
+            locked_at TEXT,
+            lock_expires_at TEXT,
+            cart_qr_code TEXT,
+            pallet_qr_code TEXT,
+            started_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exceptions (
+            id TEXT PRIMARY KEY,
+            work_unit_id TEXT NOT NULL REFERENCES work_units(id),
+            order_item_id TEXT NOT NULL REFERENCES order_items(id),
+            type TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            observation TEXT,
+            reported_by TEXT NOT NULL REFERENCES users(id),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id TEXT PRIMARY KEY,
+            user_id TEXT REFERENCES users(id),
+            action TEXT NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT,
+            details TEXT,
+            previous_value TEXT,
+            new_value TEXT,
+            ip_address TEXT,
+            user_agent TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+
+    # Additional tables for server functionality
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS section_groups (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            sections TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS picking_sessions (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL REFERENCES users(id),
+            order_id TEXT NOT NULL REFERENCES orders(id),
+            section_id TEXT NOT NULL,
+            last_heartbeat TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            UNIQUE(order_id, section_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL REFERENCES users(id),
+            token TEXT NOT NULL,
+            session_key TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS manual_qty_rules (
+            id TEXT PRIMARY KEY,
+            rule_type TEXT NOT NULL,
+            value TEXT NOT NULL,
+            description TEXT,
+            active INTEGER DEFAULT 1,
+            created_by TEXT REFERENCES users(id),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS db2_mappings (
+            id TEXT PRIMARY KEY,
+            dataset TEXT NOT NULL,
+            version INTEGER DEFAULT 1 NOT NULL,
+            is_active INTEGER DEFAULT 0 NOT NULL,
+            mapping_json TEXT NOT NULL,
+            description TEXT,
+            created_by TEXT REFERENCES users(id),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+
+
+def migracao_scripts_avulsos(cursor):
+    """
+    Correções que ficavam em scripts manuais: fix_db_columns.py, fix_schema.py,
+    manual_migration.cjs e server/migrate.ts (autorização de exceções).
+    """
+    adicionar_coluna(cursor, "cache_orcamentos", "CODBARRAS", "TEXT")
+    adicionar_coluna(cursor, "cache_orcamentos", "CODBARRAS_CAIXA", "TEXT")
+    adicionar_coluna(cursor, "products", "box_barcode", "TEXT")
+    adicionar_coluna(cursor, "order_items", "qty_picked", "REAL DEFAULT 0")
+    adicionar_coluna(cursor, "order_items", "qty_checked", "REAL DEFAULT 0")
+    adicionar_coluna(cursor, "order_items", "exception_type", "TEXT")
+    adicionar_coluna(cursor, "exceptions", "authorized_by", "TEXT REFERENCES users(id)")
+    adicionar_coluna(cursor, "exceptions", "authorized_by_name", "TEXT")
+    adicionar_coluna(cursor, "exceptions", "authorized_at", "TEXT")
+    # Tabelas criadas pelo servidor (drizzle) sem a constraint UNIQUE
+    if not tem_indice_unico(cursor, "orders", "erp_order_id"):
+        exigir_valores_unicos(cursor, "orders", "erp_order_id")
+        cursor.execute("CREATE UNIQUE INDEX orders_erp_order_id_unique ON orders(erp_order_id)")
+    if not tem_indice_unico(cursor, "products", "erp_code"):
+        exigir_valores_unicos(cursor, "products", "erp_code")
+        cursor.execute("CREATE UNIQUE INDEX products_erp_code_unique ON products(erp_code)")
+
+
+def migracao_estado_sync(cursor):
+    """Estado do sync que precisa valer entre processos (ex.: /api/sync)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+def migracao_codigos_barras(cursor):
+    """
+    Índice de resolução de códigos de barras (unitário e caixa fechada): um
+    bipe vira uma única busca pela chave primária.
+    """
+    adicionar_coluna(cursor, "cache_orcamentos", "QTDMULTIPLA_CAIXA", "REAL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_barcodes (
+            code TEXT PRIMARY KEY,
+            product_id TEXT NOT NULL REFERENCES products(id),
+            kind TEXT NOT NULL,
+            multiplier REAL DEFAULT 1 NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_barcodes_product ON product_barcodes(product_id)")
+
+
+def migracao_indices_bipe(cursor):
+    """Índices do caminho do bipe (item da unidade por produto, soma de exceções)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order_product ON order_items(order_id, product_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_units_order ON work_units(order_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_exceptions_item ON exceptions(order_item_id)")
+
+
+def migracao_recibos_bipes(cursor):
+    """Recibos dos bipes enviados em lote (idempotência por dispositivo/seq)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scan_receipts (
+            work_unit_id TEXT NOT NULL,
+            client_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
+            PRIMARY KEY (work_unit_id, client_id, seq)
+        )
+    """)
+
+
+def migracao_qtd_manual(cursor):
+    """Flag pré-calculada das regras de quantidade manual."""
+    adicionar_coluna(cursor, "products", "manual_qty", "INTEGER DEFAULT 0 NOT NULL")
+
+
+def migracao_indice_sessoes(cursor):
+    """Lookup do token a cada requisição autenticada (cache frio no servidor)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(token)")
+
+
+def migracao_versionamento_linhas(cursor):
+    """row_version, tombstones e triggers das listas incrementais (?since=)."""
+    criar_versionamento_linhas(cursor)
+
+
+def migracao_indice_fila(cursor):
+    """Fila das telas de separação/conferência/balcão (tipo + status)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_units_queue ON work_units(type, status)")
+
+
+def migracao_contadores_status(cursor):
+    """Contadores do painel mantidos por triggers."""
+    criar_contadores_status(cursor)
+
+
+def migracao_indice_romaneio(cursor):
+    """Romaneio de separação (leitura em ordem de seção/ponto de retirada)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_order_items_section_pp ON order_items(section, pickup_point)")
+
+
+def migracao_versao_excecoes_alteradas(cursor):
+    """
+    Alteração de exceção (autorização, troca de item) também versiona o item,
+    senão as listas ?since= nunca entregam a autorização às telas.
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exceptions_versao_upd AFTER UPDATE ON exceptions
+        BEGIN
+            {SQL_PROXIMA_VERSAO}
+            UPDATE order_items SET row_version = {SQL_VERSAO_ATUAL}
+            WHERE id = NEW.order_item_id OR (id = OLD.order_item_id AND OLD.order_item_id IS NOT NEW.order_item_id);
+        END
+    """)
+
+
+# Migrações do schema em ordem; PRAGMA user_version guarda quantas já rodaram.
+# Alterações novas entram no fim da lista, nunca editando uma já publicada.
+# Todas são idempotentes (IF NOT EXISTS / coluna conferida), então bancos
+# criados antes da divisão por funcionalidade sobem de versão sem erro.
+MIGRACOES = [
+    migracao_schema_inicial,
+    migracao_scripts_avulsos,
+    migracao_estado_sync,
+    migracao_codigos_barras,
+    migracao_indices_bipe,
+    migracao_recibos_bipes,
+    migracao_qtd_manual,
+    migracao_indice_sessoes,
+    migracao_versionamento_linhas,
+    migracao_indice_fila,
+    migracao_contadores_status,
+    migracao_indice_romaneio,
+    migracao_versao_excecoes_alteradas,
+]
+
+
+def versao_schema(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def inicializar_sqlite() -> bool:
+    """
+    Aplica as migrações pendentes do schema. Com o banco em dia só lê o
+    PRAGMA user_version; as pendentes rodam numa única transação (ou o banco
+    vai para a versão atual, ou nada muda). Retorna False se a migração falhou.
+    """
+    versao_atual = len(MIGRACOES)
+    conn = None
     try:
-        conn = sqlite3.connect(DATABASE_PATH, timeout=10.0)
-        cursor = conn.cursor()
-        
-        # Enable WAL mode and set busy timeout for concurrent access
-        cursor.execute("PRAGMA journal_mode = WAL")
-        cursor.execute("PRAGMA busy_timeout = 5000")
-        conn.commit()
-        
-        # 1. Cache Orcamentos
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS cache_orcamentos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    CHAVE TEXT UNIQUE NOT NULL,
-                    IDEMPRESA INTEGER,
-                    IDORCAMENTO INTEGER,
-                    IDPRODUTO TEXT,
-                    IDSUBPRODUTO TEXT,
-                    NUMSEQUENCIA INTEGER,
-                    QTDPRODUTO REAL,
-                    UNIDADE TEXT,
-                    FABRICANTE TEXT,
-                    VALUNITBRUTO REAL,
-                    VALTOTLIQUIDO REAL,
-                    DESCRRESPRODUTO TEXT,
-                    IDVENDEDOR TEXT,
-                    IDLOCALRETIRADA INTEGER,
-                    IDSECAO INTEGER,
-                    DESCRSECAO TEXT,
-                    TIPOENTREGA TEXT,
-                    NOMEVENDEDOR TEXT,
-                    TIPOENTREGA_DESCR TEXT,
-                    LOCALRETESTOQUE TEXT,
-                    FLAGCANCELADO TEXT,
-                    IDCLIFOR TEXT,
-                    DESCLIENTE TEXT,
-                    DTMOVIMENTO TEXT,
-                    IDRECEBIMENTO TEXT,
-                    DESCRRECEBIMENTO TEXT,
-                    FLAGPRENOTAPAGA TEXT,
-                    CODBARRAS TEXT,
-                    CODBARRAS_CAIXA TEXT,
-                    sync_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao criar cache_orcamentos: {e}")
+        # isolation_level=None: o BEGIN/COMMIT explícito abrange também o DDL
+        conn = sqlite3.connect(DATABASE_PATH, timeout=10.0, isolation_level=None)
+        if versao_schema(conn) == versao_atual:
+            return True
 
-        # 2. Remover tabelas antigas
-        try:
-            cursor.execute("DROP TABLE IF EXISTS cache_vendas_pendentes")
-            cursor.execute("DROP TABLE IF EXISTS cache_tubos_conexoes")
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao limpar tabelas antigas: {e}")
+        log(f"Inicializando SQLite em {DATABASE_PATH}...")
+        # Enable WAL mode and set busy timeout for concurrent access
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
 
-        # 3. Companies & Goals & Alerts & Pickup Points
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pickup_points (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    active INTEGER DEFAULT 1
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS companies (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    cnpj TEXT UNIQUE NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS goals (
-                    id TEXT PRIMARY KEY,
-                    salesperson_id TEXT NOT NULL,
-                    company_id TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    target_value REAL NOT NULL,
-                    month INTEGER NOT NULL,
-                    year INTEGER NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id TEXT PRIMARY KEY,
-                    company_id TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    salesperson_id TEXT,
-                    severity TEXT DEFAULT 'warning',
-                    is_read INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao criar tabelas comp/goals/alerts: {e}")
-            
-        # 4. Indices
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
         try:
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_dt ON cache_orcamentos(DTMOVIMENTO)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_vend ON cache_orcamentos(IDVENDEDOR)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_orc_chave ON cache_orcamentos(CHAVE)")
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao criar indices: {e}")
+            # Outro processo (ex.: sync disparado por /api/sync) pode ter migrado enquanto esperávamos o lock
+            versao = versao_schema(conn)
+            if versao > versao_atual:
+                log(f"Aviso: schema v{versao} é mais novo que este sync_db2.py (v{versao_atual})")
+            for migracao in MIGRACOES[versao:]:
+                migracao(cursor)
+            if versao < versao_atual:
+                cursor.execute(f"PRAGMA user_version = {versao_atual}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        log(f"SQLite OK | arquivo=database.db | schema=v{versao_atual} | migracoes_aplicadas={max(versao_atual - versao, 0)}")
+        return True
 
-        # 5. Users
-        try:
-            # Check if settings column exists if table exists
-            cursor.execute("PRAGMA table_info(users)")
-            columns = [info[1] for info in cursor.fetchall()]
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    sections TEXT,
-                    settings TEXT,
-                    active INTEGER DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            if 'settings' not in columns and 'users' in [t[0] for t in cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")]:
-                 # Only try to alter if table exists but column doesn't
-                 try:
-                     cursor.execute("ALTER TABLE users ADD COLUMN settings TEXT")
-                 except:
-                     pass
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao criar users: {e}")
-            
-        # 6. Sections
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sections (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL
-                )
-            """)
-            conn.commit()
-        except Exception as e:
-            log(f"Erro ao criar sections: {e}")
-            
-        # 7. App Tables
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id TEXT PRIMARY KEY,
-                    erp_code TEXT UNIQUE NOT NULL,
-                    barcode TEXT,
-                    box_barcode TEXT,
-                    name TEXT NOT NULL,
-                    section TEXT NOT NULL,
-                    pickup_point INTEGER NOT NULL,
-                    unit TEXT DEFAULT 'UN' NOT NULL,
-                    manufacturer TEXT,
-                    price REAL DEFAULT 0 NOT NULL,
-                    stock_qty REAL DEFAULT 0 NOT NULL,
-                    erp_updated_at TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS routes (
-                    id TEXT PRIMARY KEY,
-                    code TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    active INTEGER DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS orders (
-                    id TEXT PRIMARY KEY,
-                    erp_order_id TEXT UNIQUE NOT NULL,
-                    customer_name TEXT NOT NULL,
-                    customer_code TEXT,
-                    total_value REAL DEFAULT 0 NOT NULL,
-                    observation TEXT,
-                    status TEXT DEFAULT 'pendente' NOT NULL,
-                    financial_status TEXT DEFAULT 'pendente' NOT NULL,
-                    priority INTEGER DEFAULT 0 NOT NULL,
-                    is_launched INTEGER DEFAULT 0 NOT NULL,
-                    route_id TEXT REFERENCES routes(id),
-                    separation_code TEXT UNIQUE,
-                    pickup_points TEXT,
-                    erp_updated_at TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS order_items (
-                    id TEXT PRIMARY KEY,
-                    order_id TEXT NOT NULL REFERENCES orders(id),
-                    product_id TEXT NOT NULL REFERENCES products(id),
-                    quantity REAL NOT NULL,
-                    separated_qty REAL DEFAULT 0 NOT NULL,
-                    checked_qty REAL DEFAULT 0 NOT NULL,
-                    status TEXT DEFAULT 'pendente' NOT NULL,
-                    pickup_point INTEGER NOT NULL,
-                    section TEXT NOT NULL,
-                    qty_picked REAL DEFAULT 0,
-                    qty_checked REAL DEFAULT 0,
-                    exception_type TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS work_units (
-                    id TEXT PRIMARY KEY,
-                    order_id TEXT REFERENCES orders(id),
-                    status TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    pickup_point INTEGER,
-                    section TEXT,
-                    assigned_user_id TEXT REFERENCES users(id),
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    completed_at TEXT,
-                    locked_by TEXT REFERENCES users(id),
-                    locked_at TEXT,
-                    lock_expires_at TEXT,
-                    cart_qr_code TEXT,
-                    pallet_qr_code TEXT,
-                    started_at TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS exceptions (
-                    id TEXT PRIMARY KEY,
-                    work_unit_id TEXT NOT NULL REFERENCES work_units(id),
-                    order_item_id TEXT NOT NULL REFERENCES order_items(id),
-                    type TEXT NOT NULL,
-                    quantity REAL NOT NULL,
-                    observation TEXT,
-                    reported_by TEXT NOT NULL REFERENCES users(id),
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS audit_logs (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT REFERENCES users(id),
-                    action TEXT NOT NULL,
-                    entity_type TEXT NOT NULL,
-                    entity_id TEXT,
-                    details TEXT,
-                    previous_value TEXT,
-                    new_value TEXT,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            
-            # Additional tables for server functionality
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS section_groups (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    sections TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS picking_sessions (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL REFERENCES users(id),
-                    order_id TEXT NOT NULL REFERENCES orders(id),
-                    section_id TEXT NOT NULL,
-                    last_heartbeat TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    UNIQUE(order_id, section_id)
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL REFERENCES users(id),
-                    token TEXT NOT NULL,
-                    session_key TEXT NOT NULL,
-                    expires_at TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS manual_qty_rules (
-                    id TEXT PRIMARY KEY,
-                    rule_type TEXT NOT NULL,
-                    value TEXT NOT NULL,
-                    description TEXT,
-                    active INTEGER DEFAULT 1,
-                    created_by TEXT REFERENCES users(id),
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS db2_mappings (
-                    id TEXT PRIMARY KEY,
-                    dataset TEXT NOT NULL,
-                    version INTEGER DEFAULT 1 NOT NULL,
-                    is_active INTEGER DEFAULT 0 NOT NULL,
-                    mapping_json TEXT NOT NULL,
-                    description TEXT,
-                    created_by TEXT REFERENCES users(id),
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            """)
-            
-            conn.commit()
-            log(f"SQLite OK | arquivo=database.db | schema=OK")
-        except Exception as e:
-            log(f"Erro ao criar tabelas da aplicacao: {e}")
-            import traceback
-            traceback.print_exc()
-            
     except Exception as e:
         log(f"Erro CRITICO ao inicializar SQLite: {e}")
-        return
+        import traceback
+        traceback.print_exc()
+        return False
 
     finally:
-        try:
+        if conn is not None:
             conn.close()
-        except:
-            pass
+
+
+# Tabelas com versão de linha para as listas incrementais (?since=<versão>)
+TABELAS_VERSIONADAS = ("orders", "order_items", "work_units")
+# Trechos dos triggers: reserva a próxima versão global / lê a versão reservada
+SQL_PROXIMA_VERSAO = "UPDATE change_version SET version = version + 1 WHERE id = 1;"
+SQL_VERSAO_ATUAL = "(SELECT version FROM change_version WHERE id = 1)"
+# Tombstones (linhas removidas) mais antigos que isso são descartados; clientes
+# com versão anterior ao descarte recebem a lista completa.
+DIAS_RETENCAO_TOMBSTONES = 7
+
+
+def criar_versionamento_linhas(cursor):
+    """Contador global de versão mantido por triggers em orders, order_items e work_units.
+
+    Toda inserção/alteração grava a próxima versão em row_version; remoções de
+    pedidos e unidades viram tombstones. Exceções e remoção de itens versionam a
+    linha pai (o item / o pedido), que é o que as listas expõem.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            min_version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO change_version (id, version, min_version) VALUES (1, 0, 0)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tombstones (
+            table_name TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            row_version INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_version ON tombstones(table_name, row_version)")
+
+    proxima_versao = SQL_PROXIMA_VERSAO
+    versao_atual = SQL_VERSAO_ATUAL
+
+    for tabela in TABELAS_VERSIONADAS:
+        # Bancos antigos: linhas existentes ficam na versão 0 (entram na carga completa)
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        if 'row_version' not in [info[1] for info in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN row_version INTEGER DEFAULT 0 NOT NULL")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_row_version ON {tabela}(row_version)")
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_ins AFTER INSERT ON {tabela}
+            BEGIN
+                {proxima_versao}
+                UPDATE {tabela} SET row_version = {versao_atual} WHERE id = NEW.id;
+            END
+        """)
+        # O WHEN impede que o UPDATE do próprio trigger dispare outra versão
+        # (com recursive_triggers ligado)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_upd AFTER UPDATE ON {tabela}
+            WHEN NEW.row_version <= OLD.row_version
+            BEGIN
+                {proxima_versao}
+                UPDATE {tabela} SET row_version = {versao_atual} WHERE id = NEW.id;
+            END
+        """)
+
+    for tabela in ("orders", "work_units"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_del AFTER DELETE ON {tabela}
+            BEGIN
+                {proxima_versao}
+                INSERT INTO tombstones (table_name, row_id, row_version) VALUES ('{tabela}', OLD.id, {versao_atual});
+            END
+        """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_order_items_versao_del AFTER DELETE ON order_items
+        BEGIN
+            {proxima_versao}
+            UPDATE orders SET row_version = {versao_atual} WHERE id = OLD.order_id;
+        END
+    """)
+    for evento, linha in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_exceptions_versao_{evento.lower()[:3]} AFTER {evento} ON exceptions
+            BEGIN
+                {proxima_versao}
+                UPDATE order_items SET row_version = {versao_atual} WHERE id = {linha}.order_item_id;
+            END
+        """)
+
+
+def descartar_tombstones(cursor):
+    """Descarte de tombstones antigos: min_version marca até onde o histórico é completo."""
+    cursor.execute(f"""
+        UPDATE change_version SET min_version = MAX(min_version, COALESCE(
+            (SELECT MAX(row_version) FROM tombstones WHERE created_at < datetime('now', '-{DIAS_RETENCAO_TOMBSTONES} days')), 0
+        )) WHERE id = 1
+    """)
+    cursor.execute(f"DELETE FROM tombstones WHERE created_at < datetime('now', '-{DIAS_RETENCAO_TOMBSTONES} days')")
+
+
+def criar_contadores_status(cursor):
+    """Contadores do painel (stats_counters) mantidos por triggers.
+
+    Escopos: pedidos por status, exceções e unidades de trabalho por status em
+    cada seção / ponto de retirada. Valem tanto para as transições feitas pelo
+    servidor quanto para as inserções do transform_data. Na criação e na
+    manutenção diária os contadores são recalculados por GROUP BY.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            scope TEXT NOT NULL,
+            scope_key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER DEFAULT 0 NOT NULL,
+            PRIMARY KEY (scope, scope_key, status)
+        )
+    """)
+
+    def somar(scope, chave, status, delta):
+        return (f"INSERT INTO stats_counters (scope, scope_key, status, count) VALUES ('{scope}', {chave}, {status}, {delta}) "
+                f"ON CONFLICT(scope, scope_key, status) DO UPDATE SET count = count + ({delta});")
+
+    def unidade(linha, delta):
+        return (somar('work_units_section', f"COALESCE({linha}.section, '')", f"{linha}.status", delta)
+                + somar('work_units_pickup', f"COALESCE(CAST({linha}.pickup_point AS TEXT), '')", f"{linha}.status", delta))
+
+    def pedido(linha, delta):
+        return somar('orders', "''", f"{linha}.status", delta)
+
+    def excecao(delta):
+        return somar('exceptions', "''", "'total'", delta)
+
+    gatilhos = {
+        "trg_stats_orders_ins": f"AFTER INSERT ON orders BEGIN {pedido('NEW', 1)} END",
+        "trg_stats_orders_del": f"AFTER DELETE ON orders BEGIN {pedido('OLD', -1)} END",
+        "trg_stats_orders_upd": (f"AFTER UPDATE OF status ON orders WHEN OLD.status IS NOT NEW.status "
+                                 f"BEGIN {pedido('OLD', -1)} {pedido('NEW', 1)} END"),
+        "trg_stats_exceptions_ins": f"AFTER INSERT ON exceptions BEGIN {excecao(1)} END",
+        "trg_stats_exceptions_del": f"AFTER DELETE ON exceptions BEGIN {excecao(-1)} END",
+        "trg_stats_work_units_ins": f"AFTER INSERT ON work_units BEGIN {unidade('NEW', 1)} END",
+        "trg_stats_work_units_del": f"AFTER DELETE ON work_units BEGIN {unidade('OLD', -1)} END",
+        "trg_stats_work_units_upd": (f"AFTER UPDATE OF status, section, pickup_point ON work_units "
+                                     f"WHEN OLD.status IS NOT NEW.status OR OLD.section IS NOT NEW.section OR OLD.pickup_point IS NOT NEW.pickup_point "
+                                     f"BEGIN {unidade('OLD', -1)} {unidade('NEW', 1)} END"),
+    }
+    for nome, corpo in gatilhos.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {corpo}")
+    reconciliar_contadores_status(cursor)
+
+
+def reconciliar_contadores_status(cursor):
+    """Recalcula stats_counters a partir das tabelas, corrigindo qualquer desvio."""
+    cursor.execute("DELETE FROM stats_counters")
+    cursor.execute("""
+        INSERT INTO stats_counters (scope, scope_key, status, count)
+        SELECT 'orders', '', status, COUNT(*) FROM orders GROUP BY status
+        UNION ALL
+        SELECT 'exceptions', '', 'total', COUNT(*) FROM exceptions
+        UNION ALL
+        SELECT 'work_units_section', COALESCE(section, ''), status, COUNT(*) FROM work_units GROUP BY 2, 3
+        UNION ALL
+        SELECT 'work_units_pickup', COALESCE(CAST(pickup_point AS TEXT), ''), status, COUNT(*) FROM work_units GROUP BY 2, 3
+    """)
+
+
+def manutencao_diaria():
+    """
+    Descarte de tombstones, reconciliação dos contadores e cura de
+    pickup_points de todos os pedidos (o sync só cura os com itens novos).
+    Rodava a cada inicialização; com as migrações versionadas fica no loop,
+    uma vez por dia.
+    """
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+    try:
+        cursor = conn.cursor()
+        descartar_tombstones(cursor)
+        reconciliar_contadores_status(cursor)
+        curar_pickup_points(cursor)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        log(f"Erro na manutenção diária: {e}")
+    finally:
+        conn.close()
 
 
 def gerar_sql_orcamentos() -> str:
@@ -719,8 +1074,8 @@ def sync_orcamentos(conn_db2, conn_sqlite: sqlite3.Connection):
                     TIPOENTREGA, NOMEVENDEDOR, TIPOENTREGA_DESCR, LOCALRETESTOQUE,
                     FLAGCANCELADO, IDCLIFOR, DESCLIENTE, DTMOVIMENTO,
                     IDRECEBIMENTO, DESCRRECEBIMENTO, FLAGPRENOTAPAGA,
-                    CODBARRAS, CODBARRAS_CAIXA
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    CODBARRAS, CODBARRAS_CAIXA, QTDMULTIPLA_CAIXA
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 chave,
                 int(row.get('IDEMPRESA', 0)),
@@ -750,7 +1105,8 @@ def sync_orcamentos(conn_db2, conn_sqlite: sqlite3.Connection):
                 row.get('DESCRRECEBIMENTO', ''),
                 row.get('FLAGPRENOTAPAGA', ''),
                 str(row.get('CODBARRAS', '') or ''),
-                str(row.get('CODBARRAS_CAIXA', '') or '')
+                str(row.get('CODBARRAS_CAIXA', '') or ''),
+                float(row.get('QTDMULTIPLA_CAIXA', 0) or 0)
             ))
             inseridos += 1
                 
@@ -839,6 +1195,223 @@ def apply_mapping(row: dict, mapping: list) -> dict:
     return result
 
 
+def normalizar_codigo_barras(valor) -> Optional[str]:
+    """Limpa código de barras vindo do cache (vazio/None -> None)."""
+    if valor is None:
+        return None
+    codigo = str(valor).strip()
+    if not codigo or codigo.upper() == 'NONE':
+        return None
+    return codigo
+
+
+# Divisor de QTDMULTIPLA (DBA.PRODUTO_GRADE_CODBARCX): tratada na mesma escala de
+# QTDPRODUTO (x1000). A escala não foi conferida contra o ERP; um valor que não
+# dá ao menos 1 unidade rejeita o código de caixa (ver coletar_codigos_barras).
+ESCALA_QTDMULTIPLA = 1000.0
+
+
+def coletar_codigos_barras(barcodes: dict, prod_uuid: str, unit_bc, box_bc, qtd_multipla_raw,
+                           rejeitados: Optional[dict] = None):
+    """
+    Registra os códigos de um produto no mapa code -> (product_id, kind, multiplier).
+    Caixa com multiplicador abaixo de 1 (ausente ou escala errada) não entra no
+    mapa: vai para rejeitados (code -> QTDMULTIPLA bruta) em vez de contar como
+    1 unidade.
+    """
+    unit_code = normalizar_codigo_barras(unit_bc)
+    box_code = normalizar_codigo_barras(box_bc)
+
+    if box_code and box_code != unit_code:
+        multiplier = float(qtd_multipla_raw or 0) / ESCALA_QTDMULTIPLA
+        if multiplier >= 1:
+            barcodes[box_code] = (prod_uuid, 'box', multiplier)
+        elif rejeitados is not None:
+            rejeitados[box_code] = qtd_multipla_raw
+
+    # Código unitário tem precedência se o mesmo código aparecer como caixa
+    if unit_code:
+        barcodes[unit_code] = (prod_uuid, 'unit', 1.0)
+
+
+class RegrasQtdManual:
+    """
+    Regras ativas de manual_qty_rules compiladas: códigos em set, palavras-chave
+    e fabricantes numa única regex cada. Mesma semântica do servidor
+    (server/manual-qty-matcher.ts): igualdade exata para códigos, "contém"
+    sem diferenciar maiúsculas para textos.
+    """
+
+    def __init__(self, regras):
+        self.codigos = set()
+        self.barras = set()
+        palavras = set()
+        fabricantes = set()
+        for rule_type, value in regras:
+            for val in (v.strip() for v in str(value or '').split(';')):
+                if not val:
+                    continue
+                if rule_type == 'product_code':
+                    self.codigos.add(val)
+                elif rule_type == 'barcode':
+                    self.barras.add(val)
+                elif rule_type == 'description_keyword':
+                    palavras.add(val.upper())
+                elif rule_type == 'manufacturer':
+                    fabricantes.add(val.upper())
+        self.palavras = self._compilar(palavras)
+        self.fabricantes = self._compilar(fabricantes)
+
+    @staticmethod
+    def _compilar(termos):
+        if not termos:
+            return None
+        return re.compile('|'.join(re.escape(t) for t in sorted(termos, key=len, reverse=True)))
+
+    def aplica(self, erp_code, barcode, box_barcode, name, manufacturer) -> bool:
+        if erp_code in self.codigos:
+            return True
+        if (barcode and barcode in self.barras) or (box_barcode and box_barcode in self.barras):
+            return True
+        if name and self.palavras and self.palavras.search(name.upper()):
+            return True
+        if manufacturer and self.fabricantes and self.fabricantes.search(manufacturer.upper()):
+            return True
+        return False
+
+
+# Chave em sync_state da assinatura das regras usadas na última atualização das flags
+CHAVE_ASSINATURA_QTD_MANUAL = "assinatura_regras_qtd_manual"
+
+
+def atualizar_flags_qtd_manual(cursor, produtos_ids) -> int:
+    """
+    Atualiza products.manual_qty. Com as regras inalteradas desde a última
+    execução (assinatura gravada no banco, vale entre processos), só os
+    produtos deste sync (novos ou com dados atualizados) são avaliados; se
+    mudaram, todos. Retorna quantos produtos tiveram a flag alterada.
+    """
+    cursor.execute("SELECT rule_type, value FROM manual_qty_rules WHERE active = 1")
+    regras = sorted((str(r[0]), str(r[1])) for r in cursor.fetchall())
+    assinatura = hashlib.sha1(json.dumps(regras).encode('utf-8')).hexdigest()
+    cursor.execute("SELECT value FROM sync_state WHERE key = ?", (CHAVE_ASSINATURA_QTD_MANUAL,))
+    gravada = cursor.fetchone()
+
+    colunas = "SELECT id, erp_code, barcode, box_barcode, name, manufacturer, manual_qty FROM products"
+    if gravada and gravada[0] == assinatura:
+        if not produtos_ids:
+            return 0
+        produtos = []
+        for i in range(0, len(produtos_ids), 500):
+            lote = produtos_ids[i:i + 500]
+            cursor.execute(f"{colunas} WHERE id IN ({','.join('?' * len(lote))})", lote)
+            produtos.extend(cursor.fetchall())
+    else:
+        cursor.execute(colunas)
+        produtos = cursor.fetchall()
+
+    matcher = RegrasQtdManual(regras)
+    alteracoes = []
+    for prod_id, erp_code, barcode, box_barcode, name, manufacturer, atual in produtos:
+        flag = 1 if matcher.aplica(erp_code, barcode, box_barcode, name, manufacturer) else 0
+        if flag != (atual or 0):
+            alteracoes.append((flag, prod_id))
+
+    if alteracoes:
+        cursor.executemany("UPDATE products SET manual_qty = ? WHERE id = ?", alteracoes)
+    cursor.execute("""
+        INSERT INTO sync_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (CHAVE_ASSINATURA_QTD_MANUAL, assinatura))
+    return len(alteracoes)
+
+
+# orders.pickup_points = pontos de retirada distintos dos itens do pedido
+SQL_CURAR_PICKUP_POINTS = """
+    UPDATE orders SET pickup_points = pontos.lista
+    FROM (
+        SELECT order_id, json_group_array(DISTINCT pickup_point) AS lista
+        FROM (SELECT order_id, pickup_point FROM order_items
+              WHERE pickup_point IS NOT NULL {filtro}
+              ORDER BY order_id, pickup_point)
+        GROUP BY order_id
+    ) AS pontos
+    WHERE orders.id = pontos.order_id
+      AND orders.pickup_points IS NOT pontos.lista
+"""
+
+
+# Códigos de barras do cache (mesma limpeza de normalizar_codigo_barras) aplicados
+# aos produtos cujo valor difere
+SQL_CODIGOS_BARRAS_PRODUTOS = """
+    UPDATE products SET barcode = cache.barcode, box_barcode = cache.box_barcode
+    FROM (
+        SELECT IDPRODUTO AS erp_code,
+               MAX(CASE WHEN UPPER(TRIM(CODBARRAS)) IN ('', 'NONE') THEN NULL ELSE TRIM(CODBARRAS) END) AS barcode,
+               MAX(CASE WHEN UPPER(TRIM(CODBARRAS_CAIXA)) IN ('', 'NONE') THEN NULL ELSE TRIM(CODBARRAS_CAIXA) END) AS box_barcode
+        FROM cache_orcamentos
+        WHERE 1 = 1 {filtro}
+        GROUP BY IDPRODUTO
+        HAVING barcode IS NOT NULL OR box_barcode IS NOT NULL
+    ) AS cache
+    WHERE products.erp_code = cache.erp_code
+      AND (products.barcode IS NOT cache.barcode OR products.box_barcode IS NOT cache.box_barcode)
+"""
+
+
+def remover_codigos_barras_retirados(cursor, barcodes: dict, produtos_ids) -> int:
+    """
+    Apaga de product_barcodes os códigos dos produtos deste sync que não vieram
+    mais do ERP (nem foram aceitos em barcodes). Retorna quantos foram apagados.
+    """
+    ids = sorted(produtos_ids)
+    retirados = []
+    for i in range(0, len(ids), 500):
+        lote = ids[i:i + 500]
+        cursor.execute(f"SELECT code, product_id FROM product_barcodes WHERE product_id IN ({','.join('?' * len(lote))})", lote)
+        retirados.extend((code,) for code, prod_id in cursor.fetchall()
+                         if barcodes.get(code, (None,))[0] != prod_id)
+    if retirados:
+        cursor.executemany("DELETE FROM product_barcodes WHERE code = ?", retirados)
+    return len(retirados)
+
+
+def atualizar_codigos_barras_produtos(cursor, erp_codes=None) -> int:
+    """
+    Copia CODBARRAS/CODBARRAS_CAIXA do cache para products num UPDATE ... FROM
+    por lote, só nos produtos com código diferente. Sem erp_codes, todos.
+    Retorna quantos produtos foram alterados.
+    """
+    if erp_codes is None:
+        cursor.execute(SQL_CODIGOS_BARRAS_PRODUTOS.format(filtro=""))
+        return cursor.rowcount
+
+    alterados = 0
+    for i in range(0, len(erp_codes), 500):
+        lote = erp_codes[i:i + 500]
+        cursor.execute(SQL_CODIGOS_BARRAS_PRODUTOS.format(filtro=f"AND IDPRODUTO IN ({','.join('?' * len(lote))})"), lote)
+        alterados += cursor.rowcount
+    return alterados
+
+
+def curar_pickup_points(cursor, order_ids=None) -> int:
+    """
+    Recalcula orders.pickup_points a partir dos itens, num UPDATE ... FROM
+    por lote (sem SELECT/UPDATE por pedido). Sem order_ids, todos os pedidos.
+    Retorna quantos pedidos foram alterados.
+    """
+    if order_ids is None:
+        cursor.execute(SQL_CURAR_PICKUP_POINTS.format(filtro=""))
+        return cursor.rowcount
+
+    alterados = 0
+    for i in range(0, len(order_ids), 500):
+        lote = order_ids[i:i + 500]
+        cursor.execute(SQL_CURAR_PICKUP_POINTS.format(filtro=f"AND order_id IN ({','.join('?' * len(lote))})"), lote)
+        alterados += cursor.rowcount
+    return alterados
+
+
 def transform_data(conn_sqlite: sqlite3.Connection):
     """
     Transforma dados brutos de cache_orcamentos em orders/products/work_units
@@ -872,8 +1445,12 @@ def transform_data(conn_sqlite: sqlite3.Connection):
     cursor.execute("SELECT erp_order_id, id FROM orders")
     existing_orders = {r[0]: r[1] for r in cursor.fetchall()}
     
-    cursor.execute("SELECT erp_code, id FROM products")
-    existing_products = {r[0]: r[1] for r in cursor.fetchall()}
+    cursor.execute("SELECT erp_code, id, barcode, box_barcode FROM products")
+    existing_products = {}
+    codigos_gravados = {} # erp_code -> (barcode, box_barcode) já em products
+    for erp_code, prod_id, barcode, box_barcode in cursor.fetchall():
+        existing_products[erp_code] = prod_id
+        codigos_gravados[erp_code] = (barcode, box_barcode)
     
     # For items, we need to know if (order_id, product_id) exists.
     # We map (order_uuid, product_uuid) -> item_id
@@ -897,6 +1474,10 @@ def transform_data(conn_sqlite: sqlite3.Connection):
     unique_pickup_points = set()
     unique_sections = set()
     new_work_units = []
+    product_barcodes = {} # code -> (product_id, kind, multiplier)
+    caixas_rejeitadas = {} # code -> QTDMULTIPLA bruta (multiplicador < 1)
+    produtos_ids_vistos = set()
+    produtos_codigos_alterados = set() # erp_code com código no cache diferente do gravado
     
     # Helper Data Structures for this Batch
     # erp_code -> uuid (for things created in this batch)
@@ -978,7 +1559,8 @@ def transform_data(conn_sqlite: sqlite3.Connection):
         else:
             fin_status = 'pendente'
 
-        # Prepare pickup_points JSON
+        # pickup_points do cabeçalho só na inserção; depois curar_pickup_points
+        # mantém a lista a partir dos itens
         pickup_point_val = data.get('pickup_point')
         pickup_points_json = json.dumps([pickup_point_val]) if pickup_point_val else '[]'
 
@@ -1023,6 +1605,12 @@ def transform_data(conn_sqlite: sqlite3.Connection):
                             mapped_prod.get('price')
                         ))
                         batch_products_map[erp_prod_code] = prod_uuid
+
+                coletar_codigos_barras(
+                    product_barcodes, prod_uuid,
+                    mapped_prod.get('barcode'), mapped_prod.get('box_barcode'),
+                    item.get('QTDMULTIPLA_CAIXA'), caixas_rejeitadas
+                )
             else:
                 # Legacy hardcoded mapping
                 erp_prod_code = str(item.get('IDPRODUTO'))
@@ -1046,7 +1634,22 @@ def transform_data(conn_sqlite: sqlite3.Connection):
                             item.get('VALUNITBRUTO')
                         ))
                         batch_products_map[erp_prod_code] = prod_uuid
+
+                coletar_codigos_barras(
+                    product_barcodes, prod_uuid,
+                    item.get('CODBARRAS'), item.get('CODBARRAS_CAIXA'),
+                    item.get('QTDMULTIPLA_CAIXA'), caixas_rejeitadas
+                )
             
+            produtos_ids_vistos.add(prod_uuid)
+
+            # Produto novo ou com CODBARRAS/CODBARRAS_CAIXA diferente de products:
+            # só esses passam por atualizar_codigos_barras_produtos
+            codigos_cache = (normalizar_codigo_barras(item.get('CODBARRAS')),
+                             normalizar_codigo_barras(item.get('CODBARRAS_CAIXA')))
+            if codigos_cache != codigos_gravados.get(erp_prod_code):
+                produtos_codigos_alterados.add(erp_prod_code)
+
             # Determine Pickup Point & Section
             if items_mapping:
                 mapped_item_data = apply_mapping(item, items_mapping)
@@ -1130,8 +1733,12 @@ def transform_data(conn_sqlite: sqlite3.Connection):
                     financial_status = excluded.financial_status,
                     total_value = excluded.total_value,
                     customer_name = excluded.customer_name,
-                    pickup_points = excluded.pickup_points,
                     updated_at = CURRENT_TIMESTAMP
+                -- Sem mudança, sem UPDATE: o trigger de versão não gasta row_version e a
+                -- lista incremental (?since=) não devolve o pedido de novo
+                WHERE orders.financial_status IS NOT excluded.financial_status
+                   OR orders.total_value IS NOT excluded.total_value
+                   OR orders.customer_name IS NOT excluded.customer_name
             """, upsert_orders)
             
         if new_items:
@@ -1149,10 +1756,39 @@ def transform_data(conn_sqlite: sqlite3.Connection):
                 VALUES (?, ?, 'pendente', 'separacao', ?, ?)
             """, new_work_units)
 
+        if product_barcodes:
+            cursor.executemany("""
+                INSERT INTO product_barcodes (code, product_id, kind, multiplier)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET
+                    product_id = excluded.product_id,
+                    kind = excluded.kind,
+                    multiplier = excluded.multiplier
+                WHERE product_id IS NOT excluded.product_id
+                   OR kind IS NOT excluded.kind
+                   OR multiplier IS NOT excluded.multiplier
+            """, [(code, pid, kind, mult) for code, (pid, kind, mult) in product_barcodes.items()])
+
+        codigos_retirados = remover_codigos_barras_retirados(cursor, product_barcodes, produtos_ids_vistos)
+        if caixas_rejeitadas:
+            exemplos = ", ".join(f"{code} (QTDMULTIPLA={bruto})" for code, bruto in list(caixas_rejeitadas.items())[:5])
+            log(f"Aviso: {len(caixas_rejeitadas)} códigos de caixa rejeitados, multiplicador < 1 com escala "
+                f"{ESCALA_QTDMULTIPLA:g}: {exemplos}")
+
+        # pickup_points só muda com itens novos; a cura completa fica na manutenção diária
+        pedidos_curados = curar_pickup_points(cursor, sorted({i[1] for i in new_items}))
+
+        # Produtos já existentes não passam pelo INSERT: códigos de barras vêm do cache
+        produtos_codigos_barras = atualizar_codigos_barras_produtos(cursor, sorted(produtos_codigos_alterados))
+
+        # Depois dos códigos de barras: produtos novos e os deste sync com dados alterados
+        flags_qtd_manual = atualizar_flags_qtd_manual(cursor, sorted(produtos_ids_vistos))
+
         conn_sqlite.commit()
         
         # Log Summary
-        log(f"Transformação | pedidos_processados={len(orders_map)} | pedidos_upsert={len(upsert_orders)} | novos_itens={len(new_items)}")
+        log(f"Transformação | pedidos_processados={len(orders_map)} | pedidos_upsert={len(upsert_orders)} | novos_itens={len(new_items)} | codigos_barras={len(product_barcodes)} | codigos_retirados={codigos_retirados} | caixas_rejeitadas={len(caixas_rejeitadas)} | qtd_manual={flags_qtd_manual} | pontos_retirada={pedidos_curados} | produtos_codigos_barras={produtos_codigos_barras}")
+        registrar_metricas(codigos_barras_produtos={"verificados": len(produtos_codigos_alterados), "atualizados": produtos_codigos_barras})
         
     except Exception as e:
         log(f"Erro no Bulk Insert: {e}")
@@ -1254,6 +1890,209 @@ def sync_tubos_conexoes(conn_db2, conn_sqlite: sqlite3.Connection):
     log(f"  {inseridos} registros salvos em cache_tubos_conexoes")
 
 
+# === ARQUIVAMENTO ===
+# Pedidos finalizados há mais de N dias (e seus filhos) saem do database.db para
+# archive_YYYYMM.db (mês de criação do pedido), na mesma pasta. O mínimo fica
+# acima da janela do cache_orcamentos para o transform não recriar o pedido.
+DIAS_MINIMOS_ARQUIVO = 32
+
+
+def caminho_arquivo_mes(mes: str) -> str:
+    return os.path.join(os.path.dirname(DATABASE_PATH), f"archive_{mes}.db")
+
+
+def copiar_para_arquivo(cursor, tabela: str, filtro: str) -> int:
+    """Copia as linhas de main.<tabela> que atendem o filtro para arq.<tabela>.
+
+    A tabela do arquivo é criada com as colunas atuais e ganha as colunas novas
+    quando o schema principal evolui. Linhas com o mesmo id são substituídas
+    (reexecução após falha não duplica).
+    """
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS arq.{tabela} AS SELECT * FROM main.{tabela} WHERE 0")
+    cursor.execute(f"PRAGMA main.table_info({tabela})")
+    colunas = [(info[1], info[2]) for info in cursor.fetchall()]
+    cursor.execute(f"PRAGMA arq.table_info({tabela})")
+    existentes = {info[1] for info in cursor.fetchall()}
+    for nome, tipo in colunas:
+        if nome not in existentes:
+            cursor.execute(f"ALTER TABLE arq.{tabela} ADD COLUMN {nome} {tipo}")
+
+    lista = ", ".join(nome for nome, _ in colunas)
+    cursor.execute(f"DELETE FROM arq.{tabela} WHERE id IN (SELECT id FROM main.{tabela} WHERE {filtro})")
+    cursor.execute(f"INSERT INTO arq.{tabela} ({lista}) SELECT {lista} FROM main.{tabela} WHERE {filtro}")
+    return cursor.rowcount
+
+
+def arquivar_pedidos(dias: int) -> int:
+    """Move pedidos finalizados há mais de `dias` dias (itens, unidades, exceções)
+    e os audit_logs anteriores ao limite para os arquivos mensais. Retorna o
+    número de pedidos arquivados."""
+    dias = max(dias, DIAS_MINIMOS_ARQUIVO)
+    limite = (datetime.now() - timedelta(days=dias)).strftime('%Y-%m-%d')
+    mes_sql = "substr(created_at, 1, 4) || substr(created_at, 6, 2)"
+
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+    cursor = conn.cursor()
+    total_pedidos = 0
+    arquivos = []
+    try:
+        cursor.execute(f"SELECT id, erp_order_id, {mes_sql} FROM orders WHERE status = 'finalizado' AND updated_at < ?", (limite,))
+        pedidos_por_mes = {}
+        for pedido_id, erp_order_id, mes in cursor.fetchall():
+            pedidos_por_mes.setdefault(mes, []).append((pedido_id, erp_order_id))
+        cursor.execute(f"SELECT DISTINCT {mes_sql} FROM audit_logs WHERE created_at < ?", (limite,))
+        meses = sorted(set(pedidos_por_mes) | {r[0] for r in cursor.fetchall()})
+
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS arquivo_pedidos_ids (id TEXT PRIMARY KEY)")
+        dos_pedidos = "IN (SELECT id FROM temp.arquivo_pedidos_ids)"
+
+        for mes in meses:
+            if not re.fullmatch(r"\d{6}", mes or ""):
+                continue
+            pedidos = pedidos_por_mes.get(mes, [])
+            cursor.execute("ATTACH DATABASE ? AS arq", (caminho_arquivo_mes(mes),))
+            try:
+                cursor.execute("DELETE FROM temp.arquivo_pedidos_ids")
+                cursor.executemany("INSERT INTO temp.arquivo_pedidos_ids (id) VALUES (?)", [(p[0],) for p in pedidos])
+
+                filtros = {
+                    "orders": f"id {dos_pedidos}",
+                    "order_items": f"order_id {dos_pedidos}",
+                    "work_units": f"order_id {dos_pedidos}",
+                    "exceptions": f"order_item_id IN (SELECT id FROM main.order_items WHERE order_id {dos_pedidos})",
+                    "audit_logs": f"created_at < '{limite}' AND {mes_sql} = '{mes}'",
+                }
+                for tabela, filtro in filtros.items():
+                    copiar_para_arquivo(cursor, tabela, filtro)
+
+                # Remoção no banco principal: filhos antes dos pais
+                cursor.execute(f"DELETE FROM main.exceptions WHERE {filtros['exceptions']}")
+                cursor.execute(f"DELETE FROM main.scan_receipts WHERE work_unit_id IN (SELECT id FROM main.work_units WHERE order_id {dos_pedidos})")
+                cursor.execute(f"DELETE FROM main.picking_sessions WHERE order_id {dos_pedidos}")
+                for tabela in ("work_units", "order_items", "orders", "audit_logs"):
+                    cursor.execute(f"DELETE FROM main.{tabela} WHERE {filtros[tabela]}")
+                # Linhas do ERP já fora da janela; sem elas o transform não recria o pedido
+                cursor.executemany("DELETE FROM main.cache_orcamentos WHERE IDORCAMENTO = ?",
+                                   [(p[1],) for p in pedidos if str(p[1]).isdigit()])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute("DETACH DATABASE arq")
+
+            total_pedidos += len(pedidos)
+            arquivos.append(os.path.basename(caminho_arquivo_mes(mes)))
+
+        log(f"Arquivamento | limite={limite} | pedidos={total_pedidos} | arquivos={','.join(arquivos) or '-'}")
+        return total_pedidos
+    except Exception as e:
+        log(f"Erro no arquivamento: {e}")
+        return 0
+    finally:
+        conn.close()
+
+
+# === WAL ===
+# Checkpoint PASSIVE depois de cada sync (não espera leitores) e TRUNCATE no meio
+# do intervalo ocioso, zerando o -wal. Se o WAL passar dos limites, o TRUNCATE é
+# antecipado. Tamanho e atraso vão para sync_metrics.json (lido em /api/stats/sync).
+WAL_LIMITE_MB = 64
+WAL_LIMITE_ATRASO_PAGINAS = 16000
+INTERVALO_MONITOR_WAL = 30
+
+_metricas: Dict[str, Any] = {}
+
+
+def caminho_metricas() -> str:
+    return os.path.join(os.path.dirname(DATABASE_PATH), "sync_metrics.json")
+
+
+def registrar_metricas(**valores):
+    """Atualiza sync_metrics.json (escrita atômica: temporário + rename)."""
+    _metricas.update(valores)
+    _metricas["atualizado_em"] = datetime.now().isoformat(timespec="seconds")
+    destino = caminho_metricas()
+    temporario = destino + ".tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(_metricas, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, destino)
+    except OSError as e:
+        log(f"Aviso: não foi possível gravar métricas: {e}")
+
+
+def tamanho_wal_mb() -> float:
+    try:
+        return os.path.getsize(DATABASE_PATH + "-wal") / (1024 * 1024)
+    except OSError:
+        return 0.0
+
+
+def checkpoint_wal(modo: str = "PASSIVE") -> Dict[str, Any]:
+    """Executa PRAGMA wal_checkpoint(modo) e registra tamanho do WAL e atraso
+    (páginas no WAL ainda não copiadas para o banco)."""
+    inicio = time.time()
+    conn = sqlite3.connect(DATABASE_PATH, timeout=5)
+    try:
+        conn.execute("PRAGMA busy_timeout = 2000")
+        ocupado, paginas_wal, paginas_copiadas = conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+    finally:
+        conn.close()
+
+    # -1/-1: banco fora do modo WAL
+    atraso = max(paginas_wal - paginas_copiadas, 0) if paginas_wal >= 0 else 0
+    resultado = {
+        "modo": modo,
+        "ocupado": bool(ocupado),
+        "paginas_wal": max(paginas_wal, 0),
+        "atraso_paginas": atraso,
+        "wal_mb": round(tamanho_wal_mb(), 2),
+        "duracao_ms": round((time.time() - inicio) * 1000),
+        "em": datetime.now().isoformat(timespec="seconds"),
+    }
+    campos = {"wal_mb": resultado["wal_mb"], "atraso_paginas": atraso, "ultimo_checkpoint": resultado}
+    if modo == "TRUNCATE" and not ocupado:
+        campos["ultimo_truncate"] = resultado["em"]
+    registrar_metricas(**campos)
+    return resultado
+
+
+def wal_acima_do_limite(resultado: Dict[str, Any]) -> bool:
+    return resultado["wal_mb"] > WAL_LIMITE_MB or resultado["atraso_paginas"] > WAL_LIMITE_ATRASO_PAGINAS
+
+
+def manter_wal(modo: str = "PASSIVE"):
+    """Checkpoint no modo pedido; passando dos limites, força um TRUNCATE."""
+    try:
+        resultado = checkpoint_wal(modo)
+        if modo != "TRUNCATE" and wal_acima_do_limite(resultado):
+            log(f"WAL acima do limite | wal={resultado['wal_mb']}MB | atraso={resultado['atraso_paginas']} páginas | checkpoint antecipado")
+            resultado = checkpoint_wal("TRUNCATE")
+        if resultado["modo"] == "TRUNCATE":
+            status = "ocupado" if resultado["ocupado"] else "ok"
+            log(f"Checkpoint WAL | modo=TRUNCATE | {status} | wal={resultado['wal_mb']}MB | {resultado['duracao_ms']}ms")
+    except Exception as e:
+        log(f"Erro no checkpoint WAL: {e}")
+
+
+def aguardar_proximo_sync(intervalo: int):
+    """Dorme até o próximo sync monitorando o WAL a cada INTERVALO_MONITOR_WAL
+    segundos; na metade do intervalo (período ocioso) roda o TRUNCATE."""
+    inicio = time.time()
+    truncado = False
+    while True:
+        restante = intervalo - (time.time() - inicio)
+        if restante <= 0:
+            return
+        time.sleep(min(INTERVALO_MONITOR_WAL, restante))
+        if not truncado and time.time() - inicio >= intervalo / 2:
+            manter_wal("TRUNCATE")
+            truncado = True
+        else:
+            manter_wal("PASSIVE")
+
+
 def sincronizar(data_inicial: Optional[str] = None) -> bool:
     """Fluxo principal de sincronização."""
     inicio = time.time()
@@ -1285,6 +2124,8 @@ def sincronizar(data_inicial: Optional[str] = None) -> bool:
         duracao = time.time() - inicio
         duracao = time.time() - inicio
         # log(f"Sync concluído | duração={duracao:.2f}s")
+        registrar_metricas(ultimo_sync={"em": datetime.now().isoformat(timespec="seconds"), "duracao_s": round(duracao, 2)})
+        manter_wal("PASSIVE")
         
         return True
         
@@ -1345,7 +2186,7 @@ def iniciar_servidor():
 def loop_sync(intervalo: int, data_inicial: Optional[str] = None):
     """Executa sync em loop (para rodar em thread separada)."""
     while True:
-        time.sleep(intervalo)
+        aguardar_proximo_sync(intervalo)
         log(f"Sincronização incremental automática...")
         sincronizar(data_inicial=None)  # Incremental após a primeira
         log(f"Próxima sync em {intervalo} segundos ({intervalo//60} min)")
@@ -1369,6 +2210,9 @@ Exemplos:
                         help="Inicia o servidor web após sync")
     parser.add_argument("--quiet", action="store_true",
                         help="Suprime logs no stdout")
+    parser.add_argument("--arquivar", type=int, metavar="DIAS",
+                        help=f"Arquiva pedidos finalizados há mais de DIAS dias (mín. {DIAS_MINIMOS_ARQUIVO}); "
+                             "com --loop/--serve roda uma vez por dia")
     
     args = parser.parse_args()
 
@@ -1381,16 +2225,30 @@ Exemplos:
     if not QUIET:
         log(f"Sync iniciado | modo={modo_str} | SO={platform.system()}")
 
-    # Garantir que tabelas existam
-    inicializar_sqlite()
+    # Garantir que tabelas existam. Sem o schema migrado o sync gravaria em
+    # tabelas/colunas que não existem: melhor parar com o erro acima.
+    if not inicializar_sqlite():
+        log("Sync abortado: schema do SQLite não foi migrado")
+        sys.exit(1)
     
     # Passar args para sincronizar
     sucesso = sincronizar(data_inicial=args.desde)
+
+    ultimo_arquivamento = None
+    if args.arquivar:
+        arquivar_pedidos(args.arquivar)
+        ultimo_arquivamento = datetime.now().date()
     
     # 2. Configurar Loop (Thread se Serve, Main se Loop-Only)
     should_loop = args.loop is not None or args.serve
     intervalo = args.loop if args.loop else 300
 
+    # Execuções avulsas (/api/sync) não fazem manutenção: só o processo do loop
+    ultima_manutencao = None
+    if should_loop:
+        manutencao_diaria()
+        ultima_manutencao = datetime.now().date()
+
     if should_loop:
         if args.loop or args.serve:
              # Se foi explicito o loop ou tem server (que implica loop default), avisa
@@ -1404,9 +2262,16 @@ Exemplos:
                  log(f"Modo Loop ativado: {intervalo} segundos")
         
         def loop_sync_internal(): 
+            nonlocal ultimo_arquivamento, ultima_manutencao
             while True:
-                time.sleep(intervalo)
+                aguardar_proximo_sync(intervalo)
                 sincronizar()
+                if args.arquivar and ultimo_arquivamento != datetime.now().date():
+                    arquivar_pedidos(args.arquivar)
+                    ultimo_arquivamento = datetime.now().date()
+                if ultima_manutencao != datetime.now().date():
+                    manutencao_diaria()
+                    ultima_manutencao = datetime.now().date()
         
         if args.serve:
             # Thread para o loop, Main para o servidor
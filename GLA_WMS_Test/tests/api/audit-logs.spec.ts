@@ -0,0 +1,28 @@
+import { test, expect } from '@playwright/test';
+
+test.describe('Audit logs API', () => {
+
+    test.beforeEach(async ({ request }) => {
+        const login = await request.post('/api/auth/login', {
+            data: { username: 'admin', password: '1234' }
+        });
+        expect(login.ok()).toBeTruthy();
+    });
+
+    test('period includes the login just made, newest first', async ({ request }) => {
+        const today = new Date().toISOString().slice(0, 10);
+        const res = await request.get(`/api/audit-logs?from=${today}&to=${today}`);
+        expect(res.ok()).toBeTruthy();
+        const logs = await res.json();
+        expect(logs.length).toBeGreaterThan(0);
+        for (let i = 1; i < logs.length; i++) {
+            expect(logs[i - 1].createdAt >= logs[i].createdAt).toBeTruthy();
+        }
+    });
+
+    test('invalid period is rejected', async ({ request }) => {
+        const res = await request.get('/api/audit-logs?from=2026-13-01&to=2026-01-01');
+        expect(res.status()).toBe(400);
+    });
+
+});
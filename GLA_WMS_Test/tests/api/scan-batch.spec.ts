@@ -0,0 +1,98 @@
+import { test, expect, type APIRequestContext } from '@playwright/test';
+
+// Any picking unit with an item that still takes `room` more units
+async function findPendingItem(request: APIRequestContext, room = 1) {
+    const listRes = await request.get('/api/work-units?type=separacao');
+    expect(listRes.ok()).toBeTruthy();
+    for (const unit of await listRes.json()) {
+        const item = unit.items.find((i: any) =>
+            i.product?.barcode && Number(i.separatedQty) + room <= Number(i.quantity) - Number(i.exceptionQty || 0));
+        if (item) {
+            return { unitId: unit.id as string, itemId: item.id as string, barcode: item.product.barcode as string, separatedQty: Number(item.separatedQty) };
+        }
+    }
+    return undefined;
+}
+
+async function separatedQtyOf(request: APIRequestContext, unitId: string, itemId: string) {
+    const res = await request.get('/api/work-units?type=separacao');
+    const unit = (await res.json()).find((u: any) => u.id === unitId);
+    return Number(unit.items.find((i: any) => i.id === itemId).separatedQty);
+}
+
+test.describe('Scan batch API', () => {
+    // The tests below change the same unit
+    test.describe.configure({ mode: 'serial' });
+
+    test.beforeEach(async ({ request }) => {
+        const login = await request.post('/api/auth/login', {
+            data: { username: 'admin', password: '1234' }
+        });
+        expect(login.ok()).toBeTruthy();
+    });
+
+    test('replayed batch is not applied twice', async ({ request }) => {
+        const target = await findPendingItem(request);
+        test.skip(!target, 'No picking unit with a pending item in this database');
+
+        const { unitId, itemId, barcode, separatedQty } = target!;
+        const batch = { clientId: `spec-${Date.now()}`, scans: [{ seq: 1, barcode, quantity: 1 }] };
+
+        const first = await request.post(`/api/work-units/${unitId}/scan-batch`, { data: batch });
+        expect(first.ok()).toBeTruthy();
+        const firstBody = await first.json();
+        expect(firstBody.results[0].separatedQty).toBe(separatedQty + 1);
+
+        // Same device, same seq: answered from the receipt
+        const replay = await request.post(`/api/work-units/${unitId}/scan-batch`, { data: batch });
+        expect(replay.ok()).toBeTruthy();
+        const replayBody = await replay.json();
+        expect(replayBody.results[0].duplicate).toBe(true);
+        expect(replayBody.results[0].separatedQty).toBe(separatedQty + 1);
+        expect(replayBody.items).toEqual([]);
+
+        expect(await separatedQtyOf(request, unitId, itemId)).toBe(separatedQty + 1);
+    });
+
+    test('receipts of one device do not answer another', async ({ request }) => {
+        const target = await findPendingItem(request, 2);
+        test.skip(!target, 'No picking unit with an item two units short in this database');
+
+        const { unitId, itemId, barcode, separatedQty } = target!;
+        const scans = [{ seq: 1, barcode, quantity: 1 }];
+        await request.post(`/api/work-units/${unitId}/scan-batch`, { data: { clientId: `spec-a-${Date.now()}`, scans } });
+        const other = await request.post(`/api/work-units/${unitId}/scan-batch`, { data: { clientId: `spec-b-${Date.now()}`, scans } });
+        expect(other.ok()).toBeTruthy();
+        const body = await other.json();
+        expect(body.results[0].duplicate).toBeUndefined();
+        expect(body.results[0].status).toBe('success');
+        expect(await separatedQtyOf(request, unitId, itemId)).toBe(separatedQty + 2);
+    });
+
+    test('reset clears the receipts of the unit', async ({ request }) => {
+        const target = await findPendingItem(request);
+        test.skip(!target, 'No picking unit with a pending item in this database');
+
+        const { unitId, itemId, barcode } = target!;
+        const batch = { clientId: `spec-${Date.now()}`, scans: [{ seq: 1, barcode, quantity: 1 }] };
+        await request.post(`/api/work-units/${unitId}/scan-batch`, { data: batch });
+
+        const reset = await request.post('/api/work-units/unlock', { data: { workUnitIds: [unitId], reset: true } });
+        expect(reset.ok()).toBeTruthy();
+
+        // After the reset the same seq is a new scan
+        const again = await request.post(`/api/work-units/${unitId}/scan-batch`, { data: batch });
+        const body = await again.json();
+        expect(body.results[0].duplicate).toBeUndefined();
+        expect(body.results[0].separatedQty).toBe(1);
+        expect(await separatedQtyOf(request, unitId, itemId)).toBe(1);
+    });
+
+    test('batch without a device id is rejected', async ({ request }) => {
+        const res = await request.post('/api/work-units/any/scan-batch', {
+            data: { scans: [{ seq: 1, barcode: '789' }] }
+        });
+        expect(res.status()).toBe(400);
+    });
+
+});
@@ -0,0 +1,118 @@
+"""
+Tests for the per-pack result cache of .agent/scripts/audit_scanner.py
+(<project>/.audit-cache/<pack>.json).
+
+    python -m unittest discover tests/python
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, '.agent', 'scripts'))
+
+import audit_scanner  # noqa: E402
+from audit_scanner import CACHE_DIR_NAME, RulePack, Scanner  # noqa: E402
+
+
+class TodoPack(RulePack):
+    """Counts TODO markers per file; records which files were really analyzed."""
+    name = "todo_test"
+    extensions = frozenset({'.py'})
+    cacheable = True
+
+    def __init__(self, project_path=".") -> None:
+        super().__init__(project_path)
+        self.analyzed = []
+        self.counts = {}
+
+    def analyze(self, file):
+        self.analyzed.append(file.rel.as_posix())
+        return file.text.count("TODO")
+
+    def merge(self, file, findings):
+        self.counts[file.rel.as_posix()] = findings
+
+    def report(self) -> int:
+        return 0
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.write("a.py", "# TODO one\n")
+        self.write("b.py", "# TODO one\n# TODO two\n")
+
+    def write(self, name, text, age=60):
+        path = self.root / name
+        path.write_text(text, encoding='utf-8')
+        # Clearly older than the next run, whatever the filesystem's timestamp granularity
+        past = time.time() - age
+        os.utime(path, (past, past))
+        return path
+
+    def scan(self, pack=None):
+        pack = pack or TodoPack(self.root)
+        Scanner(self.root, [pack], jobs=1).run()
+        return pack
+
+    def test_first_run_misses_and_writes_the_cache(self):
+        pack = self.scan()
+        self.assertEqual(sorted(pack.analyzed), ["a.py", "b.py"])
+        self.assertEqual(pack.cache.stats(), {"hits": 0, "misses": 2})
+        data = json.loads((self.root / CACHE_DIR_NAME / "todo_test.json").read_text(encoding='utf-8'))
+        self.assertEqual(sorted(data["files"]), ["a.py", "b.py"])
+
+    def test_unchanged_files_are_served_from_the_cache(self):
+        self.scan()
+        pack = self.scan()
+        self.assertEqual(pack.analyzed, [])
+        self.assertEqual(pack.cache.stats(), {"hits": 2, "misses": 0})
+        self.assertEqual(pack.counts, {"a.py": 1, "b.py": 2})
+
+    def test_edited_file_is_analyzed_again(self):
+        self.scan()
+        self.write("a.py", "# TODO one\n# TODO two\n# TODO three\n", age=30)
+        pack = self.scan()
+        self.assertEqual(pack.analyzed, ["a.py"])
+        self.assertEqual(pack.counts["a.py"], 3)
+        self.assertEqual(pack.cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_touched_file_with_same_content_is_a_hit(self):
+        self.scan()
+        self.write("b.py", "# TODO one\n# TODO two\n", age=30)
+        pack = self.scan()
+        self.assertEqual(pack.analyzed, [])
+        self.assertEqual(pack.cache.stats(), {"hits": 2, "misses": 0})
+
+    def test_new_rules_version_drops_the_cache(self):
+        self.scan()
+        pack = TodoPack(self.root)
+        pack.version = "2"
+        self.scan(pack)
+        self.assertEqual(sorted(pack.analyzed), ["a.py", "b.py"])
+
+    def test_deleted_file_leaves_the_cache(self):
+        self.scan()
+        (self.root / "b.py").unlink()
+        self.scan()
+        data = json.loads((self.root / CACHE_DIR_NAME / "todo_test.json").read_text(encoding='utf-8'))
+        self.assertEqual(list(data["files"]), ["a.py"])
+
+    def test_no_cache_analyzes_everything(self):
+        self.scan()
+        pack = TodoPack(self.root)
+        Scanner(self.root, [pack], cache=False, jobs=1).run()
+        self.assertEqual(sorted(pack.analyzed), ["a.py", "b.py"])
+        self.assertIsNone(pack.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+"""
+Tests for sync_db2.py without an ERP: the DB2 query is replaced by fixed
+cache rows and everything runs against a temporary SQLite file.
+
+    python -m unittest discover tests/python
+"""
+
+import io
+import os
+import sys
+import types
+import sqlite3
+import tempfile
+import unittest
+import contextlib
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+# The ODBC driver is only needed to reach the ERP, which these tests never do
+try:
+    import pyodbc  # noqa: F401
+except ImportError:
+    sys.modules['pyodbc'] = types.ModuleType('pyodbc')
+
+import sync_db2  # noqa: E402
+
+
+def cache_row(order, product, seq=1, pickup_point=1, barcode='7890000000001', box_barcode='', box_qty=0):
+    return dict(
+        IDEMPRESA=3, IDORCAMENTO=order, IDPRODUTO=product, IDSUBPRODUTO=product, NUMSEQUENCIA=seq,
+        QTDPRODUTO=2000, UNIDADE='UN', FABRICANTE='ACME', VALUNITBRUTO=100, VALTOTLIQUIDO=1000,
+        DESCRRESPRODUTO=f'PRODUTO {product}', IDVENDEDOR=1, IDLOCALRETIRADA=pickup_point, IDSECAO=1,
+        DESCRSECAO='SECAO', TIPOENTREGA='I', NOMEVENDEDOR='VENDEDOR', TIPOENTREGA_DESCR='',
+        LOCALRETESTOQUE='LOC', FLAGCANCELADO='F', IDCLIFOR=5, DESCLIENTE='CLIENTE',
+        DTMOVIMENTO=datetime.now().strftime('%Y-%m-%d 08:00:00'), IDRECEBIMENTO='', DESCRRECEBIMENTO='',
+        FLAGPRENOTAPAGA='F', CODBARRAS=barcode, CODBARRAS_CAIXA=box_barcode, QTDMULTIPLA_CAIXA=box_qty,
+    )
+
+
+class SqliteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.multiple(sync_db2, DATABASE_PATH=os.path.join(self.tmp.name, 'database.db'), QUIET=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self):
+        conn = sqlite3.connect(sync_db2.DATABASE_PATH)
+        self.addCleanup(conn.close)
+        return conn
+
+
+class MigrationRunnerTest(SqliteTestCase):
+    def test_fresh_database_gets_every_migration(self):
+        self.assertTrue(sync_db2.inicializar_sqlite())
+        conn = self.connect()
+        self.assertEqual(sync_db2.versao_schema(conn), len(sync_db2.MIGRACOES))
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({'orders', 'order_items', 'work_units', 'sync_state', 'product_barcodes', 'scan_receipts'} <= tables)
+
+    def test_baseline_migration_has_only_the_original_schema(self):
+        conn = self.connect()
+        sync_db2.migracao_schema_inicial(conn.cursor())
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(orders)")]
+        self.assertNotIn('row_version', columns)
+        self.assertIsNone(conn.execute("SELECT name FROM sqlite_master WHERE name = 'product_barcodes'").fetchone())
+
+    def test_up_to_date_database_runs_nothing(self):
+        sync_db2.inicializar_sqlite()
+        spies = [mock.Mock() for _ in sync_db2.MIGRACOES]
+        with mock.patch.object(sync_db2, 'MIGRACOES', spies):
+            self.assertTrue(sync_db2.inicializar_sqlite())
+        for spy in spies:
+            spy.assert_not_called()
+
+    def test_only_pending_migrations_run(self):
+        conn = self.connect()
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        spies = [mock.Mock(), mock.Mock(), mock.Mock()]
+        with mock.patch.object(sync_db2, 'MIGRACOES', spies):
+            self.assertTrue(sync_db2.inicializar_sqlite())
+        spies[0].assert_not_called()
+        spies[1].assert_called_once()
+        spies[2].assert_called_once()
+        self.assertEqual(sync_db2.versao_schema(conn), 3)
+
+    def test_failed_migration_rolls_back_the_whole_upgrade(self):
+        def creates_table(cursor):
+            cursor.execute("CREATE TABLE parcial (id INTEGER)")
+
+        def fails(cursor):
+            raise RuntimeError("migração quebrada")
+
+        with mock.patch.object(sync_db2, 'MIGRACOES', [creates_table, fails]), \
+                contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(sync_db2.inicializar_sqlite())
+        conn = self.connect()
+        self.assertEqual(sync_db2.versao_schema(conn), 0)
+        self.assertIsNone(conn.execute("SELECT name FROM sqlite_master WHERE name = 'parcial'").fetchone())
+
+    def test_duplicate_erp_order_ids_abort_the_migration(self):
+        # Table created by the server without the UNIQUE constraint
+        conn = self.connect()
+        conn.execute("CREATE TABLE orders (id TEXT PRIMARY KEY, erp_order_id TEXT NOT NULL)")
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [('a', '100'), ('b', '100'), ('c', '200')])
+        conn.commit()
+
+        with self.assertRaisesRegex(RuntimeError, r"orders\.erp_order_id .*100 \(2x\)"):
+            sync_db2.exigir_valores_unicos(conn.cursor(), 'orders', 'erp_order_id')
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(sync_db2.inicializar_sqlite())
+        self.assertEqual(sync_db2.versao_schema(conn), 0)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0], 3)
+
+    def test_sync_stops_when_the_schema_is_not_migrated(self):
+        with mock.patch.object(sync_db2, 'inicializar_sqlite', return_value=False), \
+                mock.patch.object(sync_db2, 'sincronizar') as sincronizar, \
+                mock.patch.object(sys, 'argv', ['sync_db2.py']):
+            with self.assertRaises(SystemExit) as exit:
+                sync_db2.main()
+        self.assertEqual(exit.exception.code, 1)
+        sincronizar.assert_not_called()
+
+
+class SyncTestCase(SqliteTestCase):
+    """Migrated database plus sync_orcamentos + transform_data over fixed rows."""
+
+    def setUp(self):
+        super().setUp()
+        self.assertTrue(sync_db2.inicializar_sqlite())
+
+    def sync(self, rows):
+        with mock.patch.object(sync_db2, 'executar_sql_db2', return_value=[dict(r) for r in rows]), \
+                contextlib.redirect_stdout(io.StringIO()):
+            conn = sqlite3.connect(sync_db2.DATABASE_PATH)
+            try:
+                sync_db2.sync_orcamentos(None, conn)
+                sync_db2.transform_data(conn)
+            finally:
+                conn.close()
+
+    def barcodes(self):
+        conn = self.connect()
+        return {code: (kind, mult) for code, kind, mult in
+                conn.execute("SELECT code, kind, multiplier FROM product_barcodes")}
+
+
+class BarcodeIndexTest(SyncTestCase):
+    def test_unit_and_box_codes_are_indexed(self):
+        self.sync([cache_row(100, 10, barcode='789001', box_barcode='1789001', box_qty=12000)])
+        self.assertEqual(self.barcodes(), {'789001': ('unit', 1.0), '1789001': ('box', 12.0)})
+
+    def test_box_below_one_unit_is_rejected(self):
+        self.sync([cache_row(100, 10, barcode='789001', box_barcode='1789001', box_qty=12)])
+        self.assertEqual(self.barcodes(), {'789001': ('unit', 1.0)})
+
+    def test_unit_code_wins_over_the_same_box_code(self):
+        codes, rejected = {}, {}
+        sync_db2.coletar_codigos_barras(codes, 'p1', '789001', '789001', 12000, rejected)
+        self.assertEqual(codes, {'789001': ('p1', 'unit', 1.0)})
+        self.assertEqual(rejected, {})
+
+    def test_code_retired_in_the_erp_is_removed(self):
+        self.sync([cache_row(100, 10, barcode='789001', box_barcode='1789001', box_qty=12000)])
+        self.sync([cache_row(100, 10, barcode='789001')])
+        self.assertEqual(self.barcodes(), {'789001': ('unit', 1.0)})
+
+
+
+class RowVersionTest(SyncTestCase):
+    ROWS = [
+        cache_row(100, 10, seq=1, pickup_point=1),
+        cache_row(100, 11, seq=2, pickup_point=2, barcode='7890000000002'),
+        cache_row(200, 10, seq=1, pickup_point=1),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.sync(self.ROWS)
+
+    def snapshot(self):
+        conn = self.connect()
+        return {
+            'version': conn.execute("SELECT version FROM change_version").fetchone()[0],
+            'orders': conn.execute(
+                "SELECT erp_order_id, row_version, updated_at, pickup_points FROM orders ORDER BY erp_order_id").fetchall(),
+            'items': conn.execute("SELECT id, row_version FROM order_items ORDER BY id").fetchall(),
+        }
+
+    def items_changed_since(self, conn, since):
+        return {r[0] for r in conn.execute("SELECT id FROM order_items WHERE row_version > ?", (since,))}
+
+    def test_unchanged_sync_does_not_bump_versions(self):
+        before = self.snapshot()
+        self.sync(self.ROWS)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_changed_order_bumps_only_that_order(self):
+        before = {o[0]: o[1] for o in self.snapshot()['orders']}
+        rows = [dict(r) for r in self.ROWS]
+        rows[2]['VALTOTLIQUIDO'] = 2500
+        self.sync(rows)
+        after = {o[0]: o[1] for o in self.snapshot()['orders']}
+        self.assertEqual(after['100'], before['100'])
+        self.assertGreater(after['200'], before['200'])
+
+    def test_authorized_exception_shows_up_since_the_last_version(self):
+        conn = self.connect()
+        item, other = [r[0] for r in conn.execute("SELECT id FROM order_items ORDER BY id LIMIT 2")]
+        conn.execute("""
+            INSERT INTO exceptions (id, work_unit_id, order_item_id, type, quantity, reported_by)
+            VALUES ('e1', 'wu1', ?, 'nao_encontrado', 1, 'u1')
+        """, (item,))
+        conn.commit()
+        since = conn.execute("SELECT version FROM change_version").fetchone()[0]
+
+        conn.execute("UPDATE exceptions SET authorized_by = 'u2', authorized_at = '2026-01-01T00:00:00Z' WHERE id = 'e1'")
+        conn.commit()
+        self.assertEqual(self.items_changed_since(conn, since), {item})
+
+        # Moving the exception to another item versions both
+        since = conn.execute("SELECT version FROM change_version").fetchone()[0]
+        conn.execute("UPDATE exceptions SET order_item_id = ? WHERE id = 'e1'", (other,))
+        conn.commit()
+        self.assertEqual(self.items_changed_since(conn, since), {item, other})
+
+
+
+class PickupPointHealTest(SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sync(RowVersionTest.ROWS)
+
+    def pickup_points(self):
+        conn = self.connect()
+        return dict(conn.execute("SELECT erp_order_id, pickup_points FROM orders ORDER BY erp_order_id"))
+
+    def test_orders_get_the_pickup_points_of_their_items(self):
+        self.assertEqual(self.pickup_points(), {'100': '[1,2]', '200': '[1]'})
+
+    def test_unchanged_sync_heals_nothing(self):
+        healed = []
+        heal = sync_db2.curar_pickup_points
+
+        def spy(*args, **kwargs):
+            healed.append(heal(*args, **kwargs))
+            return healed[-1]
+
+        with mock.patch.object(sync_db2, 'curar_pickup_points', side_effect=spy):
+            self.sync(RowVersionTest.ROWS)
+        self.assertEqual(healed, [0])
+
+    def test_only_orders_with_new_items_are_healed(self):
+        rows = RowVersionTest.ROWS + [cache_row(200, 11, seq=2, pickup_point=2, barcode='7890000000002')]
+        with mock.patch.object(sync_db2, 'curar_pickup_points', wraps=sync_db2.curar_pickup_points) as heal:
+            self.sync(rows)
+        conn = self.connect()
+        order = conn.execute("SELECT id FROM orders WHERE erp_order_id = '200'").fetchone()[0]
+        self.assertEqual(heal.call_args.args[1], [order])
+        self.assertEqual(self.pickup_points(), {'100': '[1,2]', '200': '[1,2]'})
+
+
+class ProductBarcodeTest(SyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sync(RowVersionTest.ROWS)
+
+    def products(self):
+        conn = self.connect()
+        return {code: (barcode, box) for code, barcode, box in
+                conn.execute("SELECT erp_code, barcode, box_barcode FROM products")}
+
+    def sync_spying(self, rows):
+        with mock.patch.object(sync_db2, 'atualizar_codigos_barras_produtos',
+                               wraps=sync_db2.atualizar_codigos_barras_produtos) as update:
+            self.sync(rows)
+        return update.call_args.args[1]
+
+    def test_unchanged_sync_updates_no_product(self):
+        self.assertEqual(self.sync_spying(RowVersionTest.ROWS), [])
+
+    def test_only_products_with_a_changed_code_are_updated(self):
+        rows = [dict(r) for r in RowVersionTest.ROWS]
+        rows[1]['CODBARRAS'] = ' 7890000000099 '
+        self.assertEqual(self.sync_spying(rows), ['11'])
+        self.assertEqual(self.products()['11'], ('7890000000099', None))
+        self.assertEqual(self.products()['10'], ('7890000000001', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+/// <reference types="vitest/config" />
 import { defineConfig } from "vite";
 import react from "@vitejs/plugin-react";
 import path from "path";
@@ -37,4 +38,9 @@ export default defineConfig({
       deny: ["**/.*"],
     },
   },
+  // root aponta para client/: os testes do servidor ficam fora dele; *.spec.ts é do Playwright
+  test: {
+    dir: import.meta.dirname,
+    include: ["**/*.test.ts"],
+  },
 });